@@ -1,18 +1,24 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import base64
+import binascii
 import json
 import logging
 import os
 import re
+import zlib
 from collections import deque
+from datetime import datetime
 from functools import wraps
 
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Response, current_app, request, jsonify, make_response, stream_with_context
+from flask import json as flask_json
 from flask_compress import Compress
 from flask_cors import CORS
 from flask_restplus import Model, Api as RestPlusAPI
-from flask_restplus import Resource
+from flask_restplus import Resource, inputs
+from sqlalchemy import and_, or_, asc, desc, false
 from flexget import manager
 from flexget.config_schema import process_config
 from flexget.utils.database import with_session
@@ -204,7 +210,7 @@ class API(RestPlusAPI):
             pass
         return super(API, self).response(code_or_apierror, description, model=model, **kwargs)
 
-    def pagination_parser(self, parser=None, sort_choices=None, default=None, add_sort=None):
+    def pagination_parser(self, parser=None, sort_choices=None, default=None, add_sort=None, cursor=False):
         """
         Return a standardized pagination parser, to be used for any endpoint that has pagination.
 
@@ -212,12 +218,20 @@ class API(RestPlusAPI):
         :param tuple sort_choices: A tuple of strings, to be used as server side attribute searches
         :param str default: The default sort string, used `sort_choices[0]` if not given
         :param bool add_sort: Add sort order choices without adding specific sort choices
+        :param bool cursor: Add the arguments of cursor pagination, see :func:`cursor_response`
 
         :return: An api.parser() instance with pagination and sorting arguments.
         """
         pagination = parser.copy() if parser else self.parser()
         pagination.add_argument('page', type=int, default=1, help='Page number')
         pagination.add_argument('per_page', type=int, default=50, help='Results per page')
+        if cursor:
+            pagination.add_argument('after', help='Page through results with cursors instead of page numbers, which '
+                                                  'stays fast for deep pages. Leave empty for the first page, the '
+                                                  'cursor of the next one is in the `Link` header.')
+            pagination.add_argument('count', type=inputs.boolean, default=True,
+                                    help='Include the `Total-Count` header with cursors. Disable to skip counting '
+                                         'big collections.')
         if sort_choices or add_sort:
             pagination.add_argument('order', choices=('desc', 'asc'), default='desc', help='Sorting order')
         if sort_choices:
@@ -232,8 +246,48 @@ api_app.config['REMEMBER_COOKIE_NAME'] = 'flexget.token'
 api_app.config['DEBUG'] = True
 api_app.config['ERROR_404_HELP'] = False
 
+
+def gzip_stream(chunks, level):
+    """Compresses the `chunks` of a streamed response as they are produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+class StreamingCompress(Compress):
+    """Compresses streamed responses on the fly, :class:`Compress` would read them whole into memory first."""
+
+    def after_request(self, response):
+        if not response.is_streamed:
+            return super(StreamingCompress, self).after_request(response)
+        app = self.app or current_app
+        if (response.mimetype not in app.config['COMPRESS_MIMETYPES'] or
+                'gzip' not in request.headers.get('Accept-Encoding', '').lower() or
+                not 200 <= response.status_code < 300 or
+                'Content-Encoding' in response.headers):
+            return response
+        response.response = gzip_stream(response.response, app.config['COMPRESS_LEVEL'])
+        response.headers['Content-Encoding'] = 'gzip'
+        vary = response.headers.get('Vary')
+        if vary:
+            if 'accept-encoding' not in vary.lower():
+                response.headers['Vary'] = '{}, Accept-Encoding'.format(vary)
+        else:
+            response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+
 CORS(api_app)
-Compress(api_app)
+StreamingCompress(api_app)
 
 api = API(
     api_app,
@@ -399,6 +453,9 @@ def etag(f):
         assert request.method in ['HEAD', 'GET'], '@etag is only supported for GET requests'
         rv = f(*args, **kwargs)
         rv = make_response(rv)
+        if rv.is_streamed:
+            # The body is only produced while being sent
+            return rv
 
         # Some headers can change without data change for specific page
         content_headers = rv.headers.get('link', '') + rv.headers.get('count', '') + rv.headers.get('total-count', '')
@@ -423,32 +480,36 @@ def etag(f):
     return wrapped
 
 
-def pagination_headers(total_pages, total_items, page_count, request):
-    """
-    Creates the `Link`. 'Count' and  'Total-Count' headers, to be used for pagination traversing
-
-    :param total_pages: Total number of pages
-    :param total_items: Total number of items in all the pages
-    :param page_count: Item count for page (may differ from page size request)
-    :param request: The flask request used, required to build other reoccurring vars like url and such.
-    :return:
-    """
-
-    # Build constant variables from request data
+def _link_template(request, param):
+    """Template of a `Link` header entry, repeating the original query string with another value for `param`."""
     url = request.url_root + request.path.lstrip('/')
     per_page = request.args.get('per_page', 50)
-    page = int(request.args.get('page', 1))
 
     # Build the base template
     LINKTEMPLATE = '<{}?per_page={}&'.format(url, per_page)
 
-    # Removed page and per_page from query string
+    # Removed page, per_page and after from query string
     query_string = re.sub(b'per_page=\d+', b'', request.query_string)
     query_string = re.sub(b'page=\d+', b'', query_string)
+    query_string = re.sub(b'(^|&)after=[^&]*', b'', query_string)
     query_string = re.sub(b'&{2,}', b'&', query_string)
 
     # Add all original query params
-    LINKTEMPLATE += query_string.decode().lstrip('&') + '&page={}>; rel="{}"'
+    return LINKTEMPLATE + query_string.decode().lstrip('&') + '&' + param + '={}>; rel="{}"'
+
+
+def pagination_headers(total_pages, total_items, page_count, request):
+    """
+    Creates the `Link`. 'Count' and  'Total-Count' headers, to be used for pagination traversing
+
+    :param total_pages: Total number of pages
+    :param total_items: Total number of items in all the pages
+    :param page_count: Item count for page (may differ from page size request)
+    :param request: The flask request used, required to build other reoccurring vars like url and such.
+    :return:
+    """
+    page = int(request.args.get('page', 1))
+    LINKTEMPLATE = _link_template(request, 'page')
 
     link_string = ''
 
@@ -463,3 +524,114 @@ def pagination_headers(total_pages, total_items, page_count, request):
         'Total-Count': total_items,
         'Count': page_count
     }
+
+
+def cursor_pagination_headers(next_cursor, total_items, page_count, request):
+    """
+    Creates the `Link`, 'Count' and 'Total-Count' headers of cursor pagination.
+
+    :param next_cursor: Cursor of the next page, None on the last one
+    :param total_items: Total number of items, None to leave out 'Total-Count'
+    :param page_count: Item count for page
+    :param request: The flask request used
+    """
+    LINKTEMPLATE = _link_template(request, 'after')
+    link_string = LINKTEMPLATE.format('', 'first')
+    if next_cursor:
+        link_string += ', ' + LINKTEMPLATE.format(next_cursor, 'next')
+    headers = {
+        'Link': link_string,
+        'Count': page_count
+    }
+    if total_items is not None:
+        headers['Total-Count'] = total_items
+    return headers
+
+
+CURSOR_DATETIME_FMT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def encode_cursor(value, item_id):
+    """Opaque cursor for the position of the item with `item_id`, whose sort column has `value`."""
+    if isinstance(value, datetime):
+        value = {'datetime': value.strftime(CURSOR_DATETIME_FMT)}
+    data = json.dumps([value, item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    :return: Tuple of sort column value and item id encoded in `cursor`
+    :raises BadRequest: If the cursor is invalid
+    """
+    try:
+        data = base64.urlsafe_b64decode((cursor + '=' * (-len(cursor) % 4)).encode('ascii'))
+        value, item_id = json.loads(data.decode('utf-8'))
+        if isinstance(value, dict):
+            value = datetime.strptime(value['datetime'], CURSOR_DATETIME_FMT)
+    except (binascii.Error, TypeError, ValueError, KeyError):
+        raise BadRequest('invalid cursor %s' % cursor)
+    return value, item_id
+
+
+def items_after(order_column, id_column, value, item_id, descending=False):
+    """
+    Condition selecting the rows which come after the row (`value`, `item_id`), when ordered by `order_column` and
+    then `id_column`. NULL values come before all others, as SQLite sorts them.
+    """
+    if descending:
+        if value is None:
+            return and_(order_column == None, id_column < item_id)
+        return or_(order_column < value, and_(order_column == value, id_column < item_id), order_column == None)
+    if value is None:
+        return or_(order_column != None, id_column > item_id)
+    return or_(order_column > value, and_(order_column == value, id_column > item_id))
+
+
+def stream_json(query, serialize):
+    """
+    Yields the results of `query` as a JSON array, item by item.
+
+    The query runs in a session of its own, the session of the request is closed once the response body is sent.
+    """
+    with manager.Session() as session:
+        yield '['
+        for index, item in enumerate(query.with_session(session)):
+            yield (',' if index else '') + flask_json.dumps(serialize(item))
+        yield ']'
+
+
+def cursor_response(query, order_column, id_column, descending, after, per_page, count=True, serialize=None):
+    """
+    Responds with the page of `query` following the cursor `after`, streamed as a JSON array.
+
+    Pages are found with a condition on the sort column (keyset pagination), instead of an offset which gets slower the
+    deeper the page is. The item id breaks ties between equal values of the sort column.
+
+    :param query: Query for all items, its order is replaced
+    :param order_column: Column to sort by
+    :param id_column: Primary key column
+    :param bool descending: Sort order
+    :param after: Cursor from the previous page, empty for the first one
+    :param int per_page: Items in the page
+    :param bool count: Count all items for the 'Total-Count' header
+    :param serialize: Function converting an item to a JSON serializable object, `item.to_dict()` by default
+    """
+    total_items = query.order_by(None).count() if count else None
+    order = desc if descending else asc
+    ordered = query.order_by(None).order_by(order(order_column), order(id_column))
+    page = ordered
+    if after:
+        value, item_id = decode_cursor(after)
+        page = page.filter(items_after(order_column, id_column, value, item_id, descending))
+    # Only the keys are loaded here, the items themselves while the response is sent
+    keys = page.with_entities(order_column, id_column).limit(per_page + 1).all()
+    next_cursor = encode_cursor(*keys[per_page - 1]) if len(keys) > per_page else None
+    # Items are streamed by the ids of the page, rows added meanwhile must not push keyed rows out of the page
+    ids = [item_id for _, item_id in keys[:per_page]]
+    items = ordered.filter(id_column.in_(ids) if ids else false())
+
+    rsp = Response(stream_with_context(stream_json(items, serialize or (lambda item: item.to_dict()))),
+                   mimetype='application/json')
+    rsp.headers.extend(cursor_pagination_headers(next_cursor, total_items, min(len(keys), per_page), request))
+    return rsp
@@ -67,6 +67,20 @@ class ObjectsContainer(object):
         }
     }
 
+    executor_object = {
+        'type': 'object',
+        'properties': {
+            'workers': {'type': 'integer'},
+            'active': {'type': 'integer'},
+            'max_active': {'type': 'integer'},
+            'queued': {'type': 'integer'},
+            'submitted': {'type': 'integer'},
+            'completed': {'type': 'integer'},
+            'failed': {'type': 'integer'},
+            'cancelled': {'type': 'integer'},
+        }
+    }
+
     dump_threads_object = {
         'type': 'object',
         'properties': {
@@ -94,6 +108,7 @@ pid_schema = api.schema('server.pid', ObjectsContainer.pid_object)
 raw_config_schema = api.schema('raw_config', ObjectsContainer.raw_config_object)
 version_schema = api.schema('server.version', ObjectsContainer.version_object)
 dump_threads_schema = api.schema('server.dump_threads', ObjectsContainer.dump_threads_object)
+executor_schema = api.schema('server.executor', ObjectsContainer.executor_object)
 
 
 @server_api.route('/reload/')
@@ -231,6 +246,14 @@ class ServerVersionAPI(APIResource):
                         'latest_version': latest})
 
 
+@server_api.route('/executor/')
+class ServerExecutorAPI(APIResource):
+    @api.response(200, description='Thread pool statistics', model=executor_schema)
+    def get(self, session=None):
+        """ Statistics of the thread pool shared by tasks """
+        return jsonify(self.manager.executor.metrics())
+
+
 @server_api.route('/dump_threads/', doc=False)
 class ServerDumpThreads(APIResource):
     @api.response(200, description='Flexget threads dump', model=dump_threads_schema)
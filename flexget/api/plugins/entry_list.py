@@ -11,7 +11,7 @@ from sqlalchemy.orm.exc import NoResultFound
 import flexget.plugins.list.entry_list as el
 from flexget.api import api, APIResource
 from flexget.api.app import NotFoundError, base_message_schema, success_response, etag, pagination_headers, \
-    Conflict
+    Conflict, cursor_response
 
 log = logging.getLogger('entry_list')
 
@@ -133,7 +133,7 @@ entry_lists_entries_return_schema = api.schema('entry_lists_entries_return_schem
                                                ObjectsContainer.entry_lists_entries_return_object)
 
 sort_choices = ('id', 'added', 'title', 'original_url', 'list_id')
-entries_parser = api.pagination_parser(sort_choices=sort_choices, default='title')
+entries_parser = api.pagination_parser(sort_choices=sort_choices, default='title', cursor=True)
 
 
 @entry_list_api.route('/<int:list_id>/entries/')
@@ -161,9 +161,15 @@ class EntryListEntriesAPI(APIResource):
         if per_page > 100:
             per_page = 100
 
+        descending = sort_order == 'desc'
+
+        if args['after'] is not None:
+            query = session.query(el.EntryListEntry).filter(el.EntryListEntry.list_id == list_id)
+            return cursor_response(query, getattr(el.EntryListEntry, sort_by), el.EntryListEntry.id, descending,
+                                   args['after'], per_page, count=args['count'])
+
         start = per_page * (page - 1)
         stop = start + per_page
-        descending = sort_order == 'desc'
 
         kwargs = {
             'start': start,
@@ -8,7 +8,8 @@ from flask import jsonify, request
 from sqlalchemy.orm.exc import NoResultFound
 
 from flexget.api import api, APIResource
-from flexget.api.app import base_message_schema, success_response, NotFoundError, etag, pagination_headers
+from flexget.api.app import base_message_schema, success_response, NotFoundError, etag, pagination_headers, \
+    cursor_response
 from flexget.plugins.filter.retry_failed import FailedEntry, get_failures
 
 log = logging.getLogger('failed_api')
@@ -38,7 +39,7 @@ retry_failed_entry_schema = api.schema('retry_failed_entry_schema', ObjectsConta
 retry_entries_list_schema = api.schema('retry_entries_list_schema', ObjectsContainer.retry_entries_list_object)
 
 sort_choices = ('failure_time', 'id', 'title', 'url', 'reason', 'count', 'retry_time')
-failed_parser = api.pagination_parser(sort_choices=sort_choices)
+failed_parser = api.pagination_parser(sort_choices=sort_choices, cursor=True)
 
 
 @retry_failed_api.route('/')
@@ -70,6 +71,10 @@ class RetryFailed(APIResource):
         if per_page > 100:
             per_page = 100
 
+        if args['after'] is not None:
+            return cursor_response(session.query(FailedEntry), getattr(FailedEntry, sort_by), FailedEntry.id,
+                                   descending, args['after'], per_page, count=args['count'])
+
         start = per_page * (page - 1)
         stop = start + per_page
 
@@ -8,7 +8,7 @@ from flask import jsonify, request
 from sqlalchemy import desc, asc
 
 from flexget.api import api, APIResource
-from flexget.api.app import BadRequest, etag, pagination_headers, NotFoundError
+from flexget.api.app import BadRequest, etag, pagination_headers, NotFoundError, cursor_response
 from flexget.plugins.output.history import History
 
 log = logging.getLogger('history')
@@ -40,7 +40,7 @@ history_list_schema = api.schema('history.list', ObjectsContainer.history_list_o
 sort_choices = ('id', 'task', 'filename', 'url', 'title', 'time', 'details')
 
 # Create pagination parser
-history_parser = api.pagination_parser(sort_choices=sort_choices, default='time')
+history_parser = api.pagination_parser(sort_choices=sort_choices, default='time', cursor=True)
 history_parser.add_argument('task', help='Filter by task name')
 
 
@@ -72,6 +72,10 @@ class HistoryAPI(APIResource):
         if task:
             query = query.filter(History.task == task)
 
+        if args['after'] is not None:
+            return cursor_response(query, getattr(History, sort_by), History.id, sort_order == 'desc', args['after'],
+                                   per_page, count=args['count'])
+
         total_items = query.count()
 
         if not total_items:
@@ -40,8 +40,40 @@ class ObjectsContainer(object):
 
     return_response = {'type': 'array', 'items': connection}
 
+    histogram_object = {
+        'type': 'object',
+        'properties': {
+            'buckets': {
+                'type': 'array', 'items': {
+                    'type': 'object',
+                    'properties': {
+                        'le': {'type': ['number', 'null']},
+                        'count': {'type': 'integer'}
+                    }
+                }
+            },
+            'count': {'type': 'integer'},
+            'sum': {'type': 'number'},
+            'max': {'type': ['number', 'null']}
+        }
+    }
+
+    hot_tasks_object = {
+        'type': 'object',
+        'properties': {
+            'alive': {'type': 'boolean'},
+            'queued': {'type': 'integer'},
+            'kept': {'type': 'array', 'items': {'type': 'string'}},
+            'latency': {
+                'type': 'object',
+                'additionalProperties': histogram_object
+            }
+        }
+    }
+
 
 return_schema = api.schema('irc.connections', ObjectsContainer.return_response)
+hot_tasks_schema = api.schema('irc.hot_tasks', ObjectsContainer.hot_tasks_object)
 
 
 @irc_api.route('/connections/')
@@ -122,3 +154,15 @@ class IRCStop(APIResource):
         except KeyError:
             raise NotFoundError('Connection {} is not a valid IRC connection'.format(name))
         return success_response('Successfully stopped connection(s)')
+
+
+@irc_api.route('/hot_tasks/')
+class IRCHotTasks(APIResource):
+    @api.response(200, model=hot_tasks_schema)
+    @api.response(BadRequest)
+    def get(self, session=None):
+        """Status of the hot task lane and announce to output latency of its tasks"""
+        from flexget.plugins.daemon.hot_tasks import hot_tasks
+        if hot_tasks is None:
+            raise BadRequest('No hot tasks have been run')
+        return jsonify(hot_tasks.status())
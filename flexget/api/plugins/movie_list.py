@@ -11,7 +11,7 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from flexget.api import api, APIResource
 from flexget.api.app import Conflict, NotFoundError, base_message_schema, success_response, BadRequest, etag, \
-    pagination_headers
+    pagination_headers, cursor_response
 from flexget.plugins.list import movie_list as ml
 from flexget.plugins.list.movie_list import MovieListBase
 
@@ -161,7 +161,7 @@ class MovieListListAPI(APIResource):
 movie_identifiers_doc = "Use movie identifier using the following format:\n[{'ID_NAME: 'ID_VALUE'}]."
 
 sort_choices = ('id', 'added', 'title', 'year')
-movies_parser = api.pagination_parser(sort_choices=sort_choices, default='title')
+movies_parser = api.pagination_parser(sort_choices=sort_choices, default='title', cursor=True)
 
 
 @movie_list_api.route('/<int:list_id>/movies/')
@@ -197,6 +197,11 @@ class MovieListMoviesAPI(APIResource):
         except NoResultFound:
             raise NotFoundError('list_id %d does not exist' % list_id)
 
+        if args['after'] is not None:
+            query = session.query(ml.MovieListMovie).filter(ml.MovieListMovie.list_id == list_id)
+            return cursor_response(query, getattr(ml.MovieListMovie, sort_by), ml.MovieListMovie.id, descending,
+                                   args['after'], per_page, count=args['count'])
+
         total_items = list.movies.count()
 
         if not total_items:
@@ -9,7 +9,8 @@ from flask import jsonify, request
 from flask_restplus import inputs
 
 from flexget.api import api, APIResource
-from flexget.api.app import NotFoundError, base_message_schema, success_response, etag, pagination_headers
+from flexget.api.app import NotFoundError, base_message_schema, success_response, etag, pagination_headers, \
+    cursor_response
 from flexget.plugins.filter import seen
 
 seen_api = api.namespace('seen', description='Managed Flexget seen entries and fields')
@@ -52,7 +53,7 @@ seen_base_parser.add_argument('local', type=inputs.boolean, default=None,
                               help='Filter results by seen locality.')
 
 sort_choices = ('title', 'task', 'added', 'local', 'reason', 'id')
-seen_search_parser = api.pagination_parser(seen_base_parser, sort_choices)
+seen_search_parser = api.pagination_parser(seen_base_parser, sort_choices, cursor=True)
 
 
 @seen_api.route('/')
@@ -86,6 +87,11 @@ class SeenSearchAPI(APIResource):
             value = unquote(value)
             value = '%{0}%'.format(value)
 
+        if args['after'] is not None:
+            query = seen.search(value=value, status=local, session=session)
+            return cursor_response(query, getattr(seen.SeenEntry, sort_by), seen.SeenEntry.id, descending,
+                                   args['after'], per_page, count=args['count'])
+
         start = per_page * (page - 1)
         stop = start + per_page
 
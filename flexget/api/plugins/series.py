@@ -11,7 +11,7 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from flexget.api import api, APIClient, APIResource
 from flexget.api.app import NotFoundError, Conflict, BadRequest, base_message_schema, success_response, etag, \
-    pagination_headers
+    pagination_headers, cursor_response
 from flexget.event import fire_event
 from flexget.plugin import PluginError
 from flexget.plugins.filter import series
@@ -32,13 +32,21 @@ def series_details(show, begin=False, latest=False):
     if begin:
         series_dict['begin_episode'] = show.begin.to_dict() if show.begin else None
     if latest:
-        latest_ep = series.get_latest_release(show)
+        latest_ep = show.summary.latest_episode if show.summary else series.get_latest_release(show)
         series_dict['latest_episode'] = latest_ep.to_dict() if latest_ep else None
         if latest_ep:
             series_dict['latest_episode']['latest_release'] = latest_ep.latest_release.to_dict()
     return series_dict
 
 
+def add_lookups(series_dict, endpoints, api_client):
+    """Adds the results of the lookup API `endpoints` for the show to `series_dict`."""
+    series_dict.setdefault('lookup', {})
+    for endpoint in endpoints:
+        url = '/%s/series/%s/' % (endpoint, series_dict['name'])
+        series_dict['lookup'][endpoint] = api_client.get_endpoint(url)
+
+
 class ObjectsContainer(object):
     release_object = {
         'type': 'object',
@@ -135,7 +143,7 @@ base_series_parser.add_argument('latest', type=inputs.boolean, default=True,
                                 help='Show series latest downloaded episode and release')
 
 sort_choices = ('show_name', 'last_download_date')
-series_list_parser = api.pagination_parser(base_series_parser, sort_choices=sort_choices)
+series_list_parser = api.pagination_parser(base_series_parser, sort_choices=sort_choices, cursor=True)
 series_list_parser.add_argument('in_config', choices=('configured', 'unconfigured', 'all'), default='configured',
                                 help="Filter list if shows are currently in configuration.")
 series_list_parser.add_argument('premieres', type=inputs.boolean, default=False,
@@ -182,6 +190,24 @@ class SeriesAPI(APIResource):
         begin = args.get('begin')
         latest = args.get('latest')
 
+        if args['after'] is not None:
+            query = series.get_series_summary(configured=configured, premieres=premieres, status=status, days=days,
+                                              session=session)
+            if sort_by == 'show_name':
+                order_column = series.Series._name_normalized
+            else:
+                order_column = series.SeriesSummary.last_seen
+            api_client = APIClient() if lookup else None
+
+            def serialize(show):
+                series_object = series_details(show, begin, latest)
+                if lookup:
+                    add_lookups(series_object, lookup, api_client)
+                return series_object
+
+            return cursor_response(query, order_column, series.Series.id, descending, args['after'], per_page,
+                                   count=args['count'], serialize=serialize)
+
         start = per_page * (page - 1)
         stop = start + per_page
 
@@ -219,14 +245,8 @@ class SeriesAPI(APIResource):
         # Do relevant lookups
         if lookup:
             api_client = APIClient()
-            for endpoint in lookup:
-                base_url = '/%s/series/' % endpoint
-                for show in series_list:
-                    pos = series_list.index(show)
-                    series_list[pos].setdefault('lookup', {})
-                    url = base_url + show['name'] + '/'
-                    result = api_client.get_endpoint(url)
-                    series_list[pos]['lookup'].update({endpoint: result})
+            for series_object in series_list:
+                add_lookups(series_object, lookup, api_client)
 
         # Get pagination headers
         pagination = pagination_headers(total_pages, total_items, actual_size, request)
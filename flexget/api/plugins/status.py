@@ -9,7 +9,8 @@ from flask import jsonify, request
 from flask_restplus import inputs
 from flexget.api.app import NotFoundError, etag, pagination_headers, api, APIResource
 from flexget.api.core.tasks import tasks_api
-from flexget.plugins.operate.status import StatusTask, TaskExecution, get_executions_by_task_id, get_status_tasks
+from flexget.plugins.operate.status import StatusTask, TaskExecution, PluginTiming, get_executions_by_task_id, \
+    get_status_tasks
 from sqlalchemy.orm.exc import NoResultFound
 
 log = logging.getLogger('status_api')
@@ -51,10 +52,32 @@ class ObjectsContainer(object):
 
     task_status_list_schema = {'type': 'array', 'items': task_status_schema}
 
+    plugin_timing_schema = {
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer'},
+            'execution_id': {'type': 'integer'},
+            'phase': {'type': 'string'},
+            'plugin': {'type': 'string'},
+            'calls': {'type': 'integer'},
+            'wall': {'type': 'number'},
+            'cpu': {'type': 'number'},
+            'db_queries': {'type': 'integer'},
+            'http_requests': {'type': 'integer'},
+            'http_bytes': {'type': 'integer'},
+            'entries_in': {'type': 'integer'},
+            'entries_out': {'type': 'integer'}
+        },
+        'additionalProperties': False
+    }
+
+    plugin_timings_list = {'type': 'array', 'items': plugin_timing_schema}
+
 
 task_status = api.schema('tasks.tasks_status', ObjectsContainer.task_status_schema)
 task_status_list = api.schema('tasks.tasks_status_list', ObjectsContainer.task_status_list_schema)
 task_executions = api.schema('tasks.tasks_executions_list', ObjectsContainer.executions_list)
+plugin_timings = api.schema('tasks.plugin_timings_list', ObjectsContainer.plugin_timings_list)
 
 sort_choices = ('last_execution_time', 'name', 'id')
 tasks_parser = api.pagination_parser(sort_choices=sort_choices)
@@ -243,3 +266,23 @@ class TaskStatusExecutionsAPI(APIResource):
         # Add link header to response
         rsp.headers.extend(pagination)
         return rsp
+
+
+@tasks_api.route('/status/<int:task_id>/executions/<int:execution_id>/timings/')
+@status_api.route('/<int:task_id>/executions/<int:execution_id>/timings/')
+@api.doc(params={'task_id': 'ID of the status task', 'execution_id': 'ID of the task execution'})
+class TaskExecutionTimingsAPI(APIResource):
+    @etag
+    @api.response(200, model=plugin_timings)
+    @api.response(NotFoundError)
+    def get(self, task_id, execution_id, session=None):
+        """Get resources used by each plugin in a task execution"""
+        try:
+            execution = session.query(TaskExecution).filter(TaskExecution.task_id == task_id). \
+                filter(TaskExecution.id == execution_id).one()
+        except NoResultFound:
+            raise NotFoundError('execution with id %d not found for task status %d' % (execution_id, task_id))
+
+        timings = session.query(PluginTiming).filter(PluginTiming.execution_id == execution.id). \
+            order_by(PluginTiming.id)
+        return jsonify([timing.to_dict() for timing in timings])
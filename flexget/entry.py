@@ -12,6 +12,11 @@ from flexget.utils.template import render_from_entry
 
 log = logging.getLogger('entry')
 
+HOOK_ACTIONS = ('accept', 'reject', 'fail', 'complete')
+
+# Interned field names, see Entry.__setitem__
+_field_names = {}
+
 
 class EntryUnicodeError(Exception):
     """This exception is thrown when trying to set non-unicode compatible field value to entry."""
@@ -38,12 +43,16 @@ class Entry(LazyDict):
     and trigger :meth:`~flexget.task.Task.abort`.
     """
 
+    # Entries are created in large numbers, keep per instance overhead low. Traces, snapshots and hooks are only
+    # allocated when first used.
+    __slots__ = ('_traces', '_snapshots', '_state', '_hooks', 'task')
+
     def __init__(self, *args, **kwargs):
         super(Entry, self).__init__()
-        self.traces = []
-        self.snapshots = {}
+        self._traces = None
+        self._snapshots = None
         self._state = 'undecided'
-        self._hooks = {'accept': [], 'reject': [], 'fail': [], 'complete': []}
+        self._hooks = None
         self.task = None
 
         if len(args) == 2:
@@ -54,6 +63,47 @@ class Entry(LazyDict):
         # Make sure constructor does not escape our __setitem__ enforcement
         self.update(*args, **kwargs)
 
+    @property
+    def traces(self):
+        if self._traces is None:
+            self._traces = []
+        return self._traces
+
+    @traces.setter
+    def traces(self, value):
+        self._traces = value
+
+    @property
+    def snapshots(self):
+        if self._snapshots is None:
+            self._snapshots = {}
+        return self._snapshots
+
+    @snapshots.setter
+    def snapshots(self, value):
+        self._snapshots = value
+
+    def __getstate__(self):
+        # Same state as entries had before __slots__ was introduced
+        return {
+            'store': self.store,
+            'traces': self._traces or [],
+            'snapshots': self._snapshots or {},
+            '_state': self._state,
+            '_hooks': self._hooks or dict((action, []) for action in HOOK_ACTIONS),
+            'task': self.task
+        }
+
+    def __setstate__(self, state):
+        self.store = state['store']
+        self._state = state.get('_state', 'undecided')
+        self.task = state.get('task')
+        self._traces = state.get('traces') or None
+        self._snapshots = state.get('snapshots') or None
+        self._hooks = state.get('_hooks')
+        if self._hooks and not any(self._hooks.values()):
+            self._hooks = None
+
     def trace(self, message, operation=None, plugin=None):
         """
         Adds trace message to the entry which should contain useful information about why
@@ -76,7 +126,9 @@ class Entry(LazyDict):
         :param action: Name of action to run hooks for
         :param kwargs: Keyword arguments that should be passed to the registered functions
         """
-        for func in self._hooks[action]:
+        if not self._hooks:
+            return
+        for func in self._hooks.get(action, []):
             func(self, **kwargs)
 
     def add_hook(self, action, func, **kwargs):
@@ -88,10 +140,13 @@ class Entry(LazyDict):
         :param kwargs: Keyword arguments that should be passed to ``func``
         :raises: ValueError when given an invalid ``action``
         """
-        try:
-            self._hooks[action].append(functools.partial(func, **kwargs))
-        except KeyError:
+        if action not in HOOK_ACTIONS:
             raise ValueError('`%s` is not a valid entry action' % action)
+        if kwargs:
+            func = functools.partial(func, **kwargs)
+        if self._hooks is None:
+            self._hooks = {}
+        self._hooks.setdefault(action, []).append(func)
 
     def on_accept(self, func, **kwargs):
         """
@@ -216,6 +271,10 @@ class Entry(LazyDict):
         except Exception as e:
             log.debug('trying to debug key `%s` value threw exception: %s' % (key, e))
 
+        # Share one instance of each field name between all entries
+        if isinstance(key, str):
+            key = _field_names.setdefault(key, key)
+
         super(Entry, self).__setitem__(key, value)
 
     def safe_str(self):
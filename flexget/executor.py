@@ -0,0 +1,139 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError, FIRST_COMPLETED, wait
+
+from flexget import logger
+
+log = logging.getLogger('executor')
+
+# Size of the thread pool shared by all tasks
+DEFAULT_WORKERS = 10
+
+
+class Executor(object):
+    """
+    Thread pool owned by the manager, shared by all plugins which need to run blocking work (mostly network I/O)
+    concurrently. Plugins should use it through `Task.executor`, which ties the work to the task.
+
+    Submitted functions log with the logging context of the thread which submitted them, so their messages are
+    attributed to the right task and end up in captured output.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'active': 0, 'max_active': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules ``fn(*args, **kwargs)`` to run in the pool, returns a `concurrent.futures.Future`."""
+        context = logger.get_context()
+        with self._lock:
+            self._stats['submitted'] += 1
+        future = self._pool.submit(self._run, context, fn, args, kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+    def _run(self, context, fn, args, kwargs):
+        with self._lock:
+            self._stats['active'] += 1
+            self._stats['max_active'] = max(self._stats['max_active'], self._stats['active'])
+        try:
+            with logger.use_context(context):
+                return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._stats['active'] -= 1
+
+    def _done(self, future):
+        with self._lock:
+            if future.cancelled():
+                self._stats['cancelled'] += 1
+            elif future.exception() is not None:
+                self._stats['failed'] += 1
+            else:
+                self._stats['completed'] += 1
+
+    def metrics(self):
+        """Returns a dict of pool statistics, counts are since the executor was created."""
+        with self._lock:
+            metrics = dict(self._stats)
+        metrics['workers'] = self.max_workers
+        metrics['queued'] = (metrics['submitted'] - metrics['active'] - metrics['completed'] - metrics['failed'] -
+                             metrics['cancelled'])
+        return metrics
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+class TaskExecutor(object):
+    """
+    The manager's `Executor` as seen by one task, available as `Task.executor`.
+
+    When the task aborts, work which hasn't started yet is cancelled and `cancelled` is set, long running functions
+    may check it to stop early. Work still pending when the task finishes is cancelled as well.
+    """
+
+    def __init__(self, task, executor):
+        self.task = task
+        self.executor = executor
+        self.cancelled = threading.Event()
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedules ``fn(*args, **kwargs)`` to run in the shared pool, returns a `concurrent.futures.Future`.
+
+        :raises CancelledError: If the task has been aborted
+        """
+        if self.cancelled.is_set():
+            raise CancelledError('Task %s has been aborted' % self.task.name)
+        future = self.executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def map(self, fn, *iterables, **kwargs):
+        """
+        Like the builtin `map`, but the calls run concurrently and a list is returned. If a call raises, the calls not
+        started yet are cancelled and the exception is raised, a `TaskAbort` raised by ``task.abort`` in a call
+        aborts the task as usual.
+
+        :param int limit: Maximum number of calls running at the same time, by default the size of the pool
+        """
+        limit = kwargs.pop('limit', None) or self.executor.max_workers
+        futures = []
+        running = set()
+        try:
+            for args in zip(*iterables):
+                if len(running) >= limit:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                future = self.submit(fn, *args)
+                futures.append(future)
+                running.add(future)
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def cancel(self):
+        """Cancels all work of the task which hasn't started yet."""
+        self.cancelled.set()
+        with self._lock:
+            futures = list(self._futures)
+        cancelled = len([future for future in futures if future.cancel()])
+        if cancelled:
+            log.debug('Cancelled %s pending calls of task %s', cancelled, self.task.name)
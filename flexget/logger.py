@@ -46,6 +46,23 @@ def task_logging(task):
         local_context.task = old_task
 
 
+def get_context():
+    """Returns the logging context of the current thread, for passing to `use_context` in another thread."""
+    return dict(local_context.__dict__)
+
+
+@contextlib.contextmanager
+def use_context(context):
+    """Context manager which makes the current thread log with `context`, as returned by `get_context`."""
+    old_context = dict(local_context.__dict__)
+    local_context.__dict__.update(context)
+    try:
+        yield
+    finally:
+        local_context.__dict__.clear()
+        local_context.__dict__.update(old_context)
+
+
 class SessionFilter(logging.Filter):
     def __init__(self, session_id):
         self.session_id = session_id
@@ -35,11 +35,13 @@ Session = sessionmaker(class_=ContextSession)
 
 from flexget import config_schema, db_schema, logger, plugin  # noqa
 from flexget.event import fire_event  # noqa
+from flexget.executor import Executor  # noqa
 from flexget.ipc import IPCClient, IPCServer  # noqa
 from flexget.options import CoreArgumentParser, get_parser, manager_parser, ParserError, unicode_argv  # noqa
 from flexget.task import Task  # noqa
 from flexget.task_queue import TaskQueue  # noqa
-from flexget.utils.tools import pid_exists, get_current_flexget_version  # noqa
+from flexget.utils.file_watcher import FileWatcher  # noqa
+from flexget.utils.tools import get_config_hash, pid_exists, get_current_flexget_version  # noqa
 from flexget.terminal import console  # noqa
 
 log = logging.getLogger('manager')
@@ -120,6 +122,9 @@ class Manager(object):
         self.args = args
         self.autoreload_config = False
         self.config_file_hash = None
+        self.config_watcher = None
+        # Validated config of each task, with the hash of the config it was validated from
+        self._validated_tasks = {}
         self.config_base = None
         self.config_name = None
         self.config_path = None
@@ -132,6 +137,7 @@ class Manager(object):
         self.is_daemon = False
         self.ipc_server = None
         self.task_queue = None
+        self.executor = None
         self.persist = None
         self.initialized = False
 
@@ -193,6 +199,7 @@ class Manager(object):
         self.options = get_parser().parse_args(self.args)
 
         self.task_queue = TaskQueue()
+        self.executor = Executor()
         self.ipc_server = IPCServer(self, self.options.ipc_port)
 
         self.setup_yaml()
@@ -246,15 +253,17 @@ class Manager(object):
             options_namespace.__dict__.update(options)
             options = options_namespace
         task_names = self.tasks
-        # Only reload config if daemon
-        config_hash = self.hash_config()
-        if self.is_daemon and self.autoreload_config and self.config_file_hash != config_hash:
-            log.info('Config change detected. Reloading.')
-            try:
-                self.load_config(output_to_console=False, config_file_hash=config_hash)
-                log.info('Config successfully reloaded!')
-            except Exception as e:
-                log.error('Reloading config failed: %s', e)
+        # Only reload config if daemon, and only read the file when the watcher noticed a change
+        if self.is_daemon and self.autoreload_config and self.config_watcher and self.config_watcher.changed():
+            config_hash = self.hash_config()
+            if self.config_file_hash != config_hash:
+                log.info('Config change detected. Reloading.')
+                try:
+                    self.load_config(output_to_console=False, config_file_hash=config_hash)
+                    log.info('Config successfully reloaded!')
+                except Exception as e:
+                    log.error('Reloading config failed: %s', e)
+                task_names = self.tasks
         # Handle --tasks
         if options.tasks:
             # Consider * the same as not specifying tasks at all (makes sure manual plugin still works)
@@ -413,6 +422,7 @@ class Manager(object):
                 self.daemonize()
             if options.autoreload_config:
                 self.autoreload_config = True
+                self.config_watcher = FileWatcher(self.config_path)
             try:
                 signal.signal(signal.SIGTERM, self._handle_sigterm)
             except ValueError as e:
@@ -682,13 +692,33 @@ class Manager(object):
         if not config:
             config = self.config
         config = fire_event('manager.before_config_validate', config, self)
+        # Tasks which were validated before are not validated again unless their config changed
+        tasks = config.get('tasks')
+        reused, validated = {}, {}
+        if isinstance(tasks, dict):
+            for name, task_config in tasks.items():
+                config_hash = get_config_hash(task_config)
+                cached = self._validated_tasks.get(name)
+                if cached and cached[0] == config_hash:
+                    reused[name] = copy.deepcopy(cached[1])
+                else:
+                    validated[name] = config_hash
+            config['tasks'] = dict((name, tasks[name]) for name in validated)
         errors = config_schema.process_config(config)
+        if isinstance(tasks, dict):
+            config['tasks'].update(reused)
+            tasks.update(config['tasks'])
+            config['tasks'] = tasks
         if errors:
             err = ValueError('Did not pass schema validation.')
             err.errors = errors
             raise err
-        else:
-            return config
+        if isinstance(tasks, dict):
+            log.debug('Validated %s tasks, reused the validated config of %s unchanged tasks', len(validated),
+                      len(reused))
+            self._validated_tasks = dict((name, (validated.get(name) or self._validated_tasks[name][0],
+                                                 copy.deepcopy(tasks[name]))) for name in tasks)
+        return config
 
     def init_sqlalchemy(self):
         """Initialize SQLAlchemy"""
@@ -915,6 +945,10 @@ class Manager(object):
         if self.ipc_server:
             self.ipc_server.shutdown()
         fire_event('manager.shutdown', self)
+        if self.config_watcher:
+            self.config_watcher.stop()
+        if self.executor:
+            self.executor.shutdown()
         if not self.unit_test:  # don't scroll "nosetests" summary results when logging is enabled
             log.debug('Shutting down')
         self.engine.dispose()
@@ -0,0 +1,295 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+from future.moves.http.server import BaseHTTPRequestHandler, HTTPServer
+
+import copy
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+import sqlalchemy
+
+from flexget import options
+from flexget.event import event, add_event_handler, remove_event_handler
+from flexget.manager import Base, Session
+from flexget.task import Task
+from flexget.terminal import TerminalTable, TerminalTableError, table_parser, console
+from flexget.utils import json
+from flexget.utils.instrumentation import PluginTimer
+from flexget.utils.tools import get_current_flexget_version
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+log = logging.getLogger('bench')
+
+SERIES = 20
+QUALITIES = ['720p HDTV x264', '1080p WEB-DL', 'HDTV XviD', '2160p BluRay x265']
+
+# Plugins configured in every benchmark task. Templates are disabled so that plugins configured in the global
+# template of the user's config don't end up in the benchmarks.
+BASE_CONFIG = {'template': 'no_global', 'seen': 'local'}
+
+PIPELINES = OrderedDict([
+    ('seen', {'accept_all': True}),
+    ('filters', {
+        'quality': '720p+',
+        'regexp': {'reject': [r'E\d[05] ']},
+        'if': [{"'1080p' in title or '2160p' in title": 'accept'}],
+    }),
+    ('series', {'series': ['Bench Series %d' % num for num in range(SERIES)]}),
+    ('download', {'accept_all': True, 'download': '__downloads__'}),
+    ('full', {
+        'series': ['Bench Series %d' % num for num in range(SERIES)],
+        'quality': '720p+',
+        'regexp': {'reject': [r'E\d[05] ']},
+        'if': [{"'2160p' in title": 'reject'}],
+        'download': '__downloads__',
+    }),
+    ('generate', {'generate': '__count__', 'regexp': {'accept': ['^[a-m]']}}),
+])
+
+
+def mock_entries(count, url_base):
+    """Series like entries for the `mock` input, spread over `SERIES` series and `QUALITIES`."""
+    entries = []
+    for index in range(count):
+        series, episode = index % SERIES, index // SERIES
+        quality = QUALITIES[episode % len(QUALITIES)]
+        entries.append({
+            'title': 'Bench Series %d S%02dE%02d %s-FlexGet' % (series, episode // 100 + 1, episode % 100 + 1, quality),
+            'url': '%s/%d.bin' % (url_base, index),
+        })
+    return entries
+
+
+class DownloadHandler(BaseHTTPRequestHandler):
+    """Stands in for a tracker, answers every request with a small file."""
+    content = b'\0' * 1024
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(self.content)))
+        self.end_headers()
+        self.wfile.write(self.content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def download_server():
+    """Runs a local http server for the download plugin, yields its base url."""
+    server = HTTPServer(('127.0.0.1', 0), DownloadHandler)
+    thread = threading.Thread(target=server.serve_forever, name='bench_http')
+    thread.daemon = True
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:%s' % server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def temp_database(manager):
+    """Points the manager and sessions to a new SQLite database for the duration of the block."""
+    path = tempfile.mkdtemp(prefix='flexget-bench-')
+    engine = sqlalchemy.create_engine('sqlite:///%s' % os.path.join(path, 'bench.sqlite'),
+                                      connect_args={'check_same_thread': False, 'timeout': 10})
+    Base.metadata.create_all(bind=engine)
+    original_engine = manager.engine
+    manager.engine = engine
+    Session.configure(bind=engine)
+    try:
+        yield path
+    finally:
+        Session.configure(bind=original_engine)
+        manager.engine = original_engine
+        engine.dispose()
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class MemoryTracer(object):
+    """Records memory allocated by each plugin call with tracemalloc."""
+
+    def __init__(self):
+        self.allocated = defaultdict(int)
+        self._before = None
+
+    def before_plugin(self, task, keyword):
+        self._before = tracemalloc.get_traced_memory()[0]
+
+    def after_plugin(self, task, keyword):
+        if self._before is not None:
+            self.allocated[(task.current_phase, keyword)] += tracemalloc.get_traced_memory()[0] - self._before
+            self._before = None
+
+    def __enter__(self):
+        tracemalloc.start()
+        add_event_handler('task.execute.before_plugin', self.before_plugin)
+        add_event_handler('task.execute.after_plugin', self.after_plugin)
+        return self
+
+    def __exit__(self, *args):
+        remove_event_handler('task.execute.before_plugin', self.before_plugin)
+        remove_event_handler('task.execute.after_plugin', self.after_plugin)
+        tracemalloc.stop()
+
+
+def max_rss():
+    """Peak resident memory of the process in kB, 0 when unknown."""
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kB elsewhere
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def task_config(pipeline, count, url_base, path):
+    config = copy.deepcopy(PIPELINES[pipeline])
+    config.update(BASE_CONFIG)
+    if 'generate' in config:
+        config['generate'] = count
+    else:
+        config['mock'] = mock_entries(count, url_base)
+    if 'download' in config:
+        config['download'] = os.path.join(path, 'downloads', pipeline)
+        os.makedirs(config['download'])
+    errors = Task.validate_config(config)
+    if errors:
+        raise ValueError('Invalid benchmark config for %s: %s' % (pipeline, ', '.join(e.message for e in errors)))
+    return config
+
+
+def run_task(manager, name, config, memory=False):
+    """Executes a benchmark task once and returns its results."""
+    task = Task(manager, name, config=config, options={'allow_manual': True, 'tasks': [name]})
+    tracer = MemoryTracer() if memory else None
+    rss = max_rss()
+    start = time.time()
+    if tracer:
+        with tracer:
+            task.execute()
+    else:
+        task.execute()
+    took = time.time() - start
+    phases = OrderedDict()
+    plugins = []
+    for (phase, plugin_name), timing in task.plugin_timings.items():
+        phases[phase] = phases.get(phase, 0) + timing['wall']
+        result = OrderedDict([('phase', phase), ('plugin', plugin_name)])
+        result.update((field, timing[field]) for field in PluginTimer.fields + ('calls',))
+        if tracer:
+            result['allocated'] = tracer.allocated.get((phase, plugin_name), 0)
+        plugins.append(result)
+    return OrderedDict([
+        ('wall', took),
+        ('entries', len(task.all_entries)),
+        ('accepted', len(task.accepted)),
+        ('rejected', len(task.rejected)),
+        ('failed', len(task.failed)),
+        ('aborted', task.aborted),
+        ('max_rss_growth', max_rss() - rss),
+        ('phases', phases),
+        ('plugins', plugins),
+    ])
+
+
+def bench(manager, pipelines=None, count=1000, runs=2, memory=False):
+    """
+    Runs the benchmark `pipelines`, each against a new temporary database. Each pipeline is a task whose input produces
+    `count` entries, executed `runs` times. The first run sees all entries as new, the next ones as seen.
+
+    :return: Dict with the results, as output by `flexget bench --json`
+    """
+    if memory and tracemalloc is None:
+        raise ValueError('Memory tracing needs Python 3.4 or newer')
+    results = OrderedDict([
+        ('flexget', get_current_flexget_version()),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('entries', count),
+        ('pipelines', OrderedDict()),
+    ])
+    with download_server() as url_base:
+        for pipeline in pipelines or list(PIPELINES):
+            # Each pipeline gets an empty database, series history would otherwise leak from one to another
+            with temp_database(manager) as path:
+                config = task_config(pipeline, count, url_base, path)
+                name = 'bench_%s' % pipeline
+                log.verbose('Running benchmark %s with %s entries', pipeline, count)
+                results['pipelines'][pipeline] = [run_task(manager, name, config, memory=memory)
+                                                  for _ in range(runs)]
+    return results
+
+
+def print_results(results, table_type):
+    header = ['Pipeline', 'Run', 'Phase', 'Plugin', 'Wall', 'CPU', 'Queries', 'Entries in', 'Entries out']
+    memory = any('allocated' in plugin for runs in results['pipelines'].values() for run in runs
+                 for plugin in run['plugins'])
+    if memory:
+        header.append('Allocated')
+    table_data = [header]
+    for pipeline, runs in results['pipelines'].items():
+        for index, run in enumerate(runs, 1):
+            total = ['%.2fs' % run['wall'], '', '', run['entries'], run['accepted']]
+            table_data.append([pipeline, index, 'total', '', ] + total + (['%s kB' % run['max_rss_growth']]
+                                                                          if memory else []))
+            for plugin in sorted(run['plugins'], key=lambda p: p['wall'], reverse=True):
+                row = [pipeline, index, plugin['phase'], plugin['plugin'], '%.3fs' % plugin['wall'],
+                       '%.3fs' % plugin['cpu'], plugin['db_queries'], plugin['entries_in'], plugin['entries_out']]
+                if memory:
+                    row.append('%.1f kB' % (plugin['allocated'] / 1024))
+                table_data.append(row)
+    try:
+        table = TerminalTable(table_type, table_data)
+        console(table.output)
+    except TerminalTableError as e:
+        console('ERROR: %s' % str(e))
+    console('Flexget %s on Python %s, %s entries per run' % (results['flexget'], results['python'],
+                                                             results['entries']))
+
+
+def do_cli(manager, options):
+    if manager.is_daemon:
+        # The benchmark points the manager and all sessions to its own database, tasks of the daemon would use it too
+        console('The bench command can not run in a daemon, stop the daemon or run it from another config directory.')
+        return
+    results = bench(manager, options.pipelines, count=options.entries, runs=options.runs, memory=options.memory)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        console('Results written to %s' % options.json)
+    print_results(results, options.table_type)
+
+
+@event('options.register')
+def register_parser_arguments():
+    parser = options.register_command('bench', do_cli, parents=[table_parser],
+                                      help='Benchmark task pipelines with generated entries on a temporary database')
+    parser.add_argument('pipelines', nargs='*', metavar='<pipeline>', choices=list(PIPELINES) + [[]],
+                        help='Pipelines to run (default: all). Choices: %s' % ', '.join(PIPELINES))
+    parser.add_argument('--entries', type=int, default=1000, metavar='NUM',
+                        help='Entries produced by the input of each pipeline (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=2, metavar='NUM',
+                        help='Executions of each pipeline, only the first finds new entries (default: %(default)s)')
+    parser.add_argument('--memory', action='store_true', default=False,
+                        help='Trace memory allocated by each plugin, slows everything down')
+    parser.add_argument('--json', metavar='FILE', help='Also write the results to FILE as json')
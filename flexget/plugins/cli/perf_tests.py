@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
+import sys
 
 from flexget import options
 from flexget.event import event
@@ -10,7 +11,7 @@ from flexget.manager import Session
 
 log = logging.getLogger('perftests')
 
-TESTS = ['imdb_query']
+TESTS = ['imdb_query', 'entry_memory', 'irc_rules']
 
 
 def cli_perf_test(manager, options):
@@ -21,6 +22,13 @@ def cli_perf_test(manager, options):
     try:
         if options.test_name == 'imdb_query':
             imdb_query(session)
+        elif options.test_name == 'entry_memory':
+            entry_memory(options.count)
+        elif options.test_name == 'irc_rules':
+            if not options.tracker_file or not options.announce_log:
+                console('irc_rules test needs --tracker-file and --announce-log')
+                return
+            irc_rules(options.tracker_file, options.announce_log, options.count)
     finally:
         session.close()
 
@@ -73,7 +81,90 @@ def imdb_query(session):
     log.debug('Took %.2f seconds to query %i movies' % (took, len(imdb_urls)))
 
 
+def entry_memory(count):
+    """
+    Creates `count` entries resembling ones from an rss feed and keeps them in memory while reporting memory usage.
+    Run with `--mem-usage` to get a heapy report from the memusage plugin.
+    """
+    import gc
+    import resource
+    import time
+    from flexget.entry import Entry
+
+    # memusage plugin sets this up on startup when --mem-usage is given
+    memusage = sys.modules.get('flexget.plugins.output.memusage')
+    heapy = getattr(memusage, 'heapy', None)
+    if heapy:
+        heapy.setref()
+
+    gc.collect()
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_time = time.time()
+    entries = []
+    for index in range(count):
+        entry = Entry('Some.Title.S01E%02d.720p.HDTV-FlexGet' % (index % 100), 'http://localhost/%i.torrent' % index)
+        entry['description'] = 'description of entry %i' % index
+        entry['rss_pubdate'] = None
+        entry['content_size'] = index
+        entry.register_lazy_func(lambda e: None, ['imdb_id', 'imdb_score'])
+        entries.append(entry)
+    took = time.time() - start_time
+    gc.collect()
+    used = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss
+    console('Created %i entries in %.2f seconds' % (len(entries), took))
+    console('Peak memory usage grew by %s kb, %.2f kb per entry' % (used, used / len(entries)))
+    if heapy:
+        console('Heapy module calculating memory usage of entries:')
+        console(heapy.heap())
+
+
+def irc_rules(tracker_file, announce_log, count):
+    """
+    Replays the announces in `announce_log` through the line patterns and compiled linematched rules of the
+    `tracker_file`, until `count` lines have been processed. Settings the rules refer to get dummy values.
+    """
+    import io
+    import time
+    from flexget.plugins.daemon.irc import (MESSAGE_CLEAN, compile_tracker_rules, match_message_patterns,
+                                            parse_patterns, run_tracker_rules)
+    from xml.etree.ElementTree import parse
+
+    tracker_config = parse(tracker_file).getroot()
+    config = {}
+    for param in tracker_config.find('settings'):
+        name = param.get('name') if param.tag == 'textbox' else param.tag
+        config[name.replace('gazelle_', '')] = 'dummy_%s' % name
+    with io.open(announce_log, encoding='utf-8') as f:
+        lines = [line.rstrip('\r\n') for line in f if line.strip()]
+    if not lines:
+        console('No announces found in %s' % announce_log)
+        return
+
+    start_time = time.time()
+    linepatterns = parse_patterns(tracker_config.findall('parseinfo/linepatterns/extract'))
+    rules = compile_tracker_rules(tracker_config.find('parseinfo/linematched'), config)
+    compiled = time.time() - start_time
+
+    start_time = time.time()
+    matched = 0
+    for index in range(count):
+        fields = match_message_patterns(linepatterns, MESSAGE_CLEAN.sub('', lines[index % len(lines)]))
+        if fields:
+            run_tracker_rules(rules, fields)
+            matched += fields.get('irc_torrenturl') is not None
+    took = time.time() - start_time
+    console('Compiled %i rules in %.2f ms' % (len(rules), compiled * 1000))
+    console('Processed %i announces in %.2f seconds, %.1f us per announce, %i produced an url' %
+            (count, took, took / count * 1000000, matched))
+    return matched
+
+
 @event('options.register')
 def register_parser_arguments():
     perf_parser = options.register_command('perf-test', cli_perf_test)
     perf_parser.add_argument('test_name', metavar='<test name>', choices=TESTS)
+    perf_parser.add_argument('--count', type=int, default=50000,
+                             help='number of items used by the test (default: %(default)s)')
+    perf_parser.add_argument('--tracker-file', metavar='PATH', help='.tracker file used by the irc_rules test')
+    perf_parser.add_argument('--announce-log', metavar='PATH',
+                             help='file with one announce per line, replayed by the irc_rules test')
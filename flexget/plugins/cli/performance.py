@@ -4,9 +4,13 @@ import logging
 import time
 
 from argparse import SUPPRESS
+from collections import defaultdict
 
+from colorclass.toggles import disable_all_colors
 from flexget import options
 from flexget.event import event, add_event_handler, remove_event_handler
+from flexget.plugins.operate.status import get_plugin_timings
+from flexget.terminal import TerminalTable, TerminalTableError, table_parser, colorize, console
 
 from sqlalchemy.engine import Connection
 
@@ -88,7 +92,69 @@ def cleanup(manager, options):
     remove_event_handler('task.execute.after_plugin', after_plugin)
 
 
+# Plugins whose latest timing is this many times the average of the executions before are highlighted
+REGRESSION_FACTOR = 2
+# Plugins taking less seconds are not shown by default
+MIN_WALL = 0.01
+
+
+def do_cli(manager, options):
+    if options.perf_action == 'report':
+        report(options)
+
+
+def report(options):
+    if options.table_type == 'porcelain':
+        disable_all_colors()
+    header = ['Task', 'Phase', 'Plugin', 'Last', 'Average', 'CPU', 'Queries', 'Requests', 'Downloaded']
+    table_data = [header]
+    for task_name, timings in get_plugin_timings(task_name=options.task, executions=options.executions):
+        latest_execution = timings[0].execution_id if timings else None
+        last = {}
+        history = defaultdict(list)
+        for timing in timings:
+            key = (timing.phase, timing.plugin)
+            if timing.execution_id == latest_execution:
+                last[key] = timing
+            else:
+                history[key].append(timing.wall)
+        for key, timing in sorted(last.items(), key=lambda item: item[1].wall, reverse=True):
+            average = sum(history[key]) / len(history[key]) if history[key] else None
+            if not options.all and timing.wall < MIN_WALL and (average or 0) < MIN_WALL:
+                continue
+            wall = '%.2fs' % timing.wall
+            if average is not None and timing.wall > MIN_WALL and timing.wall > average * REGRESSION_FACTOR:
+                wall = colorize('red', wall)
+            table_data.append([
+                task_name,
+                timing.phase,
+                timing.plugin,
+                wall,
+                '%.2fs' % average if average is not None else '-',
+                '%.2fs' % timing.cpu,
+                timing.db_queries,
+                timing.http_requests,
+                '%.1f KB' % (timing.http_bytes / 1024),
+            ])
+
+    try:
+        table = TerminalTable(options.table_type, table_data)
+        console(table.output)
+    except TerminalTableError as e:
+        console('ERROR: %s' % str(e))
+
+
 @event('options.register')
 def register_parser_arguments():
     options.get_parser('execute').add_argument('--debug-perf', action='store_true', dest='debug_perf', default=False,
                                                help=SUPPRESS)
+
+    parser = options.register_command('perf', do_cli, help='View resources used by plugins in recent task executions')
+    subparsers = parser.add_subparsers(title='Actions', metavar='<action>', dest='perf_action')
+    report_parser = subparsers.add_parser('report', parents=[table_parser],
+                                          help='Compare the latest execution of each plugin with the ones before')
+    report_parser.add_argument('--task', action='store', metavar='TASK', help='Limit to specified %(metavar)s')
+    report_parser.add_argument('--executions', action='store', type=int, metavar='NUM', default=10,
+                               help='Compare with the last %(metavar)s executions (default: %(default)s)')
+    report_parser.add_argument('--all', action='store_true', default=False,
+                               help='Also show plugins which took less than %ss' % MIN_WALL)
@@ -12,8 +12,8 @@ from flexget.terminal import TerminalTable, TerminalTableError, table_parser, co
 
 try:
     from flexget.plugins.filter.series import (Series, remove_series, remove_series_episode, set_series_begin,
-                                               normalize_series_name, new_eps_after, get_latest_release,
-                                               get_series_summary, shows_by_name, show_episodes, shows_by_exact_name)
+                                               normalize_series_name, get_series_summary, shows_by_name, show_episodes,
+                                               shows_by_exact_name)
 except ImportError:
     raise plugin.DependencyError(issued_by='cli_series', missing='series',
                                  message='Series commandline interface not loaded')
@@ -76,16 +76,15 @@ def display_summary(options):
         for series in query:
             name_column = series.name
 
-            behind = 0
+            behind = series.summary.behind
             latest_release = '-'
             age_col = '-'
             episode_id = '-'
-            latest = get_latest_release(series)
+            latest = series.summary.latest_episode
             identifier_type = series.identified_by
             if identifier_type == 'auto':
                 identifier_type = colorize('yellow', 'auto')
             if latest:
-                behind = new_eps_after(latest)
                 latest_release = get_latest_status(latest)
                 # colorize age
                 age_col = latest.age
@@ -9,7 +9,6 @@ import pkg_resources
 import os
 import re
 import sys
-import time
 import warnings
 
 from flexget import plugin
@@ -20,6 +19,14 @@ from flexget.utils.pathscrub import pathscrub
 
 log = logging.getLogger('deluge')
 
+# Number of torrents being added to the daemon at the same time
+MAX_CONCURRENT_ADDS = 10
+# Returned by the reactor when it was paused because the connection to the daemon was closed
+DISCONNECTED = object()
+# (host, port, username) of the daemon the client is connected to. The connection stays open between tasks in daemon
+# mode, otherwise it is closed once a task is done with it.
+connected_to = None
+
 
 def add_deluge_windows_install_dir_to_sys_path():
     # Deluge does not install to python system on Windows, add the install directory to sys.path if it is found
@@ -138,7 +145,8 @@ else:
     install_pausing_reactor()
 try:
     # These have to wait until reactor has been installed to import
-    from twisted.internet import reactor
+    from twisted.internet import reactor, defer
+    from twisted.internet.task import deferLater
     from deluge.ui.client import client
     from deluge.ui.common import get_localhost_auth
 except (ImportError, pkg_resources.DistributionNotFound):
@@ -179,8 +187,10 @@ class DelugePlugin(object):
 
     def on_disconnect(self):
         """Pauses the reactor. Gets called when we disconnect from the daemon."""
+        global connected_to
+        connected_to = None
         # pause the reactor, so flexget can continue
-        reactor.callLater(0, reactor.pause)
+        reactor.callLater(0, reactor.pause, DISCONNECTED)
 
     def on_connect_fail(self, result):
         """Pauses the reactor, returns PluginError. Gets called when connection to deluge daemon fails."""
@@ -188,11 +198,34 @@ class DelugePlugin(object):
         reactor.callLater(0, reactor.pause, plugin.PluginError('Could not connect to deluge daemon', log))
 
     def on_connect_success(self, result, task, config):
-        """Gets called when successfully connected to the daemon. Should do the work then call client.disconnect"""
+        """Gets called when successfully connected to the daemon. Should do the work then call finish"""
         raise NotImplementedError
 
+    def on_connected(self, result, connection):
+        global connected_to
+        connected_to = connection
+        return result
+
+    def finish(self, task):
+        """
+        Hands control back to FlexGet once the work for `task` is done. In daemon mode the connection is kept for the
+        next task, otherwise we disconnect.
+        """
+        if task.manager.is_daemon:
+            reactor.callLater(0, reactor.pause)
+        else:
+            client.disconnect()
+
+    def disconnect(self):
+        """Disconnects from the daemon and waits until that's done."""
+        global connected_to
+        if client.connected():
+            client.disconnect()
+            reactor.run()
+        connected_to = None
+
     def connect(self, task, config):
-        """Connects to the deluge daemon and runs on_connect_success """
+        """Connects to the deluge daemon, or reuses the open connection, and runs on_connect_success """
 
         if config['host'] in ['localhost', '127.0.0.1'] and not config.get('username'):
             # If an username is not specified, we have to do a lookup for the localclient username/password
@@ -203,16 +236,28 @@ class DelugePlugin(object):
                 raise plugin.PluginError('Unable to get local authentication info for Deluge. You may need to '
                                          'specify an username and password from your Deluge auth file.')
 
-        client.set_disconnect_callback(self.on_disconnect)
-
-        d = client.connect(
-            host=config['host'],
-            port=config['port'],
-            username=config['username'],
-            password=config['password'])
+        connection = (config['host'], config['port'], config['username'])
+        if connected_to is not None and (connected_to != connection or not client.connected()):
+            self.disconnect()
+        reused = connected_to is not None
+        if reused:
+            log.debug('Reusing connection to deluge daemon')
+            d = defer.succeed(True)
+        else:
+            client.set_disconnect_callback(self.on_disconnect)
+            d = client.connect(
+                host=config['host'],
+                port=config['port'],
+                username=config['username'],
+                password=config['password'])
+            d.addCallback(self.on_connected, connection)
 
         d.addCallback(self.on_connect_success, task, config).addErrback(self.on_connect_fail)
         result = reactor.run()
+        if result is DISCONNECTED and reused:
+            # The daemon went away while we were idle, that only gets noticed once the reactor runs again
+            log.debug('Connection to deluge daemon was lost, connecting again')
+            return self.connect(task, config)
         if isinstance(result, Exception):
             raise result
         return result
@@ -291,7 +336,6 @@ class InputDeluge(DelugePlugin):
 
     def on_connect_success(self, result, task, config):
         """Creates a list of FlexGet entries from items loaded in deluge and stores them to self.entries"""
-        from deluge.ui.client import client
 
         def on_get_torrents_status(torrents):
             config_path = os.path.expanduser(config.get('config_path', ''))
@@ -314,7 +358,7 @@ class InputDeluge(DelugePlugin):
                         value = format_func(value)
                     entry[flexget_key] = value
                 self.entries.append(entry)
-            client.disconnect()
+            self.finish(task)
 
         filter = config.get('filter', {})
         # deluge client lib chokes on future's newlist, make sure we have a native python list here
@@ -387,7 +431,6 @@ class OutputDeluge(DelugePlugin):
         Call download plugin to generate the temp files we will load into deluge
         then verify they are valid torrents
         """
-        import deluge.ui.common
         config = self.prepare_config(config)
         if not config['enabled']:
             return
@@ -401,6 +444,7 @@ class OutputDeluge(DelugePlugin):
         # Check torrent files are valid
         for entry in task.accepted:
             if os.path.exists(entry.get('file', '')):
+                import deluge.ui.common
                 # Check if downloaded file is a valid torrent file
                 try:
                     deluge.ui.common.TorrentInfo(entry['file'])
@@ -428,42 +472,47 @@ class OutputDeluge(DelugePlugin):
 
     def on_connect_success(self, result, task, config):
         """Gets called when successfully connected to a daemon."""
-        from deluge.ui.client import client
-        from twisted.internet import reactor, defer
-
         if not result:
             log.debug('on_connect_success returned a failed result. BUG?')
 
         if task.options.test:
             log.debug('Test connection to deluge daemon successful.')
-            client.disconnect()
+            self.finish(task)
             return
 
         def format_label(label):
             """Makes a string compliant with deluge label naming rules"""
             return re.sub('[^\w-]+', '_', label.lower())
 
+        # (torrent_id, entry, options) of torrents whose options depend on their status
+        added = []
+        # torrent_id -> entry for the magnets which have been added
+        magnets = {}
+
+        def create_path(result, path):
+            """Creates the specified path if deluge is older than 1.3"""
+            from deluge.common import VersionSplit
+            # Before 1.3, deluge would not create a non-existent move directory, so we need to.
+            if VersionSplit('1.3.0') > VersionSplit(self.deluge_version):
+                if client.is_localhost():
+                    if not os.path.isdir(path):
+                        log.debug('path %s doesn\'t exist, creating' % path)
+                        os.makedirs(path)
+                else:
+                    log.warning('If path does not exist on the machine running the daemon, move will fail.')
+
         def set_torrent_options(torrent_id, entry, opts):
-            """Gets called when a torrent was added to the daemon."""
+            """Gets called when a torrent was added to the daemon. Options which depend on the status of the torrent
+            are set once the status of all torrents has been fetched."""
             dlist = []
             if not torrent_id:
-                log.error('There was an error adding %s to deluge.' % entry['title'])
+                if not entry.failed:
+                    log.error('There was an error adding %s to deluge.' % entry['title'])
                 # TODO: Fail entry? How can this happen still now?
                 return
             log.info('%s successfully added to deluge.' % entry['title'])
             entry['deluge_id'] = torrent_id
-
-            def create_path(result, path):
-                """Creates the specified path if deluge is older than 1.3"""
-                from deluge.common import VersionSplit
-                # Before 1.3, deluge would not create a non-existent move directory, so we need to.
-                if VersionSplit('1.3.0') > VersionSplit(self.deluge_version):
-                    if client.is_localhost():
-                        if not os.path.isdir(path):
-                            log.debug('path %s doesn\'t exist, creating' % path)
-                            os.makedirs(path)
-                    else:
-                        log.warning('If path does not exist on the machine running the daemon, move will fail.')
+            added.append((torrent_id, entry, opts))
 
             if opts.get('movedone'):
                 dlist.append(version_deferred.addCallback(create_path, opts['movedone']))
@@ -484,136 +533,174 @@ class OutputDeluge(DelugePlugin):
                     dlist.append(client.core.queue_bottom([torrent_id]))
                     log.debug('%s moved to bottom of queue' % entry['title'])
 
-            def on_get_torrent_status(status):
-                """Gets called with torrent status, including file info.
-                Sets the torrent options which require knowledge of the current status of the torrent."""
+            return defer.DeferredList(dlist)
 
-                main_file_dlist = []
+        def on_get_torrent_status(status, torrent_id, entry, opts):
+            """Gets called with torrent status, including file info.
+            Sets the torrent options which require knowledge of the current status of the torrent."""
 
-                # Determine where the file should be
-                move_now_path = None
-                if opts.get('movedone'):
-                    if status['progress'] == 100:
-                        move_now_path = opts['movedone']
-                    else:
-                        # Deluge will unset the move completed option if we move the storage, forgo setting proper
-                        # path, in favor of leaving proper final location.
-                        log.debug('Not moving storage for %s, as this will prevent movedone.' % entry['title'])
-                elif opts.get('path'):
-                    move_now_path = opts['path']
-
-                if move_now_path and os.path.normpath(move_now_path) != os.path.normpath(status['save_path']):
-                    main_file_dlist.append(version_deferred.addCallback(create_path, move_now_path))
-                    log.debug('Moving storage for %s to %s' % (entry['title'], move_now_path))
-                    main_file_dlist.append(client.core.move_storage([torrent_id], move_now_path))
-
-                if opts.get('content_filename') or opts.get('main_file_only'):
-
-                    def file_exists(filename):
-                        # Checks the download path as well as the move completed path for existence of the file
-                        if os.path.exists(os.path.join(status['save_path'], filename)):
+            main_file_dlist = []
+
+            # Determine where the file should be
+            move_now_path = None
+            if opts.get('movedone'):
+                if status['progress'] == 100:
+                    move_now_path = opts['movedone']
+                else:
+                    # Deluge will unset the move completed option if we move the storage, forgo setting proper
+                    # path, in favor of leaving proper final location.
+                    log.debug('Not moving storage for %s, as this will prevent movedone.' % entry['title'])
+            elif opts.get('path'):
+                move_now_path = opts['path']
+
+            if move_now_path and os.path.normpath(move_now_path) != os.path.normpath(status['save_path']):
+                main_file_dlist.append(version_deferred.addCallback(create_path, move_now_path))
+                log.debug('Moving storage for %s to %s' % (entry['title'], move_now_path))
+                main_file_dlist.append(client.core.move_storage([torrent_id], move_now_path))
+
+            if opts.get('content_filename') or opts.get('main_file_only'):
+
+                def file_exists(filename):
+                    # Checks the download path as well as the move completed path for existence of the file
+                    if os.path.exists(os.path.join(status['save_path'], filename)):
+                        return True
+                    elif status.get('move_on_completed') and status.get('move_on_completed_path'):
+                        if os.path.exists(os.path.join(status['move_on_completed_path'], filename)):
                             return True
-                        elif status.get('move_on_completed') and status.get('move_on_completed_path'):
-                            if os.path.exists(os.path.join(status['move_on_completed_path'], filename)):
-                                return True
-                        else:
-                            return False
-
-                    def unused_name(name):
-                        # If on local computer, tries appending a (#) suffix until a unique filename is found
-                        if client.is_localhost():
-                            counter = 2
-                            while file_exists(name):
-                                name = ''.join([os.path.splitext(name)[0],
-                                                " (", str(counter), ')',
-                                                os.path.splitext(name)[1]])
-                                counter += 1
-                        else:
-                            log.debug('Cannot ensure content_filename is unique '
-                                      'when adding to a remote deluge daemon.')
-                        return name
+                    else:
+                        return False
 
-                    def rename(file, new_name):
-                        # Renames a file in torrent
-                        main_file_dlist.append(
-                            client.core.rename_files(torrent_id,
-                                                     [(file['index'], new_name)]))
-                        log.debug('File %s in %s renamed to %s' % (file['path'], entry['title'], new_name))
-
-                    # find a file that makes up more than main_file_ratio (default: 90%) of the total size
-                    main_file = None
-                    for file in status['files']:
-                        if file['size'] > (status['total_size'] * opts.get('main_file_ratio')):
-                            main_file = file
-                            break
-
-                    if main_file is not None:
-                        # proceed with renaming only if such a big file is found
-
-                        # find the subtitle file
-                        keep_subs = opts.get('keep_subs')
-                        sub_file = None
-                        if keep_subs:
-                            sub_exts = [".srt", ".sub"]
-                            for file in status['files']:
-                                ext = os.path.splitext(file['path'])[1]
-                                if ext in sub_exts:
-                                    sub_file = file
-                                    break
-
-                        # check for single file torrents so we dont add unnecessary folders
-                        if (os.path.dirname(main_file['path']) is not ("" or "/")):
-                            # check for top folder in user config
-                            if (opts.get('content_filename') and os.path.dirname(opts['content_filename']) is not ""):
-                                top_files_dir = os.path.dirname(opts['content_filename']) + "/"
-                            else:
-                                top_files_dir = os.path.dirname(main_file['path']) + "/"
+                def unused_name(name):
+                    # If on local computer, tries appending a (#) suffix until a unique filename is found
+                    if client.is_localhost():
+                        counter = 2
+                        while file_exists(name):
+                            name = ''.join([os.path.splitext(name)[0],
+                                            " (", str(counter), ')',
+                                            os.path.splitext(name)[1]])
+                            counter += 1
+                    else:
+                        log.debug('Cannot ensure content_filename is unique '
+                                  'when adding to a remote deluge daemon.')
+                    return name
+
+                def rename(file, new_name):
+                    # Renames a file in torrent
+                    main_file_dlist.append(
+                        client.core.rename_files(torrent_id,
+                                                 [(file['index'], new_name)]))
+                    log.debug('File %s in %s renamed to %s' % (file['path'], entry['title'], new_name))
+
+                # find a file that makes up more than main_file_ratio (default: 90%) of the total size
+                main_file = None
+                for file in status['files']:
+                    if file['size'] > (status['total_size'] * opts.get('main_file_ratio')):
+                        main_file = file
+                        break
+
+                if main_file is not None:
+                    # proceed with renaming only if such a big file is found
+
+                    # find the subtitle file
+                    keep_subs = opts.get('keep_subs')
+                    sub_file = None
+                    if keep_subs:
+                        sub_exts = [".srt", ".sub"]
+                        for file in status['files']:
+                            ext = os.path.splitext(file['path'])[1]
+                            if ext in sub_exts:
+                                sub_file = file
+                                break
+
+                    # check for single file torrents so we dont add unnecessary folders
+                    if (os.path.dirname(main_file['path']) is not ("" or "/")):
+                        # check for top folder in user config
+                        if (opts.get('content_filename') and os.path.dirname(opts['content_filename']) is not ""):
+                            top_files_dir = os.path.dirname(opts['content_filename']) + "/"
                         else:
-                            top_files_dir = "/"
-
-                        if opts.get('content_filename'):
-                            # rename the main file
-                            big_file_name = (top_files_dir +
-                                             os.path.basename(opts['content_filename']) +
-                                             os.path.splitext(main_file['path'])[1])
-                            big_file_name = unused_name(big_file_name)
-                            rename(main_file, big_file_name)
-
-                            # rename subs along with the main file
-                            if sub_file is not None and keep_subs:
-                                sub_file_name = (os.path.splitext(big_file_name)[0] +
-                                                 os.path.splitext(sub_file['path'])[1])
-                                rename(sub_file, sub_file_name)
-
-                        if opts.get('main_file_only'):
-                            # download only the main file (and subs)
-                            file_priorities = [1 if f == main_file or (f == sub_file and keep_subs) else 0
-                                               for f in status['files']]
-                            main_file_dlist.append(
-                                client.core.set_torrent_file_priorities(torrent_id, file_priorities))
-
-                            if opts.get('hide_sparse_files'):
-                                # hide the other sparse files that are not supposed to download but are created anyway
-                                # http://dev.deluge-torrent.org/ticket/1827
-                                # Made sparse files behave better with deluge http://flexget.com/ticket/2881
-                                sparse_files = [f for f in status['files']
-                                                if f != main_file and (f != sub_file or (not keep_subs))]
-                                rename_pairs = [(f['index'],
-                                                 top_files_dir + ".sparse_files/" + os.path.basename(f['path']))
-                                                for f in sparse_files]
-                                main_file_dlist.append(client.core.rename_files(torrent_id, rename_pairs))
+                            top_files_dir = os.path.dirname(main_file['path']) + "/"
                     else:
-                        log.warning('No files in "%s" are > %d%% of content size, no files renamed.' % (
-                            entry['title'],
-                            opts.get('main_file_ratio') * 100))
-
-                return defer.DeferredList(main_file_dlist)
+                        top_files_dir = "/"
+
+                    if opts.get('content_filename'):
+                        # rename the main file
+                        big_file_name = (top_files_dir +
+                                         os.path.basename(opts['content_filename']) +
+                                         os.path.splitext(main_file['path'])[1])
+                        big_file_name = unused_name(big_file_name)
+                        rename(main_file, big_file_name)
+
+                        # rename subs along with the main file
+                        if sub_file is not None and keep_subs:
+                            sub_file_name = (os.path.splitext(big_file_name)[0] +
+                                             os.path.splitext(sub_file['path'])[1])
+                            rename(sub_file, sub_file_name)
+
+                    if opts.get('main_file_only'):
+                        # download only the main file (and subs)
+                        file_priorities = [1 if f == main_file or (f == sub_file and keep_subs) else 0
+                                           for f in status['files']]
+                        main_file_dlist.append(
+                            client.core.set_torrent_file_priorities(torrent_id, file_priorities))
+
+                        if opts.get('hide_sparse_files'):
+                            # hide the other sparse files that are not supposed to download but are created anyway
+                            # http://dev.deluge-torrent.org/ticket/1827
+                            # Made sparse files behave better with deluge http://flexget.com/ticket/2881
+                            sparse_files = [f for f in status['files']
+                                            if f != main_file and (f != sub_file or (not keep_subs))]
+                            rename_pairs = [(f['index'],
+                                             top_files_dir + ".sparse_files/" + os.path.basename(f['path']))
+                                            for f in sparse_files]
+                            main_file_dlist.append(client.core.rename_files(torrent_id, rename_pairs))
+                else:
+                    log.warning('No files in "%s" are > %d%% of content size, no files renamed.' % (
+                        entry['title'],
+                        opts.get('main_file_ratio') * 100))
+
+            return defer.DeferredList(main_file_dlist)
+
+        @defer.inlineCallbacks
+        def wait_for_metadata(result):
+            """Waits for all added magnets to get their file list, polling them together."""
+            timeout = config.get('magnetization_timeout')
+            waiting = set(magnets)
+            if not timeout or not waiting:
+                return
+            log.verbose('Waiting %d seconds for %d magnet(s) to magnetize' % (timeout, len(waiting)))
+            for _ in range(timeout):
+                yield deferLater(reactor, 1, lambda: None)
+                try:
+                    statuses = yield client.core.get_torrents_status({'id': list(waiting)}, ['files'])
+                except Exception as err:
+                    log.error('wait_for_metadata Error: %s' % err)
+                    break
+                for torrent_id, status in statuses.items():
+                    if len(status['files']) > 0:
+                        log.info('"%s" magnetization successful' % magnets[torrent_id]['title'])
+                        waiting.discard(torrent_id)
+                if not waiting:
+                    break
+            for torrent_id in waiting:
+                log.warning('"%s" did not magnetize before the timeout elapsed, '
+                            'file list unavailable for processing.' % magnets[torrent_id]['title'])
+
+        def on_get_torrents_status(statuses):
+            dlist = []
+            for torrent_id, entry, opts in added:
+                if torrent_id in statuses:
+                    dlist.append(on_get_torrent_status(statuses[torrent_id], torrent_id, entry, opts))
+            return defer.DeferredList(dlist)
 
+        def get_torrents_status(result):
+            """Fetches the status of all added torrents in one call."""
+            if not added:
+                return
             status_keys = ['files', 'total_size', 'save_path', 'move_on_completed_path',
                            'move_on_completed', 'progress']
-            dlist.append(client.core.get_torrent_status(torrent_id, status_keys).addCallback(on_get_torrent_status))
-
-            return defer.DeferredList(dlist)
+            torrent_ids = [torrent_id for torrent_id, _, _ in added]
+            return client.core.get_torrents_status({'id': torrent_ids}, status_keys).addCallback(
+                on_get_torrents_status)
 
         def on_fail(result, task, entry):
             """Gets called when daemon reports a failure adding the torrent."""
@@ -673,54 +760,38 @@ class OutputDeluge(DelugePlugin):
         version_deferred = client.daemon.info().addCallback(on_get_daemon_info)
         dlist.append(version_deferred)
 
+        def add_entry(entry, opts):
+            """Adds an entry to the deluge session"""
+            magnet, filedump = None, None
+            if entry.get('url', '').startswith('magnet:'):
+                magnet = entry['url']
+            else:
+                if not os.path.exists(entry['file']):
+                    entry.fail('Downloaded temp file \'%s\' doesn\'t exist!' % entry['file'])
+                    del (entry['file'])
+                    return
+                with open(entry['file'], 'rb') as f:
+                    filedump = base64.encodestring(f.read())
+
+            log.verbose('Adding %s to deluge.' % entry['title'])
+            if magnet:
+                def remember_magnet(torrent_id):
+                    if torrent_id:
+                        magnets[torrent_id] = entry
+                    return torrent_id
+
+                return client.core.add_torrent_magnet(magnet, opts).addCallback(remember_magnet)
+            else:
+                return client.core.add_torrent_file(entry['title'], filedump, opts)
+
         def on_get_session_state(torrent_ids):
             """Gets called with a list of torrent_ids loaded in the deluge session.
             Adds new torrents and modifies the settings for ones already in the session."""
             dlist = []
+            # All torrents are added concurrently, but only a limited number at a time
+            window = defer.DeferredSemaphore(MAX_CONCURRENT_ADDS)
             # add the torrents
             for entry in task.accepted:
-
-                @defer.inlineCallbacks
-                def _wait_for_metadata(torrent_id, timeout):
-                    log.verbose('Waiting %d seconds for "%s" to magnetize' % (timeout, entry['title']))
-                    for _ in range(timeout):
-                        time.sleep(1)
-                        try:
-                            status = yield client.core.get_torrent_status(torrent_id, ['files'])
-                        except Exception as err:
-                            log.error('wait_for_metadata Error: %s' % err)
-                            break
-                        if len(status['files']) > 0:
-                            log.info('"%s" magnetization successful' % (entry['title']))
-                            break
-                    else:
-                        log.warning('"%s" did not magnetize before the timeout elapsed, '
-                                    'file list unavailable for processing.' % entry['title'])
-
-                    defer.returnValue(torrent_id)
-
-                def add_entry(entry, opts):
-                    """Adds an entry to the deluge session"""
-                    magnet, filedump = None, None
-                    if entry.get('url', '').startswith('magnet:'):
-                        magnet = entry['url']
-                    else:
-                        if not os.path.exists(entry['file']):
-                            entry.fail('Downloaded temp file \'%s\' doesn\'t exist!' % entry['file'])
-                            del (entry['file'])
-                            return
-                        with open(entry['file'], 'rb') as f:
-                            filedump = base64.encodestring(f.read())
-
-                    log.verbose('Adding %s to deluge.' % entry['title'])
-                    if magnet:
-                        d = client.core.add_torrent_magnet(magnet, opts)
-                        if config.get('magnetization_timeout'):
-                            d.addCallback(_wait_for_metadata, config['magnetization_timeout'])
-                        return d
-                    else:
-                        return client.core.add_torrent_file(entry['title'], filedump, opts)
-
                 # Generate deluge options dict for torrent add
                 add_opts = {}
                 try:
@@ -765,15 +836,18 @@ class OutputDeluge(DelugePlugin):
                     dlist.extend([set_torrent_options(torrent_id, entry, modify_opts),
                                   client.core.set_torrent_options([torrent_id], add_opts)])
                 else:
-                    dlist.append(add_entry(entry, add_opts).addCallbacks(
+                    dlist.append(window.run(add_entry, entry, add_opts).addCallbacks(
                         set_torrent_options, on_fail, callbackArgs=(entry, modify_opts), errbackArgs=(task, entry)))
-            return defer.DeferredList(dlist)
+            # Once everything is added, the status of all torrents is fetched at once
+            return defer.DeferredList(dlist).addCallback(wait_for_metadata).addCallback(get_torrents_status)
 
         dlist.append(client.core.get_session_state().addCallback(on_get_session_state))
 
         def on_complete(result):
             """Gets called when all of our tasks for deluge daemon are complete."""
-            client.disconnect()
+            if timeout_call.active():
+                timeout_call.cancel()
+            self.finish(task)
 
         tasks = defer.DeferredList(dlist).addBoth(on_complete)
 
@@ -786,7 +860,7 @@ class OutputDeluge(DelugePlugin):
 
         # Schedule a disconnect to happen if FlexGet hangs while connected to Deluge
         # Leave the timeout long, to give time for possible lookups to occur
-        reactor.callLater(600, lambda: tasks.called or on_timeout(tasks))
+        timeout_call = reactor.callLater(600, lambda: tasks.called or on_timeout(tasks))
 
     def on_task_exit(self, task, config):
         """Make sure all temp files are cleaned up when task exits"""
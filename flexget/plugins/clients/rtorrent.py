@@ -22,6 +22,11 @@ from requests.auth import HTTPDigestAuth, HTTPBasicAuth
 
 log = logging.getLogger('rtorrent')
 
+# by default rtorrent won't allow calls over 512kb in size
+XMLRPC_SIZE_LIMIT = 524288
+# Add 70kb for buffer
+XMLRPC_SIZE_BUFFER = 71680
+
 
 class _Method(object):
     # some magic to bind an XML-RPC method to an RPC server.
@@ -55,7 +60,10 @@ class HTTPDigestTransport(xmlrpc_client.Transport):
 
     def single_request(self, host, handler, request_body, verbose=0):
         parsed_url = urlparse('{0}://{1}'.format(self.__scheme, host))
-        url = urljoin('{0}://{1}'.format(self.__scheme, parsed_url.hostname), handler)
+        netloc = parsed_url.hostname
+        if parsed_url.port:
+            netloc += ':%s' % parsed_url.port
+        url = urljoin('{0}://{1}'.format(self.__scheme, netloc), handler)
 
         auth = self.get_auth(parsed_url.username, parsed_url.password, self.__digest_auth)
         response = self.send_request(url, auth, request_body)
@@ -275,6 +283,8 @@ class RTorrent(object):
                 'username': self.username,
                 'password': self.password,
             }
+            if data['port']:
+                data['hostname'] += ':%s' % data['port']
             self.uri = '%(scheme)s://%(username)s:%(password)s@%(hostname)s%(path)s%(query)s' % data
 
         # Determine the proxy server
@@ -316,12 +326,24 @@ class RTorrent(object):
 
     @property
     def version(self):
-        return [int(v) for v in self._server.system.client_version().split('.')]
+        if self._version is None:
+            self._version = [int(v) for v in self._server.system.client_version().split('.')]
+        return self._version
 
-    def load(self, raw_torrent, fields=None, start=False, mkdir=True):
+    def _multicall(self, calls):
+        """
+        Runs several calls in one `system.multicall` round trip.
 
-        if fields is None:
-            fields = {}
+        :param calls: List of (method name, params) tuples
+        :return: List with the result of each call, or the `xmlrpc_client.Fault` it failed with
+        """
+        if not calls:
+            return []
+        results = self._server.system.multicall([{'methodName': name, 'params': params} for name, params in calls])
+        return [xmlrpc_client.Fault(result['faultCode'], result['faultString']) if isinstance(result, dict)
+                else result[0] for result in results]
+
+    def _load_params(self, raw_torrent, fields):
         # First param is empty 'target'
         params = ['', xmlrpc_client.Binary(raw_torrent)]
 
@@ -329,46 +351,94 @@ class RTorrent(object):
         for key, val in fields.items():
             # Values must be escaped if within params
             params.append('d.%s.set=%s' % (key, re.escape(native_str(val))))
+        return params
 
-        if mkdir and 'directory' in fields:
-            result = self._server.execute.throw('', 'mkdir', '-p', fields['directory'])
-            if result != 0:
-                raise xmlrpc_client.Error('Failed creating directory %s' % fields['directory'])
+    def load(self, raw_torrent, fields=None, start=False, mkdir=True):
+        result = self.load_many([(raw_torrent, fields)], start=start, mkdir=mkdir)[0]
+        if isinstance(result, xmlrpc_client.Error):
+            raise result
+        return result
 
-        # by default rtorrent won't allow calls over 512kb in size.
-        xmlrpc_size = len(xmlrpc_client.dumps(tuple(params), 'raw_start')) + 71680  # Add 70kb for buffer
-        if xmlrpc_size > 524288:
-            prev_size = self._server.network.xmlrpc.size_limit()
-            self._server.network.xmlrpc.size_limit.set('', xmlrpc_size)
+    def load_many(self, torrents, start=False, mkdir=True):
+        """
+        Loads several torrents with as few round trips as possible. All directories are created in one multicall, and
+        the torrents are loaded in multicalls which fit in rtorrent's xmlrpc size limit.
 
-        # Call load method and return the response
-        if start:
-            result = self._server.load.raw_start(*params)
-        else:
-            result = self._server.load.raw(*params)
+        :param torrents: List of (raw torrent, fields) tuples
+        :return: List with the result of each load, or the `xmlrpc_client.Error` it failed with
+        """
+        torrents = [(raw_torrent, fields or {}) for raw_torrent, fields in torrents]
+        results = [None] * len(torrents)
+
+        if mkdir:
+            directories = sorted(set(fields['directory'] for _, fields in torrents if 'directory' in fields))
+            calls = [('execute.throw', ('', 'mkdir', '-p', directory)) for directory in directories]
+            failed = set(directory for directory, result in zip(directories, self._multicall(calls)) if result != 0)
+            for index, (_, fields) in enumerate(torrents):
+                if fields.get('directory') in failed:
+                    results[index] = xmlrpc_client.Error('Failed creating directory %s' % fields['directory'])
+
+        method = 'load.raw_start' if start else 'load.raw'
+        # Split the loads in chunks of [size, loads], by default rtorrent won't allow calls over 512kb in size.
+        chunks = []
+        for index, (raw_torrent, fields) in enumerate(torrents):
+            if results[index] is not None:
+                continue
+            params = tuple(self._load_params(raw_torrent, fields))
+            size = len(xmlrpc_client.dumps(params, method)) + XMLRPC_SIZE_BUFFER
+            if not chunks or chunks[-1][0] + size > XMLRPC_SIZE_LIMIT:
+                chunks.append([0, []])
+            chunks[-1][0] += size
+            chunks[-1][1].append((index, params))
+
+        for size, loads in chunks:
+            # A single torrent may still be over the limit, raise it for the duration of the call
+            prev_size = None
+            if size > XMLRPC_SIZE_LIMIT:
+                prev_size = self._server.network.xmlrpc.size_limit()
+                self._server.network.xmlrpc.size_limit.set('', size)
+            try:
+                load_results = self._multicall([(method, params) for _, params in loads])
+            finally:
+                if prev_size is not None:
+                    self._server.network.xmlrpc.size_limit.set('', prev_size)
+            for (index, _), result in zip(loads, load_results):
+                results[index] = result
 
-        if xmlrpc_size > 524288:
-            self._server.network.xmlrpc.size_limit.set('', prev_size)
+        return results
 
-        return result
+    def _fields(self, info_hashes, fields):
+        """
+        Fetches `fields` of all `info_hashes` in one multicall.
+
+        :return: Generator of (info hash, dict of field values) tuples. The dict values are `xmlrpc_client.Fault`
+            for fields which couldn't be read, e.g. because the torrent doesn't exist.
+        """
+        info_hashes = [native_str(info_hash) for info_hash in info_hashes]
+        fields = self._clean_fields(list(fields) if fields else None)
+        calls = [('d.%s' % field, (info_hash,)) for info_hash in info_hashes for field in fields]
+        results = self._multicall(calls)
+        names = self._clean_fields(list(fields), reverse=True)
+        for index, info_hash in enumerate(info_hashes):
+            yield info_hash, dict(zip(names, results[index * len(names):(index + 1) * len(names)]))
 
     def torrent(self, info_hash, fields=None):
         """ Get the details of a torrent """
-        info_hash = native_str(info_hash)
-        if not fields:
-            fields = list(self.default_fields)
-
-        fields = self._clean_fields(fields)
-
-        multi_call = xmlrpc_client.MultiCall(self._server)
+        # TODO: Maybe we should return a named tuple or a Torrent class?
+        for _, torrent in self._fields([info_hash], fields):
+            for value in torrent.values():
+                if isinstance(value, xmlrpc_client.Fault):
+                    raise value
+            return torrent
 
-        for field in fields:
-            method_name = 'd.%s' % field
-            getattr(multi_call, method_name)(info_hash)
+    def torrents_by_hash(self, info_hashes, fields=None):
+        """
+        Get the details of several torrents in one round trip.
 
-        resp = multi_call()
-        # TODO: Maybe we should return a named tuple or a Torrent class?
-        return dict(list(zip(self._clean_fields(fields, reverse=True), [val for val in resp])))
+        :return: Dict of info hash -> torrent details, torrents not loaded in rtorrent are left out
+        """
+        return dict((info_hash, torrent) for info_hash, torrent in self._fields(info_hashes, fields)
+                    if not isinstance(torrent['hash'], xmlrpc_client.Fault))
 
     def torrents(self, view='main', fields=None):
         if not fields:
@@ -378,19 +448,36 @@ class RTorrent(object):
         params = ['d.%s=' % field for field in fields]
         params.insert(0, view)
 
-        resp = self._server.d.multicall(params)
+        # First param is empty 'target'
+        resp = self._server.d.multicall2('', *params)
 
         # Response is formatted as a list of lists, with just the values
         return [dict(list(zip(self._clean_fields(fields, reverse=True), val))) for val in resp]
 
     def update(self, info_hash, fields):
-        multi_call = xmlrpc_client.MultiCall(self._server)
+        result = self.update_many([(info_hash, fields)])[0]
+        if isinstance(result, xmlrpc_client.Error):
+            raise result
+        return result
 
-        for key, val in fields.items():
-            method_name = 'd.%s.set' % key
-            getattr(multi_call, method_name)(native_str(info_hash), native_str(val))
+    def update_many(self, updates):
+        """
+        Sets fields of several torrents in one round trip.
 
-        return multi_call()[0]
+        :param updates: List of (info hash, fields) tuples
+        :return: List with the result of the first set call of each update, or the `xmlrpc_client.Fault` it failed with
+        """
+        calls = []
+        for info_hash, fields in updates:
+            for key, val in fields.items():
+                calls.append(('d.%s.set' % key, (native_str(info_hash), native_str(val))))
+        results = iter(self._multicall(calls))
+        update_results = []
+        for _, fields in updates:
+            field_results = [next(results) for _ in fields]
+            faults = [result for result in field_results if isinstance(result, xmlrpc_client.Fault)]
+            update_results.append(faults[0] if faults else (field_results[0] if field_results else 0))
+        return update_results
 
     def delete(self, info_hash):
         return self._server.d.erase(native_str(info_hash))
@@ -503,14 +590,16 @@ class RTorrentOutputPlugin(RTorrentPluginBase):
         'additionalProperties': False,
     }
 
-    def _verify_load(self, client, info_hash):
-        e = IOError()
-        for _ in range(0, 5):
-            try:
-                return client.torrent(info_hash, fields=['hash'])
-            except (IOError, xmlrpc_client.Error) as e:
+    def _verify_load(self, client, info_hashes):
+        """Waits for `info_hashes` to show up in rtorrent, returns the ones which didn't."""
+        missing = set(info_hashes)
+        for attempt in range(0, 5):
+            if attempt:
                 sleep(0.5)
-        raise e
+            missing -= set(client.torrents_by_hash(list(missing), fields=['hash']))
+            if not missing:
+                break
+        return missing
 
     @plugin.priority(120)
     def on_task_download(self, task, config):
@@ -528,31 +617,32 @@ class RTorrentOutputPlugin(RTorrentPluginBase):
                           digest_auth=config['digest_auth'],
                           session=task.requests)
 
+        entries = []
         for entry in task.accepted:
             if task.options.test:
                 log.info('Would add %s to rTorrent' % entry['url'])
                 continue
 
-            if config['action'] == 'add':
-                try:
-                    options = self._build_options(config, entry)
-                except RenderError as e:
-                    entry.fail("failed to render properties %s" % str(e))
-                    continue
+            if not entry.get('torrent_info_hash'):
+                entry.fail('Failed to %s as no info_hash found' % config['action'])
+                continue
 
-                self.add_entry(client, entry, options, start=config['start'], mkdir=config['mkdir'])
+            entries.append(entry)
 
-            info_hash = entry.get('torrent_info_hash')
+        if not entries:
+            return
 
-            if not info_hash:
-                entry.fail('Failed to %s as no info_hash found' % config['action'])
-                continue
+        # Torrents are checked, added and updated in batches, so the number of round trips doesn't grow with the
+        # number of entries
+        if config['action'] == 'add':
+            self.add_entries(client, entries, config)
 
-            if config['action'] == 'delete':
+        if config['action'] == 'delete':
+            for entry in entries:
                 self.delete_entry(client, entry)
 
-            if config['action'] == 'update':
-                self.update_entry(client, entry, config)
+        if config['action'] == 'update':
+            self.update_entries(client, entries, config)
 
     def delete_entry(self, client, entry):
         try:
@@ -562,110 +652,162 @@ class RTorrentOutputPlugin(RTorrentPluginBase):
             entry.fail('Failed to delete: %s' % str(e))
             return
 
-    def update_entry(self, client, entry, config):
-        info_hash = entry['torrent_info_hash']
-
-        # First check if it already exists
+    def update_entries(self, client, entries, config):
+        # First check which already exist
         try:
-            existing = client.torrent(info_hash, fields=['base_path'])
-        except IOError as e:
-            entry.fail("Error updating torrent %s" % str(e))
+            existing = client.torrents_by_hash([entry['torrent_info_hash'] for entry in entries],
+                                               fields=['base_path'])
+        except (IOError, xmlrpc_client.Error) as e:
+            for entry in entries:
+                entry.fail("Error updating torrent %s" % str(e))
             return
-        except xmlrpc_client.Error as e:
-            existing = False
 
-        # Build options but make config values override entry values
-        try:
-            options = self._build_options(config, entry, entry_first=False)
-        except RenderError as e:
-            entry.fail("failed to render properties %s" % str(e))
-            return
+        updates = []
+        for entry in entries:
+            info_hash = entry['torrent_info_hash']
+            torrent = existing.get(native_str(info_hash))
 
-        if existing and 'directory' in options:
-            # Check if changing to another directory which requires a move
-            if options['directory'] != existing['base_path'] \
-                    and options['directory'] != os.path.dirname(existing['base_path']):
-                try:
-                    log.verbose("Path is changing, moving files from '%s' to '%s'"
-                                % (existing['base_path'], options['directory']))
-                    client.move(info_hash, options['directory'])
-                except (IOError, xmlrpc_client.Error) as e:
-                    entry.fail('Failed moving torrent: %s' % str(e))
-                    return
-
-        # Remove directory from update otherwise rTorrent will append the title to the directory path
-        if 'directory' in options:
-            del options['directory']
+            # Build options but make config values override entry values
+            try:
+                options = self._build_options(config, entry, entry_first=False)
+            except RenderError as e:
+                entry.fail("failed to render properties %s" % str(e))
+                continue
+
+            if torrent and 'directory' in options:
+                # Check if changing to another directory which requires a move
+                if options['directory'] != torrent['base_path'] \
+                        and options['directory'] != os.path.dirname(torrent['base_path']):
+                    try:
+                        log.verbose("Path is changing, moving files from '%s' to '%s'"
+                                    % (torrent['base_path'], options['directory']))
+                        client.move(info_hash, options['directory'])
+                    except (IOError, xmlrpc_client.Error) as e:
+                        entry.fail('Failed moving torrent: %s' % str(e))
+                        continue
+
+            # Remove directory from update otherwise rTorrent will append the title to the directory path
+            if 'directory' in options:
+                del options['directory']
+
+            updates.append((entry, options))
 
         try:
-            client.update(info_hash, options)
-            log.verbose('Updated %s (%s) in rtorrent ' % (entry['title'], info_hash))
+            results = client.update_many([(entry['torrent_info_hash'], options) for entry, options in updates])
         except (IOError, xmlrpc_client.Error) as e:
-            entry.fail('Failed to update: %s' % str(e))
+            for entry, _ in updates:
+                entry.fail('Failed to update: %s' % str(e))
             return
 
-    def add_entry(self, client, entry, options, start=True, mkdir=False):
-
-        if 'torrent_info_hash' not in entry:
-            entry.fail('missing torrent_info_hash')
-            return
+        for (entry, _), result in zip(updates, results):
+            if isinstance(result, xmlrpc_client.Error):
+                entry.fail('Failed to update: %s' % str(result))
+            else:
+                log.verbose('Updated %s (%s) in rtorrent ' % (entry['title'], entry['torrent_info_hash']))
 
+    def read_torrent(self, entry):
+        """Returns the raw torrent to load for `entry`, or None if the entry failed."""
         if entry['url'].startswith('magnet:'):
             torrent_raw = 'd10:magnet-uri%d:%se' % (len(entry['url']), entry['url'])
-            torrent_raw = torrent_raw.encode('ascii')
-        else:
-            # Check that file is downloaded
-            if 'file' not in entry:
-                raise plugin.PluginError('Temporary download file is missing from entry')
+            return torrent_raw.encode('ascii')
 
-            # Verify the temp file exists
-            if not os.path.exists(entry['file']):
-                raise plugin.PluginError('Temporary download file is missing from disk')
+        # Check that file is downloaded
+        if 'file' not in entry:
+            raise plugin.PluginError('Temporary download file is missing from entry')
 
-            # Verify valid torrent file
-            if not is_torrent_file(entry['file']):
-                entry.fail("Downloaded temp file '%s' is not a torrent file" % entry['file'])
-                return
+        # Verify the temp file exists
+        if not os.path.exists(entry['file']):
+            raise plugin.PluginError('Temporary download file is missing from disk')
 
-            try:
-                with open(entry['file'], 'rb') as f:
-                    torrent_raw = f.read()
-            except IOError as e:
-                entry.fail('Failed to add to rTorrent %s' % str(e))
-                return
+        # Verify valid torrent file
+        if not is_torrent_file(entry['file']):
+            entry.fail("Downloaded temp file '%s' is not a torrent file" % entry['file'])
+            return
+
+        try:
+            with open(entry['file'], 'rb') as f:
+                torrent_raw = f.read()
+        except IOError as e:
+            entry.fail('Failed to add to rTorrent %s' % str(e))
+            return
 
+        try:
+            Torrent(torrent_raw)
+        except SyntaxError as e:
+            entry.fail('Strange, unable to decode torrent, raise a BUG: %s' % str(e))
+            return
+
+        return torrent_raw
+
+    def add_entries(self, client, entries, config):
+        torrents = []
+        for entry in entries:
             try:
-                Torrent(torrent_raw)
-            except SyntaxError as e:
-                entry.fail('Strange, unable to decode torrent, raise a BUG: %s' % str(e))
-                return
+                options = self._build_options(config, entry)
+            except RenderError as e:
+                entry.fail("failed to render properties %s" % str(e))
+                continue
 
-        # First check if it already exists
+            torrent_raw = self.read_torrent(entry)
+            if torrent_raw is not None:
+                torrents.append((entry, torrent_raw, options))
+
+        if not torrents:
+            return
+
+        # First check which already exist
         try:
-            if client.torrent(entry['torrent_info_hash']):
+            existing = client.torrents_by_hash([entry['torrent_info_hash'] for entry, _, _ in torrents],
+                                               fields=['hash'])
+        except (IOError, xmlrpc_client.Error) as e:
+            for entry, _, _ in torrents:
+                entry.fail("Error checking if torrent already exists %s" % str(e))
+            return
+
+        new_torrents = []
+        for entry, torrent_raw, options in torrents:
+            if native_str(entry['torrent_info_hash']) in existing:
                 log.warning("Torrent %s already exists, won't add" % entry['title'])
-                return
-        except IOError as e:
-            entry.fail("Error checking if torrent already exists %s" % str(e))
-        except xmlrpc_client.Error:
-            # No existing found
-            pass
+                continue
+            new_torrents.append((entry, torrent_raw, options))
+
+        if not new_torrents:
+            return
 
         try:
-            resp = client.load(torrent_raw, fields=options, start=start, mkdir=mkdir)
-            if resp != 0:
-                entry.fail('Failed to add to rTorrent invalid return value %s' % resp)
+            results = client.load_many([(torrent_raw, options) for _, torrent_raw, options in new_torrents],
+                                       start=config['start'], mkdir=config['mkdir'])
         except (IOError, xmlrpc_client.Error) as e:
             log.exception(e)
-            entry.fail('Failed to add to rTorrent %s' % str(e))
+            for entry, _, _ in new_torrents:
+                entry.fail('Failed to add to rTorrent %s' % str(e))
             return
 
-        # Verify the torrent loaded
+        loaded = []
+        for (entry, _, _), resp in zip(new_torrents, results):
+            if isinstance(resp, xmlrpc_client.Error):
+                entry.fail('Failed to add to rTorrent %s' % str(resp))
+            elif resp != 0:
+                entry.fail('Failed to add to rTorrent invalid return value %s' % resp)
+            else:
+                loaded.append(entry)
+
+        if not loaded:
+            return
+
+        # Verify the torrents loaded
         try:
-            self._verify_load(client, entry['torrent_info_hash'])
-            log.info('%s added to rtorrent' % entry['title'])
+            missing = self._verify_load(client, [native_str(entry['torrent_info_hash']) for entry in loaded])
         except (IOError, xmlrpc_client.Error) as e:
-            entry.fail('Failed to verify torrent loaded: %s' % str(e))
+            for entry in loaded:
+                entry.fail('Failed to verify torrent loaded: %s' % str(e))
+            return
+
+        for entry in loaded:
+            if native_str(entry['torrent_info_hash']) in missing:
+                entry.fail('Failed to verify torrent loaded: torrent not found in rTorrent')
+            else:
+                log.info('%s added to rtorrent' % entry['title'])
 
     def on_task_exit(self, task, config):
         """ Make sure all temp files are cleaned up when task exists """
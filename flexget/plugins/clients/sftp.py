@@ -8,12 +8,12 @@ import posixpath
 import time
 from functools import partial
 from collections import namedtuple
-from itertools import groupby
 
 from flexget import plugin
 from flexget.event import event
 from flexget.entry import Entry
 from flexget.config_schema import one_or_more
+from flexget.utils.connection_pool import ConnectionPool
 from flexget.utils.template import render_from_entry, RenderError
 
 log = logging.getLogger('sftp')
@@ -26,6 +26,8 @@ CONNECT_TRIES = 3
 RETRY_INTERVAL = 15
 RETRY_STEP = 5
 SOCKET_TIMEOUT = 15
+# read requests kept in flight per file download
+PREFETCH_REQUESTS = 64
 
 # make separate path instances for local vs remote path styles
 localpath = os.path
@@ -33,10 +35,11 @@ remotepath = posixpath  # pysftp uses POSIX style paths
 
 try:
     import pysftp
+    import paramiko
 
     logging.getLogger("paramiko").setLevel(logging.ERROR)
 except ImportError:
-    pysftp = None
+    pysftp = paramiko = None
 
 
 def sftp_connect(conf):
@@ -68,6 +71,38 @@ def sftp_connect(conf):
     return sftp
 
 
+def sftp_reset(sftp):
+    """
+    Readies a pooled connection for reuse, going back to the login directory and making sure the server still answers
+    """
+    sftp.cwd(None)
+    sftp.normalize('.')
+
+
+def sftp_get(sftp, path, destination):
+    """
+    Downloads `path` with several read requests in flight, so that throughput is not bound by the round-trip time.
+    Paramiko always prefetches, newer versions allow limiting the number of outstanding requests.
+    """
+    if paramiko.__version_info__ >= (3, 3):
+        sftp.sftp_client.get(path, destination, max_concurrent_prefetch_requests=PREFETCH_REQUESTS)
+    else:
+        sftp.sftp_client.get(path, destination)
+
+
+def pool_key(conf):
+    return conf.host, conf.port, conf.username
+
+
+# Connections are shared by all tasks, so a daemon doesn't need to log in again for every entry and run
+connection_pool = ConnectionPool(sftp_connect, lambda sftp: sftp.close(), sftp_reset)
+
+
+@event('manager.shutdown')
+def close_connections(manager):
+    connection_pool.close()
+
+
 def sftp_from_config(config):
     """
     Creates an SFTP connection from a Flexget config object
@@ -274,6 +309,20 @@ class SftpList(object):
         return entries
 
 
+class EntryDownload(object):
+    """Files to be downloaded for an entry, and the outcome"""
+
+    def __init__(self, entry, sftp_config, to, base_path, files, dirs):
+        self.entry = entry
+        self.sftp_config = sftp_config
+        self.to = to
+        self.base_path = base_path
+        self.files = files
+        self.dirs = dirs
+        self.downloaded = []
+        self.error = None
+
+
 class SftpDownload(object):
     """
     Download files from a SFTP server. This plugin requires the pysftp Python module and its
@@ -286,12 +335,14 @@ class SftpDownload(object):
                         metainfo_series or similar.
     recursive:          Indicates wether to download directory contents recursively.
     delete_origin:      Indicates wether to delete the remote files(s) once they've been downloaded.
+    workers:            Number of files to download at the same time, each over its own connection.
 
     Example:
 
       sftp_download:
           to: '/Volumes/External/Drobo/downloads'
           delete_origin: False
+          workers: 4
     """
 
     schema = {
@@ -299,7 +350,8 @@ class SftpDownload(object):
         'properties': {
             'to': {'type': 'string', 'format': 'path'},
             'recursive': {'type': 'boolean', 'default': True},
-            'delete_origin': {'type': 'boolean', 'default': False}
+            'delete_origin': {'type': 'boolean', 'default': False},
+            'workers': {'type': 'integer', 'minimum': 1, 'default': 1}
         },
         'required': ['to'],
         'additionalProperties': False
@@ -328,42 +380,46 @@ class SftpDownload(object):
 
         return config
 
-    def download_file(self, path, dest, sftp, delete_origin):
+    def download_file(self, base_path, path, dest, sftp):
         """
-        Download a file from path to dest
+        Download a file from base_path/path to dest/path
         """
-        dir_name = remotepath.dirname(path)
+        source = remotepath.join(base_path, path)
         dest_relpath = localpath.join(*remotepath.split(path))  # convert remote path style to local style
         destination = localpath.join(dest, dest_relpath)
         dest_dir = localpath.dirname(destination)
 
         if localpath.exists(destination):
             log.verbose('Destination file already exists. Skipping %s' % path)
-            return
+            return False
 
         if not localpath.exists(dest_dir):
-            os.makedirs(dest_dir)
+            try:
+                os.makedirs(dest_dir)
+            except OSError:
+                # another worker may have created it in the meantime
+                if not localpath.isdir(dest_dir):
+                    raise
 
         log.verbose('Downloading file %s to %s' % (path, destination))
 
         try:
-            sftp.get(path, destination)
+            sftp_get(sftp, source, destination)
         except Exception as e:
             log.error('Failed to download %s (%s)' % (path, e))
             if localpath.exists(destination):
                 log.debug('Removing partially downloaded file %s' % destination)
                 os.remove(destination)
             raise e
+        return True
 
-        if delete_origin:
-            log.debug('Deleting remote file %s' % path)
-            try:
-                sftp.remove(path)
-            except Exception as e:
-                log.error('Failed to delete file %s (%s)' % (path, e))
-                return
-
-            self.remove_dir(sftp, dir_name)
+    def delete_file(self, base_path, path, sftp):
+        source = remotepath.join(base_path, path)
+        log.debug('Deleting remote file %s' % source)
+        try:
+            sftp.remove(source)
+        except Exception as e:
+            log.error('Failed to delete file %s (%s)' % (source, e))
 
     def handle_dir(self, path):
         """
@@ -388,84 +444,130 @@ class SftpDownload(object):
             except Exception as e:
                 log.error('Failed to delete directory %s (%s)' % (path, e))
 
-    def download_entry(self, entry, config, sftp):
+    def list_entry(self, entry, config, sftp):
         """
-        Downloads the file(s) described in entry
+        Finds the file(s) described in entry
+
+        :return: A tuple of the remote base path, paths of the files relative to it and the remote directories which
+            should be removed once they're empty after downloading with `delete_origin`.
+            None if there is nothing to download.
         """
 
         path = urlparse(entry['url']).path or '.'
-        delete_origin = config['delete_origin']
         recursive = config['recursive']
 
-        to = config['to']
-        if to:
-            try:
-                to = render_from_entry(to, entry)
-            except RenderError as e:
-                log.error('Could not render path: %s' % to)
-                entry.fail(e)
-                return
-
         if not sftp.lexists(path):
             log.error('Remote path does not exist: %s' % path)
             return
 
         if sftp.isfile(path):
-            source_file = remotepath.basename(path)
             source_dir = remotepath.dirname(path)
-            try:
-                sftp.cwd(source_dir)
-                self.download_file(source_file, to, sftp, delete_origin)
-            except Exception as e:
-                error = 'Failed to download file %s (%s)' % (path, e)
-                log.error(error)
-                entry.fail(error)
+            return source_dir, [remotepath.basename(path)], [source_dir]
         elif sftp.isdir(path):
             base_path = remotepath.normpath(remotepath.join(path, '..'))
             dir_name = remotepath.basename(path)
-            handle_file = partial(self.download_file, dest=to, sftp=sftp, delete_origin=delete_origin)
+            files = []
 
             try:
                 sftp.cwd(base_path)
-                sftp.walktree(dir_name, handle_file, self.handle_dir, self.handle_unknown, recursive)
+                sftp.walktree(dir_name, files.append, self.handle_dir, self.handle_unknown, recursive)
             except Exception as e:
                 error = 'Failed to download directory %s (%s)' % (path, e)
                 log.error(error)
                 entry.fail(error)
-
                 return
 
-            if delete_origin:
-                self.remove_dir(sftp, path)
+            dirs = set(remotepath.join(base_path, remotepath.dirname(f)) for f in files)
+            # sorted in reverse, subdirectories come before their parents
+            return base_path, files, sorted(dirs, reverse=True) + [path]
         else:
             log.warning('Skipping unknown file %s' % path)
 
+    def download_job(self, download, path):
+        """
+        Downloads one file of `download` over a pooled connection. Runs in the task executor, errors are stored in the
+        `EntryDownload` and the entry is failed by the task afterwards.
+        """
+        if download.error:
+            # entry already failed, don't bother with the rest of its files
+            return
+        key = pool_key(download.sftp_config)
+        try:
+            with connection_pool.connection(key, download.sftp_config) as sftp:
+                if self.download_file(download.base_path, path, download.to, sftp):
+                    download.downloaded.append(path)
+        except Exception as e:
+            download.error = 'Failed to download file %s (%s)' % (remotepath.join(download.base_path, path), e)
+            log.error(download.error)
+
+    def download_files(self, task, jobs, workers):
+        """
+        Downloads files with `task.executor`, using up to `workers` connections at a time.
+
+        :param jobs: List of (download, path) tuples, where download is the `EntryDownload` the file belongs to
+        """
+        if jobs:
+            task.executor.map(self.download_job, *zip(*jobs), limit=workers)
+
     def on_task_download(self, task, config):
         """
         Task handler for sftp_download plugin
         """
         dependency_check()
 
-        # Download entries by host so we can reuse the connection
-        for sftp_config, entries in groupby(task.accepted, self.get_sftp_config):
+        downloads = []
+        unreachable = {}
+        for entry in task.accepted:
+            sftp_config = self.get_sftp_config(entry)
             if not sftp_config:
                 continue
+            key = pool_key(sftp_config)
+            if key in unreachable:
+                entry.fail(unreachable[key])
+                continue
+
+            to = config['to']
+            if to:
+                try:
+                    to = render_from_entry(to, entry)
+                except RenderError as e:
+                    log.error('Could not render path: %s' % to)
+                    entry.fail(e)
+                    continue
 
-            error_message = None
-            sftp = None
+            # Connections come from the pool, so they are reused for further entries, and tasks
             try:
-                sftp = sftp_connect(sftp_config)
+                sftp = connection_pool.acquire(key, sftp_config)
             except Exception as e:
-                error_message = 'Failed to connect to %s (%s)' % (sftp_config.host, e)
-                log.error(error_message)
-
-            for entry in entries:
-                if sftp:
-                    self.download_entry(entry, config, sftp)
-                else:
-                    entry.fail(error_message)
-            if sftp:
-                sftp.close()
+                unreachable[key] = 'Failed to connect to %s (%s)' % (sftp_config.host, e)
+                log.error(unreachable[key])
+                entry.fail(unreachable[key])
+                continue
+            try:
+                found = self.list_entry(entry, config, sftp)
+            finally:
+                connection_pool.release(key, sftp)
+            if found:
+                downloads.append(EntryDownload(entry, sftp_config, to, *found))
+
+        jobs = [(download, path) for download in downloads for path in download.files]
+        self.download_files(task, jobs, config['workers'])
+
+        for download in downloads:
+            if download.error:
+                download.entry.fail(download.error)
+                continue
+            if not config['delete_origin']:
+                continue
+            key = pool_key(download.sftp_config)
+            try:
+                with connection_pool.connection(key, download.sftp_config) as sftp:
+                    for path in download.downloaded:
+                        self.delete_file(download.base_path, path, sftp)
+                    for path in download.dirs:
+                        self.remove_dir(sftp, path)
+            except Exception as e:
+                log.error('Failed to delete %s (%s)' % (download.entry['url'], e))
 
 
 class SftpUpload(object):
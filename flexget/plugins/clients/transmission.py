@@ -33,6 +33,37 @@ except ImportError:
 
 log = logging.getLogger('transmission')
 
+# RPC clients are kept between tasks, keyed by the connection details they were created with
+rpc_clients = {}
+
+
+def _filter_list(list):
+    for item in list:
+        if not isinstance(item, basestring):
+            list.remove(item)
+    return list
+
+
+def _find_matches(name, list):
+    for mask in list:
+        if fnmatch(name, mask):
+            return True
+    return False
+
+
+class AddedTorrent(object):
+    """An entry being added to transmission, along with its options and the id transmission gave it"""
+
+    def __init__(self, entry, options):
+        self.entry = entry
+        self.options = options
+        self.id = None
+        self.downloaded = not entry['url'].startswith('magnet:')
+
+    @property
+    def find_main_file(self):
+        return bool(self.options['post'].get('main_file_only') or 'content_filename' in self.options['post'])
+
 
 class TransmissionBase(object):
 
@@ -70,6 +101,9 @@ class TransmissionBase(object):
 
     def create_rpc_client(self, config):
         user, password = config.get('username'), config.get('password')
+        key = (config['host'], config['port'], user, password)
+        if key in rpc_clients:
+            return rpc_clients[key]
 
         try:
             cli = transmissionrpc.Client(config['host'], config['port'], user, password)
@@ -85,6 +119,7 @@ class TransmissionBase(object):
                     raise plugin.PluginError("Error connecting to transmission: %s" % e.original.message)
             else:
                 raise plugin.PluginError("Error connecting to transmission: %s" % e.message)
+        rpc_clients[key] = cli
         return cli
 
     def torrent_info(self, torrent, config):
@@ -131,8 +166,8 @@ class TransmissionBase(object):
         if [int(part) for part in transmissionrpc.__version__.split('.')] < [0, 11]:
             raise plugin.PluginError('Transmissionrpc module version 0.11 or higher required, please upgrade', log)
 
-        # Mark rpc client for garbage collector so every task can start
-        # a fresh new according its own config - fix to bug #2804
+        # Forget the client of the previous task so every task gets one
+        # according to its own config - fix to bug #2804
         self.client = None
         config = self.prepare_config(config)
         if config['enabled']:
@@ -384,21 +419,21 @@ class PluginTransmission(TransmissionBase):
 
     def add_to_transmission(self, cli, task, config):
         """Adds accepted entries to transmission """
+        added = []
         for entry in task.accepted:
             if task.options.test:
                 log.info('Would add %s to transmission' % entry['url'])
                 continue
             # Compile user options into appripriate dict
-            options = self._make_torrent_options_dict(config, entry)
-            downloaded = not entry['url'].startswith('magnet:')
+            torrent = AddedTorrent(entry, self._make_torrent_options_dict(config, entry))
 
             # Check that file is downloaded
-            if downloaded and 'file' not in entry:
+            if torrent.downloaded and 'file' not in entry:
                 entry.fail('file missing?')
                 continue
 
             # Verify the temp file exists
-            if downloaded and not os.path.exists(entry['file']):
+            if torrent.downloaded and not os.path.exists(entry['file']):
                 tmp_path = os.path.join(task.manager.config_base, 'temp')
                 log.debug('entry: %s', entry)
                 log.debug('temp: %s', ', '.join(os.listdir(tmp_path)))
@@ -406,187 +441,232 @@ class PluginTransmission(TransmissionBase):
                 continue
 
             try:
-                if downloaded:
+                if torrent.downloaded:
                     with open(entry['file'], 'rb') as f:
                         filedump = base64.b64encode(f.read()).decode('utf-8')
-                    r = cli.add_torrent(filedump, 30, **options['add'])
+                    r = cli.add_torrent(filedump, 30, **torrent.options['add'])
                 else:
                     # we need to set paused to false so the magnetization begins immediately
-                    options['add']['paused'] = False
-                    r = cli.add_torrent(entry['url'], timeout=30, **options['add'])
-
-                log.info('"%s" torrent added to transmission', entry['title'])
-
-                total_size = cli.get_torrent(r.id, ['id', 'totalSize']).totalSize
-
-                def _filter_list(list):
-                    for item in list:
-                        if not isinstance(item, basestring):
-                            list.remove(item)
-                    return list
-
-                def _find_matches(name, list):
-                    for mask in list:
-                        if fnmatch(name, mask):
-                            return True
-                    return False
-
-                def _wait_for_files(cli, r, timeout):
-                    from time import sleep
-                    while timeout > 0:
-                        sleep(1)
-                        fl = cli.get_files(r.id)
-                        if len(fl[r.id]) > 0:
-                            return fl
-                        else:
-                            timeout -= 1
-                    return fl
-
-                skip_files = False
-                # Filter list because "set" plugin doesn't validate based on schema
-                # Skip files only used if we have no main file
-                if 'skip_files' in options['post']:
-                    skip_files = True
-                    options['post']['skip_files'] = _filter_list(options['post']['skip_files'])
-
-                main_id = None
-                find_main_file = options['post'].get('main_file_only') or 'content_filename' in options['post']
-                # We need to index the files if any of the following are defined
-                if find_main_file or skip_files:
-                    fl = cli.get_files(r.id)
-
-                    if ('magnetization_timeout' in options['post'] and
-                        options['post']['magnetization_timeout'] > 0 and
-                            not downloaded and
-                            len(fl[r.id]) == 0):
-                        log.debug('Waiting %d seconds for "%s" to magnetize', options['post']['magnetization_timeout'],
-                                  entry['title'])
-                        fl = _wait_for_files(cli, r, options['post']['magnetization_timeout'])
-                        if len(fl[r.id]) == 0:
-                            log.warning('"%s" did not magnetize before the timeout elapsed, '
-                                        'file list unavailable for processing.', entry['title'])
-                        else:
-                            total_size = cli.get_torrent(r.id, ['id', 'totalSize']).totalSize
-
-                    # Find files based on config
-                    dl_list = []
-                    skip_list = []
-                    main_list = []
-                    full_list = []
-                    ext_list = ['*.srt', '*.sub', '*.idx', '*.ssa', '*.ass']
-
-                    main_ratio = config['main_file_ratio']
-                    if 'main_file_ratio' in options['post']:
-                        main_ratio = options['post']['main_file_ratio']
-
-                    if 'include_files' in options['post']:
-                        options['post']['include_files'] = _filter_list(options['post']['include_files'])
-
-                    for f in fl[r.id]:
-                        full_list.append(f)
-                        # No need to set main_id if we're not going to need it
-                        if find_main_file and fl[r.id][f]['size'] > total_size * main_ratio:
-                            main_id = f
-
-                        if 'include_files' in options['post']:
-                            if _find_matches(fl[r.id][f]['name'], options['post']['include_files']):
-                                dl_list.append(f)
-                            elif options['post'].get('include_subs') and _find_matches(fl[r.id][f]['name'], ext_list):
-                                dl_list.append(f)
-
-                        if skip_files:
-                            if _find_matches(fl[r.id][f]['name'], options['post']['skip_files']):
-                                skip_list.append(f)
-
-                    if main_id is not None:
-
-                        # Look for files matching main ID title but with a different extension
-                        if options['post'].get('rename_like_files'):
-                            for f in fl[r.id]:
-                                # if this filename matches main filename we want to rename it as well
-                                fs = os.path.splitext(fl[r.id][f]['name'])
-                                if fs[0] == os.path.splitext(fl[r.id][main_id]['name'])[0]:
-                                    main_list.append(f)
-                        else:
-                            main_list = [main_id]
-
-                        if main_id not in dl_list:
-                            dl_list.append(main_id)
-                    elif find_main_file:
-                        log.warning('No files in "%s" are > %d%% of content size, no files renamed.',
-                            entry['title'], main_ratio * 100)
-
-                    # If we have a main file and want to rename it and associated files
-                    if 'content_filename' in options['post'] and main_id is not None:
-                        if 'download_dir' not in options['add']:
-                            download_dir = cli.get_session().download_dir
-                        else:
-                            download_dir = options['add']['download_dir']
-
-                        # Get new filename without ext
-                        file_ext = os.path.splitext(fl[r.id][main_id]['name'])[1]
-                        file_path = os.path.dirname(os.path.join(download_dir, fl[r.id][main_id]['name']))
-                        filename = options['post']['content_filename']
-                        if config['host'] == 'localhost' or config['host'] == '127.0.0.1':
-                            counter = 1
-                            while os.path.exists(os.path.join(file_path, filename + file_ext)):
-                                # Try appending a (#) suffix till a unique filename is found
-                                filename = '%s(%s)' % (options['post']['content_filename'], counter)
-                                counter += 1
-                        else:
-                            log.debug('Cannot ensure content_filename is unique '
-                                      'when adding to a remote transmission daemon.')
-
-                        for index in main_list:
-                            file_ext = os.path.splitext(fl[r.id][index]['name'])[1]
-                            log.debug('File %s renamed to %s' % (fl[r.id][index]['name'], filename + file_ext))
-                            # change to below when set_files will allow setting name, more efficient to have one call
-                            # fl[r.id][index]['name'] = os.path.basename(pathscrub(filename + file_ext).encode('utf-8'))
-                            try:
-                                cli.rename_torrent_path(r.id, fl[r.id][index]['name'],
-                                                        os.path.basename(str(pathscrub(filename + file_ext))))
-                            except TransmissionError:
-                                log.error('content_filename only supported with transmission 2.8+')
-
-                    if options['post'].get('main_file_only') and main_id is not None:
-                        # Set Unwanted Files
-                        options['change']['files_unwanted'] = [x for x in full_list if x not in dl_list]
-                        options['change']['files_wanted'] = dl_list
-                        log.debug('Downloading %s of %s files in torrent.',
-                                  len(options['change']['files_wanted']), len(full_list))
-                    elif (not options['post'].get('main_file_only') or main_id is None) and skip_files:
-                        # If no main file and we want to skip files
-
-                        if len(skip_list) >= len(full_list):
-                            log.debug('skip_files filter would cause no files to be downloaded; '
-                                      'including all files in torrent.')
-                        else:
-                            options['change']['files_unwanted'] = skip_list
-                            options['change']['files_wanted'] = [x for x in full_list if x not in skip_list]
-                            log.debug('Downloading %s of %s files in torrent.',
-                                      len(options['change']['files_wanted']), len(full_list))
-
-                # Set any changed file properties
-                if list(options['change'].keys()):
-                    cli.change_torrent(r.id, 30, **options['change'])
-
-                # if addpaused was defined and set to False start the torrent;
-                # prevents downloading data before we set what files we want
-                if ('paused' in options['post'] and not options['post']['paused'] or
-                        'paused' not in options['post'] and cli.get_session().start_added_torrents):
-                    cli.start_torrent(r.id)
-                elif options['post'].get('paused'):
-                    log.debug('sleeping 5s to stop the torrent...')
-                    time.sleep(5)
-                    cli.stop_torrent(r.id)
-                    log.info('Torrent "%s" stopped because of addpaused=yes', entry['title'])
+                    torrent.options['add']['paused'] = False
+                    r = cli.add_torrent(entry['url'], timeout=30, **torrent.options['add'])
+            except TransmissionError as e:
+                self._fail([torrent], e)
+                continue
+
+            log.info('"%s" torrent added to transmission', entry['title'])
+            torrent.id = r.id
+            added.append(torrent)
 
+        if not added:
+            return
+
+        # Transmission can only add one torrent per call, everything after that is done for all torrents at once
+        try:
+            session = cli.get_session()
+            self._select_files(cli, added, config, session)
+        except TransmissionError as e:
+            self._fail(added, e)
+            return
+
+        # Set any changed file properties, torrents with the same changes are changed in one call
+        batches = {}
+        for torrent in added:
+            change = torrent.options['change']
+            if change:
+                key = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in change.items()))
+                batches.setdefault(key, []).append(torrent)
+        for batch in batches.values():
+            try:
+                cli.change_torrent([t.id for t in batch], 30, **batch[0].options['change'])
             except TransmissionError as e:
-                log.debug('TransmissionError', exc_info=True)
-                log.debug('Failed options dict: %s', options)
-                msg = 'TransmissionError: %s' % e.message or 'N/A'
-                log.error(msg)
-                entry.fail(msg)
+                self._fail(batch, e)
+
+        # if addpaused was defined and set to False start the torrent;
+        # prevents downloading data before we set what files we want
+        start = []
+        stop = []
+        for torrent in added:
+            if torrent.entry.failed:
+                continue
+            post = torrent.options['post']
+            if 'paused' in post and not post['paused'] or 'paused' not in post and session.start_added_torrents:
+                start.append(torrent)
+            elif post.get('paused'):
+                stop.append(torrent)
+        try:
+            if start:
+                cli.start_torrent([t.id for t in start])
+            if stop:
+                log.debug('sleeping 5s to stop the torrents...')
+                time.sleep(5)
+                cli.stop_torrent([t.id for t in stop])
+                for torrent in stop:
+                    log.info('Torrent "%s" stopped because of addpaused=yes', torrent.entry['title'])
+        except TransmissionError as e:
+            self._fail(start + stop, e)
+
+    def _fail(self, torrents, e):
+        log.debug('TransmissionError', exc_info=True)
+        msg = 'TransmissionError: %s' % e.message or 'N/A'
+        log.error(msg)
+        for torrent in torrents:
+            log.debug('Failed options dict: %s', torrent.options)
+            torrent.entry.fail(msg)
+
+    def _wait_for_files(self, cli, torrents, fields):
+        """
+        Polls all `torrents` in one loop until they have a file list, or their magnetization_timeout elapses.
+
+        :return: Dict of torrent id -> transmissionrpc Torrent, for the torrents which magnetized
+        """
+        magnetized = {}
+        waiting = dict((t.id, t) for t in torrents)
+        for torrent in torrents:
+            log.debug('Waiting %d seconds for "%s" to magnetize', torrent.options['post']['magnetization_timeout'],
+                      torrent.entry['title'])
+        waited = 0
+        while waiting:
+            time.sleep(1)
+            waited += 1
+            for info in cli.get_torrents(list(waiting), fields):
+                if info.files():
+                    magnetized[info.id] = info
+                    del waiting[info.id]
+            for torrent_id, torrent in list(waiting.items()):
+                if waited >= torrent.options['post']['magnetization_timeout']:
+                    log.warning('"%s" did not magnetize before the timeout elapsed, '
+                                'file list unavailable for processing.', torrent.entry['title'])
+                    del waiting[torrent_id]
+        return magnetized
+
+    def _select_files(self, cli, torrents, config, session):
+        """Sets up files_wanted/files_unwanted changes and renames files in `torrents` according to their options"""
+        for torrent in torrents:
+            # Filter list because "set" plugin doesn't validate based on schema
+            # Skip files only used if we have no main file
+            if 'skip_files' in torrent.options['post']:
+                torrent.options['post']['skip_files'] = _filter_list(torrent.options['post']['skip_files'])
+            if 'include_files' in torrent.options['post']:
+                torrent.options['post']['include_files'] = _filter_list(torrent.options['post']['include_files'])
+
+        # We need to index the files if any of the following are defined
+        torrents = [t for t in torrents if t.find_main_file or 'skip_files' in t.options['post']]
+        if not torrents:
+            return
+
+        fields = ['id', 'totalSize', 'files', 'priorities', 'wanted']
+        infos = dict((info.id, info) for info in cli.get_torrents([t.id for t in torrents], fields))
+        waiting = [t for t in torrents if t.id in infos and not t.downloaded and not infos[t.id].files() and
+                   t.options['post'].get('magnetization_timeout', 0) > 0]
+        if waiting:
+            infos.update(self._wait_for_files(cli, waiting, fields))
+
+        for torrent in torrents:
+            if torrent.id in infos:
+                self._select_torrent_files(cli, torrent, infos[torrent.id], config, session)
+
+    def _select_torrent_files(self, cli, torrent, info, config, session):
+        options = torrent.options
+        fl = info.files()
+        total_size = info.totalSize
+        skip_files = 'skip_files' in options['post']
+        find_main_file = torrent.find_main_file
+        main_id = None
+
+        # Find files based on config
+        dl_list = []
+        skip_list = []
+        main_list = []
+        full_list = []
+        ext_list = ['*.srt', '*.sub', '*.idx', '*.ssa', '*.ass']
+
+        main_ratio = config['main_file_ratio']
+        if 'main_file_ratio' in options['post']:
+            main_ratio = options['post']['main_file_ratio']
+
+        for f in fl:
+            full_list.append(f)
+            # No need to set main_id if we're not going to need it
+            if find_main_file and fl[f]['size'] > total_size * main_ratio:
+                main_id = f
+
+            if 'include_files' in options['post']:
+                if _find_matches(fl[f]['name'], options['post']['include_files']):
+                    dl_list.append(f)
+                elif options['post'].get('include_subs') and _find_matches(fl[f]['name'], ext_list):
+                    dl_list.append(f)
+
+            if skip_files:
+                if _find_matches(fl[f]['name'], options['post']['skip_files']):
+                    skip_list.append(f)
+
+        if main_id is not None:
+
+            # Look for files matching main ID title but with a different extension
+            if options['post'].get('rename_like_files'):
+                for f in fl:
+                    # if this filename matches main filename we want to rename it as well
+                    fs = os.path.splitext(fl[f]['name'])
+                    if fs[0] == os.path.splitext(fl[main_id]['name'])[0]:
+                        main_list.append(f)
+            else:
+                main_list = [main_id]
+
+            if main_id not in dl_list:
+                dl_list.append(main_id)
+        elif find_main_file:
+            log.warning('No files in "%s" are > %d%% of content size, no files renamed.',
+                        torrent.entry['title'], main_ratio * 100)
+
+        # If we have a main file and want to rename it and associated files
+        if 'content_filename' in options['post'] and main_id is not None:
+            if 'download_dir' not in options['add']:
+                download_dir = session.download_dir
+            else:
+                download_dir = options['add']['download_dir']
+
+            # Get new filename without ext
+            file_ext = os.path.splitext(fl[main_id]['name'])[1]
+            file_path = os.path.dirname(os.path.join(download_dir, fl[main_id]['name']))
+            filename = options['post']['content_filename']
+            if config['host'] == 'localhost' or config['host'] == '127.0.0.1':
+                counter = 1
+                while os.path.exists(os.path.join(file_path, filename + file_ext)):
+                    # Try appending a (#) suffix till a unique filename is found
+                    filename = '%s(%s)' % (options['post']['content_filename'], counter)
+                    counter += 1
+            else:
+                log.debug('Cannot ensure content_filename is unique '
+                          'when adding to a remote transmission daemon.')
+
+            for index in main_list:
+                file_ext = os.path.splitext(fl[index]['name'])[1]
+                log.debug('File %s renamed to %s' % (fl[index]['name'], filename + file_ext))
+                # change to below when set_files will allow setting name, more efficient to have one call
+                # fl[index]['name'] = os.path.basename(pathscrub(filename + file_ext).encode('utf-8'))
+                try:
+                    cli.rename_torrent_path(torrent.id, fl[index]['name'],
+                                            os.path.basename(str(pathscrub(filename + file_ext))))
+                except TransmissionError:
+                    log.error('content_filename only supported with transmission 2.8+')
+
+        if options['post'].get('main_file_only') and main_id is not None:
+            # Set Unwanted Files
+            options['change']['files_unwanted'] = [x for x in full_list if x not in dl_list]
+            options['change']['files_wanted'] = dl_list
+            log.debug('Downloading %s of %s files in torrent.',
+                      len(options['change']['files_wanted']), len(full_list))
+        elif (not options['post'].get('main_file_only') or main_id is None) and skip_files:
+            # If no main file and we want to skip files
+
+            if len(skip_list) >= len(full_list):
+                log.debug('skip_files filter would cause no files to be downloaded; '
+                          'including all files in torrent.')
+            else:
+                options['change']['files_unwanted'] = skip_list
+                options['change']['files_wanted'] = [x for x in full_list if x not in skip_list]
+                log.debug('Downloading %s of %s files in torrent.',
+                          len(options['change']['files_wanted']), len(full_list))
 
     def on_task_exit(self, task, config):
         """Make sure all temp files are cleaned up when task exits"""
@@ -627,6 +707,10 @@ class PluginTransmissionClean(TransmissionBase):
         enabled: yes
     """
 
+    clean_fields = ['id', 'name', 'status', 'leftUntilDone', 'uploadRatio', 'addedDate', 'doneDate', 'activityDate',
+                    'trackers', 'downloadDir', 'seedRatioMode', 'seedRatioLimit', 'seedIdleMode', 'seedIdleLimit']
+    file_fields = ['id', 'totalSize', 'downloadDir', 'files', 'priorities', 'wanted']
+
     def validator(self):
         """Return config validator"""
         root = validator.factory()
@@ -659,11 +743,21 @@ class PluginTransmissionClean(TransmissionBase):
 
         session = self.client.get_session()
 
+        # Only the fields needed to decide are fetched. Torrents which still have something left to download can't be
+        # finished, file lists are only fetched for the rest.
+        torrents = [torrent for torrent in self.client.get_torrents(arguments=self.clean_fields)
+                    if not torrent.leftUntilDone]
+        files = {}
+        if torrents:
+            for torrent in self.client.get_torrents([torrent.id for torrent in torrents], self.file_fields):
+                files[torrent.id] = torrent
         remove_ids = []
-        for torrent in self.client.get_torrents():
+        for torrent in torrents:
+            if torrent.id not in files:
+                continue
             log.verbose('Torrent "%s": status: "%s" - ratio: %s -  date added: %s - date done: %s' %
                         (torrent.name, torrent.status, torrent.ratio, torrent.date_added, torrent.date_done))
-            downloaded, dummy = self.torrent_info(torrent, config)
+            downloaded, dummy = self.torrent_info(files[torrent.id], config)
             seed_ratio_ok, idle_limit_ok = self.check_seed_limits(torrent, session)
             tracker_hosts = (urlparse(tracker['announce']).hostname for tracker in torrent.trackers)
             is_clean_all = nrat is None and nfor is None and trans_checks is None
@@ -697,6 +791,12 @@ class PluginTransmissionClean(TransmissionBase):
             self.client.remove_torrent(remove_ids, delete_files)
 
 
+@event('manager.config_updated')
+def config_updated(manager):
+    # Connection details may have changed, clients are created again when needed
+    rpc_clients.clear()
+
+
 @event('plugin.register')
 def register_plugin():
     plugin.register(PluginTransmission, 'transmission', api_ver=2)
@@ -0,0 +1,168 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import fnmatch
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from flexget import plugin
+from flexget.event import event
+from flexget.task import Task
+from flexget.task_queue import TaskQueue
+from flexget.utils import requests
+from flexget.utils.instrumentation import Histogram
+
+log = logging.getLogger('hot_tasks')
+
+# Entry field holding the time (seconds since epoch) an injected entry was received, e.g. when it was announced
+RECEIVED_FIELD = 'hot_task_received'
+# Upper bounds in seconds of the announce to output latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# The `HotTasks` instance of the running manager
+hot_tasks = None
+
+
+class KeptTask(object):
+    """
+    Config and http session of a task, kept between its hot executions. Only the lookup of the config and the http
+    connections are saved, each execution still copies the config and runs the start phase (templates, includes,
+    config validation by the plugins etc.) like any other.
+    """
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.requests = requests.Session()
+
+
+class HotTasks(object):
+    """
+    Runs tasks fed with injected entries (e.g. IRC announces) as fast as possible.
+
+    Compared to `Manager.execute`:
+
+    - tasks are run by an urgent task queue of their own, they go before the tasks waiting in the manager queue. Only
+      the task currently executing holds them up, tasks of both queues are never executed at the same time since
+      plugins keep the state of the running task on themselves.
+    - the config file isn't checked for changes for each execution, the task config is looked up once and dropped when
+      the config is reloaded. The start phase still runs for each execution.
+    - the http session of a task is kept, so connections to e.g. the torrent client stay open
+    - the input phase and database cleanup are skipped
+
+    The time from receiving an entry to the end of the output phase is recorded per task, see `latency`.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.queue = TaskQueue(name='hot_task_queue', urgent=True)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self._kept = {}
+        self._lock = threading.Lock()
+
+    def match(self, pattern):
+        """
+        Returns the names of the tasks matching `pattern` the way `Manager.execute` matches them (case insensitive,
+        wildcards allowed), raises ValueError if there are none.
+        """
+        tasks = self.manager.config['tasks']
+        names = [name for name in tasks if fnmatch.fnmatchcase(str(name).lower(), pattern.lower())]
+        if not names:
+            raise ValueError('`%s` does not match any tasks' % pattern)
+        return sorted(names, key=lambda name: tasks[name].get('priority', 65535))
+
+    def kept(self, name):
+        """Returns the `KeptTask` for task `name`, raises ValueError if there is no such task."""
+        with self._lock:
+            kept = self._kept.get(name)
+            if kept is None:
+                config = self.manager.config['tasks'].get(name)
+                if config is None:
+                    raise ValueError('`%s` does not match any tasks' % name)
+                kept = self._kept[name] = KeptTask(name, config)
+            return kept
+
+    def reset(self):
+        """Drops the kept tasks, they are looked up again in the current config when next injected to."""
+        with self._lock:
+            kept, self._kept = self._kept, {}
+        for task in kept.values():
+            task.requests.close()
+
+    def inject(self, pattern, entries):
+        """
+        Queues an execution with `entries` of each task matching `pattern`.
+
+        :return: List of the queued `Task` instances
+        """
+        names = self.match(pattern)
+        if not self.queue.is_alive():
+            self.queue.start()
+        received = time.time()
+        for entry in entries:
+            entry.setdefault(RECEIVED_FIELD, received)
+        tasks = []
+        for name in names:
+            kept = self.kept(name)
+            options = {'tasks': [name], 'cron': True, 'inject': entries, 'allow_manual': True, 'hot': True}
+            task = Task(self.manager, name, config=kept.config, options=options, priority=0)
+            task.requests = kept.requests
+            self.queue.put(task)
+            tasks.append(task)
+        return tasks
+
+    def observe(self, task):
+        for entry in task.accepted:
+            received = entry.get(RECEIVED_FIELD)
+            if received is not None:
+                self.latency[task.name].observe(time.time() - received)
+
+    def status(self):
+        return {
+            'alive': self.queue.is_alive(),
+            'queued': len(self.queue),
+            'kept': sorted(self._kept),
+            'latency': dict((name, histogram.to_dict()) for name, histogram in self.latency.items())
+        }
+
+    def shutdown(self):
+        self.queue.shutdown(finish_queue=False)
+        self.reset()
+
+
+def get_hot_tasks(manager):
+    """Returns the `HotTasks` of `manager`, created on first use."""
+    global hot_tasks
+    if hot_tasks is None or hot_tasks.manager is not manager:
+        hot_tasks = HotTasks(manager)
+    return hot_tasks
+
+
+class HotTaskLatency(object):
+    """Records the announce to output latency of accepted entries in hot executions."""
+
+    @plugin.priority(-255)
+    def on_task_output(self, task, config):
+        if hot_tasks is not None and getattr(task.options, 'hot', False):
+            hot_tasks.observe(task)
+
+
+@event('manager.config_updated')
+def config_updated(manager):
+    if hot_tasks is not None:
+        hot_tasks.reset()
+
+
+@event('manager.shutdown')
+def shutdown(manager):
+    global hot_tasks
+    if hot_tasks is not None:
+        hot_tasks.shutdown()
+        hot_tasks = None
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(HotTaskLatency, 'hot_task_latency', builtin=True, api_ver=2)
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals, division, absolute_import, with_statement
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from past.builtins import basestring
+from future.moves.urllib.parse import quote
 
 import os
 import re
@@ -10,13 +11,13 @@ from xml.etree.ElementTree import parse
 import io
 from uuid import uuid4
 import time
-import urllib
 from datetime import datetime, timedelta
 
 from flexget.entry import Entry
 from flexget.config_schema import register_config_key
 from flexget.event import event
 from flexget.manager import manager
+from flexget.plugins.daemon.hot_tasks import RECEIVED_FIELD, get_hot_tasks
 from flexget.config_schema import one_or_more
 from flexget.utils import requests
 from flexget.utils.tools import get_config_hash
@@ -70,6 +71,7 @@ schema = {
                     'queue_size': {'type': 'integer', 'default': 1},
                     'use_ssl': {'type': 'boolean', 'default': False},
                     'task_delay': {'type': 'integer'},
+                    'hot_tasks': {'type': 'boolean', 'default': False},
                 },
                 'anyOf': [
                     {'required': ['server', 'channels']},
@@ -141,6 +143,272 @@ class MissingConfigOption(Exception):
     """Exception thrown when a config option specified in the tracker file is not on the irc config"""
 
 
+def parse_patterns(patterns):
+    """
+    Parses the patterns and creates a tuple with the compiled regex pattern and the variables it produces
+    :param patterns: list of regex patterns as .tracker XML
+    :return: list of (regex, variables, optional)-pairs, variables are already prefixed with irc_
+    """
+    result = []
+    for pattern in patterns:
+        rx = re.compile(pattern.find('regex').get('value'), re.UNICODE | re.MULTILINE)
+        vals = [irc_prefix(var.get('name')) for var in pattern.find('vars')]
+        optional = True if pattern.get('optional', 'false').lower() == 'true' else False
+        result.append((rx, vals, optional))
+    return result
+
+
+def match_message_patterns(patterns, msg):
+    """
+    Tries to match the message to the list of patterns. Supports multiline messages.
+    :param patterns: list of (regex, variables, optional) as returned by `parse_patterns`
+    :param msg: The parsed IRC message
+    :return: A dict of the variables and their extracted values
+    """
+    result = {}
+    for rx, val_names, _ in patterns:
+        log.debug('Using pattern %s to parse message vars', rx.pattern)
+        match = rx.search(msg)
+        if match:
+            result.update(zip(val_names, [strip_whitespace(x) for x in match.groups()]))
+            log.debug('Found: %s', result)
+            break
+        else:
+            log.debug('No matches found for %s in %s', rx.pattern, msg)
+    return result
+
+
+def _var_names(element):
+    """Prefixed names of the vars bound by an extract element."""
+    vars_element = element.find('vars')
+    if vars_element is None:
+        return None
+    return [irc_prefix(var.get('name')) for var in vars_element if var.tag == 'var']
+
+
+def _compile_var(rule, config):
+    # Concat a var from strings and other vars. Config values are looked up now, the vars when the rule runs.
+    parts = []
+    for element in rule:
+        if element.tag == 'string':
+            parts.append((None, element.get('value'), False))
+        elif element.tag in ['var', 'varenc']:
+            varname = element.get('name')
+            parts.append((irc_prefix(varname), config.get(varname), element.tag == 'varenc'))
+        else:
+            log.error('Unsupported var operation %s, skipping rule', element.tag)
+            return
+    target_var = irc_prefix(rule.get('name'))
+
+    def var(fields, ignored):
+        result = ''
+        for name, value, encode in parts:
+            if name in fields:
+                value = fields[name]
+            elif name is not None and not value:
+                log.error('Missing variable %s from config, skipping rule', name)
+                return
+            if encode:
+                value = quote(value.encode('utf-8'))
+            result += value
+        fields[target_var] = result
+
+    return var
+
+
+def _compile_varreplace(rule, config):
+    # Replace text in a var
+    source_var = irc_prefix(rule.get('srcvar'))
+    target_var = irc_prefix(rule.get('name'))
+    regex = rule.get('regex')
+    replace = rule.get('replace')
+    if not source_var or not target_var or regex is None or replace is None:
+        log.error('Invalid varreplace options, skipping rule')
+        return
+    rx = re.compile(regex)
+
+    def varreplace(fields, ignored):
+        if source_var in fields:
+            fields[target_var] = rx.sub(replace, fields[source_var])
+        else:
+            log.error('Invalid varreplace options, skipping rule')
+
+    return varreplace
+
+
+def _compile_extract(rule, config):
+    # Create multiple vars from a single regex
+    source_var = irc_prefix(rule.get('srcvar'))
+    required = rule.get('optional', 'false') == 'false'
+    rx = re.compile(rule.find('regex').get('value')) if rule.find('regex') is not None else None
+    if rx is None:
+        log.error('Regex option missing on extract rule, skipping rule')
+    group_names = _var_names(rule) or []
+
+    def extract(fields, ignored):
+        if source_var not in fields:
+            if required:
+                log.error('Error processing extract rule, non-optional value %s missing!', source_var)
+            ignored.add(source_var)
+            return
+        if rx is None:
+            return
+        match = rx.search(fields[source_var])
+        if match:
+            fields.update(zip(group_names, match.groups()))
+        else:
+            log.debug('No match found for rule extract')
+
+    return extract
+
+
+def _compile_extracttags(rule, config):
+    # Set a var if a regex matches a tag in a var
+    source_var = irc_prefix(rule.get('srcvar'))
+    split = rule.get('split')
+    setters = []
+    for element in rule:
+        if element.tag != 'setvarif':
+            continue
+        regex = element.get('regex')
+        value = element.get('value')
+        new_value = element.get('newValue')
+        if regex is None and (value is None or new_value is None):
+            log.error('Missing regex/value/newValue for setvarif command, ignoring')
+            continue
+        setters.append((irc_prefix(element.get('varName')), re.compile(regex) if regex is not None else None,
+                        value, new_value))
+
+    def extracttags(fields, ignored):
+        if source_var in ignored or source_var not in fields:
+            return
+        values = [strip_whitespace(x) for x in fields[source_var].split(split)]
+        for target_var, rx, value, new_value in setters:
+            if rx is not None:
+                found_match = False
+                for val in values:
+                    if rx.match(val):
+                        fields[target_var] = val
+                        found_match = True
+                if not found_match:
+                    log.debug('No matches found for regex %s', rx.pattern)
+            elif value in values:
+                fields[target_var] = new_value
+            else:
+                log.debug('No match found for value %s in %s', value, source_var)
+
+    return extracttags
+
+
+def _compile_extractone(rule, config):
+    # Extract one var from a list of regexes
+    extracts = []
+    for element in rule:
+        if element.tag != 'extract':
+            log.error('Unsupported extractone tag: %s', element.tag)
+            continue
+        if element.find('regex') is None:
+            log.error('Regex option missing on extract rule, skipping.')
+            continue
+        var_names = _var_names(element)
+        if var_names is None:
+            log.error('No variable bindings found in extract rule, skipping.')
+            continue
+        extracts.append((irc_prefix(element.get('srcvar')), re.compile(element.find('regex').get('value')),
+                         var_names))
+
+    def extractone(fields, ignored):
+        for source_var, rx, var_names in extracts:
+            match = rx.match(fields.get(source_var, ''))
+            if match:
+                fields.update(zip(var_names, match.groups()))
+            else:
+                log.debug('No match for extract with regex: %s', rx.pattern)
+
+    return extractone
+
+
+def _compile_setregex(rule, config):
+    # Set a var if a regex matches
+    source_var = irc_prefix(rule.get('srcvar'))
+    regex = rule.get('regex')
+    target_var = irc_prefix(rule.get('varName'))
+    target_val = rule.get('newValue')
+    if not source_var or not regex or not target_var or not target_val:
+        log.error('Option missing on setregex, skipping rule')
+        return
+    rx = re.compile(regex)
+
+    def setregex(fields, ignored):
+        if source_var in fields and rx.search(fields[source_var]):
+            fields[target_var] = target_val
+
+    return setregex
+
+
+def _compile_if(rule, config):
+    # Run the nested rules if a regex matches
+    source_var = irc_prefix(rule.get('srcvar'))
+    regex = rule.get('regex')
+    if not source_var or not regex:
+        log.error('Option missing for if statement, skipping rule')
+        return
+    rx = re.compile(regex)
+    rules = compile_tracker_rules(rule, config)
+
+    def if_(fields, ignored):
+        if source_var in fields and rx.match(fields[source_var]):
+            run_tracker_rules(rules, fields)
+
+    return if_
+
+
+_rule_compilers = {
+    'var': _compile_var,
+    'varreplace': _compile_varreplace,
+    'extract': _compile_extract,
+    'extracttags': _compile_extracttags,
+    'extractone': _compile_extractone,
+    'setregex': _compile_setregex,
+    'if': _compile_if,
+}
+
+
+def compile_tracker_rules(rules, config):
+    """
+    Compiles the linematched rules of a tracker file into a list of functions, which are run on the irc fields of
+    every announced entry with `run_tracker_rules`. Regexes are compiled, variable names prefixed and config values
+    looked up once here, invalid rules are reported and left out.
+
+    :param rules: `linematched` element of the tracker file
+    :param dict config: irc config of the connection
+    :return: list of functions
+    """
+    compiled = []
+    for rule in rules:
+        compiler = _rule_compilers.get(rule.tag)
+        if compiler is None:
+            log.warning('Unsupported linematched tag: %s', rule.tag)
+            continue
+        compiled_rule = compiler(rule, config)
+        if compiled_rule is not None:
+            compiled.append(compiled_rule)
+    return compiled
+
+
+def run_tracker_rules(rules, fields):
+    """
+    Runs rules compiled by `compile_tracker_rules` on `fields`, a dict of irc fields which is updated in place.
+
+    :return: `fields`
+    """
+    # Optional vars which were missing, rules using them are skipped
+    ignored = set()
+    for rule in rules:
+        rule(fields, ignored)
+    return fields
+
+
 class IRCConnection(IRCBot):
     def __init__(self, config, config_name):
         self.config = config
@@ -150,6 +418,7 @@ class IRCConnection(IRCBot):
         self.announcer_list = []
         self.ignore_lines = []
         self.message_regex = []
+        self.tracker_rules = []
 
         # If we have a tracker config file, load it
         tracker_config_file = config.get('tracker_file')
@@ -200,6 +469,11 @@ class IRCConnection(IRCBot):
             self.linepatterns = self.parse_patterns(list(
                 self.tracker_config.findall('parseinfo/linepatterns/extract')))
 
+            # Compile the rules run on every announced entry
+            linematched = self.tracker_config.find('parseinfo/linematched')
+            if linematched is not None:
+                self.tracker_rules = compile_tracker_rules(linematched, self.config)
+
         # overwrite tracker config with flexget config
         if self.config.get('server'):
             self.server_list = [self.config['server']]
@@ -237,6 +511,8 @@ class IRCConnection(IRCBot):
         self.inject_before_shutdown = False
         self.entry_queue = []
         self.line_cache = {}
+        # Time the first line waiting in the line cache was received, by channel and nickname
+        self.line_received = {}
         self.processing_message = False  # if set to True, it means there's a message processing queued
         self.thread = create_thread(self.connection_name, self)
 
@@ -336,18 +612,7 @@ class IRCConnection(IRCBot):
         return self.thread and self.thread.is_alive()
 
     def parse_patterns(self, patterns):
-        """
-        Parses the patterns and creates a tuple with the compiled regex pattern and the variables it produces
-        :param patterns: list of regex patterns as .tracker XML
-        :return: list of (regex, variables, optional)-pairs
-        """
-        result = []
-        for pattern in patterns:
-            rx = re.compile(pattern.find('regex').get('value'), re.UNICODE | re.MULTILINE)
-            vals = [var.get('name') for idx, var in enumerate(pattern.find('vars'))]
-            optional = True if pattern.get('optional', 'false').lower() == 'true' else False
-            result.append((rx, vals, optional))
-        return result
+        return parse_patterns(patterns)
 
     def quit(self):
         """
@@ -369,8 +634,12 @@ class IRCConnection(IRCBot):
             if isinstance(tasks, basestring):
                 tasks = [tasks]
             log.info('Injecting %d entries into tasks %s', len(self.entry_queue), ', '.join(tasks))
-            manager.execute(options={'tasks': tasks, 'cron': True, 'inject': self.entry_queue, 'allow_manual': True},
-                            priority=5)
+            if self.config['hot_tasks']:
+                for task in tasks:
+                    self.inject_hot(task, self.entry_queue)
+            else:
+                manager.execute(options={'tasks': tasks, 'cron': True, 'inject': self.entry_queue,
+                                         'allow_manual': True}, priority=5)
 
         if tasks_re:
             tasks_entry_map = {}
@@ -390,11 +659,21 @@ class IRCConnection(IRCBot):
 
             for task, entries in tasks_entry_map.items():
                 log.info('Injecting %d entries into task "%s"', len(entries), task)
-                manager.execute(options={'tasks': [task], 'cron': True, 'inject': entries, 'allow_manual': True},
-                                priority=5)
+                if self.config['hot_tasks']:
+                    self.inject_hot(task, entries)
+                else:
+                    manager.execute(options={'tasks': [task], 'cron': True, 'inject': entries, 'allow_manual': True},
+                                    priority=5)
 
         self.entry_queue = []
 
+    def inject_hot(self, task, entries):
+        """Runs `task` with `entries` in the hot task lane"""
+        try:
+            get_hot_tasks(manager).inject(task, entries)
+        except ValueError as e:
+            log.error(e)
+
     def queue_entry(self, entry):
         """
         Stores an entry in the connection entry queue, if the queue is over the size limit then submit them
@@ -410,184 +689,17 @@ class IRCConnection(IRCBot):
                 self.run_tasks()
 
     def match_message_patterns(self, patterns, msg):
-        """
-        Tries to match the message to the list of patterns. Supports multiline messages.
-        :param patterns: list of (regex, variable)-pairs
-        :param msg: The parsed IRC message
-        :param multiline: True if msg is multiline
-        :return: A dict of the variables and their extracted values
-        """
-        result = {}
-        for rx, vals, _ in patterns:
-            log.debug('Using pattern %s to parse message vars', rx.pattern)
-            match = rx.search(msg)
-            if match:
-                val_names = [irc_prefix(val.lower()) for val in vals]
-                val_values = [strip_whitespace(x) for x in match.groups()]
-                result.update(dict(zip(val_names, val_values)))
-                log.debug('Found: %s', dict(zip(val_names, val_values)))
-                break
-            else:
-                log.debug('No matches found for %s in %s', rx.pattern, msg)
-        return result
+        return match_message_patterns(patterns, msg)
 
-    def process_tracker_config_rules(self, entry, rules=None):
+    def process_tracker_config_rules(self, entry):
         """
         Processes an Entry object with the linematched rules defined in a tracker config file
         :param entry: Entry to be updated
-        :param rules: Ruleset to use.
-        :return:
+        :return: dict of the irc fields after processing
         """
-
-        ignore_optionals = []
-
-        if rules is None:
-            rules = self.tracker_config.find('parseinfo/linematched')
-
         # Make sure all irc fields from entry are in `fields`
         fields = {key: val for key, val in entry.items() if key.startswith('irc_')}
-
-        for rule in rules:
-            log.debug('Processing rule %s' % rule.tag)
-
-            # Var - concat a var from other vars
-            if rule.tag == 'var':
-                result = ''
-                for element in rule:
-                    if element.tag == 'string':
-                        result += element.get('value')
-                    elif element.tag in ['var', 'varenc']:
-                        varname = element.get('name')
-                        if irc_prefix(varname) in fields:
-                            value = fields[irc_prefix(varname)]
-                        elif self.config.get(varname):
-                            value = self.config.get(varname)
-                        else:
-                            log.error('Missing variable %s from config, skipping rule', irc_prefix(varname))
-                            break
-                        if element.tag == 'varenc':
-                            value = urllib.quote(value.encode('utf-8'))
-                        result += value
-                    else:
-                        log.error('Unsupported var operation %s, skipping rule', element.tag)
-                        break
-                else:
-                    # Only set the result if we processed all elements
-                    log.debug('Result for rule %s: %s=%s', rule.tag, rule.get('name'), result)
-                    fields[irc_prefix(rule.get('name'))] = result
-
-            # Var Replace - replace text in a var
-            elif rule.tag == 'varreplace':
-                source_var = irc_prefix(rule.get('srcvar'))
-                target_var = irc_prefix(rule.get('name'))
-                regex = rule.get('regex')
-                replace = rule.get('replace')
-                if source_var and target_var and regex is not None and replace is not None and source_var in fields:
-                    fields[target_var] = re.sub(regex, replace, fields[source_var])
-                    log.debug('varreplace: %s=%s', target_var, fields[target_var])
-                else:
-                    log.error('Invalid varreplace options, skipping rule')
-
-            # Extract - create multiple vars from a single regex
-            elif rule.tag == 'extract':
-                source_var = irc_prefix(rule.get('srcvar'))
-                if source_var not in fields:
-                    if rule.get('optional', 'false') == 'false':
-                        log.error('Error processing extract rule, non-optional value %s missing!', source_var)
-                    ignore_optionals.append(source_var)
-                    continue
-                if rule.find('regex') is not None:
-                    regex = rule.find('regex').get('value')
-                else:
-                    log.error('Regex option missing on extract rule, skipping rule')
-                    continue
-                group_names = [irc_prefix(x.get('name')) for x in rule.find('vars') if x.tag == 'var']
-                match = re.search(regex, fields[source_var])
-                if match:
-                    fields.update(dict(zip(group_names, match.groups())))
-                else:
-                    log.debug('No match found for rule extract')
-
-            # Extract Tag - set a var if a regex matches a tag in a var
-            elif rule.tag == 'extracttags':
-                source_var = irc_prefix(rule.get('srcvar'))
-                split = rule.get('split')
-                if source_var in ignore_optionals:
-                    continue
-                values = [strip_whitespace(x) for x in fields[source_var].split(split)]
-                for element in rule:
-                    if element.tag == 'setvarif':
-                        target_var = irc_prefix(element.get('varName'))
-                        regex = element.get('regex')
-                        value = element.get('value')
-                        new_value = element.get('newValue')
-                        if regex is not None:
-                            found_match = False
-                            for val in values:
-                                match = re.match(regex, val)
-                                if match:
-                                    fields[target_var] = val
-                                    found_match = True
-                            if not found_match:
-                                log.debug('No matches found for regex %s', regex)
-                        elif value is not None and new_value is not None:
-                            if value in values:
-                                fields[target_var] = new_value
-                            else:
-                                log.debug('No match found for value %s in %s', value, source_var)
-                        else:
-                            log.error('Missing regex/value/newValue for setvarif command, ignoring')
-
-            # Extract One - extract one var from a list of regexes
-            elif rule.tag == 'extractone':
-                for element in rule:
-                    if element.tag == 'extract':
-                        source_var = irc_prefix(element.get('srcvar'))
-                        if element.find('regex') is not None:
-                            regex = element.find('regex').get('value')
-                        else:
-                            log.error('Regex option missing on extract rule, skipping.')
-                            continue
-                        if element.find('vars') is not None:
-                            vars = [irc_prefix(var.get('name')) for var in element.find('vars')]
-                        else:
-                            log.error('No variable bindings found in extract rule, skipping.')
-                            continue
-                        match = re.match(regex, fields.get(source_var, ''))
-                        if match:
-                            fields.update(dict(zip(vars, match.groups())))
-                        else:
-                            log.debug('No match for extract with regex: %s', regex)
-                    else:
-                        log.error('Unsupported extractone tag: %s', element.tag)
-
-            # Set Regex - set a var if a regex matches
-            elif rule.tag == 'setregex':
-                source_var = irc_prefix(rule.get('srcvar'))
-                regex = rule.get('regex')
-                target_var = irc_prefix(rule.get('varName'))
-                target_val = rule.get('newValue')
-                if source_var and regex and target_var and target_val:
-                    if source_var in fields and re.search(regex, fields[source_var]):
-                        fields[target_var] = target_val
-                else:
-                    log.error('Option missing on setregex, skipping rule')
-
-            # If statement
-            elif rule.tag == 'if':
-                source_var = irc_prefix(rule.get('srcvar'))
-                regex = rule.get('regex')
-
-                if source_var and regex:
-                    if source_var in fields and re.match(regex, fields[source_var]):
-                        fields.update(self.process_tracker_config_rules(fields, rule))
-                else:
-                    log.error('Option missing for if statement, skipping rule')
-
-            else:
-                log.warning('Unsupported linematched tag: %s', rule.tag)
-
-        return fields
+        return run_tracker_rules(self.tracker_rules, fields)
 
     def on_privmsg(self, msg):
         """
@@ -606,9 +718,12 @@ class IRCConnection(IRCBot):
         self.line_cache[channel].setdefault(nickname, [])
 
         self.line_cache[channel][nickname].append(msg.arguments[1])
+        self.line_received.setdefault((channel, nickname), time.time())
         if not self.processing_message:
-            # Schedule a parse of the message in 1 second (for multilines)
-            self.schedule.queue_command(1, partial(self.process_message, nickname, channel))
+            # Schedule a parse of the message in 1 second (for multilines). Hot tasks don't wait for single line
+            # announcements.
+            delay = 0 if self.config['hot_tasks'] and not self.multilinepatterns else 1
+            self.schedule.queue_command(delay, partial(self.process_message, nickname, channel))
             self.processing_message = True
 
     def process_message(self, nickname, channel):
@@ -625,6 +740,7 @@ class IRCConnection(IRCBot):
 
         # Clean up the messages
         lines = [MESSAGE_CLEAN.sub('', line) for line in self.line_cache[channel][nickname]]
+        received = self.line_received.pop((channel, nickname), None)
 
         log.debug('Received line(s): %s', u'\n'.join(lines))
 
@@ -648,6 +764,9 @@ class IRCConnection(IRCBot):
 
             entry['url'] = entry.get('irc_torrenturl')
 
+            if received is not None:
+                entry[RECEIVED_FIELD] = received
+
             log.debug('Entry after processing: %s', dict(entry))
             if not entry['url'] or not entry['title']:
                 log.error('Parsing message failed. Title=%s, url=%s.', entry['title'], entry['url'])
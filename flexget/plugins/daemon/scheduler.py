@@ -3,6 +3,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import hashlib
 import logging
+from datetime import timedelta
 
 import pytz
 import tzlocal
@@ -15,6 +16,7 @@ from flexget.config_schema import register_config_key, format_checker, register_
 from flexget.event import event
 from flexget.manager import Base, manager
 from flexget.utils import json
+from flexget.utils.database import with_session
 
 log = logging.getLogger('scheduler')
 
@@ -64,6 +66,19 @@ cron_schema = {
     'additionalProperties': False
 }
 
+adaptive_schema = {
+    'type': 'object',
+    'title': 'Adaptive Interval',
+    'description': 'Runs the tasks more often while they find new entries, less often while they find nothing.',
+    'properties': {
+        'min': interval_schema,
+        'max': interval_schema,
+        'factor': {'type': 'number', 'minimum': 1}
+    },
+    'required': ['min', 'max'],
+    'additionalProperties': False
+}
+
 schedule_schema = {
     'type': 'object',
     'title': 'Schedule',
@@ -71,13 +86,14 @@ schedule_schema = {
     'properties': {
         'tasks': {'type': ['array', 'string'], 'items': {'type': 'string'}},
         'interval': interval_schema,
-        'schedule': cron_schema
+        'schedule': cron_schema,
+        'adaptive': adaptive_schema
     },
     'required': ['tasks'],
     'minProperties': 2,
     'maxProperties': 2,
-    'error_minProperties': 'Either `cron` or `interval` must be defined.',
-    'error_maxProperties': 'Either `cron` or `interval` must be defined.',
+    'error_minProperties': 'Either `cron`, `interval` or `adaptive` must be defined.',
+    'error_maxProperties': 'Either `cron`, `interval` or `adaptive` must be defined.',
     'additionalProperties': False
 }
 
@@ -96,6 +112,11 @@ main_schema = {
     ]
 }
 
+# Default multiplier of the adaptive interval for each run in a row which found nothing new or failed
+ADAPTIVE_FACTOR = 2
+# Number of recent executions of a task looked at by the adaptive interval
+ADAPTIVE_HISTORY = 10
+
 scheduler = None
 scheduler_job_map = {}
 
@@ -105,14 +126,57 @@ def job_id(conf):
     return hashlib.sha1(json.dumps(conf, sort_keys=True).encode('utf-8')).hexdigest()
 
 
-def run_job(tasks):
-    """Add the execution to the queue and waits until it is finished"""
+def seconds(interval):
+    """Length of an `interval_schema` object in seconds."""
+    return timedelta(**interval).total_seconds()
+
+
+def is_idle(execution):
+    """True if `execution` failed or found no new entries, i.e. every produced entry was rejected or failed."""
+    if not execution.succeeded:
+        return True
+    new = (execution.produced or 0) - (execution.rejected or 0) - (execution.failed or 0)
+    return not execution.accepted and new <= 0
+
+
+@with_session
+def adaptive_interval(task_names, adaptive, session=None):
+    """
+    Seconds until the next run of an adaptive schedule for `task_names`. The minimum interval is multiplied by the
+    factor for each latest execution in a row which was idle (see `is_idle`), up to the maximum. With several tasks,
+    the busiest one decides.
+
+    :param adaptive: `adaptive_schema` config
+    """
+    from flexget.plugins.operate.status import get_recent_executions
+    minimum, maximum = seconds(adaptive['min']), seconds(adaptive['max'])
+    factor = adaptive.get('factor', ADAPTIVE_FACTOR)
+    intervals = []
+    for task_name in task_names:
+        idle_runs = 0
+        for execution in get_recent_executions(task_name, ADAPTIVE_HISTORY, session=session):
+            if not is_idle(execution):
+                break
+            idle_runs += 1
+        intervals.append(min(maximum, minimum * factor ** idle_runs))
+    return max(minimum, min(intervals)) if intervals else minimum
+
+
+def run_job(tasks, job_id=None, adaptive=None):
+    """
+    Add the execution to the queue and waits until it is finished. Jobs of adaptive schedules are then rescheduled
+    with an interval depending on what the tasks found.
+    """
     log.debug('executing tasks: %s', tasks)
     finished_events = manager.execute(options={'tasks': tasks, 'cron': True, 'allow_manual': False}, priority=5)
     for _, task_name, event_ in finished_events:
         log.debug('task finished executing: %s', task_name)
         event_.wait()
     log.debug('all tasks in schedule finished executing')
+    if adaptive and scheduler and scheduler.running:
+        interval = adaptive_interval([task_name for _, task_name, _ in finished_events], adaptive)
+        log.verbose('Next run of %s in %s', ', '.join(tasks), timedelta(seconds=int(interval)))
+        scheduler.reschedule_job(job_id, trigger='interval', seconds=interval)
 
 
 @event('manager.daemon.started')
@@ -175,15 +239,20 @@ def setup_jobs(manager):
         scheduler_job_map[id(job_config)] = jid
         if jid in existing_job_ids:
             continue
+        tasks = job_config['tasks']
+        if not isinstance(tasks, list):
+            tasks = [tasks]
+        kwargs = {}
         if 'interval' in job_config:
             trigger, trigger_args = 'interval', job_config['interval']
+        elif 'adaptive' in job_config:
+            # Starts at the minimum interval, rescheduled after every run
+            trigger, trigger_args = 'interval', job_config['adaptive']['min']
+            kwargs = {'job_id': jid, 'adaptive': job_config['adaptive']}
         else:
             trigger, trigger_args = 'cron', job_config['schedule']
-        tasks = job_config['tasks']
-        if not isinstance(tasks, list):
-            tasks = [tasks]
         name = ','.join(tasks)
-        scheduler.add_job(run_job, args=(tasks,), id=jid, name=name, trigger=trigger, **trigger_args)
+        scheduler.add_job(run_job, args=(tasks,), kwargs=kwargs, id=jid, name=name, trigger=trigger, **trigger_args)
     # Remove jobs no longer in config
     for jid in existing_job_ids:
         if jid not in configured_job_ids:
@@ -2,12 +2,74 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
+from collections import defaultdict
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.tools import is_plain
 
 log = logging.getLogger('crossmatch')
 
+# Length of the substrings indexing values for non exact matching
+GRAM_SIZE = 3
+
+
+def grams(value):
+    return set(value[i:i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1))
+
+
+class FieldIndex(object):
+    """
+    Finds the entries which may match a value in one field, without comparing the value to all of them.
+
+    With `exact`, entries are looked up by their value. Otherwise a value matches the ones it contains too. Each text
+    value is then indexed by its rarest substring of `GRAM_SIZE` characters, which any text containing the value
+    contains as well. Values which can't be indexed (too short, or of types with their own equality) are candidates
+    for every lookup.
+    """
+
+    def __init__(self, entries, field, exact=True):
+        self.exact = exact
+        self.positions = []
+        self.index = defaultdict(list)
+        self.always = []
+        values = []
+        for position, entry in enumerate(entries):
+            if field in entry:
+                self.positions.append(position)
+                values.append((position, entry[field]))
+        if exact:
+            for position, value in values:
+                if is_plain(value):
+                    self.index[value].append(position)
+                else:
+                    self.always.append(position)
+            return
+        value_grams = []
+        frequency = defaultdict(int)
+        for position, value in values:
+            if isinstance(value, str) and len(value) >= GRAM_SIZE:
+                value_grams.append((position, grams(value)))
+                for gram in value_grams[-1][1]:
+                    frequency[gram] += 1
+            else:
+                self.always.append(position)
+        for position, keys in value_grams:
+            self.index[min(keys, key=lambda gram: frequency[gram])].append(position)
+
+    def candidates(self, value):
+        """
+        :return: Positions of the entries that may match `value`, some of them might not
+        """
+        if self.exact and is_plain(value):
+            return self.index.get(value, []) + self.always
+        if not self.exact and isinstance(value, str):
+            found = list(self.always)
+            for gram in grams(value):
+                found.extend(self.index.get(gram, []))
+            return found
+        return self.positions
+
 
 class CrossMatch(object):
     """
@@ -66,12 +128,19 @@ class CrossMatch(object):
                     continue
 
         # perform action on intersecting entries
+        indexes = {}
         for entry in task.entries:
-            for generated_entry in match_entries:
+            candidates = self.candidates(entry, match_entries, fields, config.get('exact'), indexes)
+            current = 0
+            while current < len(candidates):
+                position = candidates[current]
+                current += 1
+                generated_entry = match_entries[position]
                 log.trace('checking if %s matches %s', entry['title'], generated_entry['title'])
                 common = self.entry_intersects(entry, generated_entry, fields, config.get('exact'))
                 if common:
                     msg = 'intersects with %s on field(s) %s' % (generated_entry['title'], ', '.join(common))
+                    added = [key for key in fields if key not in entry and key in generated_entry]
                     for key in generated_entry:
                         if key not in entry:
                             entry[key] = generated_entry[key]
@@ -79,6 +148,27 @@ class CrossMatch(object):
                         entry.reject(msg)
                     if action == 'accept':
                         entry.accept(msg)
+                    if added:
+                        # The entry has new values for the matched fields now, more generated entries may match
+                        candidates = [candidate for candidate in self.candidates(entry, match_entries, fields,
+                                                                                 config.get('exact'), indexes)
+                                      if candidate > position]
+                        current = 0
+
+    def candidates(self, entry, match_entries, fields, exact, indexes):
+        """
+        Positions of the entries in :match_entries: which may intersect with :entry:, in ascending order.
+
+        :param indexes: Dict of `FieldIndex` by field, indexes are added to it when first needed
+        """
+        found = set()
+        for field in fields:
+            if field not in entry:
+                continue
+            if field not in indexes:
+                indexes[field] = FieldIndex(match_entries, field, exact)
+            found.update(indexes[field].candidates(entry[field]))
+        return sorted(found)
 
     def entry_intersects(self, e1, e2, fields=None, exact=True):
         """
@@ -1,8 +1,10 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
+from collections import defaultdict, deque
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.tools import is_plain
 
 log = logging.getLogger('duplicates')
 
@@ -31,17 +33,36 @@ class Duplicates(object):
     def on_task_filter(self, task, config):
         field = config['field']
         action = config['action']
-        for entry in task.entries:
-            for prospect in task.entries:
-                if entry == prospect:
-                    continue
-                if entry[field] == prospect[field] and entry[field] is not None:
-                    msg = 'Field {} value {} equals on {} and {}'.format(
-                        field, entry[field], entry['title'], prospect['title'])
-                    if action == 'accept':
-                        entry.accept(msg)
-                    else:
-                        entry.reject(msg)
+        entries = list(task.entries)
+        values = dict((id(entry), entry.get(field)) for entry in entries)
+        # Entries by their plain field values, in task order. Entries with other values are compared to everything.
+        groups = defaultdict(deque)
+        others = []
+        for entry in entries:
+            if is_plain(values[id(entry)]):
+                groups[values[id(entry)]].append(entry)
+            else:
+                others.append(entry)
+        for entry in entries:
+            value = values[id(entry)]
+            if value is None:
+                continue
+            if is_plain(value) and not others:
+                group = groups[value]
+                # Duplicates rejected by now are no longer in the task, drop them
+                while group and group[0].rejected:
+                    group.popleft()
+                prospects = group
+            else:
+                prospects = (prospect for prospect in entries if values[id(prospect)] == value)
+            prospect = next((p for p in prospects if p is not entry and not p.rejected), None)
+            if prospect is None:
+                continue
+            msg = 'Field {} value {} equals on {} and {}'.format(field, value, entry['title'], prospect['title'])
+            if action == 'accept':
+                entry.accept(msg)
+            else:
+                entry.reject(msg)
 
 
 @event('plugin.register')
@@ -10,6 +10,7 @@ from path import Path
 from flexget import plugin
 from flexget.event import event
 from flexget.config_schema import one_or_more
+from flexget.plugins.internal.directory_index import index_directory
 
 log = logging.getLogger('exists')
 
@@ -38,25 +39,27 @@ class FilterExists(object):
             return
         log.verbose('Scanning path(s) for existing files.')
         config = self.prepare_config(config)
-        filenames = {}
-        for folder in config:
-            folder = Path(folder).expanduser()
-            if not folder.exists():
-                raise plugin.PluginWarning('Path %s does not exist' % folder, log)
-            for p in folder.walk(errors='ignore'):
-                key = p.name
-                # windows file system is not case sensitive
-                if platform.system() == 'Windows':
-                    key = key.lower()
-                filenames[key] = p
+        windows = platform.system() == 'Windows'
+        names = {}
         for entry in task.accepted:
             # priority is: filename, location (filename only), title
             name = Path(entry.get('filename', entry.get('location', entry['title']))).name
-            if platform.system() == 'Windows':
+            # windows file system is not case sensitive
+            if windows:
                 name = name.lower()
-            if name in filenames:
-                log.debug('Found %s in %s' % (name, filenames[name]))
-                entry.reject('exists in %s' % filenames[name])
+            names.setdefault(name, []).append(entry)
+        for folder in config:
+            folder = Path(folder).expanduser()
+            if not folder.exists():
+                raise plugin.PluginWarning('Path %s does not exist' % folder, log)
+            tree = index_directory(task.session, folder)
+            for indexed in tree.find_names(task.session, list(names), ignore_case=windows):
+                name = indexed.name.lower() if windows else indexed.name
+                for entry in names.get(name, []):
+                    if entry.rejected:
+                        continue
+                    log.debug('Found %s in %s' % (name, indexed.path))
+                    entry.reject('exists in %s' % indexed.path)
 
 
 @event('plugin.register')
@@ -11,6 +11,7 @@ from flexget import plugin
 from flexget.config_schema import one_or_more
 from flexget.event import event
 from flexget.plugin import get_plugin_by_name
+from flexget.plugins.internal.directory_index import index_directory
 from flexget.utils.tools import TimedDict
 
 log = logging.getLogger('exists_movie')
@@ -105,18 +106,19 @@ class FilterExistsMovie(object):
 
             # scan through
             items = []
+            tree = index_directory(task.session, folder)
             if config.get('type') == 'dirs':
-                for d in folder.walkdirs(errors='ignore'):
+                for d in tree.contents(task.session, is_dir=True):
                     if self.dir_pattern.search(d.name):
                         continue
                     log.debug('detected dir with name %s, adding to check list' % d.name)
-                    items.append(d.name)
+                    items.append(d)
             elif config.get('type') == 'files':
-                for f in folder.walkfiles(errors='ignore'):
+                for f in tree.contents(task.session, is_dir=False):
                     if not self.file_pattern.search(f.name):
                         continue
                     log.debug('detected file with name %s, adding to check list' % f.name)
-                    items.append(f.name)
+                    items.append(f)
 
             if not items:
                 log.verbose('No items with type %s were found in %s' % (config.get('type'), folder))
@@ -125,26 +127,28 @@ class FilterExistsMovie(object):
             for item in items:
                 count_files += 1
 
-                movie = get_plugin_by_name('parsing').instance.parse_movie(item)
+                # The index remembers parse results, names are only parsed the first time they are seen
+                if not item.parsed_movie():
+                    item.remember_movie(get_plugin_by_name('parsing').instance.parse_movie(item.name))
 
                 if config.get('lookup') == 'imdb':
                     try:
-                        imdb_id = imdb_lookup.imdb_id_lookup(movie_title=movie.name,
-                                                             movie_year=movie.year,
-                                                             raw_title=item,
+                        imdb_id = imdb_lookup.imdb_id_lookup(movie_title=item.movie_name,
+                                                             movie_year=item.movie_year,
+                                                             raw_title=item.name,
                                                              session=task.session)
                         if imdb_id in path_ids:
-                            log.trace('duplicate %s' % item)
+                            log.trace('duplicate %s' % item.name)
                             continue
                         if imdb_id is not None:
                             log.trace('adding: %s' % imdb_id)
-                            path_ids[imdb_id] = movie.quality
+                            path_ids[imdb_id] = item.movie_quality
                     except plugin.PluginError as e:
-                        log.trace('%s lookup failed (%s)' % (item, e.value))
+                        log.trace('%s lookup failed (%s)' % (item.name, e.value))
                         incompatible_files += 1
                 else:
-                    path_ids[movie.name] = movie.quality
-                    log.trace('adding: %s' % movie.name)
+                    path_ids[item.movie_name] = item.movie_quality
+                    log.trace('adding: %s' % item.movie_name)
 
             # store to cache and extend to found list
             self.cache[folder] = path_ids
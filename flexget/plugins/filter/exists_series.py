@@ -13,6 +13,7 @@ from flexget.utils.log import log_once
 from flexget.utils.template import RenderError
 from flexget.plugins.parsers import ParseWarning
 from flexget.plugin import get_plugin_by_name
+from flexget.plugins.internal.directory_index import index_directory
 
 log = logging.getLogger('exists_series')
 
@@ -75,45 +76,51 @@ class FilterExistsSeries(object):
 
         # scan through
         # For speed, only test accepted entries since our priority should be after everything is accepted.
+        trees = []
+        for folder in paths:
+            folder = Path(folder).expanduser()
+            if not folder.isdir():
+                log.warning('Directory %s does not exist', folder)
+                continue
+            trees.append(index_directory(task.session, folder))
+
         for series in accepted_series:
             # make new parser from parser in entry
             series_parser = accepted_series[series][0]['series_parser']
-            for folder in paths:
-                folder = Path(folder).expanduser()
-                if not folder.isdir():
-                    log.warning('Directory %s does not exist', folder)
-                    continue
-
-                for filename in folder.walk(errors='ignore'):
-                    # run parser on filename data
-                    try:
-                        disk_parser = get_plugin_by_name('parsing').instance.parse_series(data=filename.name,
-                                                                                          name=series_parser.name)
-                    except ParseWarning as pw:
-                        disk_parser = pw.parsed
-                        log_once(pw.value, logger=log)
-                    if disk_parser.valid:
-                        log.debug('name %s is same series as %s', filename.name, series)
-                        log.debug('disk_parser.identifier = %s', disk_parser.identifier)
-                        log.debug('disk_parser.quality = %s', disk_parser.quality)
-                        log.debug('disk_parser.proper_count = %s', disk_parser.proper_count)
+            for tree in trees:
+                # Only names starting like the series name are candidates, each is parsed once per series
+                for indexed, indexed_series in tree.series_candidates(task.session, series_parser.name):
+                    if indexed_series is None:
+                        # run parser on filename data
+                        try:
+                            disk_parser = get_plugin_by_name('parsing').instance.parse_series(
+                                data=indexed.name, name=series_parser.name)
+                        except ParseWarning as pw:
+                            disk_parser = pw.parsed
+                            log_once(pw.value, logger=log)
+                        indexed_series = indexed.remember_series(series_parser.name, disk_parser)
+                    if indexed_series.valid:
+                        log.debug('name %s is same series as %s', indexed.name, series)
+                        log.debug('disk_parser.identifier = %s', indexed_series.identifier)
+                        log.debug('disk_parser.quality = %s', indexed_series.quality)
+                        log.debug('disk_parser.proper_count = %s', indexed_series.proper_count)
 
                         for entry in accepted_series[series]:
                             log.debug('series_parser.identifier = %s', entry['series_parser'].identifier)
-                            if disk_parser.identifier != entry['series_parser'].identifier:
+                            if indexed_series.identifier != entry['series_parser'].identifier:
                                 log.trace('wrong identifier')
                                 continue
                             log.debug('series_parser.quality = %s', entry['series_parser'].quality)
                             if config.get('allow_different_qualities') == 'better':
-                                if entry['series_parser'].quality > disk_parser.quality:
+                                if entry['series_parser'].quality > indexed_series.quality:
                                     log.trace('better quality')
                                     continue
                             elif config.get('allow_different_qualities'):
-                                if disk_parser.quality != entry['series_parser'].quality:
+                                if indexed_series.quality != entry['series_parser'].quality:
                                     log.trace('wrong quality')
                                     continue
                             log.debug('entry parser.proper_count = %s', entry['series_parser'].proper_count)
-                            if disk_parser.proper_count >= entry['series_parser'].proper_count:
+                            if indexed_series.proper_count >= entry['series_parser'].proper_count:
                                 entry.reject('proper already exists')
                                 continue
                             else:
@@ -9,6 +9,7 @@ from flexget import plugin
 from flexget.config_schema import one_or_more
 from flexget.entry import Entry
 from flexget.event import event
+from flexget.utils.regexp import RegexpMatcher
 
 from future.moves.urllib.parse import unquote
 
@@ -145,32 +146,31 @@ class FilterRegexp(object):
     def on_task_filter(self, task, config):
         # TODO: what if accept and accept_excluding configured? Should raise error ...
         config = self.prepare_config(config)
-        rest = []
+        rest = None
         for operation, regexps in config.items():
             if operation == 'rest':
                 continue
             leftovers = self.filter(task, operation, regexps)
-            if not rest:
+            if rest is None:
                 rest = leftovers
             else:
-                # If there is already something in rest, take the intersection with r (entries no operations matched)
-                rest = [entry for entry in leftovers if entry in rest]
+                # Take the intersection with entries no previous operation matched. Entries are compared by
+                # identity, comparing them as dicts is slow and could mix up entries with the same fields.
+                leftover_ids = set(id(entry) for entry in leftovers)
+                rest = [entry for entry in rest if id(entry) in leftover_ids]
 
         if 'rest' in config:
             rest_method = Entry.accept if config['rest'] == 'accept' else Entry.reject
-            for entry in rest:
+            for entry in rest or []:
                 log.debug('Rest method %s for %s' % (config['rest'], entry['title']))
                 rest_method(entry, 'regexp `rest`')
 
-    def matches(self, entry, regexp, find_from=None, not_regexps=None):
+    def field_values(self, entry, find_from=None):
         """
-        Check if :entry: has any string fields or strings in a list field that match :regexp:
+        Yields (field, value) for the string fields of :entry: and strings in its list fields
 
         :param entry: Entry instance
-        :param regexp: Compiled regexp
         :param find_from: None or a list of fields to search from
-        :param not_regexps: None or list of regexps that can NOT match
-        :return: Field matching
         """
         unquote_fields = ['url']
         for field in find_from or ['title', 'description']:
@@ -186,15 +186,69 @@ class FilterRegexp(object):
                     value = str(value)
                 if field in unquote_fields:
                     value = unquote(value)
-                    # If none of the not_regexps match
-                if regexp.search(value):
-                    # Make sure the not_regexps do not match for this field
-                    for not_regexp in not_regexps or []:
-                        if self.matches(entry, not_regexp, find_from=[field]):
-                            entry.trace('Configured not_regexp %s matched, ignored' % not_regexp)
-                            break
-                    else:  # None of the not_regexps matched
-                        return field
+                yield field, value
+
+    def matches(self, entry, regexp, find_from=None, not_regexps=None):
+        """
+        Check if :entry: has any string fields or strings in a list field that match :regexp:
+
+        :param entry: Entry instance
+        :param regexp: Compiled regexp
+        :param find_from: None or a list of fields to search from
+        :param not_regexps: None or list of regexps that can NOT match
+        :return: Field matching
+        """
+        for field, value in self.field_values(entry, find_from):
+            if regexp.search(value):
+                # Make sure the not_regexps do not match for this field
+                for not_regexp in not_regexps or []:
+                    if self.matches(entry, not_regexp, find_from=[field]):
+                        entry.trace('Configured not_regexp %s matched, ignored' % not_regexp)
+                        break
+                else:  # None of the not_regexps matched
+                    return field
+
+    def prepare_matchers(self, regexps):
+        """
+        Groups regexps by the fields they search from, so that the values of these fields are only extracted once
+        per entry.
+
+        :param regexps: list of {compiled_regexp: options} dictionaries
+        :return: Dict of {tuple of `from` fields or None: RegexpMatcher}
+        """
+        groups = {}
+        for index, regexp_opts in enumerate(regexps):
+            regexp, opts = list(regexp_opts.items())[0]
+            find_from = tuple(opts['from']) if opts.get('from') else None
+            groups.setdefault(find_from, ([], []))
+            groups[find_from][0].append(regexp)
+            groups[find_from][1].append(index)
+        return dict((find_from, RegexpMatcher(group_regexps, indexes))
+                    for find_from, (group_regexps, indexes) in groups.items())
+
+    def first_match(self, entry, regexps, matchers):
+        """
+        Finds the first of :regexps: which matches :entry:, same as calling `matches` for each of them in order.
+
+        :return: Tuple of (index of the regexp, field matching), or (None, None)
+        """
+        start = 0
+        while True:
+            candidate = None
+            for find_from, matcher in matchers.items():
+                for field, value in self.field_values(entry, find_from):
+                    # Only regexps before the current candidate are of interest
+                    index = matcher.first_match(value, start=start, stop=candidate)
+                    if index is not None:
+                        candidate = index
+            if candidate is None:
+                return None, None
+            # The regexp matches some field, check `not` regexps and find out which field matched first
+            regexp, opts = list(regexps[candidate].items())[0]
+            field = self.matches(entry, regexp, opts.get('from'), opts.get('not'))
+            if field:
+                return candidate, field
+            start = candidate + 1
 
     def filter(self, task, operation, regexps):
         """
@@ -208,35 +262,38 @@ class FilterRegexp(object):
         rest = []
         method = Entry.accept if 'accept' in operation else Entry.reject
         match_mode = 'excluding' not in operation
+        matchers = self.prepare_matchers(regexps) if match_mode else None
         for entry in task.entries:
             log.trace('testing %i regexps to %s' % (len(regexps), entry['title']))
-            for regexp_opts in regexps:
-                regexp, opts = list(regexp_opts.items())[0]
-
-                # check if entry matches given regexp configuration
-                field = self.matches(entry, regexp, opts.get('from'), opts.get('not'))
-
-                # Run if we are in match mode and have a hit, or are in non-match mode and don't have a hit
-                if match_mode == bool(field):
-                    # Creates the string with the reason for the hit
-                    matchtext = 'regexp \'%s\' ' % regexp.pattern + ('matched field \'%s\'' %
-                                                                     field if match_mode else 'didn\'t match')
-                    log.debug('%s for %s' % (matchtext, entry['title']))
-                    # apply settings to entry and run the method on it
-                    if opts.get('path'):
-                        entry['path'] = opts['path']
-                    if opts.get('set'):
-                        # invoke set plugin with given configuration
-                        log.debug('adding set: info to entry:"%s" %s' % (entry['title'], opts['set']))
-                        set = plugin.get_plugin_by_name('set')
-                        set.instance.modify(entry, opts['set'])
-                    method(entry, matchtext)
-                    # We had a match so break out of the regexp loop.
-                    break
+            if match_mode:
+                index, field = self.first_match(entry, regexps, matchers)
             else:
+                # Look for the first regexp which doesn't match
+                for index, regexp_opts in enumerate(regexps):
+                    regexp, opts = list(regexp_opts.items())[0]
+                    if not self.matches(entry, regexp, opts.get('from'), opts.get('not')):
+                        break
+                else:
+                    index = None
+            if index is None:
                 # We didn't run method for any of the regexps, add this entry to rest
                 entry.trace('None of configured %s regexps matched' % operation)
                 rest.append(entry)
+                continue
+            regexp, opts = list(regexps[index].items())[0]
+            # Creates the string with the reason for the hit
+            matchtext = 'regexp \'%s\' ' % regexp.pattern + ('matched field \'%s\'' %
+                                                             field if match_mode else 'didn\'t match')
+            log.debug('%s for %s' % (matchtext, entry['title']))
+            # apply settings to entry and run the method on it
+            if opts.get('path'):
+                entry['path'] = opts['path']
+            if opts.get('set'):
+                # invoke set plugin with given configuration
+                log.debug('adding set: info to entry:"%s" %s' % (entry['title'], opts['set']))
+                set = plugin.get_plugin_by_name('set')
+                set.instance.modify(entry, opts['set'])
+            method(entry, matchtext)
         return rest
 
 
@@ -21,7 +21,7 @@ from sqlalchemy.schema import ForeignKey
 from flexget import db_schema, plugin
 from flexget.event import event
 from flexget.manager import Session
-from flexget.utils.database import with_session
+from flexget.utils.database import with_session, BulkInsert, chunked
 from flexget.utils.imdb import extract_id
 from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
 
@@ -189,6 +189,29 @@ def search_by_field_values(field_value_list, task_name, local=False, session=Non
     return found.first()
 
 
+@with_session
+def find_seen(values, task_name, local=False, session=None):
+    """
+    Looks up which of `values` have been seen.
+
+    :param values: Field values to look for
+    :param task_name: Name of task to compare to in case local flag is sent
+    :param local: Local flag
+    :return: Dict from each seen value to its `(SeenField, SeenEntry)`
+    """
+    found = {}
+    for chunk in chunked(set(values)):
+        query = session.query(SeenField, SeenEntry).join(SeenEntry).filter(SeenField.value.in_(chunk))
+        if local:
+            query = query.filter(SeenEntry.task == task_name)
+        else:
+            # Entries added from CLI were having local marked as None rather than False for a while gh#879
+            query = query.filter(or_(SeenEntry.local == False, SeenEntry.local == None))
+        for seen_field, seen_entry in query:
+            found.setdefault(seen_field.value, (seen_field, seen_entry))
+    return found
+
+
 class FilterSeen(object):
     """
         Remembers previously downloaded content and rejects them in
@@ -205,6 +228,7 @@ class FilterSeen(object):
             {'type': 'object',
              'properties': {
                  'local': {'type': 'boolean'},
+                 'early': {'type': 'boolean'},
                  'fields': {'type': 'array',
                             'items': {'type': 'string'},
                             "minItems": 1,
@@ -233,6 +257,17 @@ class FilterSeen(object):
         config.setdefault('fields', self.fields)
         return config
 
+    @plugin.priority(255)
+    def on_task_metainfo(self, task, config):
+        """
+        With `early` enabled, rejects entries already seen before metainfo plugins spend time on them. Fields the
+        metainfo plugins add are still checked by the filter phase.
+        """
+        if not isinstance(config, dict) or not config.get('early'):
+            return
+        config = self.prepare_config(config)
+        self.reject_seen(task, task.entries, config['fields'], config['local'])
+
     @plugin.priority(255)
     def on_task_filter(self, task, config, remember_rejected=False):
         """Filter entries already accepted on previous runs."""
@@ -241,10 +276,12 @@ class FilterSeen(object):
             log.debug('%s is disabled' % self.keyword)
             return
 
-        fields = config.get('fields')
-        local = config.get('local')
+        self.reject_seen(task, task.entries, config.get('fields'), config.get('local'), remember_rejected)
 
-        for entry in task.entries:
+    def reject_seen(self, task, entries, fields, local, remember_rejected=False):
+        """Rejects those of `entries` which have a value in one of `fields` marked seen, in one query per 500 values."""
+        entry_values = []
+        for entry in entries:
             # construct list of values looked
             values = []
             for field in fields:
@@ -253,16 +290,21 @@ class FilterSeen(object):
                 if entry[field] not in values and entry[field]:
                     values.append(str(entry[field]))
             if values:
-                log.trace('querying for: %s' % ', '.join(values))
-                # check if SeenField.value is any of the values
-                found = search_by_field_values(field_value_list=values, task_name=task.name, local=local,
-                                               session=task.session)
-                if found:
-                    log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], found.value))
-                    se = task.session.query(SeenEntry).filter(SeenEntry.id == found.seen_entry_id).one()
-                    entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
-                                 (found.field, found.value, se.task, se.added.strftime('%Y-%m-%d %H:%M')),
-                                 remember=remember_rejected)
+                entry_values.append((entry, values))
+        if not entry_values:
+            return
+        found = find_seen((value for _, values in entry_values for value in values), task.name, local=local,
+                          session=task.session)
+        for entry, values in entry_values:
+            for value in values:
+                if value not in found:
+                    continue
+                seen_field, se = found[value]
+                log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], value))
+                entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
+                             (seen_field.field, value, se.task, se.added.strftime('%Y-%m-%d %H:%M')),
+                             remember=remember_rejected)
+                break
 
     def on_task_learn(self, task, config):
         """Remember succeeded entries"""
@@ -277,19 +319,26 @@ class FilterSeen(object):
         if isinstance(config, list):
             fields.extend(config)
 
+        bulk = BulkInsert()
         for entry in task.accepted:
-            self.learn(task, entry, fields=fields, local=local)
+            self.learn(task, entry, fields=fields, local=local, bulk=bulk)
             # verbose if in learning mode
             if task.options.learn:
                 log.info("Learned '%s' (will skip this in the future)" % (entry['title']))
+        bulk.flush(task.session)
 
-    def learn(self, task, entry, fields=None, reason=None, local=False):
-        """Marks entry as seen"""
+    def learn(self, task, entry, fields=None, reason=None, local=False, bulk=None):
+        """
+        Marks entry as seen
+
+        :param bulk: Optional :class:`BulkInsert` to queue the rows in, caller is responsible for flushing it.
+          When not given the entry is written immediately.
+        """
         # no explicit fields given, use default
         if not fields:
             fields = self.fields
-        se = SeenEntry(entry['title'], str(task.name), reason, local)
         remembered = []
+        learned = []
         for field in fields:
             if field not in entry:
                 continue
@@ -297,12 +346,20 @@ class FilterSeen(object):
             if entry[field] in remembered:
                 continue
             remembered.append(entry[field])
-            sf = SeenField(str(field), str(entry[field]))
-            se.fields.append(sf)
-            log.debug("Learned '%s' (field: %s, local: %d)" % (entry[field], field, local))
-        # Only add the entry to the session if it has one of the required fields
-        if se.fields:
-            task.session.add(se)
+            learned.append((str(field), str(entry[field])))
+        # Only add the entry if it has one of the required fields
+        if not learned:
+            return
+        flush = bulk is None
+        if flush:
+            bulk = BulkInsert()
+        now = datetime.now()
+        se = bulk.add(SeenEntry, title=entry['title'], task=str(task.name), reason=reason, local=local, added=now)
+        for field, value in learned:
+            bulk.add(SeenField, seen_entry_id=bulk.ref(se), field=field, value=value, added=now)
+            log.debug("Learned '%s' (field: %s, local: %d)" % (value, field, local))
+        if flush:
+            bulk.flush(task.session)
 
     def forget(self, task, title):
         """Forget SeenEntry with :title:. Return True if forgotten."""
@@ -9,11 +9,13 @@ from copy import copy
 from datetime import datetime, timedelta
 
 from past.builtins import basestring
+import sqlalchemy
 from sqlalchemy import (Column, Integer, String, Unicode, DateTime, Boolean,
                         desc, select, update, delete, ForeignKey, Index, func, and_, not_)
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.hybrid import Comparator, hybrid_property
-from sqlalchemy.orm import relation, backref, object_session
+from sqlalchemy.orm import relation, backref, object_session, subqueryload, contains_eager
+from sqlalchemy.orm.util import identity_key
 
 from flexget import db_schema, options, plugin
 from flexget.config_schema import one_or_more
@@ -22,13 +24,13 @@ from flexget.manager import Session
 from flexget.plugin import get_plugin_by_name
 from flexget.plugins.parsers import SERIES_ID_TYPES
 from flexget.utils import qualities
-from flexget.utils.database import quality_property, with_session
+from flexget.utils.database import quality_property, with_session, chunked
 from flexget.utils.log import log_once
 from flexget.utils.sqlalchemy_utils import (table_columns, table_exists, drop_tables, table_schema, table_add_column,
                                             create_index)
 from flexget.utils.tools import merge_dict_from_to, parse_timedelta, parse_episode_identifier
 
-SCHEMA_VER = 13
+SCHEMA_VER = 14
 
 log = logging.getLogger('series')
 Base = db_schema.versioned_base('series', SCHEMA_VER)
@@ -154,15 +156,22 @@ def upgrade(ver, session):
         series_table = table_schema('series', session)
         session.execute(update(series_table, series_table.c.identified_by == None, {'identified_by': 'auto'}))
         ver = 13
+    if ver == 13:
+        # series_summary table is created with the current models, build the rows of the existing series
+        refresh_series_summaries(session)
+        ver = 14
     return ver
 
 
 @event('manager.db_cleanup')
 def db_cleanup(manager, session):
     # Clean up old undownloaded releases
-    result = session.query(Release). \
+    old_releases = session.query(Release). \
         filter(Release.downloaded == False). \
-        filter(Release.first_seen < datetime.now() - timedelta(days=120)).delete(False)
+        filter(Release.first_seen < datetime.now() - timedelta(days=120))
+    invalidate_summaries(session, session.query(Episode.series_id).join(Episode.releases).
+                         filter(Release.id.in_(old_releases.with_entities(Release.id).subquery())))
+    result = old_releases.delete(False)
     if result:
         log.verbose('Removed %d undownloaded episode releases.', result)
     # Clean up episodes without releases
@@ -173,6 +182,8 @@ def db_cleanup(manager, session):
     result = session.query(Series).filter(~Series.episodes.any()).filter(~Series.in_tasks.any()).delete(False)
     if result:
         log.verbose('Removed %d series without episodes.', result)
+        session.query(SeriesSummary).filter(~SeriesSummary.series_id.in_(session.query(Series.id).subquery())). \
+            delete(False)
 
 
 @event('manager.lock_acquired')
@@ -204,6 +215,7 @@ def clean_series(manager):
         removed_tasks = session.query(SeriesTask)
         if manager.tasks:
             removed_tasks = removed_tasks.filter(not_(SeriesTask.name.in_(manager.tasks)))
+        invalidate_summaries(session, removed_tasks.with_entities(SeriesTask.series_id))
         deleted = removed_tasks.delete(synchronize_session=False)
         if deleted:
             session.commit()
@@ -280,6 +292,7 @@ class Series(Base):
                         primaryjoin='Series.id == Episode.series_id')
     in_tasks = relation('SeriesTask', backref=backref('series', uselist=False), cascade='all, delete, delete-orphan')
     alternate_names = relation('AlternateNames', backref='series', cascade='all, delete, delete-orphan')
+    summary = relation('SeriesSummary', uselist=False, viewonly=True)
 
     # Make a special property that does indexed case insensitive lookups on name, but stores/returns specified case
     def name_getter(self):
@@ -472,6 +485,158 @@ class SeriesTask(Base):
         self.name = name
 
 
+class SeriesSummary(Base):
+    """
+    What series lists show and filter on, for each series. Computing these from all episodes and releases took seconds
+    per page of the series list with big databases.
+
+    A row is deleted whenever the series, its episodes, releases or tasks change, and built again when the transaction
+    making the change is committed. Listing series thus only reads the rows.
+    """
+    __tablename__ = 'series_summary'
+
+    series_id = Column(Integer, ForeignKey('series.id'), primary_key=True)
+    configured = Column(Boolean, index=True)
+    # Latest downloaded episode, as returned by `get_latest_release`, and its latest downloaded release
+    latest_episode_id = Column(Integer, ForeignKey('series_episodes.id'))
+    latest_release_id = Column(Integer, ForeignKey('episode_releases.id'))
+    # Number of episodes after the latest downloaded one
+    behind = Column(Integer, default=0)
+    # Only episodes 1 or 2 of the first season have been downloaded
+    premiere = Column(Boolean, default=False)
+    # First seen time of the oldest and newest releases
+    first_seen = Column(DateTime)
+    last_seen = Column(DateTime, index=True)
+    # When the newest episode has first been seen
+    last_episode_seen = Column(DateTime, index=True)
+
+    latest_episode = relation(Episode, viewonly=True)
+    latest_release = relation(Release, viewonly=True)
+
+    def __repr__(self):
+        return '<SeriesSummary(series_id=%s,latest_episode_id=%s,configured=%s)>' % \
+               (self.series_id, self.latest_episode_id, self.configured)
+
+
+# Session info keys of the series whose summary must be built when the transaction is committed
+SUMMARY_CHANGED = 'series_summary_changed'
+SUMMARY_ADDED = 'series_summary_added'
+
+
+def _drop_summaries(session, series_ids):
+    # Summaries are not built again before the transaction ends, a series only needs to be dropped once
+    changed = session.info.setdefault(SUMMARY_CHANGED, set())
+    series_ids = set(series_ids) - changed
+    for chunk in chunked(list(series_ids)):
+        session.execute(SeriesSummary.__table__.delete().where(SeriesSummary.series_id.in_(chunk)))
+    changed.update(series_ids)
+
+
+def invalidate_summaries(session, series_ids):
+    """
+    Deletes summaries before bulk updates or deletes, which the ORM does not see. They are built again when the
+    transaction is committed.
+
+    :param series_ids: Query selecting the ids of the changed series
+    """
+    _drop_summaries(session, [row[0] for row in series_ids])
+
+
+def _changed_series(obj):
+    """The series whose summary is outdated by a change to `obj`, or None."""
+    if isinstance(obj, Series):
+        return obj
+    if isinstance(obj, (Episode, SeriesTask)):
+        return obj.series
+    if isinstance(obj, Release) and obj.episode is not None:
+        return obj.episode.series
+
+
+def _invalidate_changed_series(session, flush_context, instances):
+    series_ids = set()
+    for obj in list(session.new) + list(session.deleted) + [o for o in session.dirty if session.is_modified(o)]:
+        series = _changed_series(obj)
+        if series is None:
+            continue
+        if series.id is None:
+            # Series being added have no summary yet, their id is known after the flush
+            session.info.setdefault(SUMMARY_ADDED, set()).add(series)
+        else:
+            series_ids.add(series.id)
+    if series_ids:
+        _drop_summaries(session, series_ids)
+
+
+def _build_changed_summaries(session):
+    session.flush()
+    series_ids = session.info.pop(SUMMARY_CHANGED, set())
+    series_ids.update(series.id for series in session.info.pop(SUMMARY_ADDED, ()) if series.id is not None)
+    for chunk in chunked(sorted(series_ids)):
+        build_series_summaries(session, chunk)
+
+
+def _transaction_ended(session, *args):
+    session.info.pop(SUMMARY_CHANGED, None)
+    session.info.pop(SUMMARY_ADDED, None)
+
+
+sqlalchemy.event.listen(Session, 'before_flush', _invalidate_changed_series)
+sqlalchemy.event.listen(Session, 'before_commit', _build_changed_summaries)
+sqlalchemy.event.listen(Session, 'after_commit', _transaction_ended)
+sqlalchemy.event.listen(Session, 'after_rollback', _transaction_ended)
+
+
+def build_series_summaries(session, series_ids):
+    """Computes and adds the `SeriesSummary` of `series_ids`, which must not have one."""
+    configured = set(row[0] for row in session.query(SeriesTask.series_id).
+                     filter(SeriesTask.series_id.in_(series_ids)).distinct())
+    seen = dict((row[0], row[1:]) for row in
+                session.query(Episode.series_id, func.min(Release.first_seen), func.max(Release.first_seen)).
+                join(Episode.releases).filter(Episode.series_id.in_(series_ids)).group_by(Episode.series_id))
+    episode_seen = session.query(Episode.series_id.label('series_id'), func.min(Release.first_seen).label('seen')). \
+        join(Episode.releases).filter(Episode.series_id.in_(series_ids)).group_by(Episode.id).subquery()
+    last_episode_seen = dict(session.query(episode_seen.c.series_id, func.max(episode_seen.c.seen)).
+                             group_by(episode_seen.c.series_id))
+    downloaded = dict((row[0], row[1:]) for row in
+                      session.query(Episode.series_id, func.max(Episode.season), func.max(Episode.number)).
+                      join(Episode.releases).filter(Release.downloaded == True).
+                      filter(Episode.series_id.in_(series_ids)).group_by(Episode.series_id))
+    for series in session.query(Series).filter(Series.id.in_(series_ids)):
+        # The row of an invalidated summary is gone, but it may still be loaded
+        outdated = session.identity_map.get(identity_key(SeriesSummary, series.id))
+        if outdated is not None:
+            session.expunge(outdated)
+        summary = SeriesSummary(series_id=series.id, configured=series.id in configured, behind=0, premiere=False)
+        summary.first_seen, summary.last_seen = seen.get(series.id, (None, None))
+        summary.last_episode_seen = last_episode_seen.get(series.id)
+        if series.id in downloaded:
+            max_season, max_number = downloaded[series.id]
+            summary.premiere = max_season is not None and max_season <= 1 and \
+                max_number is not None and max_number <= 2
+            latest = get_latest_release(series)
+            if latest:
+                summary.latest_episode_id = latest.id
+                summary.latest_release_id = latest.latest_release.id
+                summary.behind = new_eps_after(latest)
+        session.add(summary)
+
+
+def refresh_series_summaries(session):
+    """
+    Builds the summaries of the series which have none, e.g. because the series existed before summaries did.
+
+    :return: Number of summaries built
+    """
+    missing = [row[0] for row in session.query(Series.id).outerjoin(Series.summary).
+               filter(SeriesSummary.series_id == None)]
+    for chunk in chunked(missing):
+        build_series_summaries(session, chunk)
+    if missing:
+        session.flush()
+        log.debug('Built summaries of %d series', len(missing))
+    return len(missing)
+
+
 def get_latest_status(episode):
     """
     :param episode: Instance of Episode
@@ -510,32 +675,32 @@ def get_series_summary(configured=None, premieres=None, status=None, days=None,
         configured = 'configured'
     elif configured not in ['configured', 'unconfigured', 'all']:
         raise LookupError('"configured" parameter must be either "configured", "unconfigured", or "all"')
-    query = session.query(Series)
-    query = query.outerjoin(Series.episodes).outerjoin(Episode.releases).outerjoin(Series.in_tasks).group_by(Series.id)
+    query = session.query(Series).join(Series.summary)
     if configured == 'configured':
-        query = query.having(func.count(SeriesTask.id) >= 1)
+        query = query.filter(SeriesSummary.configured == True)
     elif configured == 'unconfigured':
-        query = query.having(func.count(SeriesTask.id) < 1)
+        query = query.filter(SeriesSummary.configured == False)
     if premieres:
-        query = (query.having(func.max(Episode.season) <= 1).having(func.max(Episode.number) <= 2)).filter(
-            Release.downloaded == True)
+        query = query.filter(SeriesSummary.premiere == True)
     if status == 'new':
         if not days:
             days = 7
-        query = query.having(func.max(Episode.first_seen) > datetime.now() - timedelta(days=days))
+        query = query.filter(SeriesSummary.last_episode_seen > datetime.now() - timedelta(days=days))
     if status == 'stale':
         if not days:
             days = 365
-        query = query.having(func.max(Episode.first_seen) < datetime.now() - timedelta(days=days))
+        query = query.filter(SeriesSummary.last_episode_seen < datetime.now() - timedelta(days=days))
     if count:
-        return query.group_by(Series).count()
+        return query.count()
     if sort_by == 'show_name':
         order_by = Series.name
     else:
-        order_by = func.max(Release.first_seen)
+        order_by = SeriesSummary.last_seen
     query = query.order_by(desc(order_by)) if descending else query.order_by(order_by)
+    query = query.options(contains_eager(Series.summary).joinedload(SeriesSummary.latest_episode),
+                          contains_eager(Series.summary).joinedload(SeriesSummary.latest_release))
 
-    return query.slice(start, stop).from_self()
+    return query.slice(start, stop)
 
 
 def get_latest_episode(series):
@@ -653,7 +818,26 @@ def new_eps_after(since_ep):
         return 0
 
 
-def store_parser(session, parser, series=None, quality=None):
+def preload_episodes(session, series, identifiers):
+    """
+    Load episodes of `series` matching `identifiers`, along with all their releases, using a couple of `IN` queries.
+
+    :param session: Database session to use
+    :param Series series: Series the episodes belong to
+    :param identifiers: Iterable of episode identifiers
+    :return: Dict mapping identifier to Episode, to be passed to :func:`store_parser`
+    """
+    episodes = {}
+    for chunk in chunked(set(identifiers)):
+        query = session.query(Episode).filter(Episode.series_id == series.id). \
+            filter(Episode.identifier.in_(chunk)). \
+            options(subqueryload(Episode.releases))
+        for episode in query:
+            episodes.setdefault(episode.identifier, episode)
+    return episodes
+
+
+def store_parser(session, parser, series=None, quality=None, episodes=None, flush=True):
     """
     Push series information into database. Returns added/existing release.
 
@@ -661,6 +845,10 @@ def store_parser(session, parser, series=None, quality=None):
     :param parser: parser for release that should be added to database
     :param series: Series in database to add release to. Will be looked up if not provided.
     :param quality: If supplied, this will override the quality from the series parser
+    :param episodes: Optional dict mapping identifier to Episode for `series`, as returned by
+        :func:`preload_episodes`. Episodes and releases are then looked up from it rather than queried, and added
+        episodes are stored into it.
+    :param flush: If False, the session is not flushed and the returned releases may not have ids yet.
     :return: List of Releases
     """
     if quality is None:
@@ -680,9 +868,12 @@ def store_parser(session, parser, series=None, quality=None):
     releases = []
     for ix, identifier in enumerate(parser.identifiers):
         # if episode does not exist in series, add new
-        episode = session.query(Episode).filter(Episode.series_id == series.id). \
-            filter(Episode.identifier == identifier). \
-            filter(Episode.series_id != None).first()
+        if episodes is not None:
+            episode = episodes.get(identifier)
+        else:
+            episode = session.query(Episode).filter(Episode.series_id == series.id). \
+                filter(Episode.identifier == identifier). \
+                filter(Episode.series_id != None).first()
         if not episode:
             log.debug('adding episode %s into series %s', identifier, parser.name)
             episode = Episode()
@@ -696,20 +887,26 @@ def store_parser(session, parser, series=None, quality=None):
                 episode.season = 0
                 episode.number = parser.id + ix
             series.episodes.append(episode)  # pylint:disable=E1103
+            if episodes is not None:
+                episodes[identifier] = episode
             log.debug('-> added %s' % episode)
 
         # if release does not exists in episode, add new
-        #
-        # NOTE:
-        #
-        # filter(Release.episode_id != None) fixes weird bug where release had/has been added
-        # to database but doesn't have episode_id, this causes all kinds of havoc with the plugin.
-        # perhaps a bug in sqlalchemy?
-        release = session.query(Release).filter(Release.episode_id == episode.id). \
-            filter(Release.title == parser.data). \
-            filter(Release.quality == quality). \
-            filter(Release.proper_count == parser.proper_count). \
-            filter(Release.episode_id != None).first()
+        if episodes is not None:
+            quality_name = quality.name if isinstance(quality, qualities.Quality) else quality
+            release = next((r for r in episode.releases if r.title == parser.data and r._quality == quality_name and
+                            r.proper_count == parser.proper_count), None)
+        else:
+            # NOTE:
+            #
+            # filter(Release.episode_id != None) fixes weird bug where release had/has been added
+            # to database but doesn't have episode_id, this causes all kinds of havoc with the plugin.
+            # perhaps a bug in sqlalchemy?
+            release = session.query(Release).filter(Release.episode_id == episode.id). \
+                filter(Release.title == parser.data). \
+                filter(Release.quality == quality). \
+                filter(Release.proper_count == parser.proper_count). \
+                filter(Release.episode_id != None).first()
         if not release:
             log.debug('adding release %s into episode', parser)
             release = Release()
@@ -719,7 +916,8 @@ def store_parser(session, parser, series=None, quality=None):
             episode.releases.append(release)  # pylint:disable=E1103
             log.debug('-> added %s' % release)
         releases.append(release)
-    session.flush()  # Make sure autonumber ids are populated
+    if flush:
+        session.flush()  # Make sure autonumber ids are populated
     return releases
 
 
@@ -1223,11 +1421,19 @@ class FilterSeries(FilterSeriesBase):
                         _add_alt_name(alt, db_series, series_name, session)
                 if series_name not in found_series:
                     continue
-                series_entries = {}
+                # Load all episodes and releases seen this run at once, store_parser uses them as an identity map
+                episodes = preload_episodes(session, db_series,
+                                            (identifier for entry in found_series[series_name]
+                                             for identifier in entry['series_parser'].identifiers))
+                entry_releases = []
                 for entry in found_series[series_name]:
                     # store found episodes into database and save reference for later use
                     releases = store_parser(session, entry['series_parser'], series=db_series,
-                                            quality=entry.get('quality'))
+                                            quality=entry.get('quality'), episodes=episodes, flush=False)
+                    entry_releases.append((entry, releases))
+                session.flush()  # Make sure autonumber ids are populated
+                series_entries = {}
+                for entry, releases in entry_releases:
                     entry['series_releases'] = [r.id for r in releases]
                     series_entries.setdefault(releases[0].episode, []).append(entry)
 
@@ -1316,6 +1522,11 @@ class FilterSeries(FilterSeriesBase):
         :param config: Series configuration
         """
 
+        # Latest download does not change while filtering, only look it up once per series
+        latest = None
+        if series_entries and not task.options.disable_tracking and config.get('tracking', True):
+            latest = get_latest_release(next(iter(series_entries)).series)
+
         for ep, entries in series_entries.items():
             if not entries:
                 continue
@@ -1409,7 +1620,8 @@ class FilterSeries(FilterSeriesBase):
                     log.debug('-' * 20 + ' episode tracking -->')
                     # Grace is number of distinct eps in the task for this series + 2
                     backfill = config.get('tracking') == 'backfill'
-                    if self.process_episode_tracking(ep, entries, grace=len(series_entries) + 2, backfill=backfill):
+                    if self.process_episode_tracking(ep, entries, grace=len(series_entries) + 2, backfill=backfill,
+                                                     latest=latest):
                         continue
 
             # quality
@@ -1524,7 +1736,7 @@ class FilterSeries(FilterSeriesBase):
             log.debug('no quality meets requirements')
         return result
 
-    def process_episode_tracking(self, episode, entries, grace, backfill=False):
+    def process_episode_tracking(self, episode, entries, grace, backfill=False, latest=None):
         """
         Rejects all episodes that are too old or new, return True when this happens.
 
@@ -1533,9 +1745,9 @@ class FilterSeries(FilterSeriesBase):
         :param int grace: Number of episodes before or after latest download that are allowed.
         :param bool backfill: If this is True, previous episodes will be allowed,
             but forward advancement will still be restricted.
+        :param latest: Latest downloaded Episode of the series, as returned by :func:`get_latest_release`
         """
 
-        latest = get_latest_release(episode.series)
         if episode.series.begin and (not latest or episode.series.begin > latest):
             latest = episode.series.begin
         log.debug('latest download: %s' % latest)
@@ -1659,6 +1871,8 @@ class FilterSeries(FilterSeriesBase):
                 with Session() as session:
                     num = (session.query(Release).filter(Release.id.in_(entry['series_releases'])).
                            update({'downloaded': True}, synchronize_session=False))
+                    invalidate_summaries(session, session.query(Episode.series_id).join(Episode.releases).
+                                         filter(Release.id.in_(entry['series_releases'])))
                 log.debug('marking %s releases as downloaded for %s', num, entry)
             else:
                 log.debug('%s is not a series', entry['title'])
@@ -1675,7 +1889,9 @@ class SeriesDBManager(FilterSeriesBase):
 
         # Clear all series from this task
         with Session() as session:
-            session.query(SeriesTask).filter(SeriesTask.name == task.name).delete()
+            task_series = session.query(SeriesTask).filter(SeriesTask.name == task.name)
+            invalidate_summaries(session, task_series.with_entities(SeriesTask.series_id))
+            task_series.delete()
             if not task.config.get('series'):
                 return
             config = self.prepare_config(task.config['series'])
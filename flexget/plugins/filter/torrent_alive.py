@@ -3,9 +3,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.moves.urllib.parse import urlparse, urlsplit, urlunsplit, quote
 from future.moves.urllib.error import URLError
 
-import itertools
 import logging
-import threading
 import socket
 import struct
 import binascii
@@ -17,41 +15,27 @@ from flexget import plugin
 from flexget.event import event
 from flexget.utils import requests
 from flexget.utils.bittorrent import bdecode
+from flexget.utils.tools import TimedDict
 
 log = logging.getLogger('torrent_alive')
 
 
-class TorrentAliveThread(threading.Thread):
-    _counter = itertools.count()
+# Trackers are asked for at most this many info hashes per scrape request
+SCRAPE_CHUNK_SIZE = 50
+# Maximum number of trackers scraped at the same time
+MAX_CONCURRENT_SCRAPES = 10
+# Seconds to wait for a tracker to respond
+SCRAPE_TIMEOUT = 10
+# Seeds found by recent scrapes, (tracker, info_hash) -> seeds. Shared across entries, tasks and reruns.
+scrape_cache = TimedDict(cache_time='10 minutes')
 
-    def __init__(self, tracker, info_hash):
-        threading.Thread.__init__(self, name='torrent_alive-%d' % next(self._counter))
-        self.tracker = tracker
-        self.info_hash = info_hash
-        self.tracker_seeds = 0
 
-    def run(self):
-        self.tracker_seeds = get_tracker_seeds(self.tracker, self.info_hash)
-        log.debug('%s seeds found from %s' % (self.tracker_seeds, get_scrape_url(self.tracker, self.info_hash)))
+def chunks(items, size=SCRAPE_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
 
-def max_seeds_from_threads(threads):
-    """
-    Joins the threads and returns the maximum seeds found from any of them.
-
-    :param threads: A list of started `TorrentAliveThread`
-    :return: Maximum seeds found from any of the threads
-    """
-    seeds = 0
-    for background in threads:
-        log.debug('Coming up next: %s' % background.tracker)
-        background.join()
-        seeds = max(seeds, background.tracker_seeds)
-        log.debug('Current hightest number of seeds found: %s' % seeds)
-    return seeds
-
-
-def get_scrape_url(tracker_url, info_hash):
+def get_scrape_url(tracker_url, info_hashes):
     if 'announce' in tracker_url:
         v = urlsplit(tracker_url)
         result = urlunsplit([v.scheme, v.netloc, v.path.replace('announce', 'scrape'),
@@ -61,17 +45,22 @@ def get_scrape_url(tracker_url, info_hash):
         result = tracker_url + '/scrape'
 
     result += '&' if '?' in result else '?'
-    result += 'info_hash=%s' % quote(binascii.unhexlify(info_hash))
+    result += '&'.join('info_hash=%s' % quote(binascii.unhexlify(info_hash)) for info_hash in info_hashes)
     return result
 
 
-def get_udp_seeds(url, info_hash):
+def scrape_udp(url, info_hashes):
+    """
+    Scrapes a udp tracker for multiple info hashes.
+
+    :return: dict of info_hash -> seeds for the hashes tracker answered for
+    """
     parsed_url = urlparse(url)
     try:
         port = parsed_url.port
     except ValueError:
         log.error('UDP Port Error, url was %s' % url)
-        return 0
+        return {}
 
     log.debug('Checking for seeds from %s' % url)
 
@@ -80,16 +69,17 @@ def get_udp_seeds(url, info_hash):
 
     if port is None:
         log.error('UDP Port Error, port was None')
-        return 0
+        return {}
 
     if port < 0 or port > 65535:
         log.error('UDP Port Error, port was %s' % port)
-        return 0
+        return {}
 
+    seeds = {}
     # Create the socket
+    clisocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
-        clisocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        clisocket.settimeout(5.0)
+        clisocket.settimeout(SCRAPE_TIMEOUT)
         clisocket.connect((parsed_url.hostname, port))
 
         # build packet with connection_ID, using 0 value for action, giving our transaction ID for this packet
@@ -101,68 +91,135 @@ def get_udp_seeds(url, info_hash):
         # check recieved packet for response
         action, transaction_id, connection_id = struct.unpack(b">LLQ", res)
 
-        # build packet hash out of decoded info_hash
-        packet_hash = binascii.unhexlify(info_hash)
-
-        # construct packet for scrape with decoded info_hash setting action byte to 2 for scape
-        packet = struct.pack(b">QLL", connection_id, 2, transaction_id) + packet_hash
-
-        clisocket.send(packet)
-        # set recieve size of 8 + 12 bytes
-        res = clisocket.recv(20)
-
-    except IOError as e:
+        for chunk in chunks(info_hashes):
+            # construct packet for scrape with all decoded info_hashes setting action byte to 2 for scape
+            packet = struct.pack(b">QLL", connection_id, 2, transaction_id)
+            packet += b''.join(binascii.unhexlify(info_hash) for info_hash in chunk)
+            clisocket.send(packet)
+            # 8 byte header followed by 12 bytes for each requested torrent
+            res = clisocket.recv(8 + 12 * len(chunk))
+
+            # Check for UDP error packet
+            (action,) = struct.unpack(b">L", res[:4])
+            if action == 3:
+                log.error('There was a UDP Packet Error 3')
+                break
+
+            # first 8 bytes are followed by seeders, completed and leechers for each requested torrent, in order
+            for i, info_hash in enumerate(chunk):
+                offset = 8 + 12 * i
+                if len(res) < offset + 12:
+                    break
+                seeds[info_hash], _, _ = struct.unpack(b">LLL", res[offset:offset + 12])
+    except (IOError, struct.error) as e:
         log.warning('Socket Error: %s', e)
-        return 0
-    # Check for UDP error packet
-    (action,) = struct.unpack(b">L", res[:4])
-    if action == 3:
-        log.error('There was a UDP Packet Error 3')
-        return 0
-
-    # first 8 bytes are followed by seeders, completed and leechers for requested torrent
-    seeders, _, _ = struct.unpack(b">LLL", res[8:20])
-    log.debug('get_udp_seeds is returning: %s', seeders)
-    clisocket.close()
-    return seeders
+    finally:
+        clisocket.close()
+    log.debug('scrape_udp is returning: %s', seeds)
+    return seeds
 
 
-def get_http_seeds(url, info_hash):
-    url = get_scrape_url(url, info_hash)
-    if not url:
-        log.debug('if not url is true returning 0')
-        return 0
-    log.debug('Checking for seeds from %s' % url)
+def scrape_http(url, info_hashes):
+    """
+    Scrapes a http tracker for multiple info hashes.
 
-    try:
-        data = bdecode(requests.get(url).content).get('files')
-    except RequestException as e:
-        log.debug('Error scraping: %s', e)
-        return 0
-    except SyntaxError as e:
-        log.warning('Error decoding tracker response: %s', e)
-        return 0
-    except BadStatusLine as e:
-        log.warning('Error BadStatusLine: %s', e)
-        return 0
-    except IOError as e:
-        log.warning('Server error: %s', e)
-        return 0
-    if not data:
-        log.debug('No data received from tracker scrape.')
-        return 0
-    log.debug('get_http_seeds is returning: %s', list(data.values())[0]['complete'])
-    return list(data.values())[0]['complete']
+    :return: dict of info_hash -> seeds for the hashes tracker answered for
+    """
+    seeds = {}
+    for chunk in chunks(info_hashes):
+        scrape_url = get_scrape_url(url, chunk)
+        log.debug('Checking for seeds from %s' % scrape_url)
+
+        try:
+            data = bdecode(requests.get(scrape_url, timeout=SCRAPE_TIMEOUT).content).get('files')
+        except RequestException as e:
+            log.debug('Error scraping: %s', e)
+            break
+        except SyntaxError as e:
+            log.warning('Error decoding tracker response: %s', e)
+            break
+        except BadStatusLine as e:
+            log.warning('Error BadStatusLine: %s', e)
+            break
+        except IOError as e:
+            log.warning('Server error: %s', e)
+            break
+        if not data:
+            log.debug('No data received from tracker scrape.')
+            break
+        by_binary = dict((binascii.unhexlify(info_hash), info_hash) for info_hash in chunk)
+        for binary_hash, stats in data.items():
+            if binary_hash in by_binary:
+                seeds[by_binary[binary_hash]] = stats['complete']
+            elif len(chunk) == 1:
+                # Some trackers mangle the hash key, that is fine when there was only one to ask for
+                seeds[chunk[0]] = stats['complete']
+    log.debug('scrape_http is returning: %s', seeds)
+    return seeds
 
 
-def get_tracker_seeds(url, info_hash):
+def scrape_tracker(url, info_hashes):
     if url.startswith('udp'):
-        return get_udp_seeds(url, info_hash)
+        return scrape_udp(url, info_hashes)
     elif url.startswith('http'):
-        return get_http_seeds(url, info_hash)
+        return scrape_http(url, info_hashes)
     else:
         log.warning('There has beena problem with the get_tracker_seeds')
-        return 0
+        return {}
+
+
+def get_udp_seeds(url, info_hash):
+    return scrape_udp(url, [info_hash]).get(info_hash, 0)
+
+
+def get_http_seeds(url, info_hash):
+    return scrape_http(url, [info_hash]).get(info_hash, 0)
+
+
+def get_tracker_seeds(url, info_hash):
+    return scrape_tracker(url, [info_hash]).get(info_hash, 0)
+
+
+def scrape_trackers(hashes_by_tracker, executor):
+    """
+    Scrapes each tracker once for all of its info hashes, with at most `MAX_CONCURRENT_SCRAPES` trackers at a time.
+    Recently scraped hashes are answered from `scrape_cache`.
+
+    :param dict hashes_by_tracker: tracker url -> list of info hashes
+    :param executor: `TaskExecutor` the trackers are scraped with
+    :return: dict of (tracker, info_hash) -> seeds, hashes of unreachable trackers are missing
+    """
+    results = {}
+    jobs = []
+    for tracker, info_hashes in hashes_by_tracker.items():
+        missing = []
+        for info_hash in info_hashes:
+            if (tracker, info_hash) in scrape_cache:
+                results[(tracker, info_hash)] = scrape_cache[(tracker, info_hash)]
+            else:
+                missing.append(info_hash)
+        if missing:
+            jobs.append((tracker, missing))
+
+    def scrape(tracker, info_hashes):
+        try:
+            seeds = scrape_tracker(tracker, info_hashes)
+        except URLError as e:
+            log.debug('Error scraping %s: %s' % (tracker, e))
+            return {}
+        log.debug('%s seeds found for %s torrents from %s', sum(seeds.values()), len(seeds), tracker)
+        # Trackers leave out torrents they do not know about
+        if not seeds:
+            return {}
+        return dict(((tracker, info_hash), seeds.get(info_hash, 0)) for info_hash in info_hashes)
+
+    trackers = [tracker for tracker, _ in jobs]
+    missing_hashes = [info_hashes for _, info_hashes in jobs]
+    for scraped in executor.map(scrape, trackers, missing_hashes, limit=MAX_CONCURRENT_SCRAPES):
+        for key, seeds in scraped.items():
+            scrape_cache[key] = seeds
+        results.update(scraped)
+    return results
 
 
 class TorrentAlive(object):
@@ -208,52 +265,46 @@ class TorrentAlive(object):
         config = self.prepare_config(config)
         min_seeds = config['min_seeds']
 
+        # Collect the trackers of all entries first, so that each tracker is scraped only once for all of them
+        to_check = []
+        hashes_by_tracker = {}
         for entry in task.accepted:
             # If torrent_seeds is filled, we will have already filtered in filter phase
             if entry.get('torrent_seeds'):
                 log.debug('Not checking trackers for seeds, as torrent_seeds is already filled.')
                 continue
-            log.debug('Checking for seeds for %s:' % entry['title'])
             torrent = entry.get('torrent')
-            if torrent:
-                seeds = 0
-                info_hash = torrent.info_hash
-                announce_list = torrent.content.get('announce-list')
-                if announce_list:
-                    # Multitracker torrent
-                    threadlist = []
-                    for tier in announce_list:
-                        for tracker in tier:
-                            background = TorrentAliveThread(tracker, info_hash)
-                            try:
-                                background.start()
-                                threadlist.append(background)
-                            except threading.ThreadError:
-                                # If we can't start a new thread, wait for current ones to complete and continue
-                                log.debug('Reached max threads, finishing current threads.')
-                                seeds = max(seeds, max_seeds_from_threads(threadlist))
-                                background.start()
-                                threadlist = [background]
-                            log.debug('Started thread to scrape %s with info hash %s' % (tracker, info_hash))
-
-                    seeds = max(seeds, max_seeds_from_threads(threadlist))
-                    log.debug('Highest number of seeds found: %s' % seeds)
-                else:
-                    # Single tracker
-                    tracker = torrent.content['announce']
-                    try:
-                        seeds = get_tracker_seeds(tracker, info_hash)
-                    except URLError as e:
-                        log.debug('Error scraping %s: %s' % (tracker, e))
-
-                # Reject if needed
-                if seeds < min_seeds:
-                    entry.reject(reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
-                                 remember_time=config['reject_for'])
-                    # Maybe there is better match that has enough seeds
-                    task.rerun(plugin='torrent_alive', reason='Not enough seeds')
-                else:
-                    log.debug('Found %i seeds from trackers' % seeds)
+            if not torrent:
+                continue
+            announce_list = torrent.content.get('announce-list')
+            if announce_list:
+                # Multitracker torrent
+                trackers = [tracker for tier in announce_list for tracker in tier]
+            else:
+                # Single tracker
+                trackers = [torrent.content['announce']]
+            for tracker in trackers:
+                hashes = hashes_by_tracker.setdefault(tracker, [])
+                if torrent.info_hash not in hashes:
+                    hashes.append(torrent.info_hash)
+            to_check.append((entry, torrent.info_hash, trackers))
+
+        if not to_check:
+            return
+        log.verbose('Scraping %s trackers for %s torrents', len(hashes_by_tracker), len(to_check))
+        results = scrape_trackers(hashes_by_tracker, task.executor)
+
+        for entry, info_hash, trackers in to_check:
+            seeds = max([results.get((tracker, info_hash), 0) for tracker in trackers])
+            log.debug('Highest number of seeds found for %s: %s' % (entry['title'], seeds))
+            # Reject if needed
+            if seeds < min_seeds:
+                entry.reject(reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
+                             remember_time=config['reject_for'])
+                # Maybe there is better match that has enough seeds
+                task.rerun(plugin='torrent_alive', reason='Not enough seeds')
+            else:
+                log.debug('Found %i seeds from trackers' % seeds)
 
 
 @event('plugin.register')
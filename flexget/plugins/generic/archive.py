@@ -3,16 +3,18 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
 import re
+from collections import OrderedDict
 from datetime import datetime
 
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.schema import Table, ForeignKey
-from sqlalchemy import Column, Integer, DateTime, Unicode, Index
+from sqlalchemy import Column, Integer, DateTime, Unicode, Index, select
 
 from flexget import db_schema, plugin
 from flexget.event import event
 from flexget.entry import Entry
+from flexget.utils.database import BulkInsert, chunked
 from flexget.utils.sqlalchemy_utils import table_schema, get_index_by_name
 from flexget.manager import Session
 
@@ -162,49 +164,65 @@ class Archive(object):
         else:
             tag_names = config
 
-        tags = []
-        for tag_name in set(tag_names):
-            tags.append(get_tag(tag_name, task.session))
-
-        count = 0
-        processed = []
+        # I think entry can be in multiple of those lists .. not sure though!
+        entries = OrderedDict()
         for entry in task.entries + task.rejected + task.failed:
-            # I think entry can be in multiple of those lists .. not sure though!
-            if entry in processed:
-                continue
-            else:
-                processed.append(entry)
-
-            ae = task.session.query(ArchiveEntry). \
-                filter(ArchiveEntry.title == entry['title']). \
-                filter(ArchiveEntry.url == entry['url']).first()
-            if ae:
+            entries.setdefault((entry['title'], entry['url']), entry)
+        if not entries:
+            return
+
+        # Resolve source and tags once for the whole batch
+        source = get_source(task.name, task.session)
+        tags = [get_tag(tag_name, task.session) for tag_name in set(tag_names)]
+        task.session.add(source)
+        task.session.add_all(tags)
+        task.session.flush()
+
+        existing = {}
+        for titles in chunked(set(title for title, url in entries)):
+            query = task.session.query(ArchiveEntry.id, ArchiveEntry.title, ArchiveEntry.url). \
+                filter(ArchiveEntry.title.in_(titles))
+            for ae_id, title, url in query:
+                existing.setdefault((title, url), ae_id)
+
+        has_source = set()
+        has_tags = set()
+        for ae_ids in chunked(set(existing.values())):
+            has_source.update(row.entry_id for row in task.session.execute(
+                select([archive_sources_table.c.entry_id]).
+                where(archive_sources_table.c.entry_id.in_(ae_ids)).
+                where(archive_sources_table.c.source_id == source.id)))
+            if tags:
+                has_tags.update((row.entry_id, row.tag_id) for row in task.session.execute(
+                    select([archive_tags_table.c.entry_id, archive_tags_table.c.tag_id]).
+                    where(archive_tags_table.c.entry_id.in_(ae_ids)).
+                    where(archive_tags_table.c.tag_id.in_([tag.id for tag in tags]))))
+
+        bulk = BulkInsert()
+        now = datetime.now()
+        count = 0
+        for key, entry in entries.items():
+            ae_id = existing.get(key)
+            if ae_id is not None:
                 # add (missing) sources
-                source = get_source(task.name, task.session)
-                if source not in ae.sources:
-                    log.debug('Adding `%s` into `%s` sources' % (task.name, ae))
-                    ae.sources.append(source)
+                if ae_id not in has_source:
+                    log.debug('Adding `%s` into `%s` sources' % (task.name, entry['title']))
+                    bulk.add(archive_sources_table, entry_id=ae_id, source_id=source.id)
                 # add (missing) tags
-                for tag_name in tag_names:
-                    atag = get_tag(tag_name, task.session)
-                    if atag not in ae.tags:
-                        log.debug('Adding tag %s into %s' % (tag_name, ae))
-                        ae.tags.append(atag)
+                for tag in tags:
+                    if (ae_id, tag.id) not in has_tags:
+                        log.debug('Adding tag %s into %s' % (tag.name, entry['title']))
+                        bulk.add(archive_tags_table, entry_id=ae_id, tag_id=tag.id)
             else:
                 # create new archive entry
-                ae = ArchiveEntry()
-                ae.title = entry['title']
-                ae.url = entry['url']
-                if 'description' in entry:
-                    ae.description = entry['description']
-                ae.task = task.name
-                ae.sources.append(get_source(task.name, task.session))
-                if tags:
-                    # note, we're extending empty list
-                    ae.tags.extend(tags)
-                log.debug('Adding `%s` with %i tags to archive' % (ae, len(tags)))
-                task.session.add(ae)
+                ae = bulk.add(ArchiveEntry, title=entry['title'], url=entry['url'],
+                              description=entry.get('description'), task=task.name, added=now)
+                bulk.add(archive_sources_table, entry_id=bulk.ref(ae), source_id=source.id)
+                for tag in tags:
+                    bulk.add(archive_tags_table, entry_id=bulk.ref(ae), tag_id=tag.id)
+                log.debug('Adding `%s` with %i tags to archive' % (entry['title'], len(tags)))
                 count += 1
+        bulk.flush(task.session)
         if count:
             log.verbose('Added %i new entries to archive' % count)
 
@@ -11,7 +11,7 @@ from flexget import db_schema, plugin
 from flexget.event import event
 from flexget.utils import json
 from flexget.manager import Session
-from flexget.utils.database import entry_synonym, with_session
+from flexget.utils.database import entry_synonym, with_session, serialize_entry, chunked, BulkInsert
 from flexget.utils.tools import parse_timedelta
 from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
 
@@ -133,34 +133,49 @@ class InputBacklog(object):
         """Add single entry to task backlog
 
         If :amount: is not specified, entry will only be injected on next execution."""
-        snapshot = entry.snapshots.get('after_input')
-        if not snapshot:
-            if task.current_phase != 'input':
-                # Not having a snapshot is normal during input phase, don't display a warning
-                log.warning('No input snapshot available for `%s`, using current state' % entry['title'])
-            snapshot = entry
+        self.add_backlog_entries(task, [entry], amount, session=session)
+
+    @with_session
+    def add_backlog_entries(self, task, entries, amount='', session=None):
+        """Add multiple entries to task backlog, existing backlog items are looked up and new ones written in bulk.
+
+        If :amount: is not specified, entries will only be injected on next execution."""
         expire_time = datetime.now() + parse_timedelta(amount)
-        backlog_entry = session.query(BacklogEntry).filter(BacklogEntry.title == entry['title']). \
-            filter(BacklogEntry.task == task.name).first()
-        if backlog_entry:
-            # If there is already a backlog entry for this, update the expiry time if necessary.
-            if backlog_entry.expire < expire_time:
-                log.debug('Updating expiry time for %s' % entry['title'])
-                backlog_entry.expire = expire_time
-        else:
+        existing = {}
+        for titles in chunked(set(entry['title'] for entry in entries)):
+            query = session.query(BacklogEntry).filter(BacklogEntry.title.in_(titles)). \
+                filter(BacklogEntry.task == task.name)
+            for backlog_entry in query:
+                existing.setdefault(backlog_entry.title, backlog_entry)
+
+        bulk = BulkInsert()
+        added = set()
+        for entry in entries:
+            backlog_entry = existing.get(entry['title'])
+            if backlog_entry:
+                # If there is already a backlog entry for this, update the expiry time if necessary.
+                if backlog_entry.expire < expire_time:
+                    log.debug('Updating expiry time for %s' % entry['title'])
+                    backlog_entry.expire = expire_time
+                continue
+            if entry['title'] in added:
+                continue
+            snapshot = entry.snapshots.get('after_input')
+            if not snapshot:
+                if task.current_phase != 'input':
+                    # Not having a snapshot is normal during input phase, don't display a warning
+                    log.warning('No input snapshot available for `%s`, using current state' % entry['title'])
+                snapshot = entry
             log.debug('Saving %s' % entry['title'])
-            backlog_entry = BacklogEntry()
-            backlog_entry.title = entry['title']
-            backlog_entry.entry = snapshot
-            backlog_entry.task = task.name
-            backlog_entry.expire = expire_time
-            session.add(backlog_entry)
+            bulk.add(BacklogEntry, title=entry['title'], _json=serialize_entry(snapshot), task=task.name,
+                     expire=expire_time)
+            added.add(entry['title'])
+        bulk.flush(session)
 
     def learn_backlog(self, task, amount=''):
         """Learn current entries into backlog. All task inputs must have been executed."""
         with Session() as session:
-            for entry in task.entries:
-                self.add_backlog(task, entry, amount, session=session)
+            self.add_backlog_entries(task, task.entries, amount, session=session)
 
     @with_session
     def get_injections(self, task, session=None):
@@ -9,12 +9,28 @@ from datetime import datetime
 
 from path import Path
 
-from flexget import plugin
+from sqlalchemy import Column, Integer, Float, Unicode
+
+from flexget import db_schema, plugin
 from flexget.config_schema import one_or_more
 from flexget.event import event
 from flexget.entry import Entry
+from flexget.utils.database import BulkInsert
+from flexget.utils.tools import scandir
 
 log = logging.getLogger('filesystem')
+Base = db_schema.versioned_base('filesystem', 0)
+
+
+class FilesystemFile(Base):
+    """State of a file produced by a task using `incremental`, to tell whether it changed on next run."""
+    __tablename__ = 'filesystem_files'
+
+    id = Column(Integer, primary_key=True)
+    task = Column(Unicode, index=True)
+    location = Column(Unicode)
+    mtime = Column(Float)
+    inode = Column(Integer)
 
 
 class Filesystem(object):
@@ -62,6 +78,13 @@ class Filesystem(object):
           - files
           - dirs
 
+    Example 6::
+
+      filesystem:
+        path: /storage/incoming/
+        recursive: yes
+        incremental: yes  # Only files which are new or changed (mtime or inode) since last run
+
     """
     retrieval_options = ['files', 'dirs', 'symlinks']
     paths = one_or_more({'type': 'string', 'format': 'path'}, unique_items=True)
@@ -75,12 +98,17 @@ class Filesystem(object):
                  'mask': {'type': 'string'},
                  'regexp': {'type': 'string', 'format': 'regex'},
                  'recursive': {'oneOf': [{'type': 'integer', 'minimum': 2}, {'type': 'boolean'}]},
-                 'retrieve': one_or_more({'type': 'string', 'enum': retrieval_options}, unique_items=True)
+                 'retrieve': one_or_more({'type': 'string', 'enum': retrieval_options}, unique_items=True),
+                 'incremental': {'type': 'boolean'}
              },
              'required': ['path'],
              'additionalProperties': False}]
     }
 
+    def __init__(self):
+        # Scanned file states for each running task, stored in learn phase
+        self.states = {}
+
     def prepare_config(self, config):
         from fnmatch import translate
         config = config
@@ -99,14 +127,22 @@ class Filesystem(object):
         config.setdefault('regexp', '.')
         # Sets the default retrieval option to files
         config.setdefault('retrieve', self.retrieval_options)
+        config.setdefault('incremental', False)
 
         return config
 
-    def create_entry(self, filepath, test_mode):
+    def stat(self, dir_entry):
+        try:
+            return dir_entry.stat()
+        except OSError:
+            # Broken symlink, use the link itself
+            return dir_entry.stat(follow_symlinks=False)
+
+    def create_entry(self, dir_entry, test_mode):
         """
-        Creates a single entry using a filepath and a type (file/dir)
+        Creates a single entry from a `DirEntry`, reusing the type and stat information it has cached.
         """
-        filepath = filepath.abspath()
+        filepath = Path(dir_entry.path).abspath()
         entry = Entry()
         entry['location'] = filepath
         if PY2:
@@ -117,18 +153,15 @@ class Filesystem(object):
             import pathlib
             entry['url'] = pathlib.Path(filepath).absolute().as_uri()
         entry['filename'] = filepath.name
-        if filepath.isfile():
+        if dir_entry.is_file():
             entry['title'] = filepath.namebase
         else:
             entry['title'] = filepath.name
-        try:
-            entry['timestamp'] = datetime.fromtimestamp(filepath.getmtime())
-        except Exception as e:
-            log.warning('Error setting timestamp for %s: %s' % (filepath, e))
-            entry['timestamp'] = None
-        entry['accessed'] = datetime.fromtimestamp(filepath.getatime())
-        entry['modified'] = datetime.fromtimestamp(filepath.getmtime())
-        entry['created'] = datetime.fromtimestamp(filepath.getctime())
+        file_stat = self.stat(dir_entry)
+        entry['timestamp'] = datetime.fromtimestamp(file_stat.st_mtime)
+        entry['accessed'] = datetime.fromtimestamp(file_stat.st_atime)
+        entry['modified'] = datetime.fromtimestamp(file_stat.st_mtime)
+        entry['created'] = datetime.fromtimestamp(file_stat.st_ctime)
         if entry.isvalid():
             if test_mode:
                 log.info("Test mode. Entry includes:")
@@ -142,50 +175,64 @@ class Filesystem(object):
             log.error('Non valid entry created: %s ' % entry)
             return
 
-    def get_max_depth(self, recursion, base_depth):
+    def get_max_depth(self, recursion):
         if recursion is False:
-            return base_depth + 1
+            return 1
         elif recursion is True:
             return float('inf')
         else:
-            return base_depth + recursion
+            return recursion
 
-    def get_folder_objects(self, folder, recursion):
-        if recursion is False:
-            return folder.listdir()
-        else:
-            return folder.walk(errors='ignore')
-
-    def get_entries_from_path(self, path_list, match, recursion, test_mode, get_files, get_dirs, get_symlinks):
+    def get_folder_objects(self, folder, max_depth, depth=1):
+        """
+        Yields a `DirEntry` for everything below `folder`, depth first. Directories at `max_depth` are not descended
+        into. Like `Path.walk` symlinks to directories are followed and errors are ignored.
+        """
+        try:
+            dir_entries = list(scandir(folder))
+        except OSError as e:
+            log.debug('Unable to list %s: %s', folder, e)
+            return
+        for dir_entry in dir_entries:
+            yield dir_entry
+            if depth < max_depth and dir_entry.is_dir():
+                for child in self.get_folder_objects(dir_entry.path, max_depth, depth + 1):
+                    yield child
+
+    def get_entries_from_path(self, path_list, match, recursion, test_mode, get_files, get_dirs, get_symlinks,
+                              states=None):
+        """
+        :param dict states: If given, filled with location -> (mtime, inode) of the produced entries
+        """
         entries = []
+        locations = set()
 
         for folder in path_list:
             log.verbose('Scanning folder %s. Recursion is set to %s.' % (folder, recursion))
             folder = Path(folder).expanduser()
             log.debug('Scanning %s' % folder)
-            base_depth = len(folder.splitall())
-            max_depth = self.get_max_depth(recursion, base_depth)
-            folder_objects = self.get_folder_objects(folder, recursion)
-            for path_object in folder_objects:
-                log.debug('Checking if %s qualifies to be added as an entry.' % path_object)
+            max_depth = self.get_max_depth(recursion)
+            for dir_entry in self.get_folder_objects(folder, max_depth):
+                log.debug('Checking if %s qualifies to be added as an entry.' % dir_entry.path)
                 try:
-                    path_object.exists()
+                    dir_entry.path.encode('utf-8')
                 except UnicodeError:
                     log.error('File %s not decodable with filesystem encoding: %s' % (
-                        path_object, sys.getfilesystemencoding()))
+                        dir_entry.path, sys.getfilesystemencoding()))
+                    continue
+                if not match(dir_entry.path):
                     continue
-                entry = None
-                object_depth = len(path_object.splitall())
-                if object_depth <= max_depth:
-                    if match(path_object):
-                        if (path_object.isdir() and get_dirs) or (
-                                path_object.islink() and get_symlinks) or (
-                                path_object.isfile() and not path_object.islink() and get_files):
-                            entry = self.create_entry(path_object, test_mode)
-                        else:
-                            log.debug("Path object's %s type doesn't match requested object types." % path_object)
-                        if entry and entry not in entries:
-                            entries.append(entry)
+                if (dir_entry.is_dir() and get_dirs) or (dir_entry.is_symlink() and get_symlinks) or (
+                        dir_entry.is_file() and not dir_entry.is_symlink() and get_files):
+                    entry = self.create_entry(dir_entry, test_mode)
+                else:
+                    log.debug("Path object's %s type doesn't match requested object types." % dir_entry.path)
+                    continue
+                if entry and entry['location'] not in locations:
+                    locations.add(entry['location'])
+                    entries.append(entry)
+                    if states is not None:
+                        states[entry['location']] = (self.stat(dir_entry).st_mtime, dir_entry.inode())
 
         return entries
 
@@ -201,7 +248,41 @@ class Filesystem(object):
         get_symlinks = 'symlinks' in config['retrieve']
 
         log.verbose('Starting to scan folders.')
-        return self.get_entries_from_path(path_list, match, recursive, test_mode, get_files, get_dirs, get_symlinks)
+        if not config['incremental']:
+            return self.get_entries_from_path(path_list, match, recursive, test_mode, get_files, get_dirs,
+                                              get_symlinks)
+
+        states = {}
+        entries = self.get_entries_from_path(path_list, match, recursive, test_mode, get_files, get_dirs,
+                                             get_symlinks, states=states)
+        # Only produce files which are new or changed since last run, the new states are stored in learn phase
+        known = dict((location, (mtime, inode)) for location, mtime, inode in task.session.query(
+            FilesystemFile.location, FilesystemFile.mtime, FilesystemFile.inode).filter(
+            FilesystemFile.task == task.name))
+        self.states[task.name] = states
+        changed = [entry for entry in entries if known.get(entry['location']) != states[entry['location']]]
+        log.verbose('%s of %s files are new or changed since last run.', len(changed), len(entries))
+        return changed
+
+    def on_task_learn(self, task, config):
+        states = self.states.pop(task.name, None)
+        if states is None:
+            return
+        bulk = BulkInsert()
+        for indexed in task.session.query(FilesystemFile).filter(FilesystemFile.task == task.name):
+            state = states.pop(indexed.location, None)
+            if state is None:
+                task.session.delete(indexed)
+            elif state != (indexed.mtime, indexed.inode):
+                indexed.mtime, indexed.inode = state
+        for location, (mtime, inode) in states.items():
+            bulk.add(FilesystemFile, task=task.name, location=location, mtime=mtime, inode=inode)
+        bulk.flush(task.session)
+
+    def on_task_exit(self, task, config):
+        self.states.pop(task.name, None)
+
+    on_task_abort = on_task_exit
 
 
 @event('plugin.register')
@@ -2,6 +2,8 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
+import random
+import string
 
 from flexget import plugin
 from flexget.event import event
@@ -9,6 +11,8 @@ from flexget.entry import Entry
 
 log = logging.getLogger(__name__.rsplit('.')[-1])
 
+CHARS = string.ascii_letters + string.digits
+
 
 class Generate(object):
     """Generates n number of random entries. Used for debugging purposes."""
@@ -20,13 +24,11 @@ class Generate(object):
         entries = []
         for i in range(amount):
             entry = Entry()
-            import string
-            import random
             entry['url'] = 'http://localhost/generate/%s/%s' % (
                 i,
-                ''.join([random.choice(string.letters + string.digits) for x in range(1, 30)]))
-            entry['title'] = ''.join([random.choice(string.letters + string.digits) for x in range(1, 30)])
-            entry['description'] = ''.join([random.choice(string.letters + string.digits) for x in range(1, 1000)])
+                ''.join([random.choice(CHARS) for x in range(1, 30)]))
+            entry['title'] = ''.join([random.choice(CHARS) for x in range(1, 30)])
+            entry['description'] = ''.join([random.choice(CHARS) for x in range(1, 1000)])
             entries.append(entry)
         return entries
 
@@ -7,6 +7,7 @@ from future.moves.urllib.parse import urlparse, urlsplit
 import os
 import logging
 import xml.sax
+from xml.etree import ElementTree
 import posixpath
 import http.client
 from datetime import datetime
@@ -33,6 +34,106 @@ def fp_field_name(name):
     return name.replace(':', '_').lower()
 
 
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+# Element names which feedparser stores under another key
+STREAM_FIELD_MAP = {'guid': 'id', 'description': 'summary', 'pubdate': 'published', 'dc_creator': 'author',
+                    'dc_date': 'published', 'content': 'summary', 'issued': 'published', 'modified': 'updated'}
+
+
+class _RecordingReader(object):
+    """File like wrapper which remembers the data read from `fileobj`, until told to stop, so it can be re-parsed."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.recorded = []
+        self.recording = True
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        if self.recording:
+            self.recorded.append(data)
+        return data
+
+    def stop_recording(self):
+        self.recording = False
+        self.recorded = []
+
+    def read_all(self):
+        """Returns everything recorded plus the rest of the content."""
+        return b''.join(self.recorded) + self.fileobj.read()
+
+
+def _split_tag(tag):
+    if tag.startswith('{'):
+        uri, _, local = tag[1:].partition('}')
+        return uri, local
+    return None, tag
+
+
+def _stream_item(elem, prefixes):
+    """Converts an rss item or atom entry element into a FeedParserDict resembling one made by feedparser."""
+    item = feedparser.FeedParserDict()
+    # feedparser provides enclosures from the links with enclosure rel
+    links = []
+    for child in elem:
+        if not isinstance(child.tag, basestring):
+            # Comments and processing instructions
+            continue
+        uri, local = _split_tag(child.tag)
+        if (local == 'enclosure' and uri is None) or (uri == ATOM_NS and local == 'link'):
+            link = feedparser.FeedParserDict(rel=child.get('rel', 'enclosure' if local == 'enclosure' else 'alternate'),
+                                             href=child.get('url' if local == 'enclosure' else 'href'))
+            for attr in ('length', 'type'):
+                if child.get(attr) is not None:
+                    link[attr] = child.get(attr)
+            links.append(link)
+            if link.rel == 'alternate':
+                item.setdefault('link', link.href)
+            continue
+        if uri == ATOM_NS and local == 'author':
+            name = child.find('{%s}name' % ATOM_NS)
+            if name is not None and name.text:
+                item.setdefault('author', name.text.strip())
+            continue
+        # Same naming as feedparser, prefix_name for namespaced elements (except the feed's own namespace)
+        prefix = prefixes.get(uri) if uri else None
+        name = fp_field_name('%s:%s' % (prefix, local) if prefix else local)
+        name = STREAM_FIELD_MAP.get(name, name)
+        item.setdefault(name, (child.text or '').strip())
+    item['links'] = links
+    for date_field in ('published', 'updated'):
+        if item.get(date_field):
+            try:
+                item[date_field + '_parsed'] = dateutil.parser.parse(item[date_field]).timetuple()
+            except (ValueError, OverflowError):
+                log.debug('Unable to parse %s date `%s`', date_field, item[date_field])
+    return item
+
+
+def stream_items(fileobj):
+    """
+    Incrementally parses a well formed RSS or Atom feed from `fileobj`. Each item is yielded as soon as it has been
+    read and is then dropped from the parsed tree, so memory use does not grow with the size of the feed.
+
+    :raises ElementTree.ParseError: When content is not well formed xml
+    """
+    prefixes = {}
+    stack = []
+    for action, elem in ElementTree.iterparse(fileobj, events=('start-ns', 'start', 'end')):
+        if action == 'start-ns':
+            prefix, uri = elem
+            prefixes.setdefault(uri, prefix)
+        elif action == 'start':
+            stack.append(elem)
+        else:
+            stack.pop()
+            # rss > channel > item, rdf > item, feed > entry
+            if _split_tag(elem.tag)[1] in ('item', 'entry') and len(stack) <= 2:
+                yield _stream_item(elem, prefixes)
+                if stack:
+                    stack[-1].remove(elem)
+
+
 class InputRSS(object):
     """
     Parses RSS feed.
@@ -96,6 +197,18 @@ class InputRSS(object):
       rss:
         url: <url>
         group_links: yes
+
+    Huge feeds can be parsed incrementally while they are being downloaded by setting stream value to yes.
+    Parsing stops after max_items items or, when all_entries is disabled, at the first item seen on previous run,
+    so the rest of the feed is never downloaded. Feeds which are not well formed xml are handed to feedparser
+    as usual. Streaming is not used together with ascii.
+
+    Example::
+
+      rss:
+        url: <url>
+        stream: yes
+        max_items: 200
     """
 
     schema = {
@@ -114,6 +227,8 @@ class InputRSS(object):
             'filename': {'type': 'boolean'},
             'group_links': {'type': 'boolean', 'default': False},
             'all_entries': {'type': 'boolean', 'default': True},
+            'stream': {'type': 'boolean'},
+            'max_items': {'type': 'integer', 'minimum': 1},
             'other_fields': {'type': 'array', 'items': {
                 # Items can be a string, or a dict with a string value
                 'type': ['string', 'object'], 'additionalProperties': {'type': 'string'}
@@ -152,6 +267,8 @@ class InputRSS(object):
         config.setdefault('group_links', False)
         # set default for all_entries
         config.setdefault('all_entries', True)
+        config.setdefault('stream', False)
+        config.setdefault('ascii', False)
         return config
 
     def process_invalid_content(self, task, data, url):
@@ -231,6 +348,7 @@ class InputRSS(object):
                     headers['If-Modified-Since'] = modified
                     log.debug('Sending last-modified %s for task %s', headers['If-Modified-Since'], task.name)
 
+        stream = config['stream'] and not config['ascii']
         # Get the feed content
         if config['url'].startswith(('http', 'https', 'ftp', 'file')):
             # Get feed using requests library
@@ -239,14 +357,11 @@ class InputRSS(object):
                 auth = (config['username'], config['password'])
             try:
                 # Use the raw response so feedparser can read the headers and status values
-                response = task.requests.get(config['url'], timeout=60, headers=headers, raise_status=False, auth=auth)
-                content = response.content
+                response = task.requests.get(config['url'], timeout=60, headers=headers, raise_status=False, auth=auth,
+                                             stream=stream)
             except RequestException as e:
                 raise plugin.PluginError('Unable to download the RSS for task %s (%s): %s' %
                                          (task.name, config['url'], e))
-            if config.get('ascii'):
-                # convert content to ascii (cleanup), can also help with parsing problems on malformed feeds
-                content = response.text.encode('ascii', 'ignore')
 
             # status checks
             status = response.status_code
@@ -254,15 +369,20 @@ class InputRSS(object):
                 log.verbose('%s hasn\'t changed since last run. Not creating entries.', config['url'])
                 # Let details plugin know that it is ok if this feed doesn't produce any entries
                 task.no_entries_ok = True
+                response.close()
                 return []
             elif status == 401:
+                response.close()
                 raise plugin.PluginError('Authentication needed for task %s (%s): %s' %
                                          (task.name, config['url'], response.headers['www-authenticate']), log)
             elif status == 404:
+                response.close()
                 raise plugin.PluginError('RSS Feed %s (%s) not found' % (task.name, config['url']), log)
             elif status == 500:
+                response.close()
                 raise plugin.PluginError('Internal server exception on task %s (%s)' % (task.name, config['url']), log)
             elif status != 200:
+                response.close()
                 raise plugin.PluginError('HTTP error %s received from %s' % (status, config['url']), log)
 
             # update etag and last modified
@@ -275,14 +395,65 @@ class InputRSS(object):
                     modified = response.headers['last-modified']
                     task.simple_persistence['%s_modified' % url_hash] = modified
                     log.debug('last modified %s saved for task %s', modified, task.name)
+
+            if stream:
+                # Let urllib3 take care of gzip/deflate while we read the raw stream
+                response.raw.decode_content = True
+                try:
+                    return self.stream_entries(task, config, response.raw, all_entries, url_hash)
+                finally:
+                    response.close()
+            content = response.content
+            if config.get('ascii'):
+                # convert content to ascii (cleanup), can also help with parsing problems on malformed feeds
+                content = response.text.encode('ascii', 'ignore')
         else:
             # This is a file, open it
             with open(config['url'], 'rb') as f:
+                if stream:
+                    return self.stream_entries(task, config, f, all_entries, url_hash)
                 content = f.read()
             if config.get('ascii'):
                 # Just assuming utf-8 file in this case
                 content = content.decode('utf-8', 'ignore').encode('ascii', 'ignore')
 
+        return self.parse_entries(task, config, content, all_entries, url_hash)
+
+    def stream_entries(self, task, config, fileobj, all_entries, url_hash):
+        """
+        Creates entries while parsing the feed incrementally from `fileobj`. Parsing stops as soon as `max_items` or the
+        last item seen on previous run is reached, the rest of the feed is never downloaded.
+        Falls back to feedparser if the content is not well formed xml.
+        """
+        reader = _RecordingReader(fileobj)
+        items = stream_items(reader)
+        try:
+            first = next(items)
+        except StopIteration:
+            log.debug('No items in feed.')
+            return []
+        except ElementTree.ParseError as e:
+            log.debug('Feed is not well formed xml (%s), falling back to feedparser.', e)
+            return self.parse_entries(task, config, reader.read_all(), all_entries, url_hash)
+        # We got an item, from now on feedparser fallback is not needed
+        reader.stop_recording()
+
+        def tolerant_items():
+            yield first
+            try:
+                for item in items:
+                    yield item
+            except ElementTree.ParseError as e:
+                msg = 'Error %s while parsing feed, but entries were produced, ignoring the error.' % e
+                if config.get('silent', False):
+                    log.debug(msg)
+                else:
+                    log.verbose(msg)
+
+        return self.process_items(task, config, tolerant_items(), all_entries, url_hash)
+
+    def parse_entries(self, task, config, content, all_entries, url_hash):
+        """Parses whole feed `content` with feedparser and creates entries from it."""
         if not content:
             log.error('No data recieved for rss feed.')
             return []
@@ -327,13 +498,19 @@ class InputRSS(object):
 
         log.debug('encoding %s', rss.encoding)
 
-        last_entry_id = ''
         if not all_entries:
             # Test to make sure entries are in descending order
             if rss.entries and rss.entries[0].get('published_parsed') and rss.entries[-1].get('published_parsed'):
                 if rss.entries[0]['published_parsed'] < rss.entries[-1]['published_parsed']:
                     # Sort them if they are not
                     rss.entries.sort(key=lambda x: x['published_parsed'], reverse=True)
+
+        return self.process_items(task, config, rss.entries, all_entries, url_hash)
+
+    def process_items(self, task, config, items, all_entries, url_hash):
+        """Creates entries from feedparser items, stopping at `max_items` or the first item seen on previous run."""
+        last_entry_id = ''
+        if not all_entries:
             last_entry_id = task.simple_persistence.get('%s_last_entry' % url_hash)
 
         # new entries to be created
@@ -351,7 +528,13 @@ class InputRSS(object):
         # field name for url can be configured by setting link.
         # default value is auto but for example guid is used in some feeds
         ignored = 0
-        for entry in rss.entries:
+        first_item = None
+        for index, entry in enumerate(items):
+            if first_item is None:
+                first_item = entry
+            if config.get('max_items') and index >= config['max_items']:
+                log.verbose('Stopping after %s items (max_items).', config['max_items'])
+                break
 
             # Check if title field is overridden in config
             title_field = config.get('title', 'title')
@@ -463,11 +646,10 @@ class InputRSS(object):
             add_entry(e)
 
         # Save last spot in rss
-        if rss.entries:
+        if first_item is not None:
             log.debug('Saving location in rss feed.')
             try:
-                task.simple_persistence['%s_last_entry' % url_hash] = (rss.entries[0].title +
-                                                                       rss.entries[0].get('guid', ''))
+                task.simple_persistence['%s_last_entry' % url_hash] = (first_item.title + first_item.get('guid', ''))
             except AttributeError:
                 log.debug('rss feed location saving skipped: no title information in first entry')
 
@@ -0,0 +1,313 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Integer, Float, DateTime, Unicode, Boolean, ForeignKey, Index, or_, and_, func
+from sqlalchemy.orm import relation
+
+from flexget import db_schema
+from flexget.event import event
+from flexget.plugins.parsers import plugin_parsing
+from flexget.plugins.parsers.parser_common import default_ignore_prefixes
+from flexget.utils.database import chunked, quality_property
+from flexget.utils.tools import scandir
+
+log = logging.getLogger('directory_index')
+Base = db_schema.versioned_base('directory_index', 0)
+
+# Directories modified this recently are listed again on next scan, their mtime could still change within the
+# timestamp resolution of the filesystem
+MTIME_SAFETY = 2
+# Indexes of paths which have not been used for this long are removed
+UNUSED_EXPIRY = timedelta(days=30)
+
+
+IGNORE_PREFIX = re.compile('|'.join(default_ignore_prefixes))
+NOT_KEY = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def _key(name):
+    return NOT_KEY.sub('', name.lower().replace('&', 'and'))
+
+
+def title_key(name):
+    """
+    Lowercase alphanumeric characters of `name` without ignored prefixes, & is spelled out. Series name matching
+    ignores everything else too, so the name of every file belonging to a series starts with its `series_key`.
+    """
+    prefix = IGNORE_PREFIX.match(name)
+    return _key(name[prefix.end():] if prefix else name)
+
+
+def series_key(series_name):
+    """The `title_key` all names of `series_name` start with. A trailing parenthetical like (US) is optional."""
+    if series_name.endswith(')') and '(' in series_name:
+        series_name = series_name[:series_name.rfind('(')]
+    return _key(series_name)
+
+
+def active_parser(parser_type):
+    """Name of the parser currently used for `parser_type` ('series' or 'movie')."""
+    return plugin_parsing.selected_parsers.get(parser_type, plugin_parsing.default_parsers.get(parser_type))
+
+
+class IndexedDirectory(Base):
+    __tablename__ = 'directory_index_dirs'
+
+    id = Column(Integer, primary_key=True)
+    path = Column(Unicode, index=True, unique=True)
+    # None when the directory must be listed again on next scan
+    mtime = Column(Float)
+    # Only set for directories which have been scanned as root
+    last_used = Column(DateTime)
+    files = relation('IndexedFile', backref='directory', cascade='all, delete, delete-orphan')
+
+    def __repr__(self):
+        return '<IndexedDirectory(path=%s,mtime=%s)>' % (self.path, self.mtime)
+
+
+class IndexedFile(Base):
+    """
+    A file or directory contained in an `IndexedDirectory`. Series and movie identities parsed from the name are kept,
+    along with the parser and series name they were parsed with, so they are only parsed again when those change.
+    Names are only parsed for series their `title_key` may belong to.
+    """
+    __tablename__ = 'directory_index_files'
+
+    id = Column(Integer, primary_key=True)
+    directory_id = Column(Integer, ForeignKey('directory_index_dirs.id'), nullable=False)
+    name = Column(Unicode)
+    title_key = Column(Unicode, index=True)
+    is_dir = Column(Boolean)
+    series = relation('IndexedSeries', backref='file', cascade='all, delete, delete-orphan')
+
+    movie_parser = Column(Unicode)
+    movie_name = Column(Unicode)
+    movie_year = Column(Integer)
+    _movie_quality = Column('movie_quality', Unicode)
+    movie_quality = quality_property('_movie_quality')
+
+    def __init__(self, name, is_dir):
+        self.name = name
+        self.title_key = title_key(name)
+        self.is_dir = is_dir
+
+    @property
+    def path(self):
+        return os.path.join(self.directory.path, self.name)
+
+    def remember_series(self, series_name, parser):
+        """Stores the result of parsing the name as `series_name`, returns it as `IndexedSeries`."""
+        indexed_series = next((s for s in self.series if s.series_name == series_name), None)
+        if indexed_series is None:
+            indexed_series = IndexedSeries(series_name=series_name)
+            self.series.append(indexed_series)
+        indexed_series.parser = active_parser('series')
+        indexed_series.valid = parser.valid
+        indexed_series.identifier = parser.identifier if parser.valid else None
+        indexed_series._quality = parser.quality.name if parser.quality else None
+        indexed_series.proper_count = parser.proper_count
+        return indexed_series
+
+    def parsed_movie(self):
+        """Returns True if the stored movie identity was parsed with the active parser."""
+        return self.movie_parser == active_parser('movie')
+
+    def remember_movie(self, parser):
+        self.movie_parser = active_parser('movie')
+        self.movie_name = parser.name
+        self.movie_year = parser.year
+        self._movie_quality = parser.quality.name if parser.quality else None
+
+    def __repr__(self):
+        return '<IndexedFile(name=%s,is_dir=%s)>' % (self.name, self.is_dir)
+
+
+Index('ix_directory_index_files_directory_name', IndexedFile.directory_id, IndexedFile.name)
+
+
+class IndexedSeries(Base):
+    """
+    Series identity of an `IndexedFile` name, as parsed for `series_name`. A name parses differently for each
+    series, so there is one of these per file and series name, only for the series whose `series_key` the name
+    starts with.
+    """
+    __tablename__ = 'directory_index_series'
+
+    id = Column(Integer, primary_key=True)
+    file_id = Column(Integer, ForeignKey('directory_index_files.id'), nullable=False)
+    series_name = Column(Unicode)
+    parser = Column(Unicode)
+    valid = Column(Boolean)
+    identifier = Column(Unicode)
+    _quality = Column('quality', Unicode)
+    quality = quality_property('_quality')
+    proper_count = Column(Integer)
+
+    def __repr__(self):
+        return '<IndexedSeries(series_name=%s,valid=%s,identifier=%s)>' % (self.series_name, self.valid,
+                                                                           self.identifier)
+
+
+Index('ix_directory_index_series_file_name', IndexedSeries.file_id, IndexedSeries.series_name, unique=True)
+
+
+@event('manager.db_cleanup')
+def db_cleanup(manager, session):
+    expired = session.query(IndexedDirectory).filter(IndexedDirectory.last_used < datetime.now() - UNUSED_EXPIRY)
+    for root in expired.all():
+        for directory in _query_tree(session, root.path):
+            session.delete(directory)
+        log.verbose('Removed unused index of %s', root.path)
+
+
+def _query_tree(session, root):
+    """Returns all indexed directories below and including `root`."""
+    prefix = root.rstrip(os.sep) + os.sep
+    query = session.query(IndexedDirectory).filter(or_(IndexedDirectory.path == root,
+                                                       IndexedDirectory.path.startswith(prefix)))
+    # LIKE treats _ and % in the path as wildcards, filter out anything they matched
+    return [d for d in query if d.path == root or d.path.startswith(prefix)]
+
+
+def _list_dir(path):
+    """Returns `(name, is_dir)` for everything in directory `path`. Like `Path.walk` symlinks are followed."""
+    contents = []
+    for dir_entry in scandir(path):
+        try:
+            contents.append((dir_entry.name, dir_entry.is_dir()))
+        except OSError:
+            contents.append((dir_entry.name, False))
+    return contents
+
+
+def _update_files(directory, contents):
+    existing = dict((f.name, f) for f in directory.files)
+    for name, is_dir in contents:
+        indexed = existing.pop(name, None)
+        if indexed is not None and indexed.is_dir == is_dir:
+            continue
+        if indexed is not None:
+            directory.files.remove(indexed)
+        directory.files.append(IndexedFile(name, is_dir))
+    for indexed in existing.values():
+        directory.files.remove(indexed)
+
+
+def index_directory(session, root):
+    """
+    Brings the index of `root` and everything below it up to date and returns it as `IndexedTree`.
+
+    Only directories whose mtime changed since the last scan are listed, for the rest the stored contents are used.
+    A directory's mtime only reflects changes to its direct contents, so all indexed subdirectories are still
+    stat'ed, but that is far cheaper than listing and parsing their contents again.
+    """
+    root = os.path.normpath(os.path.abspath(os.path.expanduser(root)))
+    known = dict((d.path, d) for d in _query_tree(session, root))
+    # Subdirectory names of all known directories, so that unchanged directories don't need their files loaded
+    subdirs = defaultdict(list)
+    for directory_ids in chunked([d.id for d in known.values()]):
+        query = session.query(IndexedFile.directory_id, IndexedFile.name). \
+            filter(IndexedFile.directory_id.in_(directory_ids)). \
+            filter(IndexedFile.is_dir == True)  # noqa: E712
+        for directory_id, name in query:
+            subdirs[directory_id].append(name)
+
+    now = time.time()
+    visited = {}
+    real_paths = set()
+    listed = 0
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            log.debug('Unable to stat %s: %s', path, e)
+            continue
+        # Symlinks may lead to a loop
+        real_path = os.path.realpath(path)
+        if real_path in real_paths:
+            continue
+        real_paths.add(real_path)
+
+        directory = known.get(path)
+        if directory is not None and directory.mtime is not None and directory.mtime == mtime:
+            names = subdirs[directory.id]
+        else:
+            try:
+                contents = _list_dir(path)
+            except OSError as e:
+                log.debug('Unable to list %s: %s', path, e)
+                continue
+            if directory is None:
+                directory = IndexedDirectory(path=path)
+                session.add(directory)
+            _update_files(directory, contents)
+            directory.mtime = mtime if now - mtime > MTIME_SAFETY else None
+            names = [name for name, is_dir in contents if is_dir]
+            listed += 1
+        visited[path] = directory
+        stack.extend(os.path.join(path, name) for name in names)
+
+    for path, directory in known.items():
+        if path not in visited:
+            session.delete(directory)
+    if root in visited:
+        visited[root].last_used = datetime.now()
+    session.flush()
+    log.debug('Index of %s has %s directories, %s of them were listed again', root, len(visited), listed)
+    return IndexedTree(root, [d.id for d in visited.values()])
+
+
+class IndexedTree(object):
+    """Query helpers for the indexed contents of `root`, as returned by `index_directory`."""
+
+    def __init__(self, root, directory_ids):
+        self.root = root
+        self.directory_ids = directory_ids
+
+    def _query(self, session, *criterion):
+        for directory_ids in chunked(self.directory_ids):
+            for indexed in session.query(IndexedFile).filter(IndexedFile.directory_id.in_(directory_ids)). \
+                    filter(*criterion):
+                yield indexed
+
+    def find_names(self, session, names, ignore_case=False):
+        """Yields `IndexedFile` for every file or directory whose name is one of `names`."""
+        column = func.lower(IndexedFile.name) if ignore_case else IndexedFile.name
+        for chunk in chunked(names):
+            for indexed in self._query(session, column.in_(chunk)):
+                yield indexed
+
+    def series_candidates(self, session, series_name):
+        """
+        Yields `(IndexedFile, IndexedSeries)` for every file or directory whose name may belong to `series_name`, the
+        ones with a `title_key` starting with the `series_key`. The `IndexedSeries` is the stored result of parsing the
+        name for `series_name` with the active parser, None when the name still needs to be parsed and remembered with
+        `IndexedFile.remember_series`.
+        """
+        key = series_key(series_name)
+        parsed = and_(IndexedSeries.file_id == IndexedFile.id, IndexedSeries.series_name == series_name,
+                      IndexedSeries.parser == active_parser('series'))
+        criterion = []
+        if key:
+            # A range instead of LIKE, so the index on title_key is used
+            criterion = [IndexedFile.title_key >= key, IndexedFile.title_key < key[:-1] + chr(ord(key[-1]) + 1)]
+        for directory_ids in chunked(self.directory_ids):
+            query = session.query(IndexedFile, IndexedSeries).outerjoin(IndexedSeries, parsed). \
+                filter(IndexedFile.directory_id.in_(directory_ids)).filter(*criterion)
+            for indexed, indexed_series in query:
+                yield indexed, indexed_series
+
+    def contents(self, session, is_dir=None):
+        """Yields `IndexedFile` for everything in the tree, only directories or files when `is_dir` is given."""
+        if is_dir is None:
+            return self._query(session)
+        return self._query(session, IndexedFile.is_dir == is_dir)
@@ -14,6 +14,7 @@ from flexget.manager import Session
 from flexget.db_schema import versioned_base, with_session
 from flexget.entry import Entry
 from flexget.event import event
+from flexget.utils.regexp import RegexpMatcher
 
 log = logging.getLogger('regexp_list')
 Base = versioned_base('regexp_list', 1)
@@ -74,6 +75,8 @@ class RegexpList(MutableSet):
     @with_session
     def __init__(self, config, session=None):
         self.config = config
+        # Tuple of (regexp ids, RegexpMatcher), built on the first lookup and dropped when the list is changed
+        self._matcher = None
         db_list = self._db_list(session)
         if not db_list:
             session.add(RegexpListList(name=self.config))
@@ -98,6 +101,7 @@ class RegexpList(MutableSet):
             db_regexp.regexp = entry.get('regexp', entry['title'])
             db_list.regexps.append(db_regexp)
             session.commit()
+            self._matcher = None
             return db_regexp.to_entry()
 
     def discard(self, entry):
@@ -107,6 +111,7 @@ class RegexpList(MutableSet):
                 if db_regexp:
                     log.debug('deleting file %s', db_regexp)
                     session.delete(db_regexp)
+                    self._matcher = None
 
     def __contains__(self, entry):
         return self._find_entry(entry, match_regexp=True) is not None
@@ -116,14 +121,29 @@ class RegexpList(MutableSet):
         """Finds `SubtitleListFile` corresponding to this entry, if it exists."""
         res = None
         if match_regexp:
-            for regexp in self._db_list(session).regexps:
-                if re.search(regexp.regexp, entry['title'], re.IGNORECASE):
-                    res = regexp
+            ids, matcher = self._get_matcher(session)
+            index = matcher.first_match(entry['title'])
+            if index is not None:
+                res = session.query(RegexListRegexp).get(ids[index])
         else:
             res = self._db_list(session).regexps.filter(RegexListRegexp.regexp ==
                                                         entry.get('regexp', entry['title'])).first()
         return res
 
+    def _get_matcher(self, session):
+        """Compiles the regexps of the list once, instead of for every entry looked up."""
+        if self._matcher is None:
+            ids, regexps = [], []
+            for db_regexp in self._db_list(session).regexps:
+                try:
+                    regexps.append(re.compile(db_regexp.regexp, re.IGNORECASE | re.UNICODE))
+                except re.error as e:
+                    log.error('Invalid regexp `%s` in list %s: %s', db_regexp.regexp, self.config, e)
+                    continue
+                ids.append(db_regexp.id)
+            self._matcher = ids, RegexpMatcher(regexps)
+        return self._matcher
+
     @property
     def immutable(self):
         return False
@@ -0,0 +1,71 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+import os
+
+from flexget.config_schema import register_config_key, parse_size
+from flexget.event import event
+from flexget.utils.requests import ResponseCache, Session
+
+log = logging.getLogger('http_cache')
+
+schema = {
+    'oneOf': [
+        {'type': 'boolean'},
+        {
+            'type': 'object',
+            'properties': {
+                'path': {'type': 'string', 'format': 'path'},
+                'max_size': {'type': 'string', 'format': 'size'},
+                'ttl': {'type': 'object', 'additionalProperties': {'type': 'string', 'format': 'interval'}}
+            },
+            'additionalProperties': False
+        }
+    ]
+}
+
+# Config the current cache was created with
+cache_config = None
+
+
+def prepare_config(config, manager):
+    config = {} if config is True else dict(config)
+    config.setdefault('path', os.path.join(manager.config_base, 'http_cache'))
+    config.setdefault('max_size', '50 MB')
+    config.setdefault('ttl', {})
+    return config
+
+
+@event('manager.config_updated')
+def setup_cache(manager):
+    """
+    Shares a `ResponseCache` between all http sessions. Configured on the root level, since it applies to everything
+    that talks http, not just tasks.
+
+    Example::
+
+      http_cache:
+        max_size: 100 MB
+        ttl:
+          api.tvmaze.com: 6 hours
+    """
+    global cache_config
+    config = manager.config.get('http_cache')
+    if not config:
+        if Session.response_cache is not None:
+            log.debug('Disabling http cache')
+        Session.response_cache = cache_config = None
+        return
+    config = prepare_config(config, manager)
+    if config == cache_config:
+        return
+    log.debug('Using http cache at %s', config['path'])
+    Session.response_cache = ResponseCache(os.path.expanduser(config['path']), max_size=parse_size(config['max_size']),
+                                           ttls=config['ttl'])
+    cache_config = config
+
+
+@event('config.register')
+def register_config():
+    register_config_key('http_cache', schema)
@@ -5,7 +5,7 @@ from datetime import timedelta
 
 from flexget.utils.database import with_session
 from flexget.utils.sqlalchemy_utils import create_index
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, select, func, Index
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, select, func, Index
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.schema import ForeignKey
 from sqlalchemy.orm import relation
@@ -70,6 +70,7 @@ class TaskExecution(Base):
     rejected = Column(Integer)
     failed = Column(Integer)
     abort_reason = Column(String, nullable=True)
+    timings = relation('PluginTiming', backref='execution', cascade='all, delete, delete-orphan')
 
     def __repr__(self):
         return ('<TaskExecution(task_id=%s,start=%s,end=%s,succeeded=%s,p=%s,a=%s,r=%s,f=%s,reason=%s)>' %
@@ -91,6 +92,45 @@ class TaskExecution(Base):
         }
 
 
+class PluginTiming(Base):
+    """Resources used by a plugin in one phase of a task execution, summed over reruns."""
+    __tablename__ = 'status_plugin_timing'
+    id = Column(Integer, primary_key=True)
+    execution_id = Column(Integer, ForeignKey('status_execution.id'), index=True)
+
+    phase = Column(String)
+    plugin = Column(String)
+    calls = Column(Integer)
+    # Seconds
+    wall = Column(Float)
+    cpu = Column(Float)
+    db_queries = Column(Integer)
+    http_requests = Column(Integer)
+    http_bytes = Column(Integer)
+    entries_in = Column(Integer)
+    entries_out = Column(Integer)
+
+    def __repr__(self):
+        return '<PluginTiming(execution_id=%s,phase=%s,plugin=%s,wall=%s)>' % (self.execution_id, self.phase,
+                                                                               self.plugin, self.wall)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'execution_id': self.execution_id,
+            'phase': self.phase,
+            'plugin': self.plugin,
+            'calls': self.calls,
+            'wall': self.wall,
+            'cpu': self.cpu,
+            'db_queries': self.db_queries,
+            'http_requests': self.http_requests,
+            'http_bytes': self.http_bytes,
+            'entries_in': self.entries_in,
+            'entries_out': self.entries_out
+        }
+
+
 Index('ix_status_execution_task_id_start_end_succeeded', TaskExecution.task_id, TaskExecution.start, TaskExecution.end,
       TaskExecution.succeeded)
 
@@ -126,6 +166,8 @@ class Status(object):
         self.execution.rejected = len(task.rejected)
         self.execution.failed = len(task.failed)
 
+    # Run last, so the timings of the other exit plugins are stored as well
+    @plugin.priority(-255)
     def on_task_exit(self, task, config):
         with Session() as session:
             if self.execution is None:
@@ -134,6 +176,8 @@ class Status(object):
                 self.execution.succeeded = False
                 self.execution.abort_reason = task.abort_reason
             self.execution.end = datetime.datetime.now()
+            for (phase, plugin_name), timing in task.plugin_timings.items():
+                self.execution.timings.append(PluginTiming(phase=phase, plugin=plugin_name, **timing))
             session.merge(self.execution)
 
     on_task_abort = on_task_exit
@@ -152,6 +196,9 @@ def db_cleanup(manager, session):
         TaskExecution.start < datetime.datetime.now() - timedelta(days=365)).delete()
     if result:
         log.verbose('Removed %s task executions from history older than 1 year', result)
+        # Bulk deletes don't cascade
+        session.query(PluginTiming).filter(~PluginTiming.execution_id.in_(session.query(TaskExecution.id))). \
+            delete(synchronize_session=False)
 
 
 @event('plugin.register')
@@ -170,6 +217,37 @@ def get_status_tasks(start=None, stop=None, order_by='last_execution_time', desc
     return query.slice(start, stop).all()
 
 
+@with_session
+def get_plugin_timings(task_name=None, executions=10, session=None):
+    """
+    Returns the timings of the last `executions` executions of each task, or only of task `task_name`.
+
+    :return: List of `(task name, [PluginTiming, ...])` tuples, timings of the latest execution first
+    """
+    query = session.query(StatusTask)
+    if task_name:
+        query = query.filter(StatusTask.name == task_name)
+    results = []
+    for status_task in query.order_by(StatusTask.name):
+        execution_ids = [execution_id for execution_id, in session.query(TaskExecution.id).
+                         filter(TaskExecution.task_id == status_task.id).
+                         order_by(TaskExecution.start.desc())[:executions]]
+        if not execution_ids:
+            continue
+        timings = session.query(PluginTiming).filter(PluginTiming.execution_id.in_(execution_ids)).all()
+        order = dict((execution_id, index) for index, execution_id in enumerate(execution_ids))
+        timings.sort(key=lambda timing: order[timing.execution_id])
+        results.append((status_task.name, timings))
+    return results
+
+
+@with_session
+def get_recent_executions(task_name, limit=10, session=None):
+    """Returns the last `limit` executions of task `task_name`, latest first."""
+    return session.query(TaskExecution).join(StatusTask).filter(StatusTask.name == task_name). \
+        order_by(TaskExecution.start.desc()).limit(limit).all()
+
+
 @with_session
 def get_executions_by_task_id(task_id, start=None, stop=None, order_by='start', descending=True,
                               succeeded=None, produced=True, start_date=None, end_date=None, session=None):
@@ -8,10 +8,41 @@ import ftplib
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.connection_pool import ConnectionPool
 
 log = logging.getLogger('ftp')
 
 
+def ftp_connect(config, ftp_url):
+    if config['use-ssl']:
+        ftp = ftplib.FTP_TLS()
+    else:
+        ftp = ftplib.FTP()
+
+    # ftp.set_debuglevel(2)
+    log.debug("Connecting to " + ftp_url.hostname)
+    ftp.connect(ftp_url.hostname, ftp_url.port)
+    ftp.login(ftp_url.username, ftp_url.password)
+    if config['use-ssl']:
+        ftp.prot_p()
+    ftp.sendcmd('TYPE I')
+    ftp.set_pasv(True)
+    return ftp
+
+
+def pool_key(config, ftp_url):
+    return ftp_url.hostname, ftp_url.port, ftp_url.username, config['use-ssl']
+
+
+# Logged in connections are kept between entries and tasks
+connection_pool = ConnectionPool(ftp_connect, lambda ftp: ftp.close(), lambda ftp: ftp.voidcmd('NOOP'))
+
+
+@event('manager.shutdown')
+def close_connections(manager):
+    connection_pool.close()
+
+
 class OutputFtp(object):
     """
         Ftp Download plugin
@@ -25,6 +56,7 @@ class OutputFtp(object):
               ftp_tmp_path: <path>
               delete_origin: <True/False>
               download_empty_dirs: <True/False>
+              workers: <number of entries downloaded at the same time>
 
         TODO:
           - Resume downloads
@@ -39,7 +71,8 @@ class OutputFtp(object):
             'use-ssl': {'type': 'boolean', 'default': False},
             'ftp_tmp_path': {'type': 'string', 'format': 'path'},
             'delete_origin': {'type': 'boolean', 'default': False},
-            'download_empty_dirs': {'type': 'boolean', 'default': False}
+            'download_empty_dirs': {'type': 'boolean', 'default': False},
+            'workers': {'type': 'integer', 'minimum': 1, 'default': 1}
         },
         'additionalProperties': False
     }
@@ -49,24 +82,18 @@ class OutputFtp(object):
         config.setdefault('delete_origin', False)
         config.setdefault('ftp_tmp_path', os.path.join(task.manager.config_base, 'temp'))
         config.setdefault('download_empty_dirs', False)
+        config.setdefault('workers', 1)
         return config
 
     def ftp_connect(self, config, ftp_url, current_path):
-        if config['use-ssl']:
-            ftp = ftplib.FTP_TLS()
-        else:
-            ftp = ftplib.FTP()
-
-        # ftp.set_debuglevel(2)
-        log.debug("Connecting to " + ftp_url.hostname)
-        ftp.connect(ftp_url.hostname, ftp_url.port)
-        ftp.login(ftp_url.username, ftp_url.password)
-        if config['use-ssl']:
-            ftp.prot_p()
-        ftp.sendcmd('TYPE I')
-        ftp.set_pasv(True)
+        key = pool_key(config, ftp_url)
+        ftp = connection_pool.acquire(key, config, ftp_url)
         log.debug("Changing directory to: " + current_path)
-        ftp.cwd(current_path)
+        try:
+            ftp.cwd(current_path)
+        except ftplib.error_perm:
+            connection_pool.release(key, ftp)
+            raise
 
         return ftp
 
@@ -74,51 +101,101 @@ class OutputFtp(object):
         try:
             ftp.voidcmd("NOOP")
         except (IOError, ftplib.Error):
+            ftp.close()
             ftp = self.ftp_connect(config, ftp_url, current_path)
         return ftp
 
-    def on_task_download(self, task, config):
-        config = self.prepare_config(config, task)
-        for entry in task.accepted:
-            ftp_url = urlparse(entry.get('url'))
-            ftp_url = ftp_url._replace(path=unquote(ftp_url.path))
-            current_path = os.path.dirname(ftp_url.path)
-            try:
-                ftp = self.ftp_connect(config, ftp_url, current_path)
-            except ftplib.all_errors as e:
-                entry.fail("Unable to connect to server : %s" % (e))
-                break
+    def download_entry(self, entry, config):
+        """
+        Downloads the file or directory of `entry`. Runs in the task executor, so the entry is not failed here.
 
-            if not os.path.isdir(config['ftp_tmp_path']):
-                log.debug('creating base path: %s' % config['ftp_tmp_path'])
-                os.mkdir(config['ftp_tmp_path'])
+        :return: The reason the entry should be failed for, None once downloaded
+        """
+        ftp_url = urlparse(entry.get('url'))
+        ftp_url = ftp_url._replace(path=unquote(ftp_url.path))
+        current_path = os.path.dirname(ftp_url.path)
+        try:
+            ftp = self.ftp_connect(config, ftp_url, current_path)
+        except ftplib.all_errors as e:
+            return "Unable to connect to server : %s" % (e)
 
-            file_name = os.path.basename(ftp_url.path)
+        file_name = os.path.basename(ftp_url.path)
 
+        try:
             try:
                 # Directory
                 ftp = self.check_connection(ftp, config, ftp_url, current_path)
                 ftp.cwd(file_name)
-                self.ftp_walk(ftp, os.path.join(config['ftp_tmp_path'], file_name), config, ftp_url, ftp_url.path)
+                ftp = self.ftp_walk(ftp, os.path.join(config['ftp_tmp_path'], file_name), config, ftp_url,
+                                    ftp_url.path)
                 ftp = self.check_connection(ftp, config, ftp_url, current_path)
                 ftp.cwd('..')
                 if config['delete_origin']:
                     ftp.rmd(file_name)
             except ftplib.error_perm:
                 # File
-                self.ftp_down(ftp, file_name, config['ftp_tmp_path'], config, ftp_url, current_path)
-
+                ftp = self.ftp_down(ftp, file_name, config['ftp_tmp_path'], config, ftp_url, current_path)
+        except Exception:
             ftp.close()
+            raise
+
+        connection_pool.release(pool_key(config, ftp_url), ftp)
+
+    def on_task_download(self, task, config):
+        config = self.prepare_config(config, task)
+        if not task.accepted:
+            return
+
+        if not os.path.isdir(config['ftp_tmp_path']):
+            log.debug('creating base path: %s' % config['ftp_tmp_path'])
+            os.mkdir(config['ftp_tmp_path'])
+
+        def download(entry):
+            try:
+                return self.download_entry(entry, config)
+            except Exception as e:
+                log.error('Failed to download %s: %s', entry['title'], e)
+                return 'Download failed: %s' % e
+
+        # Entries are downloaded by the task executor, and only failed once back in the task
+        entries = list(task.accepted)
+        for entry, error in zip(entries, task.executor.map(download, entries, limit=config['workers'])):
+            if error:
+                entry.fail(error)
 
     def on_task_output(self, task, config):
         """Count this as an output plugin."""
 
+    def ftp_list(self, ftp):
+        """
+        Lists the current directory as (name, is_dir) tuples. MLSD tells the type of each name in the same round trip,
+        when the server doesn't support it is_dir is None, and names have to be probed with cwd.
+        """
+        if not getattr(ftp, 'no_mlsd', False):
+            lines = []
+            try:
+                ftp.retrlines('MLSD', lines.append)
+            except ftplib.error_perm as e:
+                log.debug('MLSD not supported, falling back to NLST: %s', e)
+                ftp.no_mlsd = True
+            else:
+                listing = []
+                for line in lines:
+                    facts, _, name = line.partition(' ')
+                    facts = dict(fact.partition('=')[::2] for fact in facts.lower().split(';') if fact)
+                    file_type = facts.get('type')
+                    if file_type in ('cdir', 'pdir'):
+                        continue
+                    listing.append((name, {'dir': True, 'file': False}.get(file_type)))
+                return listing
+        return [(name, None) for name in ftp.nlst(ftp.pwd())]
+
     def ftp_walk(self, ftp, tmp_path, config, ftp_url, current_path):
         log.debug("DIR->" + ftp.pwd())
         log.debug("FTP tmp_path : " + tmp_path)
         try:
             ftp = self.check_connection(ftp, config, ftp_url, current_path)
-            dirs = ftp.nlst(ftp.pwd())
+            dirs = self.ftp_list(ftp)
         except ftplib.error_perm as ex:
             log.info("Error %s" % ex)
             return ftp
@@ -130,8 +207,11 @@ class OutputFtp(object):
                 log.debug("Empty directory, skipping.")
             return ftp
 
-        for file_name in (path for path in dirs if path not in ('.', '..')):
+        for file_name, is_dir in (item for item in dirs if item[0] not in ('.', '..')):
             file_name = os.path.basename(file_name)
+            if is_dir is False:
+                ftp = self.ftp_down(ftp, file_name, tmp_path, config, ftp_url, current_path)
+                continue
             try:
                 ftp = self.check_connection(ftp, config, ftp_url, current_path)
                 ftp.cwd(file_name)
@@ -9,6 +9,7 @@ from sqlalchemy import Column, String, Integer, DateTime, Unicode
 from flexget import plugin
 from flexget.event import event
 from flexget.manager import Base
+from flexget.utils.database import BulkInsert
 
 log = logging.getLogger('history')
 
@@ -52,17 +53,20 @@ class PluginHistory(object):
         if config is False:
             return  # Explicitly disabled with configuration
 
+        bulk = BulkInsert()
+        now = datetime.now()
         for entry in task.accepted:
-            item = History()
-            item.task = task.name
-            item.filename = entry.get('output', None)
-            item.title = entry['title']
-            item.url = entry['url']
             reason = ''
             if 'reason' in entry:
                 reason = ' (reason: %s)' % entry['reason']
-            item.details = 'Accepted by %s%s' % (entry.get('accepted_by', '<unknown>'), reason)
-            task.session.add(item)
+            bulk.add(History,
+                     task=task.name,
+                     filename=entry.get('output', None),
+                     title=entry['title'],
+                     url=entry['url'],
+                     time=now,
+                     details='Accepted by %s%s' % (entry.get('accepted_by', '<unknown>'), reason))
+        bulk.flush(task.session)
 
 
 @event('plugin.register')
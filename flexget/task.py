@@ -7,6 +7,7 @@ import logging
 import threading
 import random
 import string
+from collections import OrderedDict
 from functools import wraps, total_ordering
 
 from sqlalchemy import Column, Integer, String, Unicode
@@ -14,6 +15,7 @@ from sqlalchemy import Column, Integer, String, Unicode
 from flexget import config_schema, db_schema
 from flexget.entry import EntryUnicodeError
 from flexget.event import event, fire_event
+from flexget.executor import TaskExecutor
 from flexget.logger import capture_output
 from flexget.manager import Session
 from flexget.plugin import plugins as all_plugins
@@ -21,6 +23,7 @@ from flexget.plugin import (
     DependencyError, get_plugins, phase_methods, plugin_schemas, PluginError, PluginWarning, task_phases)
 from flexget.utils import requests
 from flexget.utils.database import with_session
+from flexget.utils.instrumentation import PluginTimer
 from flexget.utils.simple_persistence import SimpleTaskPersistence
 from flexget.utils.tools import get_config_hash
 
@@ -244,6 +247,10 @@ class Task(object):
         self.session = None
 
         self.requests = requests.Session()
+        self._executor = None
+
+        # Resources used by each plugin, (phase, plugin name) -> dict of totals, see `PluginTimer`
+        self.plugin_timings = OrderedDict()
 
         # List of all entries in the task
         self._all_entries = EntryContainer()
@@ -255,6 +262,13 @@ class Task(object):
         self.current_phase = None
         self.current_plugin = None
 
+    @property
+    def executor(self):
+        """:class:`TaskExecutor` for running blocking work of this task concurrently."""
+        if self._executor is None:
+            self._executor = TaskExecutor(self, self.manager.executor)
+        return self._executor
+
     @property
     def max_reruns(self):
         """How many times task can be rerunned before stopping"""
@@ -444,16 +458,26 @@ class Task(object):
                 self.session = session
                 try:
                     fire_event('task.execute.before_plugin', self, plugin.name)
-                    response = self.__run_plugin(plugin, phase, args)
-                    if phase == 'input' and response:
-                        # add entries returned by input to self.all_entries
-                        for e in response:
-                            e.task = self
-                        self.all_entries.extend(response)
+                    timer = PluginTimer(len(self.entries))
+                    try:
+                        response = self.__run_plugin(plugin, phase, args)
+                        if phase == 'input' and response:
+                            # add entries returned by input to self.all_entries
+                            for e in response:
+                                e.task = self
+                            self.all_entries.extend(response)
+                    finally:
+                        self._add_timing(phase, plugin.name, timer.stop(len(self.entries)))
                 finally:
                     fire_event('task.execute.after_plugin', self, plugin.name)
                 self.session = None
 
+    def _add_timing(self, phase, plugin_name, timing):
+        totals = self.plugin_timings.setdefault((phase, plugin_name), dict.fromkeys(PluginTimer.fields + ('calls',), 0))
+        for field in PluginTimer.fields:
+            totals[field] += timing[field]
+        totals['calls'] += 1
+
     def __run_plugin(self, plugin, phase, args=None, kwargs=None):
         """
         Execute given plugins phase method, with supplied args and kwargs.
@@ -608,6 +632,8 @@ class Task(object):
                         # Store a copy of the config state after start phase to restore for reruns
                         self.prepared_config = copy.deepcopy(self.config)
         except TaskAbort:
+            if self._executor:
+                self._executor.cancel()
             try:
                 self.__run_task_phase('abort')
             except TaskAbort as e:
@@ -629,11 +655,13 @@ class Task(object):
           for this execution.
         - :attr:`.options.inject` is a list of :class:`Entry` instances used instead
           of running input phase.
+        - :attr:`.options.hot` is set for latency sensitive executions, database cleanup
+          is left to other executions.
         """
 
         try:
             self.finished_event.clear()
-            if self.options.cron:
+            if self.options.cron and not getattr(self.options, 'hot', False):
                 self.manager.db_cleanup()
             fire_event('task.execute.started', self)
             while True:
@@ -652,6 +680,8 @@ class Task(object):
                 break
             fire_event('task.execute.completed', self)
         finally:
+            if self._executor:
+                self._executor.cancel()
             self.finished_event.set()
 
     @staticmethod
@@ -6,6 +6,7 @@ import queue
 import sys
 import threading
 import time
+from contextlib import contextmanager
 
 from sqlalchemy.exc import ProgrammingError, OperationalError
 
@@ -14,13 +15,56 @@ from flexget.task import TaskAbort
 log = logging.getLogger('task_queue')
 
 
+class ExecutionLock(object):
+    """
+    Lets only one task execute at a time across task queues. Plugin instances are shared by all tasks, and some keep
+    the state of the running task on themselves.
+
+    Urgent holders waiting for the lock get it before the others, so their tasks jump ahead of queued tasks, though
+    they still wait for the running task to finish.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._locked = False
+        self._urgent_waiting = 0
+
+    @contextmanager
+    def hold(self, urgent=False):
+        with self._condition:
+            if urgent:
+                self._urgent_waiting += 1
+            try:
+                while self._locked or (not urgent and self._urgent_waiting):
+                    self._condition.wait()
+            finally:
+                if urgent:
+                    self._urgent_waiting -= 1
+            self._locked = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._locked = False
+                self._condition.notify_all()
+
+
+# Held by the task queues while they execute a task
+execution_lock = ExecutionLock()
+
+
 class TaskQueue(object):
     """
     Task processing thread.
-    Only executes one task at a time, if more are requested they are queued up and run in turn.
+    Only executes one task at a time, if more are requested they are queued up and run in turn. Tasks of all queues
+    are executed one at a time, see `ExecutionLock`.
     """
 
-    def __init__(self):
+    def __init__(self, name='task_queue', urgent=False):
+        """
+        :param bool urgent: Tasks of this queue go before those of other queues waiting to execute
+        """
+        self.urgent = urgent
         self.run_queue = queue.PriorityQueue()
         self._shutdown_now = False
         self._shutdown_when_finished = False
@@ -29,7 +73,7 @@ class TaskQueue(object):
 
         # We don't override `threading.Thread` because debugging this seems unsafe with pydevd.
         # Overriding __len__(self) seems to cause a debugger deadlock.
-        self._thread = threading.Thread(target=self.run, name='task_queue')
+        self._thread = threading.Thread(target=self.run, name=name)
         self._thread.daemon = True
 
     def start(self):
@@ -45,7 +89,8 @@ class TaskQueue(object):
                     self._shutdown_now = True
                 continue
             try:
-                self.current_task.execute()
+                with execution_lock.hold(self.urgent):
+                    self.current_task.execute()
             except TaskAbort as e:
                 log.debug('task %s aborted: %r' % (self.current_task.name, e))
             except (ProgrammingError, OperationalError):
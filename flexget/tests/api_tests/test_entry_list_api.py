@@ -320,6 +320,23 @@ class TestEntryListPagination(object):
         assert links['next']['page'] == 3
         assert links['prev']['page'] == 1
 
+    def test_entry_list_cursor_pagination(self, api_client, cursor_pages):
+        with Session() as session:
+            entry_list = EntryListList(name='test list')
+            session.add(entry_list)
+
+            for i in range(200):
+                e = Entry(title='test_title_%s' % i, original_url='url_%s' % i)
+                entry_list.entries.append(EntryListEntry(e, entry_list.id))
+
+        responses, items = cursor_pages('/entry_list/1/entries/?per_page=30&after=&sort_by=added&order=asc')
+        assert len(responses) == 7
+        assert int(responses[-1].headers['count']) == 20
+        assert [item['id'] for item in items] == list(range(1, 201))
+
+        rsp = api_client.get('/entry_list/2/entries/?after=')
+        assert rsp.status_code == 404
+
     def test_entry_list_sorting(self, api_client):
         base_entry_1 = dict(title='test_title_1', original_url='url_c')
         base_entry_2 = dict(title='test_title_2', original_url='url_b')
@@ -162,6 +162,14 @@ class TestFailedPaginationAPI(object):
         assert links['next']['page'] == 3
         assert links['prev']['page'] == 1
 
+    def test_failed_cursor_pagination(self, api_client, cursor_pages):
+        self.add_failed_entries()
+
+        responses, items = cursor_pages('/failed/?per_page=60&after=&sort_by=failure_time&order=desc&count=false')
+        assert len(responses) == 4
+        assert all('total-count' not in rsp.headers for rsp in responses)
+        assert [item['id'] for item in items] == list(range(200, 0, -1))
+
     def test_failed_sorting(self, api_client):
         failed_entry_dict_1 = dict(title='Failed title_1', url='http://jhb.com', reason='Test reason_3')
         failed_entry_dict_2 = dict(title='Failed title_2', url='http://def.com', reason='Test reason_1')
@@ -1,6 +1,10 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import zlib
+
+import requests
+
 from flexget.api.app import base_message
 from flexget.api.plugins.history import ObjectsContainer as OC
 from flexget.manager import Session
@@ -206,3 +210,84 @@ class TestHistoryPaginationAPI(object):
         assert len(data) == 1
         assert int(rsp.headers['total-count']) == 3
         assert int(rsp.headers['count']) == 1
+
+
+class TestHistoryCursorPaginationAPI(object):
+    config = "{'tasks': {}}"
+
+    def add_history(self, num_of_entries):
+        with Session() as session:
+            for i in range(num_of_entries):
+                item = History()
+                # Few distinct tasks, ties are broken by id. Some entries have no details.
+                item.task = 'test_task_%s' % (i % 3)
+                item.title = 'test_title_%s' % i
+                item.url = 'test_url_%s' % i
+                item.filename = 'test_filename_%s' % i
+                item.details = 'test_details_%s' % (i % 7) if i % 5 else None
+                session.add(item)
+
+    def test_cursor_pages(self, api_client, cursor_pages):
+        self.add_history(120)
+
+        responses, items = cursor_pages('/history/?per_page=50&after=')
+        assert [int(rsp.headers['count']) for rsp in responses] == [50, 50, 20]
+        assert all(int(rsp.headers['total-count']) == 120 for rsp in responses)
+        # Same order as page numbers
+        data = json.loads(api_client.get('/history/?per_page=100').get_data(as_text=True))
+        data += json.loads(api_client.get('/history/?per_page=100&page=2').get_data(as_text=True))
+        assert items == data
+
+        for sort_by in ('task', 'details', 'id'):
+            for order in ('asc', 'desc'):
+                responses, items = cursor_pages('/history/?per_page=25&after=&sort_by=%s&order=%s' % (sort_by, order))
+                assert len(items) == 120
+                assert len(set(item['id'] for item in items)) == 120
+                with Session() as session:
+                    column = getattr(History, sort_by)
+                    query = session.query(History.id).order_by(column.desc() if order == 'desc' else column)
+                    expected = [row.id for row in query.order_by(History.id.desc() if order == 'desc' else History.id)]
+                assert [item['id'] for item in items] == expected
+
+    def test_cursor_insert_while_streaming(self, api_client, cursor_pages):
+        self.add_history(4)
+        with Session() as session:
+            expected = [item.id for item in session.query(History).order_by(History.time.desc(), History.id.desc())]
+
+        rsp = api_client.get('/history/?per_page=2&after=&sort_by=time&order=desc')
+        assert rsp.status_code == 200
+        # A newer row is added before the body of the first page is read
+        with Session() as session:
+            item = History()
+            item.task = 'test_task'
+            item.title = 'test_title_new'
+            session.add(item)
+        items = json.loads(rsp.get_data(as_text=True))
+        assert [item['id'] for item in items] == expected[:2]
+
+        link = requests.utils.parse_header_links(rsp.headers['link'])
+        next_url = dict((l['rel'], l['url']) for l in link)['next']
+        _, rest = cursor_pages(next_url)
+        assert [item['id'] for item in items + rest] == expected
+
+    def test_cursor_options(self, api_client):
+        self.add_history(30)
+
+        rsp = api_client.get('/history/?per_page=5&after=&count=false&task=test_task_1')
+        assert rsp.status_code == 200
+        assert 'total-count' not in rsp.headers
+        assert int(rsp.headers['count']) == 5
+        link = rsp.headers['link']
+        assert 'task=test_task_1' in link
+        assert 'rel="next"' in link
+        assert all(item['task'] == 'test_task_1' for item in json.loads(rsp.get_data(as_text=True)))
+
+        rsp = api_client.get('/history/?after=invalid')
+        assert rsp.status_code == 400
+
+        # Streamed responses are compressed on the fly
+        rsp = api_client.get('/history/?after=', headers={'Accept-Encoding': 'gzip'})
+        assert rsp.status_code == 200
+        assert rsp.headers['content-encoding'] == 'gzip'
+        data = json.loads(zlib.decompress(rsp.get_data(), 16 + zlib.MAX_WBITS).decode('utf-8'))
+        assert len(data) == 30
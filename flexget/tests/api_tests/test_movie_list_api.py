@@ -385,6 +385,21 @@ class TestMovieListPagination(object):
         assert links['next']['page'] == 3
         assert links['prev']['page'] == 1
 
+    def test_movie_list_cursor_pagination(self, api_client, cursor_pages):
+        with Session() as session:
+            movie_list = MovieListList(name='test_list')
+            session.add(movie_list)
+
+            for i in range(200):
+                movie_list.movies.append(MovieListMovie(title='title_%s' % i, year=1900 + i % 10))
+
+        responses, items = cursor_pages('/movie_list/1/movies/?per_page=50&after=&sort_by=year&order=desc')
+        assert len(responses) == 4
+        assert all(int(rsp.headers['total-count']) == 200 for rsp in responses)
+        # Equal years are ordered by id
+        assert [(item['year'], item['id']) for item in items] == \
+            sorted(((1900 + i % 10, i + 1) for i in range(200)), reverse=True)
+
     def test_movie_list_sorting(self, api_client):
         with Session() as session:
             movie_list = MovieListList(name='test_list')
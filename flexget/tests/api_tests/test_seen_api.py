@@ -245,6 +245,27 @@ class TestSeenPagination(object):
         assert links['next']['page'] == 3
         assert links['prev']['page'] == 1
 
+    def test_seen_cursor_pagination(self, api_client, cursor_pages):
+        with Session() as session:
+            for i in range(200):
+                seen_entry = SeenEntry(title='test_title_%s' % i, task='test_task_%s' % (i % 2),
+                                       reason='test_reason_%s' % i)
+                session.add(seen_entry)
+                seen_entry.fields = [SeenField(field='test_field_%s' % i, value='test_value_%s' % i),
+                                     SeenField(field='url', value='test_url_%s' % i)]
+
+        responses, items = cursor_pages('/seen/?per_page=30&after=&sort_by=title&order=asc')
+        assert len(items) == 200
+        assert all(int(rsp.headers['total-count']) == 200 for rsp in responses)
+        data = json.loads(api_client.get('/seen/?per_page=100&sort_by=title&order=asc').get_data(as_text=True))
+        data += json.loads(api_client.get('/seen/?per_page=100&page=2&sort_by=title&order=asc').
+                           get_data(as_text=True))
+        assert items == data
+
+        responses, items = cursor_pages('/seen/?per_page=30&after=&value=test_value_1&sort_by=task')
+        assert int(responses[0].headers['total-count']) == 111
+        assert len(items) == 111
+
     def test_seen_sorting(self, api_client):
         seen_entry_1 = dict(title='test_title_1', reason='test_reason_c', task='test_task_2', local=True)
         field_1 = dict(field='test_field_1', value='test_value_1')
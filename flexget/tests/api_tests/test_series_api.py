@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import pytest
+import sqlalchemy
 from datetime import datetime, timedelta
 
 from flexget.plugins.filter.seen import SeenEntry
@@ -11,7 +12,8 @@ from flexget.api.plugins.series import ObjectsContainer as OC
 from flexget.api.plugins.tvdb_lookup import ObjectsContainer as tvdb
 from flexget.api.plugins.tvmaze_lookup import ObjectsContainer as tvmaze
 from flexget.manager import Session
-from flexget.plugins.filter.series import Series, SeriesTask, Episode, Release, AlternateNames
+from flexget.plugins.filter.series import (Series, SeriesTask, Episode, Release, AlternateNames, SeriesSummary,
+                                           get_series_summary)
 from flexget.utils import json
 
 
@@ -1555,6 +1557,24 @@ class TestSeriesPagination(object):
         assert links['next']['page'] == 3
         assert links['prev']['page'] == 1
 
+    def test_series_cursor_pagination(self, api_client, cursor_pages):
+        with Session() as session:
+            for i in range(60):
+                series = Series()
+                session.add(series)
+                series.name = 'Test Series {}'.format(i)
+                if i % 2:
+                    series.in_tasks = [SeriesTask('test task')]
+
+        responses, items = cursor_pages('/series/?per_page=8&after=&in_config=all&order=asc&begin=false')
+        assert len(items) == 60
+        assert [item['name'] for item in items] == sorted('Test Series {}'.format(i) for i in range(60))
+
+        # No releases, all series have the same last download date and are ordered by id
+        responses, items = cursor_pages('/series/?per_page=7&after=&sort_by=last_download_date&order=desc')
+        assert int(responses[0].headers['total-count']) == 30
+        assert [item['id'] for item in items] == list(range(60, 0, -2))
+
     def test_episodes_pagination(self, api_client, link_headers):
         number_of_episodes = 200
         with Session() as session:
@@ -1687,3 +1707,83 @@ class TestSeriesPagination(object):
         assert links['last']['page'] == 4
         assert links['next']['page'] == 3
         assert links['prev']['page'] == 1
+
+
+class TestSeriesSummary(object):
+    config = """
+        tasks:
+          first:
+            mock:
+              - {title: 'series.foo.s01e01.720p.hdtv-flexget'}
+              - {title: 'series.foo.s01e02.720p.hdtv-flexget'}
+              - {title: 'series.bar.s01e05.720p.hdtv-flexget'}
+            series:
+              - series foo
+              - series bar
+          second:
+            mock:
+              - {title: 'series.foo.s01e03.720p.hdtv-flexget'}
+            series:
+              - series foo
+    """
+
+    def summaries(self):
+        with Session() as session:
+            return dict((s.series_id, (s.latest_episode.identifier if s.latest_episode else None, s.behind))
+                        for s in session.query(SeriesSummary))
+
+    def latest(self, api_client):
+        rsp = api_client.get('/series/?latest=true&configured=all')
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        return dict((s['name'], s['latest_episode']['identifier'] if s['latest_episode'] else None)
+                    for s in json.loads(rsp.get_data(as_text=True)))
+
+    def test_summary_follows_changes(self, execute_task, api_client):
+        execute_task('first')
+        assert sorted(self.summaries().values()) == [('S01E02', 0), ('S01E05', 0)]
+        # Listing only reads the summaries
+        statements = []
+        engine = Session.kw['bind']
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement.split()[0].upper())
+
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', record)
+        try:
+            assert self.latest(api_client) == {'series foo': 'S01E02', 'series bar': 'S01E05'}
+        finally:
+            sqlalchemy.event.remove(engine, 'before_cursor_execute', record)
+        assert set(statements) == {'SELECT'}
+
+        execute_task('second')
+        assert sorted(self.summaries().values()) == [('S01E03', 0), ('S01E05', 0)]
+        assert self.latest(api_client) == {'series foo': 'S01E03', 'series bar': 'S01E05'}
+
+        with Session() as session:
+            foo = session.query(Series).filter(Series.name == 'series foo').one()
+            episode = session.query(Episode).filter(Episode.series_id == foo.id). \
+                filter(Episode.identifier == 'S01E03').one()
+            series_id, episode_id = foo.id, episode.id
+        rsp = api_client.delete('/series/%s/episodes/%s/' % (series_id, episode_id))
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        assert self.summaries()[series_id] == ('S01E02', 0)
+        assert self.latest(api_client)['series foo'] == 'S01E02'
+
+    def test_summary_behind(self, execute_task):
+        execute_task('first')
+        with Session() as session:
+            foo = session.query(Series).filter(Series.name == 'series foo').one()
+            # An episode seen but not downloaded
+            release = Release()
+            release.title = 'series.foo.s01e03.720p.hdtv-flexget'
+            episode = Episode()
+            episode.identifier, episode.identified_by, episode.season, episode.number = 'S01E03', 'ep', 1, 3
+            episode.releases.append(release)
+            foo.episodes.append(episode)
+        with Session() as session:
+            assert get_series_summary(configured='all', count=True, session=session) == 2
+            summary = session.query(Series).filter(Series.name == 'series foo').one().summary
+            assert summary.latest_episode.identifier == 'S01E02'
+            assert summary.behind == 1
+            assert summary.configured
+            assert summary.first_seen <= summary.last_seen
@@ -89,6 +89,18 @@ class TestServerAPI(object):
         assert data['raw_config'] == 'dGFza3M6CiAgdGVzdDoKICAgIHJzczoKICAgICAgdXJsOiBodHRwOi8vdGVzdC9yc3MKICAgIG1' \
                                      'vY2s6CiAgICAgIC0gdGl0bGU6IGVudHJ5IDE='
 
+    def test_executor(self, api_client, schema_match, manager):
+        manager.executor.submit(lambda: None).result()
+
+        rsp = api_client.get('/server/executor/')
+        assert rsp.status_code == 200
+        data = json.loads(rsp.get_data(as_text=True))
+
+        errors = schema_match(OC.executor_object, data)
+        assert not errors
+        assert data['submitted'] == data['completed'] == 1
+        assert data['queued'] == 0
+
     @pytest.mark.online
     def test_version(self, api_client, schema_match):
         latest = get_latest_flexget_version_number()
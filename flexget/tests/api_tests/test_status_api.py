@@ -321,3 +321,27 @@ class TestTaskStatusPagination(object):
         data = json.loads(rsp.get_data(as_text=True))
 
         assert data[0]['produced'] == 10
+
+
+class TestStatusTimingsAPI(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'a'}
+            accept_all: yes
+    """
+
+    def test_execution_timings(self, api_client, schema_match, execute_task):
+        rsp = api_client.get('/status/1/executions/1/timings/')
+        assert rsp.status_code == 404
+
+        execute_task('test')
+
+        rsp = api_client.get('/status/1/executions/1/timings/')
+        assert rsp.status_code == 200
+        data = json.loads(rsp.get_data(as_text=True))
+
+        errors = schema_match(OC.plugin_timings_list, data)
+        assert not errors
+        assert {'phase': 'input', 'plugin': 'mock'} in [{'phase': t['phase'], 'plugin': t['plugin']} for t in data]
@@ -30,6 +30,7 @@ from flexget.task import Task, TaskAbort
 from flexget.webserver import User
 from flexget.manager import Session
 from flexget.api import api_app
+from flexget.utils import json
 
 log = logging.getLogger('tests')
 
@@ -176,6 +177,26 @@ def link_headers(manager):
     return headers
 
 
+@pytest.fixture()
+def cursor_pages(api_client):
+    """
+    Follows the `next` links of cursor pagination, starting from an url. Returns the responses and all items.
+    """
+    def pages(url):
+        responses, items = [], []
+        while url:
+            rsp = api_client.get(url)
+            assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+            responses.append(rsp)
+            items.extend(json.loads(rsp.get_data(as_text=True)))
+            links = dict((link['rel'], link['url']) for link in
+                         requests.utils.parse_header_links(rsp.headers.get('link')))
+            url = links.get('next')
+        return responses, items
+
+    return pages
+
+
 # --- End Public Fixtures ---
 
 
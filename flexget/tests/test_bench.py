@@ -0,0 +1,54 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+from future.moves.http import client as http_client
+
+import requests
+import pytest
+
+from flexget.plugins.cli import bench as bench_module
+from flexget.plugins.cli.bench import bench, PIPELINES
+from flexget.utils import json
+
+# Saved before the no_requests fixture replaces them, the download server of the benchmark is local
+real_requests = {
+    'requests.sessions.Session.request': requests.sessions.Session.request,
+    'future.moves.http.client.HTTPConnection.request': http_client.HTTPConnection.request,
+}
+
+
+class TestBench(object):
+    config = 'tasks: {}'
+
+    @pytest.fixture()
+    def local_requests(self, no_requests, monkeypatch):
+        for func, real_func in real_requests.items():
+            monkeypatch.setattr(func, real_func)
+
+    def test_pipelines(self, manager, local_requests):
+        engine = manager.engine
+        results = bench(manager, count=20)
+        assert manager.engine is engine
+        assert list(results['pipelines']) == list(PIPELINES)
+        for pipeline, (first, repeat) in results['pipelines'].items():
+            assert first['entries'] == 20, pipeline
+            assert not first['aborted'], pipeline
+            assert not first['failed'], pipeline
+            assert any(plugin['plugin'] == 'seen' for plugin in first['plugins'])
+            assert 'input' in first['phases']
+        # Everything accepted on the first run has been seen by the second one
+        full = results['pipelines']['full']
+        assert full[0]['accepted']
+        assert not full[1]['accepted']
+        assert results['pipelines']['download'][0]['accepted'] == 20
+        # Results are json serializable
+        assert json.loads(json.dumps(results))['entries'] == 20
+
+    def test_single_pipeline(self, manager):
+        results = bench(manager, pipelines=['filters'], count=10, runs=1)
+        assert list(results['pipelines']) == ['filters']
+        assert len(results['pipelines']['filters']) == 1
+
+    def test_refused_in_daemon(self, manager, monkeypatch):
+        monkeypatch.setattr(manager, 'is_daemon', True)
+        monkeypatch.setattr(bench_module, 'bench', lambda *args, **kwargs: pytest.fail('bench should not run'))
+        bench_module.do_cli(manager, manager.options)
@@ -2,10 +2,13 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import copy
 import os
 import pytest
 
+from flexget import config_schema
 from flexget.manager import Manager
+from flexget.utils.file_watcher import FileWatcher
 
 config_utf8 = os.path.join(os.path.dirname(__file__), 'config_utf8.yml')
 
@@ -27,3 +30,66 @@ class TestConfig(object):
         manager.find_config()
         manager.load_config()
         assert manager.config, 'Config didn\'t load'
+
+
+class TestIncrementalValidation(object):
+    config = """
+        tasks:
+          one:
+            mock:
+              - title: a
+          two:
+            mock:
+              - title: b
+    """
+
+    @pytest.fixture
+    def validated(self, monkeypatch):
+        """Names of the tasks passed to schema validation."""
+        validated = []
+        process_config = config_schema.process_config
+
+        def recording_process_config(config, *args, **kwargs):
+            validated.extend(config.get('tasks', {}))
+            return process_config(config, *args, **kwargs)
+
+        monkeypatch.setattr(config_schema, 'process_config', recording_process_config)
+        return validated
+
+    def test_unchanged_tasks_reused(self, manager, validated):
+        config = copy.deepcopy(manager.user_config)
+        config['tasks']['two']['mock'].append({'title': 'c'})
+        config['tasks']['three'] = {'accept_all': True}
+        manager.update_config(config)
+        assert sorted(validated) == ['three', 'two']
+        assert list(manager.config['tasks']) == ['one', 'two', 'three']
+        assert manager.config['tasks']['one'] == {'mock': [{'title': 'a'}]}
+
+    def test_invalid_task(self, manager, validated):
+        config = copy.deepcopy(manager.user_config)
+        config['tasks']['two'] = {'mock': 'invalid'}
+        with pytest.raises(ValueError) as e:
+            manager.update_config(config)
+        assert [error.json_pointer for error in e.value.errors] == ['/tasks/two/mock']
+        assert manager.config['tasks']['two'] == {'mock': [{'title': 'b'}]}
+        # The invalid task is validated again on next update
+        del validated[:]
+        with pytest.raises(ValueError):
+            manager.update_config(copy.deepcopy(config))
+        assert validated == ['two']
+
+
+class TestFileWatcher(object):
+    def test_polling(self, tmpdir):
+        config_file = tmpdir.join('config.yml')
+        config_file.write('tasks: {}')
+        watcher = FileWatcher(config_file.strpath, use_notifications=False)
+        assert not watcher.notifications
+        assert not watcher.changed()
+        config_file.write('tasks: {a: {}}')
+        assert watcher.changed()
+        assert not watcher.changed()
+        # Editors often replace the file
+        tmpdir.join('new.yml').write('tasks: {b: {}}')
+        tmpdir.join('new.yml').rename(config_file)
+        assert watcher.changed()
@@ -1,6 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget.entry import Entry
+from flexget.plugins.filter.crossmatch import FieldIndex
+
 
 class TestCrossmatch(object):
     config = """
@@ -15,9 +18,107 @@ class TestCrossmatch(object):
                 - title: entry 2
               action: reject
               fields: [title]
+          test_order:
+            mock:
+            - title: entry 2
+            - title: entry 1
+            - title: entry 3
+            crossmatch:
+              from:
+              - mock:
+                - title: entry 3
+                - title: entry 1
+              action: reject
+              fields: [title]
+          test_substring:
+            mock:
+            - title: Some.Show.S01E01.720p
+            - title: Other.Show.S01E01
+            - title: Show
+            crossmatch:
+              from:
+              - mock:
+                - title: Some.Show
+                - title: S01E01.7
+                - {title: x, imdb_id: tt1}
+              action: accept
+              fields: [title]
+              exact: no
+          test_fields:
+            mock:
+            - {title: a, imdb_id: tt1}
+            - {title: b, imdb_id: tt2, tvdb_id: 2}
+            - {title: c}
+            - {title: d, imdb_id: [tt1]}
+            crossmatch:
+              from:
+              - mock:
+                - {title: c}
+                - {title: e, imdb_id: tt1, tvdb_id: 1}
+                - {title: f, tvdb_id: 2}
+                - {title: g, imdb_id: [tt1]}
+              action: accept
+              fields: [imdb_id, tvdb_id]
+          test_copied_fields:
+            mock:
+            - {title: a}
+            crossmatch:
+              from:
+              - mock:
+                - {title: a, imdb_id: tt1}
+                - {title: b, imdb_id: tt1, tvdb_id: 5}
+              action: reject
+              fields: [title, imdb_id]
     """
 
     def test_reject_title(self, execute_task):
         task = execute_task('test_title')
         assert task.find_entry('rejected', title='entry 2')
         assert len(task.rejected) == 1
+
+    def test_order(self, execute_task):
+        task = execute_task('test_order')
+        assert [e['title'] for e in task.rejected] == ['entry 1', 'entry 3']
+        assert task.find_entry('undecided', title='entry 2')
+        assert [e['title'] for e in task.all_entries] == ['entry 2', 'entry 1', 'entry 3']
+
+    def test_substring(self, execute_task):
+        task = execute_task('test_substring')
+        # The first intersecting entry gives the reason
+        assert task.find_entry('accepted', title='Some.Show.S01E01.720p',
+                               reason='intersects with Some.Show on field(s) title')
+        assert task.find_entry('undecided', title='Other.Show.S01E01')
+        assert task.find_entry('undecided', title='Show')
+
+    def test_fields(self, execute_task):
+        task = execute_task('test_fields')
+        assert task.find_entry('accepted', title='a', reason='intersects with e on field(s) imdb_id')
+        assert task.find_entry('accepted', title='b', reason='intersects with f on field(s) tvdb_id')
+        # Fields missing from one of the entries don't intersect
+        assert task.find_entry('undecided', title='c')
+        # Unhashable values are still compared
+        assert task.find_entry('accepted', title='d', reason='intersects with g on field(s) imdb_id')
+
+    def test_copied_fields(self, execute_task):
+        task = execute_task('test_copied_fields')
+        # imdb_id is copied from the first match, the entry then intersects with the second one on it
+        entry = task.find_entry('rejected', title='a', reason='intersects with a on field(s) title')
+        assert entry['imdb_id'] == 'tt1'
+        assert entry['tvdb_id'] == 5
+        assert len(task.rejected) == 1
+
+
+class TestFieldIndex(object):
+    def test_exact(self):
+        entries = [Entry(title='a', id=1), Entry(title='b', id=[1]), Entry(title='c'), Entry(title='d', id=1)]
+        index = FieldIndex(entries, 'id')
+        assert sorted(index.candidates(1)) == [0, 1, 3]
+        assert index.candidates('1') == [1]
+        assert index.candidates([1]) == [0, 1, 3]
+
+    def test_substring(self):
+        entries = [Entry(title='the show'), Entry(title='show'), Entry(title='sh'), Entry(title='other')]
+        index = FieldIndex(entries, 'title', exact=False)
+        candidates = index.candidates('The.Show the show 720p')
+        assert 0 in candidates and 2 in candidates and 3 not in candidates
+        assert index.candidates('xyz') == [2]
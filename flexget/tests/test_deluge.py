@@ -0,0 +1,152 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import re
+import sys
+import types
+from functools import partial
+
+import pytest
+
+pytest.importorskip('twisted')
+
+# The plugin installs its own reactor, it must be imported before the reactor is
+from flexget.plugins.clients import deluge  # noqa
+from twisted.internet import defer, reactor  # noqa
+
+
+class FakeDaemon(object):
+    """
+    Stands in for `deluge.ui.client.client` connected to a deluge daemon. Calls are answered asynchronously from the
+    reactor like a real daemon would, and recorded so tests can count round trips.
+    """
+
+    def __init__(self):
+        self.torrents = {}
+        self.calls = []
+        self.connects = 0
+        self.adding = 0
+        self.max_adding = 0
+        self._connected = False
+        self._disconnect_callback = None
+        self.core = RPCNamespace(self, 'core')
+        self.daemon = RPCNamespace(self, 'daemon')
+        self.label = RPCNamespace(self, 'label')
+
+    def connect(self, host, port, username, password):
+        self.connects += 1
+        self._connected = True
+        return self.answer(True)
+
+    def connected(self):
+        return self._connected
+
+    def disconnect(self):
+        self._connected = False
+        if self._disconnect_callback:
+            self._disconnect_callback()
+        return defer.succeed(True)
+
+    def set_disconnect_callback(self, callback):
+        self._disconnect_callback = callback
+
+    def is_localhost(self):
+        return True
+
+    def answer(self, result, delay=0.01):
+        d = defer.Deferred()
+        reactor.callLater(delay, d.callback, result)
+        return d
+
+    def call(self, method, *args):
+        self.calls.append(method)
+        handler = getattr(self, method.replace('.', '_'), None)
+        if method.startswith('core.add_torrent'):
+            self.adding += 1
+            self.max_adding = max(self.max_adding, self.adding)
+            return self.answer(handler(*args)).addCallback(self.added)
+        return self.answer(handler(*args) if handler else None)
+
+    def added(self, torrent_id):
+        self.adding -= 1
+        return torrent_id
+
+    def core_get_session_state(self):
+        return list(self.torrents)
+
+    def core_add_torrent_magnet(self, uri, options):
+        torrent_id = re.search(r'btih:(\w+)', uri).group(1).lower()
+        self.torrents[torrent_id] = {
+            'files': [{'index': 0, 'path': 'Show/show.mkv', 'size': 95},
+                      {'index': 1, 'path': 'Show/show.nfo', 'size': 5}],
+            'total_size': 100, 'save_path': '/downloads', 'move_on_completed': False, 'move_on_completed_path': '',
+            'progress': 0}
+        return torrent_id
+
+    def core_get_torrents_status(self, filter, keys):
+        return dict((torrent_id, dict((key, self.torrents[torrent_id][key]) for key in keys))
+                    for torrent_id in filter.get('id', self.torrents) if torrent_id in self.torrents)
+
+    def daemon_info(self):
+        return '1.3.15'
+
+
+class RPCNamespace(object):
+    def __init__(self, daemon, name):
+        self.daemon = daemon
+        self.name = name
+
+    def __getattr__(self, method):
+        return partial(self.daemon.call, '%s.%s' % (self.name, method))
+
+
+@pytest.fixture()
+def daemon(monkeypatch):
+    daemon = FakeDaemon()
+    client_module = types.ModuleType(str('deluge.ui.client'))
+    client_module.client = daemon
+    for name in ['deluge', 'deluge.ui']:
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(str(name)))
+    monkeypatch.setitem(sys.modules, 'deluge.ui.client', client_module)
+    monkeypatch.setattr(deluge, 'client', daemon, raising=False)
+    monkeypatch.setattr(deluge, 'connected_to', None)
+    return daemon
+
+
+class TestDelugeOutput(object):
+    config = """
+        templates:
+          global:
+            accept_all: yes
+            deluge:
+              username: user
+              password: pass
+              main_file_only: yes
+        tasks:
+          add:
+            mock:
+              - {title: 'a', url: 'magnet:?xt=urn:btih:AAAA'}
+              - {title: 'b', url: 'magnet:?xt=urn:btih:BBBB'}
+              - {title: 'c', url: 'magnet:?xt=urn:btih:CCCC'}
+          add_more:
+            mock:
+              - {title: 'd', url: 'magnet:?xt=urn:btih:DDDD'}
+    """
+
+    def test_add(self, execute_task, daemon, monkeypatch):
+        monkeypatch.setattr(deluge, 'MAX_CONCURRENT_ADDS', 2)
+        task = execute_task('add')
+        assert [e['deluge_id'] for e in task.accepted] == ['aaaa', 'bbbb', 'cccc']
+        assert daemon.max_adding == 2
+        # The status of all torrents is fetched in one call
+        assert daemon.calls.count('core.get_torrents_status') == 1
+        assert daemon.calls.count('core.set_torrent_file_priorities') == 3
+        assert not daemon.connected()
+
+    def test_connection_kept_in_daemon_mode(self, execute_task, manager, daemon):
+        manager.is_daemon = True
+        execute_task('add')
+        execute_task('add_more')
+        assert daemon.connects == 1
+        assert daemon.connected()
+        assert 'dddd' in daemon.torrents
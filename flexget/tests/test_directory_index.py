@@ -0,0 +1,188 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import os
+import time
+
+import pytest
+
+from flexget import plugin
+from flexget.manager import Session
+from flexget.plugins.internal import directory_index
+from flexget.plugins.internal.directory_index import index_directory, IndexedDirectory
+
+
+def age(path, seconds=60):
+    """Moves mtime of `path` to the past, so the index trusts it."""
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture()
+def library(tmpdir):
+    for name in ['Show.S01E01.mkv', 'sub/Show.S01E02.mkv', 'sub/deeper/Other.S01E01.mkv']:
+        tmpdir.join(name).ensure()
+    for path in ['sub/deeper', 'sub', '']:
+        age(tmpdir.join(path).strpath)
+    return tmpdir
+
+
+@pytest.fixture()
+def listings(monkeypatch):
+    listed = []
+    list_dir = directory_index._list_dir
+
+    def counting_list_dir(path):
+        listed.append(os.path.basename(path))
+        return list_dir(path)
+
+    monkeypatch.setattr(directory_index, '_list_dir', counting_list_dir)
+    return listed
+
+
+@pytest.mark.usefixtures('manager')
+class TestDirectoryIndex(object):
+    config = 'tasks: {}'
+
+    def test_find_names(self, library):
+        with Session() as session:
+            tree = index_directory(session, library.strpath)
+            found = dict((f.name, f.path) for f in tree.find_names(session, ['Show.S01E02.mkv', 'missing', 'deeper']))
+        assert found == {'Show.S01E02.mkv': library.join('sub', 'Show.S01E02.mkv').strpath,
+                         'deeper': library.join('sub', 'deeper').strpath}
+
+    def test_unchanged_not_listed(self, library, listings):
+        with Session() as session:
+            index_directory(session, library.strpath)
+        assert len(listings) == 3
+        del listings[:]
+        with Session() as session:
+            tree = index_directory(session, library.strpath)
+            assert len(list(tree.contents(session, is_dir=False))) == 3
+        assert not listings
+
+    def test_changes(self, library, listings):
+        with Session() as session:
+            index_directory(session, library.strpath)
+        library.join('sub', 'deeper', 'Other.S01E01.mkv').remove()
+        library.join('sub', 'deeper', 'Other.S01E02.mkv').ensure()
+        library.join('sub', 'new').ensure(dir=True)
+        del listings[:]
+        with Session() as session:
+            tree = index_directory(session, library.strpath)
+            names = sorted(f.name for f in tree.contents(session))
+        assert sorted(listings) == ['deeper', 'new', 'sub']
+        assert names == ['Other.S01E02.mkv', 'Show.S01E01.mkv', 'Show.S01E02.mkv', 'deeper', 'new', 'sub']
+
+    def test_removed_directory(self, library):
+        with Session() as session:
+            index_directory(session, library.strpath)
+        library.join('sub').remove()
+        with Session() as session:
+            tree = index_directory(session, library.strpath)
+            assert [f.name for f in tree.contents(session)] == ['Show.S01E01.mkv']
+            assert session.query(IndexedDirectory).count() == 1
+
+    def test_series_candidates(self, library):
+        with Session() as session:
+            tree = index_directory(session, library.strpath)
+            candidates = sorted((f.name, s) for f, s in tree.series_candidates(session, 'Show'))
+            assert candidates == [('Show.S01E01.mkv', None), ('Show.S01E02.mkv', None)]
+
+    def test_series_keys(self):
+        # Names are matched the way the series parser matches them
+        assert directory_index.title_key('[Grp] Show - 01 [720p].mkv').startswith(directory_index.series_key('Show'))
+        assert directory_index.title_key('Law.and.Order.S01E01').startswith(directory_index.series_key('Law & Order'))
+        assert directory_index.title_key('Show.S01E01').startswith(directory_index.series_key('Show (US)'))
+        assert not directory_index.title_key('Other.S01E01').startswith(directory_index.series_key('Show'))
+
+    def test_series_remembered_per_name(self, library):
+        library.join('Show.Extra.S01E03.mkv').ensure()
+        parsing = plugin.get_plugin_by_name('parsing').instance
+        with Session() as session:
+            tree = index_directory(session, library.strpath)
+            for series_name in ['Show', 'Show Extra']:
+                for indexed, indexed_series in tree.series_candidates(session, series_name):
+                    assert indexed_series is None
+                    indexed.remember_series(series_name, parsing.parse_series(data=indexed.name, name=series_name))
+        with Session() as session:
+            tree = index_directory(session, library.strpath)
+            # Both series keep their own results for the shared names
+            for series_name, valid in [('Show', ['Show.Extra.S01E03.mkv', 'Show.S01E01.mkv', 'Show.S01E02.mkv']),
+                                       ('Show Extra', ['Show.Extra.S01E03.mkv'])]:
+                parsed = dict((f.name, s) for f, s in tree.series_candidates(session, series_name))
+                assert all(s is not None for s in parsed.values())
+                assert sorted(name for name, s in parsed.items() if s.valid) == valid
+            # Only names starting like the series name have been parsed
+            assert session.query(directory_index.IndexedSeries).count() == 4
+
+
+class TestExists(object):
+    _config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Show.S01E02.mkv'}
+              - {title: 'Other', filename: 'Other.S01E01.mkv'}
+              - {title: 'New.S01E01.mkv'}
+            accept_all: yes
+            exists: __tmp__
+    """
+
+    @pytest.fixture()
+    def config(self, library):
+        return self._config.replace('__tmp__', library.strpath)
+
+    def test_exists(self, execute_task, library):
+        task = execute_task('test')
+        assert task.find_entry('rejected', title='Show.S01E02.mkv')
+        assert task.find_entry('rejected', title='Other')
+        assert task.find_entry('accepted', title='New.S01E01.mkv')
+        # Files added later are found from the index as well
+        library.join('New.S01E01.mkv').ensure()
+        task = execute_task('test')
+        assert task.find_entry('rejected', title='New.S01E01.mkv')
+
+
+class TestExistsSeriesNames(object):
+    _config = """
+        templates:
+          global:
+            mock:
+              - {title: '[Grp] Show - 01 [720p].mkv'}
+              - {title: 'Law.and.Order.S01E01.mkv'}
+              - {title: 'Show.S01E01.mkv'}
+            accept_all: yes
+        tasks:
+          test_ignored_prefix:
+            series:
+              - Show:
+                  identified_by: sequence
+            exists_series: __tmp__
+          test_ampersand:
+            series:
+              - Law & Order
+            exists_series: __tmp__
+          test_parenthetical:
+            series:
+              - Show (US)
+            exists_series: __tmp__
+    """
+
+    @pytest.fixture()
+    def config(self, tmpdir):
+        for name in ['[Grp] Show - 01 [720p].mkv', 'Law.and.Order.S01E01.mkv', 'Show.S01E01.mkv']:
+            tmpdir.join('library', name).ensure()
+        return self._config.replace('__tmp__', tmpdir.join('library').strpath)
+
+    def test_ignored_prefix(self, execute_task):
+        task = execute_task('test_ignored_prefix')
+        assert task.find_entry('rejected', title='[Grp] Show - 01 [720p].mkv')
+
+    def test_ampersand(self, execute_task):
+        task = execute_task('test_ampersand')
+        assert task.find_entry('rejected', title='Law.and.Order.S01E01.mkv')
+
+    def test_parenthetical(self, execute_task):
+        task = execute_task('test_parenthetical')
+        assert task.find_entry('rejected', title='Show.S01E01.mkv')
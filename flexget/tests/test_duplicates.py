@@ -0,0 +1,47 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+
+class TestDuplicates(object):
+    config = """
+        templates:
+          global:
+            mock:
+              - {title: a1, imdb_id: tt1}
+              - {title: b1, imdb_id: tt2}
+              - {title: a2, imdb_id: tt1}
+              - {title: c1}
+              - {title: a3, imdb_id: tt1}
+              - {title: d1, imdb_id: null}
+              - {title: d2, imdb_id: null}
+              - {title: e1, imdb_id: [tt3]}
+              - {title: e2, imdb_id: [tt3]}
+        tasks:
+          test_reject:
+            duplicates:
+              field: imdb_id
+              action: reject
+          test_accept:
+            duplicates:
+              field: imdb_id
+              action: accept
+    """
+
+    def test_reject(self, execute_task):
+        task = execute_task('test_reject')
+        # Rejected duplicates don't count anymore, the last one is kept
+        assert task.find_entry('rejected', title='a1', reason='Field imdb_id value tt1 equals on a1 and a2')
+        assert task.find_entry('rejected', title='a2', reason='Field imdb_id value tt1 equals on a2 and a3')
+        assert task.find_entry('undecided', title='a3')
+        assert task.find_entry('rejected', title='e1')
+        assert task.find_entry('undecided', title='e2')
+        assert len(task.rejected) == 3
+
+    def test_accept(self, execute_task):
+        task = execute_task('test_accept')
+        assert task.find_entry('accepted', title='a1', reason='Field imdb_id value tt1 equals on a1 and a2')
+        assert task.find_entry('accepted', title='a2', reason='Field imdb_id value tt1 equals on a2 and a1')
+        assert task.find_entry('accepted', title='a3', reason='Field imdb_id value tt1 equals on a3 and a1')
+        assert task.find_entry('accepted', title='e2')
+        # Missing and empty values are not duplicates
+        assert len(task.accepted) == 5
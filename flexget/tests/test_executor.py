@@ -0,0 +1,98 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import threading
+import time
+
+import pytest
+from concurrent.futures import CancelledError
+
+from flexget import logger
+from flexget.executor import Executor, TaskExecutor
+from flexget.task import TaskAbort
+
+
+class FakeTask(object):
+    name = 'fake'
+
+    def abort(self, reason):
+        raise TaskAbort(reason)
+
+
+@pytest.yield_fixture()
+def executor():
+    executor = Executor(max_workers=4)
+    yield executor
+    executor.shutdown()
+
+
+class TestExecutor(object):
+    def test_map(self, executor):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def work(value):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return value * 2
+
+        task_executor = TaskExecutor(FakeTask(), executor)
+        assert task_executor.map(work, range(10), limit=2) == [value * 2 for value in range(10)]
+        assert running[1] == 2
+        metrics = executor.metrics()
+        assert metrics['submitted'] == metrics['completed'] == 10
+        assert metrics['max_active'] == 2
+
+    def test_logging_context(self, executor):
+        with logger.task_logging('some_task'):
+            future = executor.submit(lambda: logger.local_context.task)
+            assert future.result() == 'some_task'
+        # Worker threads don't keep the context of previous work
+        assert not executor.submit(lambda: getattr(logger.local_context, 'task', None)).result()
+
+    def test_cancel(self):
+        executor = Executor(max_workers=1)
+        task_executor = TaskExecutor(FakeTask(), executor)
+        release = threading.Event()
+        blocking = task_executor.submit(release.wait)
+        pending = task_executor.submit(lambda: None)
+
+        task_executor.cancel()
+        assert pending.cancelled()
+        assert task_executor.cancelled.is_set()
+        with pytest.raises(CancelledError):
+            task_executor.submit(lambda: None)
+
+        release.set()
+        assert blocking.result()
+        executor.shutdown()
+        assert executor.metrics()['cancelled'] == 1
+
+    def test_abort_in_worker(self, executor):
+        task = FakeTask()
+
+        def work(value):
+            if value == 1:
+                task.abort('Bad value')
+            return value
+
+        with pytest.raises(TaskAbort):
+            TaskExecutor(task, executor).map(work, range(3))
+
+
+class TestTaskExecutor(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'a'}
+    """
+
+    def test_task_executor(self, execute_task, manager):
+        task = execute_task('test')
+        assert task.executor.executor is manager.executor
+        assert task.executor.map(lambda entry: entry['title'], task.all_entries) == ['a']
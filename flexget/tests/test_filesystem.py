@@ -1,6 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import os
+
+import pytest
 from path import Path
 
 
@@ -208,3 +211,39 @@ class TestFilesystem(object):
         task = execute_task(task_name)
 
         self.assert_check(task, task_name, 'positive', should_exist)
+
+
+class TestFilesystemIncremental(object):
+    _config = """
+        tasks:
+          incremental:
+            filesystem:
+              path: __tmp__
+              incremental: yes
+    """
+
+    @pytest.fixture()
+    def config(self, tmpdir):
+        tmpdir.join('file1.mkv').write('1')
+        tmpdir.join('file2.mkv').write('2')
+        return self._config.replace('__tmp__', tmpdir.strpath)
+
+    def test_incremental(self, execute_task, tmpdir):
+        task = execute_task('incremental')
+        assert len(task.all_entries) == 2
+
+        task = execute_task('incremental')
+        assert not task.all_entries, 'unchanged files should not be produced again'
+
+        mtime = os.path.getmtime(tmpdir.join('file1.mkv').strpath) + 10
+        os.utime(tmpdir.join('file1.mkv').strpath, (mtime, mtime))
+        tmpdir.join('file3.mkv').write('3')
+        task = execute_task('incremental')
+        assert sorted(e['title'] for e in task.all_entries) == ['file1', 'file3']
+
+        # Files which went away are forgotten and produced again when they come back
+        tmpdir.join('file2.mkv').remove()
+        execute_task('incremental')
+        tmpdir.join('file2.mkv').write('2')
+        task = execute_task('incremental')
+        assert [e['title'] for e in task.all_entries] == ['file2']
@@ -0,0 +1,115 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import threading
+import time
+
+import pytest
+
+from flexget.entry import Entry
+from flexget.plugins.daemon import hot_tasks as hot_tasks_module
+from flexget.plugins.daemon.hot_tasks import RECEIVED_FIELD, get_hot_tasks
+from flexget.task_queue import ExecutionLock
+from flexget.utils import json
+
+
+def announce(title, received=None):
+    entry = Entry(title=title, url='http://localhost/%s.torrent' % title)
+    if received is not None:
+        entry[RECEIVED_FIELD] = received
+    return entry
+
+
+class TestHotTasks(object):
+    config = """
+        tasks:
+          race:
+            regexp:
+              accept:
+                - wanted
+          race_other:
+            accept_all: yes
+            disable: seen
+    """
+
+    @pytest.yield_fixture()
+    def hot_tasks(self, manager, monkeypatch):
+        hot_tasks = get_hot_tasks(manager)
+        # The in-memory test database is not shared between threads, run the tasks in place of the queue thread
+        monkeypatch.setattr(hot_tasks.queue, 'put', lambda task: task.execute())
+        yield hot_tasks
+        hot_tasks_module.shutdown(manager)
+
+    def run(self, hot_tasks, name, entries):
+        task, = hot_tasks.inject(name, entries)
+        assert task.finished_event.wait(10)
+        return task
+
+    def test_inject(self, hot_tasks, manager, monkeypatch):
+        monkeypatch.setattr(manager, 'db_cleanup', lambda: pytest.fail('db cleanup should be skipped'))
+        task = self.run(hot_tasks, 'race', [announce('wanted', received=time.time() - 0.3), announce('other')])
+        assert [e['title'] for e in task.accepted] == ['wanted']
+        latency = hot_tasks.latency['race'].to_dict()
+        assert latency['count'] == 1
+        assert 0.3 <= latency['max'] < 10
+        # Counted in the first bucket with a bound above the latency, 0.3s or a bit more on a busy machine
+        bucket = next(b for b in latency['buckets'] if b['le'] is None or b['le'] >= latency['max'])
+        assert bucket['count'] == 1
+
+    def test_kept_task_reused(self, hot_tasks):
+        first = self.run(hot_tasks, 'race', [announce('wanted')])
+        second = self.run(hot_tasks, 'race', [announce('wanted 2')])
+        assert first.requests is second.requests
+        assert first.id != second.id
+        assert hot_tasks.status()['kept'] == ['race']
+
+    def test_task_patterns(self, hot_tasks):
+        assert self.run(hot_tasks, 'RACE', [announce('wanted')]).name == 'race'
+        tasks = hot_tasks.inject('race*', [announce('wanted 2')])
+        assert [task.name for task in tasks] == ['race', 'race_other']
+        for task in tasks:
+            assert task.finished_event.wait(10)
+        assert [len(task.accepted) for task in tasks] == [1, 1]
+
+    def test_config_reload(self, hot_tasks, manager):
+        kept = hot_tasks.kept('race')
+        manager.config['tasks']['race'] = {'accept_all': True}
+        assert hot_tasks.kept('race') is kept
+        hot_tasks_module.config_updated(manager)
+        task = self.run(hot_tasks, 'race', [announce('anything')])
+        assert len(task.accepted) == 1
+
+    def test_unknown_task(self, hot_tasks):
+        with pytest.raises(ValueError):
+            hot_tasks.inject('nope', [announce('wanted')])
+
+    def test_api(self, hot_tasks, api_client, schema_match):
+        from flexget.api.plugins.irc import ObjectsContainer
+        self.run(hot_tasks, 'race', [announce('wanted')])
+        rsp = api_client.get('/irc/hot_tasks/')
+        assert rsp.status_code == 200
+        data = json.loads(rsp.get_data(as_text=True))
+        assert not schema_match(ObjectsContainer.hot_tasks_object, data)
+        assert data['latency']['race']['count'] == 1
+
+
+class TestExecutionLock(object):
+    def test_urgent_first(self):
+        lock = ExecutionLock()
+        order = []
+
+        def execute(name, urgent):
+            with lock.hold(urgent):
+                order.append(name)
+
+        threads = []
+        with lock.hold():
+            for name, urgent in [('queued', False), ('hot', True)]:
+                threads.append(threading.Thread(target=execute, args=(name, urgent)))
+                threads[-1].start()
+                time.sleep(0.1)
+            # Nothing runs beside the running task
+            assert order == []
+        for thread in threads:
+            thread.join(5)
+        assert order == ['hot', 'queued']
@@ -0,0 +1,182 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import pytest
+import requests as base_requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from flexget.utils.requests import ResponseCache, Session, parse_cache_control
+
+# Nothing here goes online, all requests are answered by FakeAdapter
+real_request = base_requests.Session.request
+
+
+class FakeAdapter(BaseAdapter):
+    """Serves canned responses and remembers the requests it received."""
+
+    def __init__(self):
+        super(FakeAdapter, self).__init__()
+        self.routes = {}
+        self.sent = []
+
+    def add(self, url, body=b'body', status=200, headers=None):
+        self.routes[url] = (status, body, headers or {})
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        status, body, headers = self.routes[request.url]
+        etag = headers.get('ETag')
+        if etag and request.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        response = base_requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture()
+def adapter():
+    return FakeAdapter()
+
+
+@pytest.fixture()
+def cache(tmpdir):
+    return ResponseCache(tmpdir.join('http_cache').strpath, max_size=1000, max_entry_size=500)
+
+
+@pytest.fixture()
+def session(no_requests, monkeypatch, adapter, cache):
+    monkeypatch.setattr('requests.sessions.Session.request', real_request)
+    session = Session()
+    session.mount('http://', adapter)
+    session.response_cache = cache
+    return session
+
+
+class TestResponseCache(object):
+    def test_parse_cache_control(self):
+        assert parse_cache_control('Public, max-age="60", no-cache') == {'public': None, 'max-age': '60',
+                                                                         'no-cache': None}
+        assert parse_cache_control(None) == {}
+
+    def test_fresh_served_from_cache(self, session, adapter):
+        adapter.add('http://test/a', b'fresh', headers={'Cache-Control': 'max-age=3600'})
+        assert session.get('http://test/a').content == b'fresh'
+        response = session.get('http://test/a')
+        assert response.content == b'fresh'
+        assert response.from_cache
+        assert len(adapter.sent) == 1
+
+    def test_revalidate(self, session, adapter):
+        adapter.add('http://test/a', b'etagged', headers={'ETag': '"1"'})
+        session.get('http://test/a')
+        response = session.get('http://test/a')
+        assert len(adapter.sent) == 2
+        assert adapter.sent[1].headers['If-None-Match'] == '"1"'
+        assert response.status_code == 200
+        assert response.content == b'etagged'
+
+    def test_changed(self, session, adapter):
+        adapter.add('http://test/a', b'old', headers={'ETag': '"1"'})
+        session.get('http://test/a')
+        adapter.add('http://test/a', b'new', headers={'ETag': '"2"'})
+        assert session.get('http://test/a').content == b'new'
+        assert session.get('http://test/a').content == b'new'
+        assert len(adapter.sent) == 3
+
+    def test_no_store(self, session, adapter, cache):
+        adapter.add('http://test/a', headers={'Cache-Control': 'no-store, max-age=3600'})
+        session.get('http://test/a')
+        session.get('http://test/a')
+        assert len(adapter.sent) == 2
+        assert len(cache) == 0
+
+    def test_caller_validators_bypass(self, session, adapter):
+        adapter.add('http://test/a', headers={'Cache-Control': 'max-age=3600'})
+        session.get('http://test/a')
+        session.get('http://test/a', headers={'If-None-Match': '"x"'})
+        assert len(adapter.sent) == 2
+
+    def test_params_and_auth_in_key(self, session, adapter):
+        adapter.add('http://test/a?page=1', headers={'Cache-Control': 'max-age=3600'})
+        adapter.add('http://test/a?page=2', headers={'Cache-Control': 'max-age=3600'})
+        session.get('http://test/a', params={'page': 1})
+        session.get('http://test/a', params={'page': 2})
+        session.get('http://test/a', params={'page': 1}, headers={'Authorization': 'Bearer other'})
+        session.get('http://test/a', params={'page': 1})
+        assert len(adapter.sent) == 3
+
+    def test_stream_bypass(self, session, adapter, cache):
+        adapter.add('http://test/a', b'streamed', headers={'ETag': '"1"'})
+        response = session.get('http://test/a', stream=True)
+        assert response.content == b'streamed'
+        assert cache.size == 0
+        session.get('http://test/a', stream=True)
+        assert 'If-None-Match' not in adapter.sent[1].headers
+
+    def test_credentials_bypass(self, session, adapter, cache):
+        adapter.add('http://test/a', headers={'Cache-Control': 'max-age=3600'})
+        session.get('http://test/a', auth=('user', 'pass'))
+        session.get('http://test/a', cookies={'session': 'secret'})
+        session.auth = ('user', 'pass')
+        session.get('http://test/a')
+        session.auth = None
+        session.cookies.set('session', 'secret')
+        session.get('http://test/a')
+        assert cache.size == 0
+        assert len(adapter.sent) == 4
+
+    def test_other_domain_cookies(self, session, adapter, cache):
+        adapter.add('http://test/a', headers={'Cache-Control': 'max-age=3600'})
+        session.cookies.set('session', 'secret', domain='other.com')
+        session.get('http://test/a')
+        assert session.get('http://test/a').from_cache
+        session.cookies.set('session', 'secret', domain='test.local')
+        adapter.add('http://test.local/a', headers={'Cache-Control': 'max-age=3600'})
+        session.get('http://test.local/a')
+        session.get('http://test.local/a')
+        assert len(adapter.sent) == 3
+
+    def test_domain_ttl(self, tmpdir, session, adapter):
+        session.response_cache = ResponseCache(tmpdir.join('ttl').strpath, ttls={'test': '1 hour'})
+        adapter.add('http://test/a', headers={'Cache-Control': 'no-cache'})
+        session.get('http://test/a')
+        assert session.get('http://test/a').from_cache
+        assert len(adapter.sent) == 1
+
+    def test_domain_ttl_matches_host(self, tmpdir, session, adapter):
+        session.response_cache = ResponseCache(tmpdir.join('ttl').strpath, ttls={'test.com': '1 hour'})
+        assert session.response_cache.ttl_for('http://api.test.com/a')
+        assert not session.response_cache.ttl_for('http://nottest.com/a')
+        assert not session.response_cache.ttl_for('http://other/test.com?url=test.com')
+        adapter.add('http://other/test.com', headers={'Cache-Control': 'no-cache'})
+        session.get('http://other/test.com')
+        session.get('http://other/test.com')
+        assert len(adapter.sent) == 2
+
+    def test_lru_eviction(self, session, adapter, cache):
+        for name in 'abc':
+            adapter.add('http://test/%s' % name, b'x' * 400, headers={'Cache-Control': 'max-age=3600'})
+        session.get('http://test/a')
+        session.get('http://test/b')
+        # Use a, so b is least recently used
+        session.get('http://test/a')
+        session.get('http://test/c')
+        assert cache.size == 800
+        session.get('http://test/a')
+        session.get('http://test/b')
+        assert [r.url for r in adapter.sent] == ['http://test/a', 'http://test/b', 'http://test/c', 'http://test/b']
+
+    def test_persisted(self, session, adapter, cache):
+        adapter.add('http://test/a', b'kept', headers={'Cache-Control': 'max-age=3600'})
+        session.get('http://test/a')
+        session.response_cache = ResponseCache(cache.path, max_size=1000)
+        assert session.get('http://test/a').content == b'kept'
+        assert len(adapter.sent) == 1
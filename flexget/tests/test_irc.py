@@ -0,0 +1,75 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import os
+from xml.etree.ElementTree import parse
+
+import pytest
+
+from flexget.plugins.cli.perf_tests import irc_rules
+from flexget.plugins.daemon.irc import (MESSAGE_CLEAN, compile_tracker_rules, match_message_patterns, parse_patterns,
+                                        run_tracker_rules)
+
+test_dir = os.path.join(os.path.dirname(__file__), 'irc_test_dir')
+tracker_file = os.path.join(test_dir, 'example.tracker')
+announce_log = os.path.join(test_dir, 'announces.log')
+config = {'authkey': 'auth key', 'torrent_pass': 'pass'}
+
+
+@pytest.fixture(scope='module')
+def tracker():
+    tracker_config = parse(tracker_file).getroot()
+    linepatterns = parse_patterns(tracker_config.findall('parseinfo/linepatterns/extract'))
+    rules = compile_tracker_rules(tracker_config.find('parseinfo/linematched'), config)
+    return linepatterns, rules
+
+
+def process(tracker, line):
+    linepatterns, rules = tracker
+    fields = match_message_patterns(linepatterns, MESSAGE_CLEAN.sub('', line))
+    return run_tracker_rules(rules, fields)
+
+
+class TestTrackerRules(object):
+    def test_episode(self, tracker):
+        fields = process(tracker, 'Show.Name.S01E02.720p.HDTV.x264-GRP [Episode] - '
+                                  'https://example.org/torrents.php?id=123 / '
+                                  'https://example.org/torrents.php?action=download&id=456 - hd, tv')
+        assert fields['irc_torrenturl'] == ('https://example.org/torrents.php?action=download&id=456'
+                                            '&authkey=auth%20key&torrent_pass=pass')
+        assert fields['irc_releasename'] == 'Show Name S01E02 720p HDTV x264-GRP'
+        assert fields['irc_resolution'] == '720p'
+        assert fields['irc_hd'] == 'yes'
+        assert fields['irc_format'] == 'tv'
+        assert fields['irc_tvshow'] == 'yes'
+        assert (fields['irc_name1'], fields['irc_season'], fields['irc_episode']) == ('Show.Name', '01', '02')
+        assert 'irc_never' not in fields
+
+    def test_if_not_matching(self, tracker):
+        fields = process(tracker, '\x02Movie.Name.2017.1080p.BluRay.x264-GRP\x02 [Movie] - '
+                                  'https://example.org/torrents.php?id=124 / '
+                                  'https://example.org/torrents.php?action=download&id=457 - movie')
+        assert fields['irc_torrentname'] == 'Movie.Name.2017.1080p.BluRay.x264-GRP'
+        assert fields['irc_format'] == 'movie'
+        assert 'irc_hd' not in fields
+        assert 'irc_tvshow' not in fields
+        assert 'irc_season' not in fields
+
+    def test_missing_config(self):
+        tracker_config = parse(tracker_file).getroot()
+        rules = compile_tracker_rules(tracker_config.find('parseinfo/linematched'), {})
+        fields = run_tracker_rules(rules, {'irc_$baseurl': 'https://example.org', 'irc_$torrentid': '1',
+                                           'irc_torrentname': 'a.b'})
+        assert 'irc_torrenturl' not in fields
+        assert fields['irc_releasename'] == 'a b'
+
+    def test_invalid_rules_skipped(self):
+        tracker_config = parse(tracker_file).getroot()
+        linematched = tracker_config.find('parseinfo/linematched')
+        for tag in ['unknown', 'setregex', 'varreplace']:
+            linematched.append(linematched.makeelement(tag, {}))
+        rules = compile_tracker_rules(linematched, config)
+        assert len(rules) == len(linematched) - 3
+
+    def test_benchmark(self):
+        assert irc_rules(tracker_file, announce_log, 30) == 20
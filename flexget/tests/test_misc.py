@@ -5,6 +5,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.utils import text_type
 
 import os
+import pickle
 import stat
 
 import pytest
@@ -164,6 +165,53 @@ class TestEntryStringCoercion(object):
         assert type(e['test']) == text_type  # pylint: disable=unidiomatic-typecheck
 
 
+class TestEntrySnapshots(object):
+    def test_overwrite(self):
+        e = Entry('title', 'url')
+        e.take_snapshot('first')
+        e['field'] = 'value'
+        e.take_snapshot('second')
+        e['title'] = 'other'
+        e.take_snapshot('first')
+        assert list(e.snapshots) == ['first', 'second']
+        assert e.snapshots['first']['title'] == 'other'
+        assert e.snapshots['second'] == {'title': 'title', 'url': 'url', 'original_url': 'url', 'field': 'value'}
+
+
+class TestEntryPickle(object):
+    def test_pickle(self):
+        e = Entry('title', 'url', field='value')
+        e.accept('some reason')
+        e.take_snapshot('snap')
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(e, protocol))
+            assert loaded == e
+            assert loaded['field'] == 'value'
+            assert loaded.accepted
+            assert loaded.traces == e.traces
+            assert loaded.snapshots == e.snapshots
+
+    def test_unpickle_old_state(self):
+        """Entries pickled before __slots__ was used have their attributes as state"""
+        e = Entry.__new__(Entry)
+        e.__setstate__({'store': {'title': 'title', 'url': 'url'}, 'traces': [], 'snapshots': {},
+                        '_state': 'rejected', 'task': None,
+                        '_hooks': {'accept': [], 'reject': [], 'fail': [], 'complete': []}})
+        assert e['title'] == 'title'
+        assert e.rejected
+        assert e.traces == []
+        e.run_hooks('accept')
+
+    def test_hooks(self):
+        called = []
+        e = Entry('title', 'url')
+        e.on_accept(lambda entry, **kwargs: called.append(kwargs))
+        e.accept('reason')
+        assert called == [{'reason': 'reason'}]
+        with pytest.raises(ValueError):
+            e.add_hook('invalid', lambda entry: None)
+
+
 class TestFilterRequireField(object):
     config = """
         tasks:
@@ -282,3 +330,58 @@ class TestSetPlugin(object):
         entry = task.find_entry('entries', title='Entry 1')
         assert entry['title'] == 'Entry 1', 'should fall back to original value when template fails'
         assert entry['other'] is None
+
+
+class TestArchive(object):
+    config = """
+        tasks:
+          archive_one:
+            mock:
+              - {title: 'Entry 1', url: 'http://localhost/1'}
+              - {title: 'Entry 2', url: 'http://localhost/2', description: 'some text'}
+            archive: [foo]
+          archive_two:
+            mock:
+              - {title: 'Entry 2', url: 'http://localhost/2'}
+              - {title: 'Entry 3', url: 'http://localhost/3'}
+            archive: [foo, bar]
+    """
+
+    def test_archive(self, execute_task):
+        from flexget.manager import Session
+        from flexget.plugins.generic.archive import ArchiveEntry
+
+        execute_task('archive_one')
+        execute_task('archive_two')
+        # run again, nothing should be duplicated
+        execute_task('archive_two')
+        with Session() as session:
+            entries = dict((ae.title, ae) for ae in session.query(ArchiveEntry).all())
+            assert len(entries) == 3
+            assert entries['Entry 2'].description == 'some text'
+            assert sorted(s.name for s in entries['Entry 1'].sources) == ['archive_one']
+            assert sorted(s.name for s in entries['Entry 2'].sources) == ['archive_one', 'archive_two']
+            assert sorted(t.name for t in entries['Entry 2'].tags) == ['bar', 'foo']
+            assert sorted(t.name for t in entries['Entry 3'].tags) == ['bar', 'foo']
+
+
+class TestHistory(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Entry 1', url: 'http://localhost/1'}
+              - {title: 'Entry 2', url: 'http://localhost/2'}
+            accept_all: yes
+    """
+
+    def test_history(self, execute_task):
+        from flexget.manager import Session
+        from flexget.plugins.output.history import History
+
+        execute_task('test')
+        with Session() as session:
+            items = session.query(History).order_by(History.title).all()
+            assert [item.title for item in items] == ['Entry 1', 'Entry 2']
+            assert items[0].task == 'test'
+            assert items[0].details == 'Accepted by accept_all'
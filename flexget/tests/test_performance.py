@@ -0,0 +1,53 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+from io import StringIO
+
+from flexget.logger import capture_output
+from flexget.manager import Session
+from flexget.options import get_parser
+from flexget.plugins.operate.status import PluginTiming, get_plugin_timings
+
+
+class TestPluginTimings(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'a'}
+              - {title: 'b'}
+            accept_all: yes
+            disable: [seen, backlog]
+    """
+
+    def test_timings(self, execute_task):
+        task = execute_task('test')
+        timing = task.plugin_timings[('input', 'mock')]
+        assert timing['calls'] == 1
+        assert timing['entries_in'] == 0
+        assert timing['entries_out'] == 2
+        assert timing['wall'] >= 0
+        assert task.plugin_timings[('filter', 'accept_all')]['entries_in'] == 2
+
+    def test_timings_stored(self, execute_task):
+        execute_task('test')
+        execute_task('test')
+        with Session() as session:
+            (task_name, timings), = get_plugin_timings(session=session)
+            assert task_name == 'test'
+            assert len([t for t in timings if t.plugin == 'mock']) == 2
+            # Latest execution first
+            assert timings[0].execution_id > timings[-1].execution_id
+            mock_timing = session.query(PluginTiming).filter(PluginTiming.plugin == 'mock').first()
+            assert mock_timing.phase == 'input'
+            assert mock_timing.entries_out == 2
+
+    def test_report(self, manager, execute_task):
+        execute_task('test')
+        options = get_parser().parse_args(['perf', 'report', '--all', '--porcelain'])
+        buffer = StringIO()
+        with capture_output(buffer, loglevel='error'):
+            manager.handle_cli(options=options)
+        lines = buffer.getvalue().split('\n')
+        assert any('accept_all' in line for line in lines)
+        assert any('mock' in line for line in lines)
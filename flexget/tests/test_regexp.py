@@ -88,6 +88,30 @@ class TestRegexp(object):
                 - 6:
                     from: imdb_score
 
+          test_first_regexp_wins:
+            regexp:
+              accept:
+                - '1$':
+                    set: {rule: first}
+                - 'regexp[14]':
+                    set: {rule: second}
+                    not: '4'
+                - 'regexp[45]':
+                    set: {rule: third}
+                - genre3:
+                    set: {rule: field}
+                    from: genre
+                - regular:
+                    set: {rule: title}
+
+          test_rest_multiple_operations:
+            regexp:
+              accept:
+                - regexp1
+              reject:
+                - regexp2
+              rest: reject
+
           test_match_in_list:
             regexp:
               # Also tests global from option
@@ -98,6 +122,22 @@ class TestRegexp(object):
                     not: genre3
     """
 
+    def test_first_regexp_wins(self, execute_task):
+        task = execute_task('test_first_regexp_wins')
+        assert task.find_entry('accepted', title='regexp1', rule='first')
+        # `not` of the first matching regexp vetoes it, the next one matching is used
+        assert task.find_entry('accepted', title='regexp4', rule='third')
+        assert task.find_entry('accepted', title='regexp5', rule='third')
+        assert task.find_entry('accepted', title='regular', rule='field')
+        assert len(task.accepted) == 4
+
+    def test_rest_multiple_operations(self, execute_task):
+        task = execute_task('test_rest_multiple_operations')
+        assert task.find_entry('accepted', title='regexp1')
+        assert task.find_entry('rejected', title='regexp2', reason='regexp \'regexp2\' matched field \'title\'')
+        assert task.find_entry('rejected', title='regexp3', reason='regexp `rest`')
+        assert len(task.rejected) == 10
+
     def test_accept(self, execute_task):
         task = execute_task('test_accept')
         assert task.find_entry('accepted', title='regexp1'), 'regexp1 should have been accepted'
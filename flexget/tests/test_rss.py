@@ -47,6 +47,28 @@ class TestInputRSS(object):
               title: "other:Title"
               other_fields:
               - "Other:field"
+          test_stream:
+            rss:
+              <<: *rss
+              stream: yes
+          test_stream_field_sanitation:
+            rss:
+              <<: *rss
+              stream: yes
+              link: "other:link"
+              title: "other:Title"
+              other_fields:
+              - "Other:field"
+          test_stream_all_entries_no:
+            rss:
+              <<: *rss
+              stream: yes
+              all_entries: no
+          test_stream_max_items:
+            rss:
+              <<: *rss
+              stream: yes
+              max_items: 2
     """
 
     def test_rss(self, execute_task):
@@ -145,6 +167,53 @@ class TestInputRSS(object):
         assert entry['url'] == 'http://localhost/altlink'
         assert entry['other:field'] == 'otherfield'
 
+    def test_stream(self, execute_task):
+        task = execute_task('test')
+        expected = sorted((e['title'], e['url'], e.get('description'), e.get('filename'), e.get('rss_pubdate'))
+                          for e in task.entries)
+        task = execute_task('test_stream')
+        assert sorted((e['title'], e['url'], e.get('description'), e.get('filename'), e.get('rss_pubdate'))
+                      for e in task.entries) == expected, 'streaming should produce the same entries as feedparser'
+
+    def test_stream_field_sanitation(self, execute_task):
+        task = execute_task('test_stream_field_sanitation')
+        entry = task.entries[0]
+        assert entry['title'] == 'alt title'
+        assert entry['url'] == 'http://localhost/altlink'
+        assert entry['other:field'] == 'otherfield'
+
+    def test_stream_all_entries_no(self, execute_task):
+        task = execute_task('test_stream_all_entries_no')
+        assert task.entries, 'Entries should have been produced on first run.'
+        from flexget.utils.cached_input import cached
+        cached.cache.clear()
+        task = execute_task('test_stream_all_entries_no')
+        assert not task.entries, 'No entries should have been produced the second run.'
+
+    def test_stream_max_items(self, execute_task):
+        task = execute_task('test_stream_max_items')
+        assert [e['title'] for e in task.entries] == ['Zero sized enclosure', 'Multiple enclosures',
+                                                      'Multiple enclosures', 'Multiple enclosures']
+
+    def test_stream_parse_error(self, execute_task, tmpdir):
+        from flexget.plugin import PluginError
+        from flexget.plugins.input.rss import InputRSS
+        feed = tmpdir.join('broken.xml')
+        feed.write('<rss><channel><item><title>Good</title><link>http://localhost/good</link></item>'
+                   '<item><title>Broken&nbsp;title</title><link>http://localhost/broken</link></item></channel></rss>')
+        task = execute_task('test_stream')
+        # Items before the error are kept
+        entries = InputRSS().on_task_input(task, {'url': str(feed), 'stream': True})
+        assert [e['url'] for e in entries] == ['http://localhost/good']
+        # Error before the first item falls back to feedparser, which handles the invalid content
+        feed = tmpdir.join('invalid.xml')
+        feed.write('<rss><channel><title>&nbsp;</title><item><title>Good</title></item></channel></rss>')
+        with pytest.raises(PluginError) as stream_error:
+            InputRSS().on_task_input(task, {'url': str(feed), 'stream': True})
+        with pytest.raises(PluginError) as error:
+            InputRSS().on_task_input(task, {'url': str(feed)})
+        assert str(stream_error.value) == str(error.value)
+
 
 @pytest.mark.online
 class TestRssOnline(object):
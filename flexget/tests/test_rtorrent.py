@@ -1,12 +1,21 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.moves.xmlrpc import client as xmlrpc_client
+from future.moves.xmlrpc import server as xmlrpc_server
+from future.moves.http import client as http_client
 
 import os
+import re
+import threading
+from collections import OrderedDict
 
 import mock
+import pytest
+import requests
 
 from flexget.plugins.clients.rtorrent import RTorrent
+from flexget.utils.bittorrent import Torrent
+from flexget.utils.requests import Session
 
 torrent_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'private.torrent')
 torrent_url = 'file:///%s' % torrent_file
@@ -15,42 +24,111 @@ torrent_info_hash = '09977FE761B8D293AD8A929CCAF2E9322D525A6C'
 with open(torrent_file, 'rb') as tor_file:
     torrent_raw = tor_file.read()
 
+# Saved before the no_requests fixture replaces them, the fake rtorrent server is local
+real_requests = {
+    'requests.sessions.Session.request': requests.sessions.Session.request,
+    'future.moves.http.client.HTTPConnection.request': http_client.HTTPConnection.request,
+}
 
-def compare_binary(obj1, obj2):
-    # Used to compare xmlrpclib.binary objects within a mocked call
-    if not isinstance(obj1, type(obj2)):
-        return False
-    if obj1.data != obj2.data:
-        return False
-    return True
 
+class FakeRTorrent(object):
+    """
+    Answers rtorrent XML-RPC methods from torrents kept in memory. Requests received by the server are counted, so
+    tests can check the number of round trips.
+    """
 
-class Matcher(object):
-    def __init__(self, compare, some_obj):
-        self.compare = compare
-        self.some_obj = some_obj
-
-    def __eq__(self, other):
-        return self.compare(self.some_obj, other)
+    def __init__(self):
+        self.torrents = OrderedDict()
+        self.executed = []
+        self.requests = 0
+
+    def add(self, info_hash, **fields):
+        torrent = {'hash': info_hash, 'name': 'private.torrent', 'base_path': '/data/downloads', 'state': 1}
+        torrent.update(fields)
+        self.torrents[info_hash] = torrent
+        return torrent
+
+    def _torrent(self, info_hash):
+        if info_hash not in self.torrents:
+            raise xmlrpc_client.Fault(-501, 'Could not find info-hash.')
+        return self.torrents[info_hash]
+
+    def _load(self, target, raw, *commands):
+        if raw.data.startswith(b'd10:magnet-uri'):
+            info_hash = re.search(br'btih:([0-9A-Z]+)', raw.data).group(1).decode('ascii')
+        else:
+            info_hash = Torrent(raw.data).info_hash
+        torrent = self.add(info_hash)
+        for command in commands:
+            field, value = re.match(r'd\.(\w+)\.set=(.*)', command).groups()
+            torrent[field] = re.sub(r'\\(.)', r'\1', value)
+        return 0
+
+    def _dispatch(self, method, params):
+        if method == 'system.client_version':
+            return '0.9.6'
+        if method in ['load.raw', 'load.raw_start']:
+            return self._load(*params)
+        if method == 'execute.throw':
+            self.executed.append(list(params[1:]))
+            return 0
+        if method == 'd.multicall2':
+            commands = params[2:]
+            return [[torrent.get(command.rstrip('=')[2:], '') for command in commands]
+                    for torrent in self.torrents.values()]
+        if method == 'd.erase':
+            self._torrent(params[0])
+            del self.torrents[params[0]]
+            return 0
+        field = method[2:]
+        if field.startswith('set_'):
+            field = field[4:] + '.set'
+        if field.endswith('.set'):
+            self._torrent(params[0])[field[:-4]] = params[1]
+            return 0
+        if field in ['start', 'stop', 'close']:
+            self._torrent(params[0])['state'] = int(field == 'start')
+            return 0
+        return self._torrent(params[0]).get(field, '')
+
+
+class CountingRequestHandler(xmlrpc_server.SimpleXMLRPCRequestHandler):
+    def do_POST(self):
+        self.server.instance.requests += 1
+        xmlrpc_server.SimpleXMLRPCRequestHandler.do_POST(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.yield_fixture()
+def rtorrent(no_requests, monkeypatch):
+    for func, real_func in real_requests.items():
+        monkeypatch.setattr(func, real_func)
+    server = xmlrpc_server.SimpleXMLRPCServer(('127.0.0.1', 0), requestHandler=CountingRequestHandler,
+                                              allow_none=True, logRequests=False)
+    server.register_multicall_functions()
+    server.register_instance(FakeRTorrent())
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    server.instance.uri = 'http://127.0.0.1:%s/RPC2' % server.server_address[1]
+    yield server.instance
+    server.shutdown()
+    server.server_close()
 
 
-@mock.patch('flexget.plugins.clients.rtorrent.xmlrpc_client.ServerProxy')
 class TestRTorrentClient(object):
-    def test_version(self, mocked_proxy):
-        mocked_client = mocked_proxy()
-        mocked_client.system.client_version.return_value = '0.9.4'
-        client = RTorrent('http://localhost/RPC2')
+    @pytest.fixture()
+    def client(self, rtorrent):
+        return RTorrent(rtorrent.uri, session=Session())
 
-        assert client.version == [0, 9, 4]
-        assert mocked_client.system.client_version.called
-
-    def test_load(self, mocked_proxy):
-        mocked_proxy = mocked_proxy()
-        mocked_proxy.execute.throw.return_value = 0
-        mocked_proxy.load.raw_start.return_value = 0
-
-        client = RTorrent('http://localhost/RPC2')
+    def test_version(self, client, rtorrent):
+        assert client.version == [0, 9, 6]
+        assert client.version == [0, 9, 6]
+        assert rtorrent.requests == 1
 
+    def test_load(self, client, rtorrent):
         resp = client.load(
             torrent_raw,
             fields={'priority': 3, 'directory': '/data/downloads', 'custom1': 'testing'},
@@ -59,33 +137,26 @@ class TestRTorrentClient(object):
         )
 
         assert resp == 0
-
-        # Ensure mkdir was called
-        mocked_proxy.execute.throw.assert_called_with('', 'mkdir', '-p', '/data/downloads')
-
-        # Ensure load was called
-        assert mocked_proxy.load.raw_start.called
-
-        match_binary = Matcher(compare_binary, xmlrpc_client.Binary(torrent_raw))
-
-        called_args = mocked_proxy.load.raw_start.call_args_list[0][0]
-        assert len(called_args) == 5
-        assert '' == called_args[0]
-        assert match_binary in called_args
-
-        fields = [p for p in called_args[2:]]
-        assert len(fields) == 3
-        assert 'd.directory.set=\\/data\\/downloads' in fields
-        assert 'd.custom1.set=testing' in fields
-        assert 'd.priority.set=3' in fields
-
-    def test_torrent(self, mocked_proxy):
-        mocked_proxy = mocked_proxy()
-        mocked_proxy.system.multicall.return_value = [
-            ['/data/downloads'], ['private.torrent'], [torrent_info_hash], ['test_custom1'], [123456]
-        ]
-
-        client = RTorrent('http://localhost/RPC2')
+        assert rtorrent.executed == [['mkdir', '-p', '/data/downloads']]
+        torrent = rtorrent.torrents[torrent_info_hash]
+        assert torrent['directory'] == '/data/downloads'
+        assert torrent['custom1'] == 'testing'
+        assert torrent['priority'] == '3'
+
+    def test_load_many(self, client, rtorrent):
+        magnets = [('d10:magnet-uri%d:%se' % (len(url), url)).encode('ascii') for url in
+                   ['magnet:?xt=urn:btih:AAAA', 'magnet:?xt=urn:btih:BBBB', 'magnet:?xt=urn:btih:CCCC']]
+        resp = client.load_many([(magnets[0], {'directory': '/data/a'}), (magnets[1], {'directory': '/data/b'}),
+                                 (magnets[2], {'directory': '/data/a'})], start=True, mkdir=True)
+
+        assert resp == [0, 0, 0]
+        assert list(rtorrent.torrents) == ['AAAA', 'BBBB', 'CCCC']
+        assert rtorrent.executed == [['mkdir', '-p', '/data/a'], ['mkdir', '-p', '/data/b']]
+        # One round trip creating the directories, one loading the torrents
+        assert rtorrent.requests == 2
+
+    def test_torrent(self, client, rtorrent):
+        rtorrent.add(torrent_info_hash, custom1='test_custom1', **{'down.rate': 123456})
 
         torrent = client.torrent(torrent_info_hash, fields=['custom1', 'down_rate'])  # Required fields should be added
 
@@ -95,29 +166,34 @@ class TestRTorrentClient(object):
         assert torrent.get('custom1') == 'test_custom1'
         assert torrent.get('name') == 'private.torrent'
         assert torrent.get('down_rate') == 123456
+        assert rtorrent.requests == 1
 
-        assert mocked_proxy.system.multicall.called_with(([
-            {'params': (torrent_info_hash,), 'methodName': 'd.base_path'},
-            {'params': (torrent_info_hash,), 'methodName': 'd.name'},
-            {'params': (torrent_info_hash,), 'methodName': 'd.hash'},
-            {'params': (torrent_info_hash,), 'methodName': 'd.custom1'},
-            {'params': (torrent_info_hash,), 'methodName': 'd.down.rate'},
-        ]))
+        with pytest.raises(xmlrpc_client.Fault):
+            client.torrent('09977FE761AAAAAAAAAAAAAAAAAAAAAAAAAAAAAA')
 
-    def test_torrents(self, mocked_proxy):
-        mocked_proxy = mocked_proxy()
+    def test_torrents_by_hash(self, client, rtorrent):
         hash1 = '09977FE761AAAAAAAAAAAAAAAAAAAAAAAAAAAAAA'
         hash2 = '09977FE761BBBBBBBBBBBBBBBBBBBBBBBBBBBBBB'
+        rtorrent.add(hash1, custom1='test_custom1')
+        rtorrent.add(hash2, custom1='test_custom2')
 
-        mocked_proxy.d.multicall.return_value = (
-            ['/data/downloads', 'private.torrent', hash1, 'test_custom1'],
-            ['/data/downloads', 'private.torrent', hash2, 'test_custom2'],
-        )
+        torrents = client.torrents_by_hash([hash1, torrent_info_hash, hash2], fields=['custom1'])
+
+        assert sorted(torrents) == [hash1, hash2]
+        assert torrents[hash1]['custom1'] == 'test_custom1'
+        assert torrents[hash2]['custom1'] == 'test_custom2'
+        assert rtorrent.requests == 1
+
+    def test_torrents(self, client, rtorrent):
+        hash1 = '09977FE761AAAAAAAAAAAAAAAAAAAAAAAAAAAAAA'
+        hash2 = '09977FE761BBBBBBBBBBBBBBBBBBBBBBBBBBBBBB'
+        rtorrent.add(hash1, custom1='test_custom1')
+        rtorrent.add(hash2, custom1='test_custom2')
 
-        client = RTorrent('http://localhost/RPC2')
         torrents = client.torrents(fields=['custom1'])  # Required fields should be added
 
         assert isinstance(torrents, list)
+        assert len(torrents) == 2
 
         for torrent in torrents:
             assert torrent.get('base_path') == '/data/downloads'
@@ -130,15 +206,10 @@ class TestRTorrentClient(object):
             else:
                 assert False, 'Invalid hash returned'
 
-        assert mocked_proxy.system.multicall.called_with((
-            ['main', 'd.directory_base=', 'd.name=', 'd.hash=', u'd.custom1='],
-        ))
-
-    def test_update(self, mocked_proxy):
-        mocked_proxy = mocked_proxy()
-        mocked_proxy.system.multicall.return_value = [[0]]
+        assert rtorrent.requests == 1
 
-        client = RTorrent('http://localhost/RPC2')
+    def test_update(self, client, rtorrent):
+        rtorrent.add(torrent_info_hash)
 
         update_fields = {
             'custom1': 'test_custom1',
@@ -149,61 +220,35 @@ class TestRTorrentClient(object):
         resp = client.update(torrent_info_hash, fields=update_fields)
         assert resp == 0
 
-        assert mocked_proxy.system.multicall.called_with(([
-            {'params': (torrent_info_hash, '/data/downloads'), 'methodName': 'd.directory_base'},
-            {'params': (torrent_info_hash, 'test_custom1'), 'methodName': 'd.custom1'},
-            {'params': (torrent_info_hash, '/data/downloads'), 'methodName': 'd.custom1'}
-        ]))
+        torrent = rtorrent.torrents[torrent_info_hash]
+        assert torrent['custom1'] == 'test_custom1'
+        assert torrent['directory_base'] == '/data/downloads'
+        assert torrent['priority'] == '3'
+        assert rtorrent.requests == 1
 
-    def test_delete(self, mocked_proxy):
-        mocked_proxy = mocked_proxy()
-        mocked_proxy.d.erase.return_value = 0
+    def test_delete(self, client, rtorrent):
+        rtorrent.add(torrent_info_hash)
 
-        client = RTorrent('http://localhost/RPC2')
         resp = client.delete(torrent_info_hash)
 
         assert resp == 0
-        assert mocked_proxy.d.erase.called_with((torrent_info_hash,))
-
-    def test_move(self, mocked_proxy):
-        mocked_proxy = mocked_proxy()
-        mocked_proxy.system.multicall.return_value = [
-            ['private.torrent'], [torrent_info_hash], ['/data/downloads'],
-        ]
+        assert not rtorrent.torrents
 
-        mocked_proxy.move.return_value = 0
-        mocked_proxy.d.directory.set.return_value = 0
-        mocked_proxy.execute.throw.return_value = 0
+    def test_move(self, client, rtorrent):
+        rtorrent.add(torrent_info_hash)
 
-        client = RTorrent('http://localhost/RPC2')
         client.move(torrent_info_hash, '/new/folder')
 
-        mocked_proxy.execute.throw.assert_has_calls([
-            mock.call('', 'mkdir', '-p', '/new/folder'),
-            mock.call('', 'mv', '-u', '/data/downloads', '/new/folder'),
-        ])
-
-    def test_start(self, mocked_proxy):
-        mocked_proxy = mocked_proxy()
-        mocked_proxy.d.start.return_value = 0
-
-        client = RTorrent('http://localhost/RPC2')
-        resp = client.start(torrent_info_hash)
+        assert rtorrent.executed == [['mkdir', '-p', '/new/folder'], ['mv', '-u', '/data/downloads', '/new/folder']]
+        assert rtorrent.torrents[torrent_info_hash]['directory'] == '/new/folder'
 
-        assert resp == 0
-        assert mocked_proxy.d.start.called_with((torrent_info_hash,))
-
-    def test_stop(self, mocked_proxy):
-        mocked_proxy = mocked_proxy()
-        mocked_proxy.d.close.return_value = 0
-        mocked_proxy.d.stop.return_value = 0
-
-        client = RTorrent('http://localhost/RPC2')
-        resp = client.stop(torrent_info_hash)
+    def test_start_stop(self, client, rtorrent):
+        rtorrent.add(torrent_info_hash)
 
-        assert resp == 0
-        assert mocked_proxy.d.stop.called_with((torrent_info_hash,))
-        assert mocked_proxy.d.close.called_with((torrent_info_hash,))
+        assert client.stop(torrent_info_hash) == 0
+        assert rtorrent.torrents[torrent_info_hash]['state'] == 0
+        assert client.start(torrent_info_hash) == 0
+        assert rtorrent.torrents[torrent_info_hash]['state'] == 1
 
 
 @mock.patch('flexget.plugins.clients.rtorrent.RTorrent')
@@ -268,35 +313,34 @@ class TestRTorrentOutputPlugin(object):
 
     def test_add(self, mocked_client, execute_task):
         mocked_client = mocked_client()
-        mocked_client.load.return_value = 0
+        mocked_client.load_many.return_value = [0]
         mocked_client.version = [0, 9, 4]
-        mocked_client.torrent.side_effect = [False, {'hash': torrent_info_hash}]
+        mocked_client.torrents_by_hash.side_effect = [{}, {torrent_info_hash: {'hash': torrent_info_hash}}]
 
-        execute_task('test_add_torrent')
+        task = execute_task('test_add_torrent')
 
-        mocked_client.load.assert_called_with(
-            torrent_raw,
-            fields={'priority': 3, 'directory': '/data/downloads', 'custom1': 'test_custom1'},
+        mocked_client.load_many.assert_called_with(
+            [(torrent_raw, {'priority': 3, 'directory': '/data/downloads', 'custom1': 'test_custom1'})],
             start=True,
             mkdir=True,
         )
+        assert task.find_entry('accepted', title='test')
 
     def test_add_set(self, mocked_client, execute_task):
         mocked_client = mocked_client()
-        mocked_client.load.return_value = 0
+        mocked_client.load_many.return_value = [0]
         mocked_client.version = [0, 9, 4]
-        mocked_client.torrent.side_effect = [False, {'hash': torrent_info_hash}]
+        mocked_client.torrents_by_hash.side_effect = [{}, {torrent_info_hash: {'hash': torrent_info_hash}}]
 
         execute_task('test_add_torrent_set')
 
-        mocked_client.load.assert_called_with(
-            torrent_raw,
-            fields={
+        mocked_client.load_many.assert_called_with(
+            [(torrent_raw, {
                 'priority': 1,
                 'directory': '/data/downloads',
                 'custom1': 'test_custom1',
                 'custom2': 'test_custom2'
-            },
+            })],
             start=False,
             mkdir=False,
         )
@@ -304,29 +348,26 @@ class TestRTorrentOutputPlugin(object):
     def test_update(self, mocked_client, execute_task):
         mocked_client = mocked_client()
         mocked_client.version = [0, 9, 4]
-        mocked_client.update.return_value = 0
-        # ntpath complains on windows if base_path is a MagicMock
-        mocked_client.torrent.side_effect = [False, {'base_path': ''}]
+        mocked_client.update_many.return_value = [0]
+        mocked_client.torrents_by_hash.return_value = {}
 
         execute_task('test_update')
 
-        mocked_client.update.assert_called_with(
-            torrent_info_hash,
-            {'priority': 1, 'custom1': 'test_custom1'}
+        mocked_client.update_many.assert_called_with(
+            [(torrent_info_hash, {'priority': 1, 'custom1': 'test_custom1'})]
         )
 
     def test_update_path(self, mocked_client, execute_task):
         mocked_client = mocked_client()
         mocked_client.version = [0, 9, 4]
-        mocked_client.update.return_value = 0
+        mocked_client.update_many.return_value = [0]
         mocked_client.move.return_value = 0
-        mocked_client.torrent.return_value = {'base_path': '/some/path'}
+        mocked_client.torrents_by_hash.return_value = {torrent_info_hash: {'base_path': '/some/path'}}
 
         execute_task('test_update_path')
 
-        mocked_client.update.assert_called_with(
-            torrent_info_hash,
-            {'custom1': 'test_custom1'}
+        mocked_client.update_many.assert_called_with(
+            [(torrent_info_hash, {'custom1': 'test_custom1'})]
         )
 
         mocked_client.move.assert_called_with(
@@ -345,6 +386,38 @@ class TestRTorrentOutputPlugin(object):
         mocked_client.delete.assert_called_with(torrent_info_hash)
 
 
+class TestRTorrentOutputRoundTrips(object):
+    _config = """
+        tasks:
+          test_add_many:
+            accept_all: yes
+            mock:
+              - {title: 'a', url: 'magnet:?xt=urn:btih:AAAA', torrent_info_hash: 'AAAA'}
+              - {title: 'b', url: 'magnet:?xt=urn:btih:BBBB', torrent_info_hash: 'BBBB'}
+              - {title: 'c', url: 'magnet:?xt=urn:btih:CCCC', torrent_info_hash: 'CCCC'}
+              - {title: 'd', url: 'magnet:?xt=urn:btih:DDDD', torrent_info_hash: 'DDDD'}
+            rtorrent:
+              uri: __uri__
+              path: /data/{{title}}
+    """
+
+    @pytest.fixture()
+    def config(self, rtorrent):
+        return self._config.replace('__uri__', rtorrent.uri)
+
+    def test_add_many(self, execute_task, rtorrent):
+        rtorrent.add('DDDD')
+
+        task = execute_task('test_add_many')
+
+        assert len(task.failed) == 0
+        assert list(rtorrent.torrents) == ['DDDD', 'AAAA', 'BBBB', 'CCCC']
+        assert rtorrent.torrents['BBBB']['directory'] == '/data/b'
+        assert len(rtorrent.executed) == 3
+        # Version check, existence check, directories, load and verify, however many entries there are
+        assert rtorrent.requests == 5
+
+
 @mock.patch('flexget.plugins.clients.rtorrent.RTorrent')
 class TestRTorrentInputPlugin(object):
     config = """
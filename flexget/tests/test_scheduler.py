@@ -0,0 +1,64 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from flexget.config_schema import process_config
+from flexget.manager import Session
+from flexget.plugins.daemon.scheduler import adaptive_interval, schedule_schema
+from flexget.plugins.operate.status import StatusTask, TaskExecution
+
+ADAPTIVE = {'min': {'minutes': 10}, 'max': {'hours': 2}}
+
+
+def add_executions(task_name, *executions):
+    """Stores executions of `task_name`, given as dicts of `TaskExecution` columns, latest first."""
+    with Session() as session:
+        status_task = StatusTask(name=task_name)
+        session.add(status_task)
+        for index, columns in enumerate(executions):
+            execution = TaskExecution(start=datetime.now() - timedelta(hours=index), **columns)
+            execution.task = status_task
+
+
+ACTIVE = {'produced': 10, 'accepted': 1, 'rejected': 9}
+NEW = {'produced': 10, 'accepted': 0, 'rejected': 8}
+EMPTY = {'produced': 10, 'accepted': 0, 'rejected': 10}
+FAILED = {'succeeded': False}
+
+
+@pytest.mark.usefixtures('manager')
+class TestAdaptiveInterval(object):
+    config = 'tasks: {}'
+
+    def test_no_history(self):
+        assert adaptive_interval(['unknown'], ADAPTIVE) == 600
+
+    def test_backoff(self):
+        add_executions('quiet', EMPTY, FAILED, EMPTY, ACTIVE, EMPTY)
+        assert adaptive_interval(['quiet'], ADAPTIVE) == 600 * 8
+        assert adaptive_interval(['quiet'], dict(ADAPTIVE, factor=1.5)) == 600 * 1.5 ** 3
+
+    def test_maximum(self):
+        add_executions('dead', *[EMPTY] * 10)
+        assert adaptive_interval(['dead'], ADAPTIVE) == 7200
+
+    def test_new_entries_are_activity(self):
+        add_executions('busy', NEW, EMPTY, EMPTY)
+        assert adaptive_interval(['busy'], ADAPTIVE) == 600
+
+    def test_busiest_task_decides(self):
+        add_executions('busy', ACTIVE)
+        add_executions('quiet', EMPTY, EMPTY)
+        assert adaptive_interval(['busy', 'quiet'], ADAPTIVE) == 600
+
+
+class TestAdaptiveSchema(object):
+    def test_valid(self):
+        assert not process_config({'tasks': 'a', 'adaptive': ADAPTIVE}, schedule_schema)
+
+    def test_invalid(self):
+        assert process_config({'tasks': 'a', 'adaptive': {'min': {'minutes': 10}}}, schedule_schema)
+        assert process_config({'tasks': 'a', 'adaptive': ADAPTIVE, 'interval': {'hours': 1}}, schedule_schema)
@@ -186,3 +186,36 @@ class TestFilterSeenMovies(object):
         task = execute_task('test_2')
         msg = 'Changing scope should not have rejected Seen movie title 13'
         assert not task.find_entry('rejected', title='Seen movie title 13'), msg
+
+
+class TestSeenEarly(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/seen1'}
+              - {title: 'Show.S01E02.720p.HDTV-FlexGet', url: 'http://localhost/new1'}
+            accept_all: yes
+            seen:
+              early: yes
+          test_late:
+            mock:
+              - {title: 'Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/seen1'}
+            accept_all: yes
+          learn:
+            mock:
+              - {title: 'Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/seen1'}
+            accept_all: yes
+    """
+
+    def test_rejected_before_metainfo(self, execute_task):
+        execute_task('learn', options={'learn': True})
+        task = execute_task('test')
+        seen = task.find_entry('rejected', title='Show.S01E01.720p.HDTV-FlexGet')
+        assert seen, 'seen entry should have been rejected'
+        assert 'quality' not in seen, 'metainfo should not have run on the seen entry'
+        new = task.find_entry('accepted', title='Show.S01E02.720p.HDTV-FlexGet')
+        assert new and new['quality']
+        # Without early the entry is rejected in filter phase, after metainfo
+        task = execute_task('test_late')
+        assert task.find_entry('rejected', title='Show.S01E01.720p.HDTV-FlexGet')['quality']
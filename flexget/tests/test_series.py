@@ -203,6 +203,12 @@ class TestDatabase(object):
             mock:
               - {title: 'Progress.S01E20.720p.Another-FlexGet'}
               - {title: 'Progress.S01E20.HDTV-Another-FlexGet'}
+
+          progress_unseen:
+            mock:
+              - {title: 'Progress.S01E20.720p-FlexGet'}
+              - {title: 'Progress.S01E20.HDTV-FlexGet'}
+            seen: no
     """
 
     def test_database(self, execute_task):
@@ -226,6 +232,19 @@ class TestDatabase(object):
         task = execute_task('progress_2')
         assert not task.accepted, 'doppelgangers accepted'
 
+    def test_releases_stored_once(self, execute_task):
+        """Series plugin: repeated runs reuse stored episodes and releases"""
+        from flexget.manager import Session
+        from flexget.plugins.filter.series import Episode, Release
+
+        task = execute_task('progress_unseen')
+        entry_releases = sorted(r for e in task.entries for r in e['series_releases'])
+        task = execute_task('progress_unseen')
+        assert sorted(r for e in task.all_entries for r in e['series_releases']) == entry_releases
+        with Session() as session:
+            assert session.query(Episode).count() == 1
+            assert session.query(Release).count() == 2
+
 
 class TestFilterSeries(object):
     config = """
@@ -0,0 +1,137 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import posixpath
+
+import pytest
+
+from flexget.plugins.clients import sftp
+from flexget.utils.connection_pool import ConnectionPool
+
+
+class FakeSftpServer(object):
+    """Remote files kept in memory, path -> content. Content may be an exception raised when the file is read."""
+
+    def __init__(self, files):
+        self.files = files
+        self.connections = []
+
+    def connect(self, conf):
+        self.connections.append(FakeSftp(self))
+        return self.connections[-1]
+
+    def is_dir(self, path):
+        return any(name.startswith(path.rstrip('/') + '/') for name in self.files)
+
+
+class FakeSftp(object):
+    """Stands in for a `pysftp.Connection`."""
+
+    def __init__(self, server):
+        self.server = server
+        self.sftp_client = self
+        self.current = '/'
+        self.closed = False
+
+    def _path(self, path):
+        return posixpath.normpath(posixpath.join(self.current, path))
+
+    def cwd(self, path):
+        self.current = self._path(path) if path else '/'
+
+    def normalize(self, path):
+        return self._path(path)
+
+    def lexists(self, path):
+        return self.isfile(path) or self.isdir(path)
+
+    def exists(self, path):
+        return self.lexists(path)
+
+    def isfile(self, path):
+        return self._path(path) in self.server.files
+
+    def isdir(self, path):
+        return self.server.is_dir(self._path(path))
+
+    def walktree(self, remotepath, fcallback, dcallback, ucallback, recurse=True):
+        base = self._path(remotepath)
+        for name in sorted(self.server.files):
+            if name.startswith(base + '/') and (recurse or '/' not in name[len(base) + 1:]):
+                fcallback(posixpath.join(remotepath, name[len(base) + 1:]))
+
+    def get(self, remotepath, localpath):
+        content = self.server.files[self._path(remotepath)]
+        with open(localpath, 'w') as f:
+            if isinstance(content, Exception):
+                f.write('partial')
+                raise content
+            f.write(content)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeParamiko(object):
+    __version_info__ = (2, 0)
+
+
+@pytest.fixture()
+def server(monkeypatch):
+    server = FakeSftpServer({'/remote/good.mkv': 'good', '/remote/pack/a.mkv': 'a',
+                             '/remote/pack/b.mkv': IOError('connection lost')})
+    monkeypatch.setattr(sftp, 'pysftp', object())
+    monkeypatch.setattr(sftp, 'paramiko', FakeParamiko)
+    monkeypatch.setattr(sftp, 'connection_pool', ConnectionPool(server.connect, lambda s: s.close(), sftp.sftp_reset))
+    return server
+
+
+class TestSftpDownload(object):
+    _config = """
+        tasks:
+          download:
+            disable: [seen, retry_failed]
+            mock:
+              - {title: 'good', url: 'sftp://user@localhost/remote/good.mkv'}
+              - {title: 'pack', url: 'sftp://user@localhost/remote/pack'}
+            accept_all: yes
+            sftp_download:
+              to: __tmp__
+              workers: 2
+          reuse:
+            disable: [seen, retry_failed]
+            mock:
+              - {title: 'good', url: 'sftp://user@localhost/remote/good.mkv'}
+              - {title: 'a', url: 'sftp://user@localhost/remote/pack/a.mkv'}
+            accept_all: yes
+            sftp_download:
+              to: __tmp__
+    """
+
+    @pytest.fixture()
+    def config(self, tmpdir):
+        return self._config.replace('__tmp__', tmpdir.strpath)
+
+    def test_partial_failure(self, execute_task, server, tmpdir):
+        task = execute_task('download')
+        assert task.find_entry('accepted', title='good')
+        assert tmpdir.join('good.mkv').read() == 'good'
+        # One failed file fails its entry, the partial download is removed
+        entry = task.find_entry('failed', title='pack')
+        assert 'b.mkv' in entry['reason']
+        assert not tmpdir.join('pack', 'b.mkv').exists()
+        # The connection it failed on is not put back in the pool
+        assert len([connection for connection in server.connections if connection.closed]) == 1
+
+    def test_pool_reuse(self, execute_task, server, manager, tmpdir):
+        submitted = manager.executor.metrics()['submitted']
+        task = execute_task('reuse')
+        assert len(task.accepted) == 2
+        assert tmpdir.join('a.mkv').read() == 'a'
+        # Files are downloaded by the task executor, listing and downloads share one pooled connection
+        assert manager.executor.metrics()['submitted'] - submitted == 2
+        assert len(server.connections) == 1
+        # The next run reuses the idle connection
+        execute_task('reuse')
+        assert len(server.connections) == 1
+        assert not server.connections[0].closed
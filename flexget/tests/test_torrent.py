@@ -1,12 +1,13 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import binascii
 import os
 
 import mock
 import pytest
 
-from flexget.utils.bittorrent import Torrent
+from flexget.utils.bittorrent import Torrent, bencode
 
 
 class TestInfoHash(object):
@@ -275,6 +276,12 @@ class TestTorrentAlive(object):
             mock:
               - {title: 'test', file: '__tmp__/test.torrent', url: fake}
             torrent_alive: 0
+          test_torrent_alive_shared_tracker:
+            mock:
+              - {title: 'test', file: '__tmp__/test.torrent', url: fake}
+              - {title: 'private', file: '__tmp__/private.torrent', url: fake2}
+            torrent_alive: 1
+            disable: [seen, seen_info_hash]
     """
 
     @pytest.mark.filecopy('test.torrent', '__tmp__/test.torrent')
@@ -296,6 +303,23 @@ class TestTorrentAlive(object):
         assert task.accepted
         assert task._rerun_count == 0, 'Torrent should have been accepted without rerun.'
 
+    @pytest.mark.filecopy([('test.torrent', '__tmp__/test.torrent'), ('private.torrent', '__tmp__/private.torrent')])
+    @mock.patch('flexget.utils.requests.get')
+    def test_torrent_alive_shared_tracker(self, mocked_request, execute_task):
+        from flexget.plugins.filter.torrent_alive import scrape_cache
+        scrape_cache.clear()
+        mocked_request.return_value.content = bencode({'files': {
+            binascii.unhexlify('14FFE5DD23188FD5CB53A1D47F1289DB70ABF31E'): {'complete': 5},
+            binascii.unhexlify('09977FE761B8D293AD8A929CCAF2E9322D525A6C'): {'complete': 0}}})
+        task = execute_task('test_torrent_alive_shared_tracker')
+        assert task.find_entry('accepted', title='test')
+        assert task.find_entry('rejected', title='private')
+        # Both torrents are on the same tracker, it should have been scraped once for both, and the rerun should
+        # have used the cached results
+        assert task._rerun_count == 1
+        assert mocked_request.call_count == 1
+        assert mocked_request.call_args[0][0].count('info_hash=') == 2
+
     def test_torrent_alive_udp_invalid_port(self):
         from flexget.plugins.filter.torrent_alive import get_udp_seeds
         assert get_udp_seeds('udp://[2001::1]/announce', 'HASH') == 0
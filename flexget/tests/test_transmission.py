@@ -0,0 +1,292 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import re
+import sys
+import time
+import types
+from collections import OrderedDict
+from datetime import datetime
+
+import pytest
+
+from flexget.plugins.clients import transmission
+
+
+class FakeTransmissionError(Exception):
+    def __init__(self, message='', original=None):
+        super(FakeTransmissionError, self).__init__(message)
+        self.message = message
+        self.original = original
+
+
+class FakeTorrent(object):
+    """A transmissionrpc `Torrent` holding only the fields it was fetched with."""
+
+    def __init__(self, fields):
+        self._fields = fields
+
+    dates = {'date_added': 'addedDate', 'date_done': 'doneDate', 'date_active': 'activityDate'}
+
+    def __getattr__(self, name):
+        field = 'uploadRatio' if name == 'ratio' else self.dates.get(name, name)
+        if field not in self._fields:
+            raise AttributeError('field %s was not fetched' % field)
+        value = self._fields[field]
+        return datetime.fromtimestamp(value) if name in self.dates else value
+
+    def files(self):
+        files = self._fields['files']
+        return dict((index, {'name': f['name'], 'size': f['length'], 'completed': f['bytesCompleted'],
+                             'selected': self._fields['wanted'][index], 'priority': self._fields['priorities'][index]})
+                    for index, f in enumerate(files))
+
+
+class FakeSession(object):
+    start_added_torrents = True
+    download_dir = '/downloads'
+    seedRatioLimited = False
+    idle_seeding_limit_enabled = False
+
+
+class FakeClient(object):
+    """
+    Stands in for `transmissionrpc.Client`, with torrents kept in memory. Calls are recorded so tests can count round
+    trips.
+    """
+
+    def __init__(self, address, port, user, password):
+        self.address = (address, port, user, password)
+        self.torrents = OrderedDict()
+        self.calls = []
+        # Magnet info hash -> (files, number of polls before the metadata is there, None for never)
+        self.magnets = {}
+        self.session = FakeSession()
+
+    def add(self, **fields):
+        torrent_id = len(self.torrents) + 1
+        torrent = {'id': torrent_id, 'name': 'torrent %s' % torrent_id, 'totalSize': 0, 'files': [], 'wanted': [],
+                   'priorities': [], 'leftUntilDone': 0, 'downloadDir': '/downloads', 'trackers': [],
+                   'status': 'seeding',
+                   'uploadRatio': 0, 'addedDate': time.time() - 3600, 'doneDate': time.time() - 1800,
+                   'activityDate': time.time(), 'seedRatioMode': 0, 'seedRatioLimit': 0, 'seedIdleMode': 0,
+                   'seedIdleLimit': 0}
+        torrent.update(fields)
+        self.torrents[torrent_id] = torrent
+        return torrent
+
+    def set_files(self, torrent, files):
+        torrent['files'] = [{'name': name, 'length': size, 'bytesCompleted': 0} for name, size in files]
+        torrent['totalSize'] = sum(size for _, size in files)
+        torrent['wanted'] = [1] * len(files)
+        torrent['priorities'] = [0] * len(files)
+
+    def get_session(self):
+        self.calls.append(('get_session',))
+        return self.session
+
+    def add_torrent(self, torrent, timeout=None, **kwargs):
+        self.calls.append(('add_torrent', torrent, kwargs))
+        info_hash = re.search(r'btih:(\w+)', torrent).group(1)
+        files, polls = self.magnets[info_hash]
+        added = self.add(name=info_hash, polls=polls, metadata=files)
+        if polls == 0:
+            self.set_files(added, files)
+        return FakeTorrent({'id': added['id']})
+
+    def get_torrents(self, ids=None, arguments=None, timeout=None):
+        self.calls.append(('get_torrents', ids, arguments))
+        torrents = []
+        for torrent_id, torrent in self.torrents.items():
+            if ids is not None and torrent_id not in ids:
+                continue
+            if torrent.get('polls'):
+                torrent['polls'] -= 1
+                if not torrent['polls']:
+                    self.set_files(torrent, torrent['metadata'])
+            fields = dict((k, v) for k, v in torrent.items() if arguments is None or k in arguments)
+            torrents.append(FakeTorrent(fields))
+        return torrents
+
+    def change_torrent(self, ids, timeout=None, **kwargs):
+        self.calls.append(('change_torrent', ids, kwargs))
+
+    def start_torrent(self, ids):
+        self.calls.append(('start_torrent', ids))
+
+    def stop_torrent(self, ids):
+        self.calls.append(('stop_torrent', ids))
+
+    def rename_torrent_path(self, torrent_id, location, name):
+        self.calls.append(('rename_torrent_path', torrent_id, location, name))
+
+    def remove_torrent(self, ids, delete_data=False, timeout=None):
+        self.calls.append(('remove_torrent', ids, delete_data))
+        for torrent_id in ids:
+            del self.torrents[torrent_id]
+
+    def called(self, method):
+        return [call[1:] for call in self.calls if call[0] == method]
+
+
+class FakeTime(object):
+    def __init__(self):
+        self.slept = 0
+
+    def sleep(self, seconds):
+        self.slept += seconds
+
+
+@pytest.fixture()
+def clients(monkeypatch):
+    """Installs a fake transmissionrpc module, returns the list of clients it created."""
+    clients = []
+
+    def client(*args):
+        clients.append(FakeClient(*args))
+        return clients[-1]
+
+    module = types.ModuleType(str('transmissionrpc'))
+    module.__version__ = '0.11'
+    module.Client = client
+    module.TransmissionError = FakeTransmissionError
+    module.HTTPHandlerError = FakeTransmissionError
+    monkeypatch.setitem(sys.modules, 'transmissionrpc', module)
+    monkeypatch.setattr(transmission, 'transmissionrpc', module, raising=False)
+    monkeypatch.setattr(transmission, 'TransmissionError', FakeTransmissionError, raising=False)
+    monkeypatch.setattr(transmission, 'HTTPHandlerError', FakeTransmissionError, raising=False)
+    monkeypatch.setattr(transmission, 'rpc_clients', {})
+    return clients
+
+
+@pytest.fixture()
+def fake_time(monkeypatch):
+    fake_time = FakeTime()
+    monkeypatch.setattr(transmission, 'time', fake_time)
+    return fake_time
+
+
+class TestTransmissionOutput(object):
+    config = """
+        templates:
+          global:
+            accept_all: yes
+            disable: [seen, seen_info_hash]
+        tasks:
+          batched:
+            mock:
+              - {title: 'AAA', url: 'magnet:?xt=urn:btih:AAA'}
+              - {title: 'BBB', url: 'magnet:?xt=urn:btih:BBB'}
+              - {title: 'CCC', url: 'magnet:?xt=urn:btih:CCC', maxupspeed: 20}
+            transmission:
+              maxupspeed: 10
+          main_file:
+            mock:
+              - {title: 'AAA', url: 'magnet:?xt=urn:btih:AAA'}
+              - {title: 'BBB', url: 'magnet:?xt=urn:btih:BBB', skip_files: ['*.nfo'], main_file_only: no}
+            transmission:
+              main_file_only: yes
+          magnetization:
+            mock:
+              - {title: 'AAA', url: 'magnet:?xt=urn:btih:AAA'}
+              - {title: 'BBB', url: 'magnet:?xt=urn:btih:BBB'}
+            transmission:
+              main_file_only: yes
+              magnetization_timeout: 5
+          other_port:
+            mock:
+              - {title: 'AAA', url: 'magnet:?xt=urn:btih:AAA'}
+            transmission:
+              port: 9092
+    """
+
+    files = [('Show/show.mkv', 950), ('Show/sample.mkv', 40), ('Show/show.nfo', 10)]
+
+    def client_for(self, manager, clients, task, magnets):
+        """Creates the client the task is going to use, with `magnets` known to it."""
+        config = transmission.PluginTransmission().prepare_config(dict(manager.config['tasks'][task]['transmission']))
+        client = transmission.PluginTransmission().create_rpc_client(config)
+        client.magnets.update(magnets)
+        return client
+
+    def test_batched_calls(self, execute_task, manager, clients, fake_time):
+        client = self.client_for(manager, clients, 'batched', dict((h, ([], 0)) for h in ['AAA', 'BBB', 'CCC']))
+        task = execute_task('batched')
+        assert len(task.accepted) == 3
+        assert len(client.called('add_torrent')) == 3
+        # Torrents with the same changes are changed together, one call per distinct change
+        changes = sorted((sorted(ids), kwargs['uploadLimit']) for ids, kwargs in client.called('change_torrent'))
+        assert changes == [([1, 2], 10), ([3], 20)]
+        assert client.called('start_torrent') == [([1, 2, 3],)]
+        assert not client.called('get_torrents')
+        assert fake_time.slept == 0
+
+    def test_file_selection(self, execute_task, manager, clients, fake_time):
+        client = self.client_for(manager, clients, 'main_file', {'AAA': (self.files, 0), 'BBB': (self.files, 0)})
+        execute_task('main_file')
+        # File lists of all torrents are fetched at once
+        assert len(client.called('get_torrents')) == 1
+        changes = dict((tuple(ids), kwargs) for ids, kwargs in client.called('change_torrent'))
+        assert changes[(1,)] == {'files_wanted': [0], 'files_unwanted': [1, 2]}
+        assert changes[(2,)] == {'files_wanted': [0, 1], 'files_unwanted': [2]}
+
+    def test_magnetization_timeout(self, execute_task, manager, clients, fake_time):
+        client = self.client_for(manager, clients, 'magnetization', {'AAA': (self.files, 2), 'BBB': (self.files, None)})
+        task = execute_task('magnetization')
+        # Both torrents are polled in one loop, until the timeout of the one never getting its metadata
+        assert fake_time.slept == 5
+        polls = client.called('get_torrents')
+        assert [sorted(ids) for ids, _ in polls] == [[1, 2], [1, 2], [2], [2], [2], [2]]
+        # Files are only selected in the torrent which magnetized, neither fails
+        assert client.called('change_torrent') == [([1], {'files_wanted': [0], 'files_unwanted': [1, 2]})]
+        assert client.called('start_torrent') == [([1, 2],)]
+        assert len(task.accepted) == 2
+
+    def test_rpc_clients_cached(self, execute_task, manager, clients, fake_time):
+        client = self.client_for(manager, clients, 'batched', dict((h, ([], 0)) for h in ['AAA', 'BBB', 'CCC']))
+        execute_task('batched')
+        execute_task('batched')
+        assert clients == [client]
+        assert len(client.called('add_torrent')) == 6
+        # Other connection details get a client of their own
+        other = self.client_for(manager, clients, 'other_port', {'AAA': ([], 0)})
+        execute_task('other_port')
+        assert clients == [client, other]
+        assert other.address[1] == 9092
+        # Clients are created again once the config changes
+        transmission.config_updated(manager)
+        assert not transmission.rpc_clients
+        renewed = self.client_for(manager, clients, 'batched', dict((h, ([], 0)) for h in ['AAA', 'BBB', 'CCC']))
+        execute_task('batched')
+        assert clients == [client, other, renewed]
+        assert len(client.called('add_torrent')) == 6
+        assert len(renewed.called('add_torrent')) == 3
+
+
+class TestTransmissionClean(object):
+    config = """
+        tasks:
+          clean:
+            clean_transmission:
+              min_ratio: 1
+    """
+
+    def test_clean_fields(self, execute_task, clients):
+        client = transmission.PluginTransmissionClean().create_rpc_client(
+            transmission.PluginTransmissionClean().prepare_config({'min_ratio': 1}))
+        done = client.add(uploadRatio=2)
+        client.set_files(done, [('done.mkv', 100)])
+        done['files'][0]['bytesCompleted'] = 100
+        low_ratio = client.add(uploadRatio=0.5)
+        client.set_files(low_ratio, [('low.mkv', 100)])
+        low_ratio['files'][0]['bytesCompleted'] = 100
+        client.add(uploadRatio=2, leftUntilDone=100)
+
+        execute_task('clean')
+        first, files = client.called('get_torrents')
+        # Torrents are listed without their files, file lists are only fetched for finished torrents
+        assert first == (None, transmission.PluginTransmissionClean.clean_fields)
+        assert 'files' not in first[1]
+        assert files == ([1, 2], transmission.PluginTransmissionClean.file_fields)
+        assert client.called('remove_torrent') == [([1], False)]
+        assert list(client.torrents) == [2, 3]
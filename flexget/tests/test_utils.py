@@ -3,10 +3,13 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 from datetime import datetime
 import math
+import re
 
 import pytest
 
 from flexget.utils import json
+from flexget.utils.connection_pool import ConnectionPool
+from flexget.utils.regexp import RegexpMatcher
 from flexget.utils.tools import parse_filesize
 
 
@@ -83,3 +86,88 @@ class TestParseFilesize(object):
 
         size = '1 234 567 MiB'
         assert parse_filesize(size) == 1234567
+
+
+class FakeConnection(object):
+    def __init__(self, key):
+        self.key = key
+        self.alive = True
+        self.closed = False
+
+
+class TestConnectionPool(object):
+    @pytest.fixture()
+    def pool(self):
+        def check(connection):
+            if not connection.alive:
+                raise IOError('connection lost')
+
+        def close(connection):
+            connection.closed = True
+
+        return ConnectionPool(FakeConnection, close, check)
+
+    def test_reuse(self, pool):
+        with pool.connection('a', 'a') as first:
+            pass
+        with pool.connection('a', 'a') as second:
+            # Only connections not in use are handed out
+            with pool.connection('a', 'a') as third:
+                pass
+        assert first is second
+        assert third is not second
+        with pool.connection('b', 'b') as other:
+            assert other.key == 'b'
+
+    def test_dead_connection_replaced(self, pool):
+        with pool.connection('a', 'a') as first:
+            pass
+        first.alive = False
+        with pool.connection('a', 'a') as second:
+            assert second is not first
+        assert first.closed
+
+    def test_discarded_on_error(self, pool):
+        with pytest.raises(ValueError):
+            with pool.connection('a', 'a') as first:
+                raise ValueError()
+        assert first.closed
+        assert pool.acquire('a', 'a') is not first
+
+    def test_idle_timeout_and_close(self, pool):
+        with pool.connection('a', 'a') as first:
+            pass
+        pool.idle_timeout = 0
+        with pool.connection('a', 'a') as second:
+            assert second is not first
+        assert first.closed
+        pool.close()
+        assert second.closed
+
+
+class TestRegexpMatcher(object):
+    def matcher(self, *patterns, **kwargs):
+        return RegexpMatcher([re.compile(pattern, re.IGNORECASE | re.UNICODE) for pattern in patterns], **kwargs)
+
+    def test_first_in_order(self):
+        # The first regexp wins, not the one matching leftmost in the string
+        matcher = self.matcher('foo', 'bar', '^start', r'end$')
+        assert matcher.first_match('bar foo') == 0
+        assert matcher.first_match('BAR') == 1
+        assert matcher.first_match('start bar') == 1
+        assert matcher.first_match('the start') is None
+        assert matcher.first_match('the end') == 3
+
+    def test_range(self):
+        matcher = self.matcher('foo', 'bar')
+        assert matcher.first_match('bar foo', start=1) == 1
+        assert matcher.first_match('bar foo', stop=1) == 0
+        assert matcher.first_match('bar', stop=1) is None
+
+    def test_indexes(self):
+        matcher = self.matcher('a', 'b', indexes=[3, 7])
+        assert matcher.first_match('ab') == 3
+        assert matcher.first_match('ab', start=4) == 7
+        assert matcher.first_match('ab', start=8) is None
+        assert matcher.first_match('ab', stop=7) == 3
+        assert matcher.first_match('b', stop=7) is None
@@ -0,0 +1,93 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+log = logging.getLogger('connection_pool')
+
+
+class ConnectionPool(object):
+    """
+    Keeps idle connections around so they can be reused by later entries and tasks instead of logging in again.
+
+    Connections are grouped by a hashable key, usually ``(host, port, username)``. A connection is only ever handed
+    to one user at a time, concurrent users of the same key get a connection each.
+
+    :param connect: Function creating a new connection, called with the arguments given to `connection`
+    :param close: Function closing a connection
+    :param check: Function called before an idle connection is reused. It should make sure the connection is still
+      alive and reset any state left over from the previous user, raising an exception if the connection is unusable.
+    :param int idle_timeout: Idle connections older than this many seconds are closed instead of reused
+    """
+
+    def __init__(self, connect, close, check=None, idle_timeout=300):
+        self._connect = connect
+        self._close = close
+        self._check = check
+        self.idle_timeout = idle_timeout
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _pop_idle(self, key):
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                connection, released = idle.pop()
+                if time.time() - released < self.idle_timeout:
+                    return connection
+                self._discard(connection)
+
+    def _discard(self, connection):
+        try:
+            self._close(connection)
+        except Exception as e:
+            log.debug('Error closing connection: %s', e)
+
+    def acquire(self, key, *args, **kwargs):
+        """Returns an idle connection for `key` if one still works, otherwise a new one."""
+        while True:
+            connection = self._pop_idle(key)
+            if connection is None:
+                break
+            if self._check is None:
+                return connection
+            try:
+                self._check(connection)
+            except Exception as e:
+                log.debug('Pooled connection for %s is no longer usable: %s', key, e)
+                self._discard(connection)
+                continue
+            log.debug('Reusing connection for %s', key)
+            return connection
+        return self._connect(*args, **kwargs)
+
+    def release(self, key, connection):
+        """Puts `connection` back into the pool for reuse."""
+        with self._lock:
+            self._idle[key].append((connection, time.time()))
+
+    @contextmanager
+    def connection(self, key, *args, **kwargs):
+        """
+        Context manager around `acquire` and `release`. If the block raises, the connection may be left in an unknown
+        state and is closed instead of returned to the pool.
+        """
+        connection = self.acquire(key, *args, **kwargs)
+        try:
+            yield connection
+        except Exception:
+            self._discard(connection)
+            raise
+        self.release(key, connection)
+
+    def close(self):
+        """Closes all idle connections."""
+        with self._lock:
+            idle = [connection for connections in self._idle.values() for connection, _ in connections]
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
@@ -6,7 +6,7 @@ import functools
 from collections import Mapping
 from datetime import datetime
 
-from sqlalchemy import extract, func
+from sqlalchemy import extract, func, Table
 from sqlalchemy.orm import synonym
 from sqlalchemy.ext.hybrid import Comparator, hybrid_property
 
@@ -46,6 +46,90 @@ def with_session(*args, **kwargs):
         return decorator
 
 
+def chunked(items, size=500):
+    """
+    Yields successive lists of at most `size` items, useful for keeping `IN` clauses below the bind parameter
+    limit of the database.
+    """
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BulkInsert(object):
+    """
+    Collects rows during a phase and writes them with as few statements as possible.
+
+    Rows are plain dicts keyed by mapped attribute names, or by column names when the target is a :class:`Table`
+    (eg. association tables). A row may reference the primary key of a row added earlier to the same batch with
+    :meth:`ref`, the value is filled in once the referenced row has been written.
+
+    Example::
+
+        bulk = BulkInsert()
+        parent = bulk.add(Parent, name='foo')
+        bulk.add(Child, parent_id=bulk.ref(parent), value='bar')
+        bulk.flush(session)
+    """
+
+    class _Ref(object):
+        def __init__(self, row, key):
+            self.row = row
+            self.key = key
+
+        def resolve(self):
+            return self.row[self.key]
+
+    def __init__(self):
+        self._targets = []
+        self._rows = {}
+        self._row_targets = {}
+        self._referenced = set()
+
+    def __len__(self):
+        return sum(len(rows) for rows in self._rows.values())
+
+    def add(self, target, **values):
+        """
+        Queue a row for insertion.
+
+        :param target: Mapped class or :class:`Table` to insert into
+        :return: The row dict, can be passed to :meth:`ref`
+        """
+        if target not in self._rows:
+            self._targets.append(target)
+            self._rows[target] = []
+        self._rows[target].append(values)
+        self._row_targets[id(values)] = target
+        return values
+
+    def ref(self, row, key='id'):
+        """Returns a placeholder for the value of `key` in `row`, resolved when the batch is flushed."""
+        self._referenced.add(self._row_targets[id(row)])
+        return self._Ref(row, key)
+
+    def flush(self, session):
+        """
+        Writes all queued rows using `session`. Targets referenced by other rows are written first, otherwise targets
+        are written in the order they were first added.
+        """
+        for target in sorted(self._targets, key=lambda t: t not in self._referenced):
+            rows = self._rows[target]
+            for row in rows:
+                for key, value in row.items():
+                    if isinstance(value, self._Ref):
+                        row[key] = value.resolve()
+            if isinstance(target, Table):
+                session.execute(target.insert(), rows)
+            else:
+                # Primary keys are only fetched for targets other rows depend on, everything else uses executemany
+                session.bulk_insert_mappings(target, rows, return_defaults=target in self._referenced)
+        self._targets = []
+        self._rows = {}
+        self._row_targets = {}
+        self._referenced = set()
+
+
 def pipe_list_synonym(name):
     """Converts pipe separated text into a list"""
 
@@ -82,8 +166,8 @@ def text_date_synonym(name):
     return synonym(name, descriptor=property(getter, setter))
 
 
-def entry_synonym(name):
-    """Use json to serialize python objects for db storage."""
+def serialize_entry(entry):
+    """Serializes an `Entry` or dict to json, leaving out any fields which are not made of builtin types."""
 
     def only_builtins(item):
         supported_types = (str, unicode, int, float, long, bool, datetime)
@@ -120,12 +204,18 @@ def entry_synonym(name):
         # If item isn't a subclass of a builtin python type, raise ValueError.
         raise TypeError('%r is not of type Entry.' % type(item))
 
+    return unicode(json.dumps(only_builtins(dict(entry)), encode_datetime=True))
+
+
+def entry_synonym(name):
+    """Use json to serialize python objects for db storage."""
+
     def getter(self):
         return Entry(json.loads(getattr(self, name), decode_datetime=True))
 
     def setter(self, entry):
         if isinstance(entry, Entry) or isinstance(entry, dict):
-            setattr(self, name, unicode(json.dumps(only_builtins(dict(entry)), encode_datetime=True)))
+            setattr(self, name, serialize_entry(entry))
         else:
             raise TypeError('%r is not of type Entry or dict.' % type(entry))
 
@@ -0,0 +1,83 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+import os
+import threading
+
+log = logging.getLogger('file_watcher')
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+def stat_signature(path):
+    """Cheap fingerprint of a file, changes when the file is written to or replaced."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size, stat.st_ino
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        paths = [event.src_path, getattr(event, 'dest_path', None)]
+        if self.watcher.path in [os.path.abspath(path) for path in paths if path]:
+            self.watcher.notify()
+
+
+class FileWatcher(object):
+    """
+    Tells whether a file has changed since it was last asked, without reading the file.
+
+    File system notifications (inotify on Linux) are used when the watchdog package is installed. The directory of
+    the file is watched, so that editors replacing the file instead of writing to it are noticed too. Without
+    watchdog, the mtime, size and inode of the file are compared on every call.
+    """
+
+    def __init__(self, path, use_notifications=True):
+        self.path = os.path.abspath(path)
+        self._changed = threading.Event()
+        self._signature = stat_signature(self.path)
+        self._observer = None
+        if use_notifications and Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_ChangeHandler(self), os.path.dirname(self.path))
+                self._observer.daemon = True
+                self._observer.start()
+                log.debug('Watching %s for changes', self.path)
+            except Exception as e:
+                log.debug('File system notifications unavailable, polling %s instead: %s', self.path, e)
+                self._observer = None
+
+    @property
+    def notifications(self):
+        """True if file system notifications are used, False if the file is polled."""
+        return self._observer is not None
+
+    def notify(self):
+        self._changed.set()
+
+    def changed(self):
+        """Returns True if the file may have changed since the last call."""
+        if self._observer is not None:
+            changed = self._changed.is_set()
+            self._changed.clear()
+            return changed
+        signature = stat_signature(self.path)
+        changed, self._signature = signature != self._signature, signature
+        return changed
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
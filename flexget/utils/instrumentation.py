@@ -0,0 +1,94 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import bisect
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Process wide totals, `PluginTimer` measures how much they grew while a plugin ran
+counters = {'db_queries': 0, 'http_requests': 0, 'http_bytes': 0}
+_lock = threading.Lock()
+
+
+def count(name, amount=1):
+    with _lock:
+        counters[name] += amount
+
+
+def count_response(response):
+    """Counts a http request, and the size of its response body if it has already been read (not streamed)."""
+    content = getattr(response, '_content', None)
+    size = len(content) if isinstance(content, bytes) else 0
+    with _lock:
+        counters['http_requests'] += 1
+        counters['http_bytes'] += size
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    count('db_queries')
+
+
+def cpu_time():
+    """Seconds of user and system CPU time used by the process."""
+    times = os.times()
+    return times[0] + times[1]
+
+
+class PluginTimer(object):
+    """
+    Measures a plugin call: wall and CPU time, database queries and http requests. The counters are process wide,
+    work done by other threads in the meantime (e.g. the web server) is included.
+
+    :param int entries_in: Number of entries the plugin was given
+    """
+
+    fields = ('wall', 'cpu', 'db_queries', 'http_requests', 'http_bytes', 'entries_in', 'entries_out')
+
+    def __init__(self, entries_in):
+        self.entries_in = entries_in
+        with _lock:
+            self._counters = dict(counters)
+        self._cpu = cpu_time()
+        self._wall = time.time()
+
+    def stop(self, entries_out):
+        """Returns a dict of the resources used since the timer was created."""
+        wall = time.time() - self._wall
+        cpu = cpu_time() - self._cpu
+        with _lock:
+            result = dict((name, value - self._counters[name]) for name, value in counters.items())
+        result.update(wall=wall, cpu=cpu, entries_in=self.entries_in, entries_out=entries_out)
+        return result
+
+
+class Histogram(object):
+    """
+    Counts observed values in buckets.
+
+    :param bounds: Sorted upper bounds of the buckets, values above the last one are counted in an extra bucket
+    """
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.total += 1
+            self.sum += value
+            self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self):
+        with self._lock:
+            buckets = [{'le': bound, 'count': hits} for bound, hits in zip(self.bounds + (None,), self.counts)]
+            return {'buckets': buckets, 'count': self.total, 'sum': self.sum, 'max': self.max}
@@ -0,0 +1,42 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+from bisect import bisect_left
+
+
+class RegexpMatcher(object):
+    """
+    Finds the first of a list of compiled regexps which matches a string.
+
+    Putting the regexps into one alternation, so that a single search finds the match, is several times slower with
+    the backtracking `re` module: the alternatives are still tried one by one at every position of the string, and
+    the fast scan for the literal prefix each regexp gets on its own is lost. Regexps are thus searched one by one,
+    with as little Python work per regexp as possible.
+    """
+
+    def __init__(self, regexps, indexes=None):
+        """
+        :param regexps: List of compiled regexps
+        :param indexes: Ascending number of each regexp, when they are a subset of a bigger list. The matcher answers
+            with these numbers instead of positions in `regexps`.
+        """
+        self.regexps = list(regexps)
+        self.indexes = list(indexes) if indexes is not None else list(range(len(self.regexps)))
+        self._searches = [regexp.search for regexp in self.regexps]
+
+    def __len__(self):
+        return len(self.regexps)
+
+    def first_match(self, value, start=0, stop=None):
+        """
+        :param value: String to search
+        :param int start: Ignore regexps numbered below start
+        :param int stop: Ignore regexps numbered stop and above
+        :return: Number of the first regexp which matches `value`, or None
+        """
+        searches = self._searches
+        last = len(searches) if stop is None else bisect_left(self.indexes, stop)
+        for position in range(bisect_left(self.indexes, start), last):
+            if searches[position](value):
+                return self.indexes[position]
+        return None
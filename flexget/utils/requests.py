@@ -3,8 +3,15 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.moves.urllib.request import urlopen
 from future.moves.urllib.parse import urlparse
 
+import email.utils
+import hashlib
+import io
+import json
+import os
+import threading
 import time
 import logging
+from collections import OrderedDict
 from datetime import timedelta, datetime
 
 import requests
@@ -13,6 +20,7 @@ import warnings
 from requests import RequestException
 
 from flexget import __version__ as version
+from flexget.utils import instrumentation
 from flexget.utils.tools import parse_timedelta, TimedDict, timedelta_total_seconds
 
 # If we use just 'requests' here, we'll get the logger created by requests, rather than our own
@@ -166,13 +174,259 @@ def limit_domains(url, limit_dict):
             break
 
 
+def parse_cache_control(value):
+    """
+    Parses a Cache-Control header in to a dict of lowercase directives.
+
+    :param value: The header value, e.g. 'public, max-age=3600'
+    :return: dict of directive -> argument, argument is None for directives without one
+    """
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _parse_http_date(value):
+    """Returns the unix timestamp of an http date header, or None if it cannot be parsed."""
+    parsed = email.utils.parsedate_tz(value) if value else None
+    if parsed is None:
+        return None
+    return email.utils.mktime_tz(parsed)
+
+
+class ResponseCache(object):
+    """
+    On-disk store of GET response bodies along with the validators needed to revalidate them.
+
+    Responses which are still fresh according to `Cache-Control`/`Expires` (or a per-domain ttl override) are served
+    without touching the network, stale ones are revalidated with `If-None-Match`/`If-Modified-Since`. When the store
+    grows over `max_size` the least recently used responses are evicted.
+
+    Every response is stored as two files in `path`, `<key>.body` and `<key>.meta`. The modification time of the meta
+    file records the last use, so the LRU order survives restarts.
+    """
+
+    # Request headers that change the response body, they become part of the cache key
+    key_headers = ('Authorization', 'Accept', 'Accept-Language')
+    # Headers worth keeping along with the body
+    stored_headers = ('Content-Type', 'Content-Encoding', 'Cache-Control', 'Expires', 'ETag', 'Last-Modified',
+                      'Date', 'Age')
+
+    def __init__(self, path, max_size=50 * 1024 * 1024, max_entry_size=None, ttls=None):
+        """
+        :param path: Directory where responses are stored, created if missing.
+        :param int max_size: Maximum size of all stored bodies in bytes.
+        :param int max_entry_size: Bodies larger than this are not stored. Defaults to a tenth of `max_size`.
+        :param dict ttls: Per-domain freshness overrides, domain -> `timedelta` or interval string. These win over
+            whatever the server sends in `Cache-Control` or `Expires`.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size or max_size // 10
+        self.ttls = dict((domain, parse_timedelta(ttl)) for domain, ttl in (ttls or {}).items())
+        self.size = 0
+        self._lock = threading.RLock()
+        # key -> body size, least recently used first
+        self._entries = OrderedDict()
+        self._load()
+
+    def _load(self):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        found = []
+        for filename in os.listdir(self.path):
+            key, ext = os.path.splitext(filename)
+            if ext != '.meta':
+                continue
+            try:
+                found.append((os.path.getmtime(self._file(key, 'meta')), key, os.path.getsize(self._file(key, 'body'))))
+            except OSError:
+                self._remove_files(key)
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.size += size
+        log.debug('Loaded %s cached responses (%s bytes) from %s', len(self._entries), self.size, self.path)
+
+    def _file(self, key, ext):
+        return os.path.join(self.path, '%s.%s' % (key, ext))
+
+    def _remove_files(self, key):
+        for ext in ('meta', 'body'):
+            try:
+                os.remove(self._file(key, ext))
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def key(self, url, headers=None):
+        """Returns the cache key for a GET of `url` with given request `headers`."""
+        parts = [url] + [(headers or {}).get(name) or '' for name in self.key_headers]
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def ttl_for(self, url):
+        """
+        Returns the ttl override for `url` as `timedelta`, or None if its domain has none configured. A domain applies
+        to its subdomains as well.
+        """
+        host = (urlparse(url).hostname or '').lower()
+        for domain, ttl in self.ttls.items():
+            domain = domain.lower()
+            if host == domain or host.endswith('.' + domain):
+                return ttl
+
+    def expires(self, url, headers, now=None):
+        """Returns the timestamp until which a response with `headers` is fresh, 0 if it must always be revalidated."""
+        now = now or time.time()
+        ttl = self.ttl_for(url)
+        if ttl is not None:
+            return now + timedelta_total_seconds(ttl)
+        cache_control = parse_cache_control(headers.get('Cache-Control'))
+        if 'no-cache' in cache_control:
+            return 0
+        if 'max-age' in cache_control:
+            try:
+                age = int(headers.get('Age') or 0)
+                return now + int(cache_control['max-age']) - age
+            except (TypeError, ValueError):
+                return 0
+        expires = _parse_http_date(headers.get('Expires'))
+        if expires is None:
+            return 0
+        date = _parse_http_date(headers.get('Date'))
+        # Compensate for clock skew between us and the server
+        return now + expires - date if date is not None else expires
+
+    def cacheable(self, url, response, request_headers=None):
+        """Whether `response` to a GET of `url` is allowed, and worth, storing."""
+        if response.status_code != 200:
+            return False
+        if 'no-store' in parse_cache_control((request_headers or {}).get('Cache-Control')):
+            return False
+        if 'no-store' in parse_cache_control(response.headers.get('Cache-Control')):
+            return False
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > self.max_entry_size:
+            return False
+        has_validators = 'ETag' in response.headers or 'Last-Modified' in response.headers
+        return has_validators or self.expires(url, response.headers) > time.time()
+
+    def get(self, key):
+        """
+        Returns the stored `(meta, body)` for `key`, or None when it is not cached. Marks the entry as recently used.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            try:
+                with io.open(self._file(key, 'meta'), encoding='utf-8') as meta_file:
+                    meta = json.load(meta_file)
+                with io.open(self._file(key, 'body'), 'rb') as body_file:
+                    body = body_file.read()
+                os.utime(self._file(key, 'meta'), None)
+            except (IOError, OSError, ValueError) as e:
+                log.debug('Dropping unreadable cached response %s: %s', key, e)
+                self.delete(key)
+                return None
+            self._entries[key] = self._entries.pop(key)
+            return meta, body
+
+    def is_fresh(self, meta, now=None):
+        return meta['expires'] > (now or time.time())
+
+    def store(self, key, url, response):
+        """Stores `response` under `key`, evicting least recently used entries to stay under `max_size`."""
+        body = response.content
+        if len(body) > self.max_entry_size:
+            return
+        headers = dict((name, response.headers[name]) for name in self.stored_headers if name in response.headers)
+        meta = {
+            'url': url,
+            'status': response.status_code,
+            'encoding': response.encoding,
+            'headers': headers,
+            'expires': self.expires(url, response.headers)}
+        with self._lock:
+            try:
+                with io.open(self._file(key, 'body'), 'wb') as body_file:
+                    body_file.write(body)
+                self._write_meta(key, meta)
+            except (IOError, OSError) as e:
+                log.warning('Unable to store response for %s in http cache: %s', url, e)
+                self.delete(key)
+                return
+            self.size += len(body) - self._entries.pop(key, 0)
+            self._entries[key] = len(body)
+            self._evict()
+
+    def revalidated(self, key, meta, not_modified):
+        """Refreshes stored `meta` for `key` with the headers of a 304 `not_modified` response."""
+        headers = meta['headers']
+        headers.update((name, not_modified.headers[name]) for name in self.stored_headers
+                       if name in not_modified.headers)
+        meta['expires'] = self.expires(meta['url'], requests.structures.CaseInsensitiveDict(headers))
+        with self._lock:
+            try:
+                self._write_meta(key, meta)
+            except (IOError, OSError) as e:
+                log.debug('Unable to update cached response for %s: %s', meta['url'], e)
+
+    def _write_meta(self, key, meta):
+        with io.open(self._file(key, 'meta'), 'w', encoding='utf-8') as meta_file:
+            meta_file.write(str(json.dumps(meta)))
+
+    def delete(self, key):
+        with self._lock:
+            self.size -= self._entries.pop(key, 0)
+            self._remove_files(key)
+
+    def _evict(self):
+        # Never evict the entry which was just stored
+        while self.size > self.max_size and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            log.debug('Evicting %s from http cache', key)
+            self.delete(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self.delete(key)
+
+    @staticmethod
+    def build_response(meta, body, request=None):
+        """Builds a `requests.Response` out of a stored response."""
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.headers = requests.structures.CaseInsensitiveDict(meta['headers'])
+        response.encoding = meta['encoding']
+        response.url = meta['url']
+        response.request = request
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+
 class Session(requests.Session):
     """
     Subclass of requests Session class which defines some of our own defaults, records unresponsive sites,
     and raises errors by default.
 
+    GET requests go through `response_cache` when one is set. Setting it on the class shares a single cache between
+    all sessions, which is what the `http_cache` config option does.
     """
 
+    #: Opt-in :class:`ResponseCache`, None disables caching
+    response_cache = None
+
     def __init__(self, timeout=30, max_retries=1, *args, **kwargs):
         """Set some defaults for our session if not explicitly defined."""
         super(Session, self).__init__(*args, **kwargs)
@@ -218,6 +472,21 @@ class Session(requests.Session):
 
         :param bool raise_status: If True, non-success status code responses will be raised as errors (True by default)
         """
+        raise_status = kwargs.pop('raise_status', True)
+        has_adapter = any(url.startswith(adapter) for adapter in self.adapters)
+
+        cache, cache_key, cached = self._cache_for(method, url, args, kwargs) if has_adapter else (None, None, None)
+        if cached:
+            meta, body = cached
+            if cache.is_fresh(meta):
+                log.debug('Serving %s from http cache', url)
+                return cache.build_response(meta, body)
+            headers = dict(kwargs.get('headers') or {})
+            if meta['headers'].get('ETag'):
+                headers['If-None-Match'] = meta['headers']['ETag']
+            if meta['headers'].get('Last-Modified'):
+                headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+            kwargs['headers'] = headers
 
         # Raise Timeout right away if site is known to timeout
         if is_unresponsive(url):
@@ -228,10 +497,9 @@ class Session(requests.Session):
         limit_domains(url, self.domain_limiters)
 
         kwargs.setdefault('timeout', self.timeout)
-        raise_status = kwargs.pop('raise_status', True)
 
         # If we do not have an adapter for this url, pass it off to urllib
-        if not any(url.startswith(adapter) for adapter in self.adapters):
+        if not has_adapter:
             log.debug('No adaptor, passing off to urllib')
             return _wrap_urlopen(url, timeout=kwargs['timeout'])
 
@@ -242,12 +510,57 @@ class Session(requests.Session):
             # Mark this site in known unresponsive list
             set_unresponsive(url)
             raise
+        instrumentation.count_response(result)
+
+        if cache is not None:
+            result = self._cache_response(cache, cache_key, cached, result)
 
         if raise_status:
             result.raise_for_status()
 
         return result
 
+    def _cache_for(self, method, url, args, kwargs):
+        """
+        Returns `(cache, cache_key, cached)` for a request, `cache` is None when the request should not go through
+        the cache. `cache_key` is a `(key, full url, request headers)` tuple.
+        Requests carrying their own validators are left alone, the caller handles the 304 responses itself.
+        Streamed requests are left alone too, storing them would read the body before the caller does. So are
+        requests with credentials or with cookies that would be sent along, the cache is shared by all sessions.
+        """
+        cache = self.response_cache
+        if cache is None or method.upper() != 'GET' or args or kwargs.get('stream'):
+            return None, None, None
+        if kwargs.get('auth') or self.auth:
+            return None, None, None
+        headers = requests.sessions.merge_setting(kwargs.get('headers'), self.headers,
+                                                  dict_class=requests.structures.CaseInsensitiveDict)
+        if 'If-None-Match' in headers or 'If-Modified-Since' in headers:
+            return None, None, None
+        full_url = requests.models.PreparedRequest()
+        full_url.prepare_url(url, kwargs.get('params'))
+        full_url.prepare_headers(headers)
+        cookies = requests.cookies.merge_cookies(requests.cookies.RequestsCookieJar(), self.cookies)
+        cookies = requests.cookies.merge_cookies(cookies, kwargs.get('cookies'))
+        if 'Cookie' in headers or requests.cookies.get_cookie_header(cookies, full_url):
+            return None, None, None
+        cache_key = (cache.key(full_url.url, headers), full_url.url, headers)
+        cached = None
+        if 'no-cache' not in parse_cache_control(headers.get('Cache-Control')):
+            cached = cache.get(cache_key[0])
+        return cache, cache_key, cached
+
+    def _cache_response(self, cache, cache_key, cached, response):
+        key, url, request_headers = cache_key
+        if cached and response.status_code == 304:
+            log.debug('%s not modified, serving from http cache', url)
+            meta, body = cached
+            cache.revalidated(key, meta, response)
+            return cache.build_response(meta, body, response.request)
+        if cache.cacheable(url, response, request_headers):
+            cache.store(key, url, response)
+        return response
+
 
 # Define some module level functions that use our Session, so this module can be used like main requests module
 def request(method, url, **kwargs):
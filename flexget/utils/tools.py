@@ -13,6 +13,7 @@ import locale
 import operator
 import os
 import re
+import stat
 import sys
 from collections import MutableMapping
 from datetime import timedelta, datetime
@@ -505,3 +506,65 @@ def parse_episode_identifier(ep_id):
     if error:
         raise ValueError(error)
     return identified_by
+
+
+class _DirEntry(object):
+    """Minimal stand-in for `os.DirEntry` on pythons without `os.scandir`, caches stat results the same way."""
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self._stat = None
+        self._lstat = None
+
+    def stat(self, follow_symlinks=True):
+        if not follow_symlinks:
+            if self._lstat is None:
+                self._lstat = os.lstat(self.path)
+            return self._lstat
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    def inode(self):
+        return self.stat(follow_symlinks=False).st_ino
+
+    def _mode(self, follow_symlinks):
+        try:
+            return self.stat(follow_symlinks=follow_symlinks).st_mode
+        except OSError:
+            return 0
+
+    def is_dir(self, follow_symlinks=True):
+        return stat.S_ISDIR(self._mode(follow_symlinks))
+
+    def is_file(self, follow_symlinks=True):
+        return stat.S_ISREG(self._mode(follow_symlinks))
+
+    def is_symlink(self):
+        return stat.S_ISLNK(self._mode(False))
+
+    def __repr__(self):
+        return '<DirEntry %r>' % self.name
+
+
+def scandir(path):
+    """
+    Returns an iterator of `os.DirEntry` objects for the contents of `path`. These carry the file type and cache
+    their stat results, which saves most of the syscalls `os.listdir` followed by `os.path` checks would need.
+
+    Falls back to an equivalent built on `os.listdir` where `os.scandir` is not available.
+    """
+    if hasattr(os, 'scandir'):
+        return os.scandir(path)
+    return iter([_DirEntry(path, name) for name in os.listdir(path)])
+
+
+# Values of these types only compare equal to values with the same hash. Values of other types may define their own
+# equality, a `Quality` equals the string it was parsed from for example.
+PLAIN_TYPES = (str, bytes, int, float, type(None))
+
+
+def is_plain(value):
+    """True if `value` can be looked up by hash wherever it would be compared with ==."""
+    return isinstance(value, PLAIN_TYPES)